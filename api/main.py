@@ -2,27 +2,44 @@
 API FastAPI - Copilote Financier
 Routes principales exposant les modules Python existants.
 """
+import asyncio
+import importlib.util
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from dataclasses import asdict
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 import pandas as pd
 
 # Import des modules existants
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from core.market_data import get_price_history, get_fundamentals, get_fred_series
-from ingestion.finnews import run_pipeline as run_news_pipeline, list_sources
-from analytics.phase2_technical import load_prices, compute_indicators, technical_signals
-from analytics.phase3_macro import get_us_macro_bundle
-from research.scoring import compute_composite_brief  # Nouveau module à créer
-from research.rag_store import RAGStore  # Nouveau module à créer
+from core.columnar import FORMATS, OHLCV, arrow_response, frame_columns, frame_records, json_response
+from core.lazy import lazy_attr
+
+# Moteurs importés au premier appel (yfinance, feedparser, ta, statsmodels...) :
+# le worker démarre sans les charger et une dépendance absente ne casse que ses routes.
+get_price_history = lazy_attr("core.market_data", "get_price_history")
+get_fundamentals = lazy_attr("core.market_data", "get_fundamentals")
+get_fred_series = lazy_attr("core.market_data", "get_fred_series")
+run_news_pipeline = lazy_attr("ingestion.finnews", "run_pipeline")
+list_sources = lazy_attr("ingestion.finnews", "list_sources")
+search_news_cached = lazy_attr("ingestion.finnews", "search_cached")
+load_prices = lazy_attr("analytics.phase2_technical", "load_prices")
+compute_indicators = lazy_attr("analytics.phase2_technical", "compute_indicators")
+technical_signals = lazy_attr("analytics.phase2_technical", "technical_signals")
+get_us_macro_bundle = lazy_attr("analytics.phase3_macro", "get_us_macro_bundle")
+get_brief = lazy_attr("research.scoring", "get_brief")
+get_sheet = lazy_attr("research.sheets", "get_sheet")
+sheet_etag = lazy_attr("research.sheets", "sheet_etag")
+etag_matches = lazy_attr("research.sheets", "etag_matches")
 
 # ============================================================================
 # APP CONFIG
@@ -42,8 +59,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# RAG Store singleton
-rag_store = RAGStore()
+# RAG Store singleton (créé au premier usage)
+_RAG_STORE = None
+
+
+def get_rag_store():
+    global _RAG_STORE
+    if _RAG_STORE is None:
+        from research.rag_store import RAGStore
+        _RAG_STORE = RAGStore()
+    return _RAG_STORE
 
 # ============================================================================
 # MODELS
@@ -61,67 +86,170 @@ class CopilotResponse(BaseModel):
     citations: List[Dict[str, Any]]
     generated_at: str
 
+# ============================================================================
+# EXÉCUTION NON BLOQUANTE
+# ============================================================================
+# Les appels yfinance / FRED / RSS sont bloquants : ils tournent dans un pool borné,
+# les requêtes identiques en vol partagent le même calcul (single-flight) et chaque
+# route a une échéance au-delà de laquelle elle répond avec ce qui est prêt.
+API_MAX_WORKERS = int(os.getenv("API_MAX_WORKERS", "16"))
+ROUTE_DEADLINES = {
+    "macro": float(os.getenv("API_DEADLINE_MACRO_S", "10")),
+    "stocks": float(os.getenv("API_DEADLINE_STOCKS_S", "10")),
+    "news": float(os.getenv("API_DEADLINE_NEWS_S", "15")),
+    "brief": float(os.getenv("API_DEADLINE_BRIEF_S", "20")),
+    "sheet": float(os.getenv("API_DEADLINE_SHEET_S", "12")),
+    "copilot": float(os.getenv("API_DEADLINE_COPILOT_S", "10")),
+}
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=API_MAX_WORKERS, thread_name_prefix="api")
+_INFLIGHT: Dict[Hashable, asyncio.Future] = {}
+
+
+async def offload(key: Optional[Hashable], fn: Callable, *args, **kwargs) -> Any:
+    """Exécute `fn` dans le pool ; un seul calcul par `key` en vol (None = pas de partage).
+
+    Le résultat partagé ne doit pas être modifié par l'appelant.
+    """
+    loop = asyncio.get_running_loop()
+    if key is None:
+        return await loop.run_in_executor(_EXECUTOR, lambda: fn(*args, **kwargs))
+    fut = _INFLIGHT.get(key)
+    if fut is None:
+        fut = loop.run_in_executor(_EXECUTOR, lambda: fn(*args, **kwargs))
+        _INFLIGHT[key] = fut
+        fut.add_done_callback(lambda f: _INFLIGHT.pop(key, None) if _INFLIGHT.get(key) is f else None)
+    # shield : un client qui abandonne n'annule pas le calcul des autres
+    return await asyncio.shield(fut)
+
+
+async def gather_until(calls: Dict[str, Awaitable], deadline: float) -> Tuple[Dict[str, Any], List[str]]:
+    """Attend les appels jusqu'à `deadline` secondes : (résultats prêts, clés en retard).
+
+    Un appel en erreur donne une `Exception` comme résultat. Les appels en retard
+    continuent en arrière-plan : une requête suivante les rejoint via `offload`.
+    """
+    if not calls:
+        return {}, []
+    tasks = {name: asyncio.ensure_future(c) for name, c in calls.items()}
+    done, _ = await asyncio.wait(tasks.values(), timeout=deadline)
+    results: Dict[str, Any] = {}
+    late: List[str] = []
+    for name, t in tasks.items():
+        if t in done:
+            results[name] = t.exception() or t.result()
+        else:
+            late.append(name)
+            t.add_done_callback(lambda f: f.cancelled() or f.exception())  # évite "never retrieved"
+    return results, late
+
+
+async def offload_until(key: Optional[Hashable], deadline: float, fn: Callable, *args, **kwargs) -> Any:
+    """`offload` borné par `deadline` (asyncio.TimeoutError au-delà ; le calcul continue)."""
+    return await asyncio.wait_for(offload(key, fn, *args, **kwargs), timeout=deadline)
+
+
+@app.on_event("shutdown")
+def _shutdown_executor() -> None:
+    _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
 # ============================================================================
 # UTILS
 # ============================================================================
+INDICATOR_COLUMNS = {"RSI": "rsi", "SMA_20": "sma_20", "SMA_50": "sma_50", "MACD": "macd", "MACD_Signal": "macd_signal"}
+
+
 def df_to_timeseries(df: pd.DataFrame, value_col: str = "value") -> List[Dict]:
-    """Convertit DataFrame pandas en liste [{t, v}]."""
-    if df.empty:
-        return []
-    result = []
-    for idx, row in df.iterrows():
-        result.append({
-            "t": idx.isoformat() if hasattr(idx, 'isoformat') else str(idx),
-            "v": float(row[value_col]) if pd.notna(row[value_col]) else None
-        })
-    return result
+    """Convertit DataFrame pandas en liste [{t, v}] (construite depuis les colonnes NumPy)."""
+    return frame_records(df, {value_col: "v"})
 
 def df_to_ohlcv(df: pd.DataFrame) -> List[Dict]:
-    """Convertit DataFrame OHLCV en liste [{t, o, h, l, c, v}]."""
-    if df.empty:
-        return []
-    result = []
-    for idx, row in df.iterrows():
-        result.append({
-            "t": idx.isoformat() if hasattr(idx, 'isoformat') else str(idx),
-            "o": float(row.get("Open", 0)) if pd.notna(row.get("Open")) else None,
-            "h": float(row.get("High", 0)) if pd.notna(row.get("High")) else None,
-            "l": float(row.get("Low", 0)) if pd.notna(row.get("Low")) else None,
-            "c": float(row.get("Close", 0)) if pd.notna(row.get("Close")) else None,
-            "v": float(row.get("Volume", 0)) if pd.notna(row.get("Volume")) else None,
-        })
-    return result
+    """Convertit DataFrame OHLCV en liste [{t, o, h, l, c, v}] (construite depuis les colonnes NumPy)."""
+    return frame_records(df, OHLCV)
+
+def _check_format(fmt: str) -> None:
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+
+def _num(row, col: str) -> Optional[float]:
+    v = row.get(col)
+    return float(v) if pd.notna(v) else None
+
+def _macro_frame(series_id: str, start: Optional[str]) -> Optional[pd.DataFrame]:
+    """Série FRED + YoY (exécuté dans le pool ; le résultat partagé n'est plus modifié)."""
+    df = get_fred_series(series_id, start=start)
+    if df is None or df.empty:
+        return None
+    df = df.copy()
+    # Calculer YoY si pertinent (série mensuelle)
+    if len(df) >= 12:
+        df['yoy'] = df['value'].pct_change(12) * 100
+    return df
+
+def _macro_entry(df: pd.DataFrame, fmt: str) -> Dict:
+    """Série sérialisée : lignes [{t, v}] ou tableaux parallèles {t, v, yoy}."""
+    has_yoy = 'yoy' in df.columns
+    if fmt == "columnar":
+        cols = frame_columns(df, {"value": "v", "yoy": "yoy"} if has_yoy else {"value": "v"})
+        data = {"t": cols["t"], "v": cols["v"]}
+        yoy = cols.get("yoy")
+    else:
+        data = df_to_timeseries(df, "value")
+        yoy = df_to_timeseries(df, "yoy") if has_yoy else None
+    return {"data": data, "yoy": yoy, "source": "FRED", "generated_at": datetime.utcnow().isoformat()}
+
+def _price_frame(ticker: str, interval: str) -> Optional[pd.DataFrame]:
+    """Historique + indicateurs techniques (exécuté dans le pool)."""
+    df = get_price_history(ticker, start=None, interval=interval)
+    if df is None or df.empty:
+        return None
+    return compute_indicators(df)
+
+def _stock_entry(df_with_indicators: Optional[pd.DataFrame], fmt: str) -> Optional[Dict]:
+    """Prix + derniers indicateurs : lignes OHLCV ou tableaux parallèles {t, o, h, l, c, v}."""
+    if df_with_indicators is None:
+        return None
+    # Extraire dernières valeurs des indicateurs
+    last_row = df_with_indicators.iloc[-1] if len(df_with_indicators) > 0 else {}
+    prices = frame_columns(df_with_indicators, OHLCV) if fmt == "columnar" else df_to_ohlcv(df_with_indicators)
+    return {
+        "prices": prices,
+        "indicators": {name: _num(last_row, col) for col, name in INDICATOR_COLUMNS.items()},
+        "last_price": _num(last_row, "Close"),
+        "source": "yfinance",
+        "generated_at": datetime.utcnow().isoformat()
+    }
 
 # ============================================================================
 # ROUTES - MACRO (Pilier 1)
 # ============================================================================
 @app.get("/api/macro/series")
 async def get_macro_series(
+    request: Request,
     ids: List[str] = Query(..., description="FRED series IDs"),
     start: Optional[str] = Query(None, description="Start date YYYY-MM-DD"),
-    end: Optional[str] = Query(None, description="End date YYYY-MM-DD")
+    end: Optional[str] = Query(None, description="End date YYYY-MM-DD"),
+    format: str = Query("rows", description="rows | columnar | arrow")
 ):
     """
     Récupère plusieurs séries macro depuis FRED.
-    Exemple: /api/macro/series?ids=CPIAUCSL&ids=VIXCLS&start=2019-01-01
+    Exemple: /api/macro/series?ids=CPIAUCSL&ids=VIXCLS&start=2019-01-01&format=columnar
+    `arrow` renvoie un flux Arrow IPC (colonnes series, t, value, yoy).
     """
+    _check_format(format)
     try:
-        result = {}
-        for series_id in ids:
-            df = get_fred_series(series_id, start=start)
-            if df is not None and not df.empty:
-                # Calculer YoY si pertinent (série mensuelle)
-                if len(df) >= 12:
-                    df['yoy'] = df['value'].pct_change(12) * 100
-                
-                result[series_id] = {
-                    "data": df_to_timeseries(df, "value"),
-                    "yoy": df_to_timeseries(df, "yoy") if 'yoy' in df.columns else None,
-                    "source": "FRED",
-                    "generated_at": datetime.utcnow().isoformat()
-                }
+        calls = {sid: offload(("fred", sid, start), _macro_frame, sid, start)
+                 for sid in dict.fromkeys(ids)}
+        done, late = await gather_until(calls, ROUTE_DEADLINES["macro"])
+        errors = {sid: str(v) for sid, v in done.items() if isinstance(v, Exception)}
+        frames = {sid: v for sid, v in done.items() if v is not None and sid not in errors}
+        if format == "arrow":
+            return await offload(None, lambda: arrow_response(request, frames, {"value": "value", "yoy": "yoy"},
+                                                              key="series", headers={"X-Pending": ",".join(late)}))
+        result = await offload(None, lambda: {sid: _macro_entry(df, format) for sid, df in frames.items()})
         
-        return {"ok": True, "data": result}
+        return json_response(request, {"ok": True, "data": result, "partial": bool(late),
+                                       "pending": late, "errors": errors})
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
@@ -129,8 +257,10 @@ async def get_macro_series(
 async def get_macro_bundle():
     """Récupère le bundle macro US complet (snapshot)."""
     try:
-        bundle = get_us_macro_bundle()
+        bundle = await offload_until(("macro_bundle",), ROUTE_DEADLINES["macro"], get_us_macro_bundle)
         return {"ok": True, "data": bundle}
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": "timeout", "pending": ["bundle"]}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
@@ -139,46 +269,32 @@ async def get_macro_bundle():
 # ============================================================================
 @app.get("/api/stocks/prices")
 async def get_stock_prices(
+    request: Request,
     tickers: List[str] = Query(..., description="Tickers (AAPL, NVDA, etc.)"),
     range: str = Query("1y", description="Range: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y"),
-    interval: str = Query("1d", description="Interval: 1m, 5m, 1h, 1d, 1wk, 1mo")
+    interval: str = Query("1d", description="Interval: 1m, 5m, 1h, 1d, 1wk, 1mo"),
+    format: str = Query("rows", description="rows | columnar | arrow")
 ):
     """
     Récupère prix + indicateurs techniques pour plusieurs tickers.
-    Exemple: /api/stocks/prices?tickers=AAPL&tickers=NVDA&range=1y&interval=1d
+    Exemple: /api/stocks/prices?tickers=AAPL&tickers=NVDA&range=1y&interval=1d&format=columnar
+    `arrow` renvoie un flux Arrow IPC (colonnes ticker, t, OHLCV et indicateurs).
     """
+    _check_format(format)
     try:
-        result = {}
-        
-        for ticker in tickers:
-            # Récupérer historique de prix
-            df = get_price_history(ticker, start=None, interval=interval)
-            
-            if df is None or df.empty:
-                result[ticker] = None
-                continue
-            
-            # Calculer indicateurs techniques
-            df_with_indicators = compute_indicators(df)
-            
-            # Extraire dernières valeurs des indicateurs
-            last_row = df_with_indicators.iloc[-1] if len(df_with_indicators) > 0 else {}
-            
-            result[ticker] = {
-                "prices": df_to_ohlcv(df_with_indicators),
-                "indicators": {
-                    "rsi": float(last_row.get("RSI", 0)) if pd.notna(last_row.get("RSI")) else None,
-                    "sma_20": float(last_row.get("SMA_20", 0)) if pd.notna(last_row.get("SMA_20")) else None,
-                    "sma_50": float(last_row.get("SMA_50", 0)) if pd.notna(last_row.get("SMA_50")) else None,
-                    "macd": float(last_row.get("MACD", 0)) if pd.notna(last_row.get("MACD")) else None,
-                    "macd_signal": float(last_row.get("MACD_Signal", 0)) if pd.notna(last_row.get("MACD_Signal")) else None,
-                },
-                "last_price": float(last_row.get("Close", 0)) if pd.notna(last_row.get("Close")) else None,
-                "source": "yfinance",
-                "generated_at": datetime.utcnow().isoformat()
-            }
+        # Un calcul par ticker, en parallèle, partagé entre requêtes concurrentes
+        calls = {t: offload(("price_frame", t, interval), _price_frame, t, interval)
+                 for t in dict.fromkeys(tickers)}
+        done, late = await gather_until(calls, ROUTE_DEADLINES["stocks"])
+        errors = {t: str(v) for t, v in done.items() if isinstance(v, Exception)}
+        frames = {t: (None if t in errors else v) for t, v in done.items()}
+        if format == "arrow":
+            return await offload(None, lambda: arrow_response(request, frames, {**OHLCV, **INDICATOR_COLUMNS},
+                                                              key="ticker", headers={"X-Pending": ",".join(late)}))
+        result = await offload(None, lambda: {t: _stock_entry(df, format) for t, df in frames.items()})
         
-        return {"ok": True, "data": result}
+        return json_response(request, {"ok": True, "data": result, "partial": bool(late),
+                                       "pending": late, "errors": errors})
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
@@ -186,8 +302,11 @@ async def get_stock_prices(
 async def get_stock_fundamentals(ticker: str):
     """Récupère les données fondamentales d'une action."""
     try:
-        data = get_fundamentals(ticker)
+        data = await offload_until(("fundamentals", ticker), ROUTE_DEADLINES["stocks"],
+                                   get_fundamentals, ticker)
         return {"ok": True, "data": data}
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": "timeout", "pending": [ticker]}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
@@ -210,18 +329,30 @@ async def get_news_feed(
         regions = ["US", "CA", "INTL"]
         tgt_ticker = tickers[0] if tickers and len(tickers) > 0 else None
         
-        items = run_news_pipeline(
-            regions=regions,
-            window=window,
-            query=q or "",
-            tgt_ticker=tgt_ticker,
-            per_source_cap=None,
-            limit=limit
-        )
+        # Items déjà enrichis en mémoire (filtrage vectorisé), sinon pipeline complet
+        items = search_news_cached(query=q or "", window=window, regions=regions,
+                                   tickers=tickers, limit=limit)
+        partial = False
+        if items is None:
+            try:
+                items = await offload_until(
+                    ("news", window, q or "", tgt_ticker, limit), ROUTE_DEADLINES["news"],
+                    run_news_pipeline,
+                    regions=regions,
+                    window=window,
+                    query=q or "",
+                    tgt_ticker=tgt_ticker,
+                    per_source_cap=None,
+                    limit=limit
+                )
+            except asyncio.TimeoutError:
+                items, partial = [], True
         
         # Sérialiser les items
         serialized_items = []
         for item in items:
+            if not isinstance(item, dict):
+                item = {**asdict(item), "url": item.link}
             serialized_items.append({
                 "title": item.get("title", ""),
                 "url": item.get("url", ""),
@@ -242,6 +373,7 @@ async def get_news_feed(
             "data": {
                 "items": serialized_items,
                 "count": len(serialized_items),
+                "partial": partial,
                 "generated_at": datetime.utcnow().isoformat()
             }
         }
@@ -252,7 +384,7 @@ async def get_news_feed(
 async def save_news_to_memory(item: Dict[str, Any]):
     """Enregistre un item de news dans la mémoire RAG."""
     try:
-        rag_store.add_news_item(item)
+        await offload(None, lambda: get_rag_store().add_news_item(item))
         return {"ok": True, "message": "Item saved to memory"}
     except Exception as e:
         return {"ok": False, "error": str(e)}
@@ -263,15 +395,15 @@ async def save_news_to_memory(item: Dict[str, Any]):
 @app.get("/api/brief")
 async def get_market_brief(
     period: str = Query("weekly", description="daily or weekly"),
-    universe: List[str] = Query(["SPY", "QQQ"], description="Tickers universe")
+    universe: Optional[List[str]] = Query(None, description="Tickers universe (défaut: research.scoring.DEFAULT_UNIVERSE, précalculé)")
 ):
     """
-    Génère le Market Brief avec scoring composite.
+    Market Brief avec scoring composite (artefact précalculé, rafraîchi en arrière-plan).
     Retourne Top 3 signaux, Top 3 risques, picks.
     """
     try:
-        # Compute composite brief (nouveau module scoring.py)
-        brief = compute_composite_brief(period=period, universe=universe)
+        brief = await offload_until(("brief", period, tuple(universe or ())), ROUTE_DEADLINES["brief"],
+                                    get_brief, period=period, universe=universe)
         
         return {
             "ok": True,
@@ -281,10 +413,14 @@ async def get_market_brief(
                 "picks": brief.get("picks", []),
                 "sources": brief.get("sources", []),
                 "generated_at": brief.get("generated_at", datetime.utcnow().isoformat()),
+                "version": brief.get("version"),
+                "stale": brief.get("stale", False),
                 "period": period,
-                "universe": universe
+                "universe": brief.get("universe", universe)
             }
         }
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": "timeout", "pending": ["brief"]}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
@@ -311,66 +447,50 @@ async def get_dashboard_kpis():
 # ROUTES - TICKER SHEET
 # ============================================================================
 @app.get("/api/tickers/{ticker}/sheet")
-async def get_ticker_sheet(ticker: str):
+async def get_ticker_sheet(request: Request, ticker: str):
     """
-    Fiche complète d'un ticker : prix, indicateurs, news top 5, niveaux.
+    Fiche complète d'un ticker : prix, indicateurs, alertes, news top 5, niveaux.
+    Servie depuis l'artefact précalculé (research.sheets) ; ETag + 304 si inchangée.
     """
     try:
-        # 1. Prix + indicateurs
-        df = get_price_history(ticker, start=None, interval="1d")
-        if df is None or df.empty:
+        sheet = await offload_until(("sheet", ticker.upper()), ROUTE_DEADLINES["sheet"], get_sheet, ticker)
+        if sheet is None:
             raise HTTPException(status_code=404, detail=f"No data for {ticker}")
-        
-        df_with_indicators = compute_indicators(df)
-        last_row = df_with_indicators.iloc[-1]
-        
-        # 2. News top 5
-        news_items = run_news_pipeline(
-            regions=["US", "CA", "INTL"],
-            window="last_week",
-            tgt_ticker=ticker,
-            limit=5
-        )
-        
-        # 3. Niveaux (SMA, RSI, perf)
-        close_prices = df["Close"].dropna()
-        perf_1w = ((close_prices.iloc[-1] / close_prices.iloc[-5]) - 1) * 100 if len(close_prices) >= 5 else None
-        perf_1m = ((close_prices.iloc[-1] / close_prices.iloc[-21]) - 1) * 100 if len(close_prices) >= 21 else None
-        
-        return {
+        etag = sheet_etag(sheet, "v1")
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        px = sheet["prices"]
+        keys = ["t", *OHLCV.values()]
+        prices = [dict(zip(keys, row)) for row in zip(*(px.get(k, []) for k in keys))]
+        ind, lv = sheet["indicators"], sheet["levels"]
+        return json_response(request, {
             "ok": True,
             "data": {
-                "ticker": ticker,
+                "ticker": sheet["ticker"],
                 "overview": {
-                    "last_price": float(last_row["Close"]),
-                    "change_pct": perf_1w,
-                },
-                "prices": df_to_ohlcv(df_with_indicators[-90:]),  # 90 derniers jours
-                "indicators": {
-                    "rsi": float(last_row.get("RSI", 0)) if pd.notna(last_row.get("RSI")) else None,
-                    "sma_20": float(last_row.get("SMA_20", 0)) if pd.notna(last_row.get("SMA_20")) else None,
-                    "sma_50": float(last_row.get("SMA_50", 0)) if pd.notna(last_row.get("SMA_50")) else None,
-                    "macd": float(last_row.get("MACD", 0)) if pd.notna(last_row.get("MACD")) else None,
+                    "last_price": lv.get("last_close"),
+                    "change_pct": lv.get("perf_1w"),
                 },
+                "prices": prices[-90:],  # 90 derniers jours
+                "indicators": {k: ind.get(k) for k in ("rsi", "sma_20", "sma_50", "macd")},
+                "alerts": sheet.get("alerts", []),
                 "news_top": [
-                    {
-                        "title": item.get("title"),
-                        "url": item.get("url"),
-                        "published": item.get("published"),
-                        "score": item.get("score"),
-                    }
-                    for item in news_items[:5]
+                    {k: item.get(k) for k in ("title", "url", "published", "score")}
+                    for item in sheet.get("news_top", [])[:5]
                 ],
-                "levels": {
-                    "sma_20": float(last_row.get("SMA_20", 0)) if pd.notna(last_row.get("SMA_20")) else None,
-                    "sma_50": float(last_row.get("SMA_50", 0)) if pd.notna(last_row.get("SMA_50")) else None,
-                    "rsi": float(last_row.get("RSI", 0)) if pd.notna(last_row.get("RSI")) else None,
-                    "perf_1w": perf_1w,
-                    "perf_1m": perf_1m,
-                },
-                "generated_at": datetime.utcnow().isoformat()
+                "levels": {k: lv.get(k) for k in ("sma_20", "sma_50", "rsi", "perf_1w", "perf_1m")},
+                "partial": False,
+                "pending": [],
+                "version": sheet.get("version"),
+                "stale": sheet.get("stale", False),
+                "generated_at": sheet.get("generated_at"),
             }
-        }
+        }, headers=headers)
+    except asyncio.TimeoutError:
+        # le calcul d'un ticker inconnu continue : la requête suivante lira l'artefact
+        return {"ok": False, "error": "timeout", "pending": ["sheet"]}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
@@ -389,7 +509,8 @@ async def copilot_ask(request: CopilotRequest):
         if request.tickers:
             scope["tickers"] = request.tickers
         
-        context_chunks = rag_store.search(scope, top_k=10)
+        context_chunks = await offload_until(None, ROUTE_DEADLINES["copilot"],
+                                             lambda: get_rag_store().search(scope, top_k=10))
         
         # 2. Composer contexte pour LLM
         context_text = "\n\n".join([
@@ -421,6 +542,8 @@ async def copilot_ask(request: CopilotRequest):
                 "generated_at": datetime.utcnow().isoformat()
             }
         }
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": "timeout"}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
@@ -465,7 +588,7 @@ async def health():
             "fred": True,  # TODO: vérifier connexion FRED
             "yfinance": True,  # TODO: vérifier yfinance
             "news": True,  # TODO: vérifier sources RSS
-            "rag": rag_store is not None
+            "rag": _RAG_STORE is not None or importlib.util.find_spec("research.rag_store") is not None
         }
     }
 
@@ -19,7 +19,7 @@ _SRC_ROOT = Path(__file__).resolve().parents[1] / "src"
 if str(_SRC_ROOT) not in _sys.path:
     _sys.path.insert(0, str(_SRC_ROOT))
 
-from analytics.market_intel import build_snapshot
+from analytics.market_intel import build_snapshots
 from analytics.forecaster import forecast_ticker
 from analytics.ml_baseline import ml_predict_next_return
 from core.data_store import write_parquet
@@ -38,9 +38,14 @@ def main() -> int:
     rows = []
     feat_rows = []
     feat_flat_rows = []
-    for t in [x.strip().upper() for x in WATCHLIST if x.strip()]:
+    tickers = [x.strip().upper() for x in WATCHLIST if x.strip()]
+    # shared news/macro fetched once, per-ticker parts concurrently
+    snaps = build_snapshots(tickers, regions=["US","INTL"], window="last_week", limit=150)
+    for t in tickers:
         try:
-            snap = build_snapshot(regions=["US","INTL"], window="last_week", ticker=t, limit=150)
+            snap = snaps.get(t) or {}
+            if snap.get("error"):
+                raise RuntimeError(snap["error"])
             feats = snap.get("features") or {}
             f_1w = forecast_ticker(t, horizon="1w", features=feats).to_dict()
             f_1m = forecast_ticker(t, horizon="1m", features=feats).to_dict()
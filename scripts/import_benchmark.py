@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Import-time benchmark for the API and Dash entry points.
+
+Each target is imported in fresh interpreters (`python -X importtime`), several
+times; reports the median import wall time, the heaviest direct imports and the
+modules with the largest self time, and writes a JSON report under
+artifacts/import_bench/.
+
+Usage (from repository root):
+    python scripts/import_benchmark.py                  # all targets, 3 runs each
+    python scripts/import_benchmark.py -t dash -n 5 -k 15
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+ART = ROOT / "artifacts" / "import_bench"
+
+# name -> (PYTHONPATH entries, code timed in the child)
+TARGETS: Dict[str, Dict] = {
+    "api": {"path": [ROOT], "code": "import api.main"},
+    "src-api": {"path": [ROOT / "src"], "code": "import api.main"},
+    "dash": {"path": [ROOT / "src"], "code": "import dash_app.app"},
+    # what the first request pays on top: callback pages + initial layout
+    "dash-ready": {"path": [ROOT / "src"],
+                   "code": "import dash_app.app as a; a.register_page_callbacks(); a.serve_layout()"},
+}
+
+
+def _parse_importtime(stderr: str) -> List[Dict]:
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|", 2)
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        self_us, cum_us, name = parts
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2  # 2 spaces per nesting level
+        rows.append({"module": name.strip(), "self_ms": int(self_us) / 1000,
+                     "cum_ms": int(cum_us) / 1000, "depth": depth})
+    return rows
+
+
+def run_target(name: str, runs: int) -> Dict:
+    spec = TARGETS[name]
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(p) for p in spec["path"]] + [env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+    env.setdefault("DASH_PRELOAD_PAGES", "0")  # deterministic: no background warm-up
+    code = f"import time as _t; _t0 = _t.perf_counter(); {spec['code']}; print(_t.perf_counter() - _t0)"
+    walls, rows, error = [], [], None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                              capture_output=True, text=True)
+        total = time.perf_counter() - t0
+        if proc.returncode != 0:
+            error = (proc.stderr.strip().splitlines() or ["failed"])[-1]
+            break
+        try:
+            walls.append({"import_s": float(proc.stdout.strip().splitlines()[-1]), "process_s": total})
+        except (ValueError, IndexError):
+            walls.append({"import_s": None, "process_s": total})
+        rows = _parse_importtime(proc.stderr)
+    imp = [w["import_s"] for w in walls if w["import_s"] is not None]
+    return {
+        "target": name, "code": spec["code"], "runs": len(walls), "error": error,
+        "import_s_median": statistics.median(imp) if imp else None,
+        "process_s_median": statistics.median([w["process_s"] for w in walls]) if walls else None,
+        "modules": rows,
+    }
+
+
+def _print(res: Dict, top: int) -> None:
+    print(f"\n== {res['target']}: {res['code']}")
+    if res["error"]:
+        print(f"   error: {res['error']}")
+        return
+    print(f"   import {res['import_s_median']:.3f}s | process {res['process_s_median']:.3f}s (median of {res['runs']})")
+    rows = res["modules"]
+    direct = sorted((r for r in rows if r["depth"] <= 1), key=lambda r: -r["cum_ms"])[:top]
+    heavy = sorted(rows, key=lambda r: -r["self_ms"])[:top]
+    print("   heaviest imports (cumulative ms):")
+    for r in direct:
+        print(f"     {r['cum_ms']:9.1f}  {r['module']}")
+    print("   largest self time (ms):")
+    for r in heavy:
+        print(f"     {r['self_ms']:9.1f}  {r['module']}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Import-time benchmark (API / Dash cold start)")
+    ap.add_argument("-t", "--targets", nargs="*", default=list(TARGETS), choices=list(TARGETS))
+    ap.add_argument("-n", "--runs", type=int, default=3)
+    ap.add_argument("-k", "--top", type=int, default=10)
+    ap.add_argument("--no-save", action="store_true", help="do not write the JSON report")
+    args = ap.parse_args()
+
+    results = [run_target(t, max(1, args.runs)) for t in args.targets]
+    for res in results:
+        _print(res, args.top)
+    if not args.no_save:
+        ART.mkdir(parents=True, exist_ok=True)
+        out = ART / f"import_bench_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        slim = [{**r, "modules": sorted(r["modules"], key=lambda m: -m["cum_ms"])[:50]} for r in results]
+        out.write_text(json.dumps(slim, indent=2), encoding="utf-8")
+        print(f"\nreport: {out.relative_to(ROOT)}")
+    return 1 if any(r["error"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
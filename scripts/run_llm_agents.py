@@ -17,7 +17,7 @@ _SRC_ROOT = Path(__file__).resolve().parents[1] / "src"
 if str(_SRC_ROOT) not in _sys.path:
     _sys.path.insert(0, str(_SRC_ROOT))
 
-from analytics.market_intel import build_snapshot
+from analytics.market_intel import build_snapshots
 from analytics.econ_llm_agent import EconomicAnalyst, EconomicInput
 
 
@@ -30,9 +30,14 @@ def main() -> int:
     out: Dict[str, Any] = {"asof": datetime.utcnow().isoformat()+"Z", "tickers": []}
     agent = EconomicAnalyst()
 
-    for t in [x.strip().upper() for x in WATCHLIST if x.strip()]:
+    tickers = [x.strip().upper() for x in WATCHLIST if x.strip()]
+    # shared news/macro fetched once, per-ticker parts concurrently
+    snaps = build_snapshots(tickers, regions=["US","INTL"], window="last_week", limit=180)
+    for t in tickers:
         try:
-            snap = build_snapshot(regions=["US","INTL"], window="last_week", ticker=t, limit=180)
+            snap = snaps.get(t) or {}
+            if snap.get("error"):
+                raise RuntimeError(snap["error"])
             feats = (snap or {}).get("features") or {}
             news = (snap or {}).get("news") or []
             ein = EconomicInput(
@@ -21,10 +21,12 @@ import numpy as np
 # Lazy imports to keep CLI simple
 try:
     from core.market_data import get_price_history
+    from analytics.price_panel import load_close_panel, panel_features
 except Exception:
     import sys
     sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
     from core.market_data import get_price_history
+    from analytics.price_panel import load_close_panel, panel_features
 
 DT_FMT = "%Y%m%d"
 
@@ -64,6 +66,8 @@ COMMODITIES = {
 
 HORIZONS = ["1w", "1m", "3m"]
 HORIZON_DAYS = {"1w": 5, "1m": 21, "3m": 63}
+INDICATOR_COLUMNS = ["sma_20", "sma_50", "sma_200", "rsi_14", "macd", "volatility_20", "trend_strength"]
+MIN_OBS = 50  # Need minimum data for indicators
 
 def _today_dt() -> str:
     return datetime.utcnow().strftime(DT_FMT)
@@ -97,154 +101,18 @@ def _load_macro_factors() -> Dict[str, float]:
         'gdp_growth': 2.1
     }
 
-def _compute_technical_indicators(prices: pd.DataFrame, ticker: str) -> Dict[str, float]:
-    """Compute technical indicators for commodity forecasting"""
-    if prices is None or prices.empty or 'Close' not in prices.columns:
-        return {}
+def _technical_indicators(feats: pd.DataFrame) -> pd.DataFrame:
+    """Indicator columns from the shared panel features; NaN rows below MIN_OBS"""
+    ind = feats.reindex(columns=INDICATOR_COLUMNS).astype(float)
+    if "n_obs" in feats.columns:
+        ind[(feats["n_obs"] < MIN_OBS).to_numpy()] = np.nan
+    return ind
 
-    close = pd.to_numeric(prices['Close'], errors='coerce').dropna()
-
-    if len(close) < 50:  # Need minimum data for indicators
-        return {}
-
-    indicators = {}
-
-    try:
-        # Moving averages
-        indicators['sma_20'] = float(close.tail(20).mean())
-        indicators['sma_50'] = float(close.tail(50).mean())
-        indicators['sma_200'] = float(close.tail(200).mean())
-
-        # Momentum indicators
-        indicators['rsi_14'] = _compute_rsi(close, 14)
-        indicators['macd'] = _compute_macd(close)
-
-        # Volatility
-        indicators['volatility_20'] = float(close.tail(20).pct_change().std() * np.sqrt(252))
-
-        # Trend strength
-        indicators['trend_strength'] = _compute_trend_strength(close)
-
-    except Exception as e:
-        print(f"Warning: Error computing indicators for {ticker}: {e}")
-
-    return indicators
-
-def _compute_rsi(prices: pd.Series, period: int = 14) -> float:
-    """Compute RSI indicator"""
-    try:
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs.iloc[-1]))
-        return float(rsi)
-    except Exception:
-        return 50.0
-
-def _compute_macd(prices: pd.Series) -> float:
-    """Compute MACD indicator"""
-    try:
-        exp1 = prices.ewm(span=12, adjust=False).mean()
-        exp2 = prices.ewm(span=26, adjust=False).mean()
-        macd = exp1 - exp2
-        return float(macd.iloc[-1])
-    except:
-        return 0.0
-
-def _compute_trend_strength(prices: pd.Series) -> float:
-    """Compute trend strength based on price momentum"""
-    try:
-        # Compare short-term vs long-term momentum
-        short_ma = prices.tail(20).mean()
-        long_ma = prices.tail(200).mean()
-        current_price = prices.iloc[-1]
-
-        if long_ma > 0:
-            trend_ratio = (current_price - long_ma) / long_ma
-            return float(min(max(trend_ratio, -1.0), 1.0))
-        return 0.0
-    except:
-        return 0.0
-
-def _forecast_commodity(ticker: str, commodity_config: Dict, macro_factors: Dict) -> List[Dict[str, Any]]:
-    """Generate forecasts for a single commodity"""
-    print(f"Forecasting {commodity_config['name']} ({ticker})...")
-
-    # Get historical price data (minimum 5 years)
-    start_date = (datetime.utcnow() - timedelta(days=5*365)).strftime('%Y-%m-%d')
-    prices = get_price_history(ticker, start=start_date)
-
-    if prices is None or prices.empty:
-        print(f"Warning: No price data for {ticker}")
-        return _get_empty_forecasts(ticker, commodity_config)
-
-    # Compute technical indicators
-    indicators = _compute_technical_indicators(prices, ticker)
-
-    # Get current price
-    current_price = float(prices['Close'].iloc[-1])
-
-    # Generate forecasts for each horizon
-    forecasts = []
-    for horizon in HORIZONS:
-        forecast = _generate_single_forecast(
-            ticker, commodity_config, current_price, indicators,
-            macro_factors, horizon, prices
-        )
-        forecasts.append(forecast)
-
-    return forecasts
-
-def _generate_single_forecast(ticker: str, config: Dict, current_price: float,
-                            indicators: Dict, macro_factors: Dict,
-                            horizon: str, prices: pd.DataFrame) -> Dict[str, Any]:
-    """Generate forecast for a single horizon"""
-
-    # Base forecast using technical indicators
-    base_return = _compute_base_return(indicators, horizon)
-
-    # Adjust for macro factors
-    macro_adjustment = _compute_macro_adjustment(config, macro_factors, horizon)
-
-    # Adjust for commodity-specific factors
-    commodity_adjustment = _compute_commodity_adjustment(config, indicators, horizon)
-
-    # Combine adjustments
-    total_adjustment = base_return + macro_adjustment + commodity_adjustment
-
-    # Calculate expected price and return
-    horizon_days = HORIZON_DAYS[horizon]
-    expected_return = total_adjustment
-    expected_price = current_price * (1 + expected_return)
-
-    # Determine direction and confidence
-    direction = "up" if expected_return > 0.02 else ("down" if expected_return < -0.02 else "flat")
-    confidence = _compute_confidence(indicators, macro_factors, horizon)
-
-    return {
-        "ticker": ticker,
-        "commodity_name": config["name"],
-        "category": config["category"],
-        "horizon": horizon,
-        "current_price": round(current_price, 2),
-        "expected_price": round(expected_price, 2),
-        "expected_return": round(expected_return, 4),
-        "direction": direction,
-        "confidence": round(confidence, 3),
-        "unit": config["unit"],
-        "technical_indicators": indicators,
-        "macro_factors": macro_factors
-    }
-
-def _compute_base_return(indicators: Dict, horizon: str) -> float:
-    """Compute base return using technical indicators"""
-    if not indicators:
-        return 0.0
-
-    # Trend-based return
-    trend_strength = indicators.get('trend_strength', 0.0)
-    volatility = indicators.get('volatility_20', 0.15)
+def _compute_base_return(ind: pd.DataFrame, horizon: str) -> np.ndarray:
+    """Base return from trend and volatility (0 where indicators are missing)"""
+    has = ind.notna().any(axis=1).to_numpy()
+    trend_strength = ind["trend_strength"].fillna(0.0).to_numpy()
+    volatility = ind["volatility_20"].fillna(0.15).to_numpy()
 
     # Scale return by horizon
     horizon_multiplier = {"1w": 0.5, "1m": 1.0, "3m": 1.5}[horizon]
@@ -255,7 +123,7 @@ def _compute_base_return(indicators: Dict, horizon: str) -> float:
     # Adjust for volatility (higher volatility = lower confidence, smaller moves)
     volatility_adjustment = -0.05 * (volatility - 0.15) * horizon_multiplier
 
-    return base_return + volatility_adjustment
+    return np.where(has, base_return + volatility_adjustment, 0.0)
 
 def _compute_macro_adjustment(config: Dict, macro_factors: Dict, horizon: str) -> float:
     """Compute macro factor adjustments"""
@@ -279,65 +147,43 @@ def _compute_macro_adjustment(config: Dict, macro_factors: Dict, horizon: str) -
 
     return adjustment
 
-def _compute_commodity_adjustment(config: Dict, indicators: Dict, horizon: str) -> float:
-    """Compute commodity-specific adjustments"""
-    adjustment = 0.0
-
-    # Precious metals adjustments
-    if config['category'] == 'precious_metals':
-        # Gold/silver benefit from uncertainty
-        if indicators.get('volatility_20', 0) > 0.2:
-            adjustment += 0.02
-
-        # RSI-based mean reversion
-        rsi = indicators.get('rsi_14', 50)
-        if rsi > 70:
-            adjustment -= 0.03  # Overbought
-        elif rsi < 30:
-            adjustment += 0.03  # Oversold
-
-    # Energy adjustments
-    elif config['category'] == 'energy':
-        # MACD trend following
-        macd = indicators.get('macd', 0)
-        if macd > 0:
-            adjustment += 0.02
-        else:
-            adjustment -= 0.02
-
-    # Industrial metals adjustments
-    elif config['category'] == 'industrial_metals':
-        # Strong trend following
-        trend_strength = indicators.get('trend_strength', 0)
-        adjustment += trend_strength * 0.05
-
-    return adjustment
-
-def _compute_confidence(indicators: Dict, macro_factors: Dict, horizon: str) -> float:
-    """Compute confidence level for the forecast"""
-    confidence = 0.5  # Base confidence
-
-    # Technical indicators confidence
-    if indicators:
-        # RSI confidence (extreme values = higher confidence)
-        rsi = indicators.get('rsi_14', 50)
-        rsi_confidence = 1.0 - abs(rsi - 50) / 50
-        confidence += rsi_confidence * 0.2
-
-        # Trend strength confidence
-        trend_strength = abs(indicators.get('trend_strength', 0))
-        confidence += trend_strength * 0.2
-
-        # Volatility confidence (lower volatility = higher confidence)
-        volatility = indicators.get('volatility_20', 0.15)
-        vol_confidence = max(0, 1.0 - (volatility - 0.1) / 0.2)
-        confidence += vol_confidence * 0.1
+def _compute_commodity_adjustment(categories: np.ndarray, ind: pd.DataFrame) -> np.ndarray:
+    """Commodity-specific adjustments per category"""
+    vol = ind["volatility_20"].fillna(0.0).to_numpy()
+    rsi = ind["rsi_14"].fillna(50.0).to_numpy()
+    macd = ind["macd"].fillna(0.0).to_numpy()
+    trend_strength = ind["trend_strength"].fillna(0.0).to_numpy()
+
+    # Precious metals: benefit from uncertainty, RSI-based mean reversion (overbought/oversold)
+    precious = np.where(vol > 0.2, 0.02, 0.0) + np.select([rsi > 70, rsi < 30], [-0.03, 0.03], 0.0)
+    # Energy: MACD trend following
+    energy = np.where(macd > 0, 0.02, -0.02)
+    # Industrial metals: strong trend following
+    industrial = trend_strength * 0.05
+
+    return np.select(
+        [categories == "precious_metals", categories == "energy", categories == "industrial_metals"],
+        [precious, energy, industrial], 0.0)
+
+def _compute_confidence(ind: pd.DataFrame, horizon: str) -> np.ndarray:
+    """Confidence level per commodity for the forecast"""
+    has = ind.notna().any(axis=1).to_numpy()
+
+    # RSI confidence (extreme values = higher confidence)
+    rsi = ind["rsi_14"].fillna(50.0).to_numpy()
+    rsi_confidence = 1.0 - np.abs(rsi - 50) / 50
+    # Trend strength confidence
+    trend_strength = np.abs(ind["trend_strength"].fillna(0.0).to_numpy())
+    # Volatility confidence (lower volatility = higher confidence)
+    volatility = ind["volatility_20"].fillna(0.15).to_numpy()
+    vol_confidence = np.maximum(0, 1.0 - (volatility - 0.1) / 0.2)
+    technical = rsi_confidence * 0.2 + trend_strength * 0.2 + vol_confidence * 0.1
 
     # Horizon confidence (shorter horizon = higher confidence)
     horizon_confidence = {"1w": 0.8, "1m": 0.6, "3m": 0.4}[horizon]
-    confidence += (horizon_confidence - 0.5) * 0.3
+    confidence = 0.5 + np.where(has, technical, 0.0) + (horizon_confidence - 0.5) * 0.3
 
-    return min(max(confidence, 0.3), 0.9)
+    return np.clip(confidence, 0.3, 0.9)
 
 def _get_empty_forecasts(ticker: str, config: Dict) -> List[Dict[str, Any]]:
     """Return empty forecasts when no data is available"""
@@ -356,6 +202,52 @@ def _get_empty_forecasts(ticker: str, config: Dict) -> List[Dict[str, Any]]:
         "macro_factors": {}
     } for horizon in HORIZONS]
 
+def _forecast_frame(feats: pd.DataFrame, macro_factors: Dict) -> pd.DataFrame:
+    """Forecasts for every commodity and horizon as array operations"""
+    tickers = list(COMMODITIES)
+    configs = [COMMODITIES[t] for t in tickers]
+    categories = np.array([c["category"] for c in configs])
+    feats = feats.reindex(tickers)
+    last = feats["last"] if "last" in feats.columns else pd.Series(np.nan, index=feats.index)
+    has_data = last.notna().to_numpy()
+    current_price = last.fillna(0.0).to_numpy()
+    ind = _technical_indicators(feats)
+    indicator_dicts = [{k: float(v) for k, v in row.items() if pd.notna(v)} for row in ind.to_dict("records")]
+
+    per_horizon = {}
+    for horizon in HORIZONS:
+        # Base (technical) + macro + commodity-specific adjustments
+        macro_adjustment = np.array([_compute_macro_adjustment(c, macro_factors, horizon) for c in configs])
+        expected_return = (_compute_base_return(ind, horizon) + macro_adjustment
+                           + _compute_commodity_adjustment(categories, ind))
+        expected_price = current_price * (1 + expected_return)
+        direction = np.select([expected_return > 0.02, expected_return < -0.02], ["up", "down"], "flat")
+        per_horizon[horizon] = (expected_return, expected_price, direction, _compute_confidence(ind, horizon))
+
+    rows: List[Dict[str, Any]] = []
+    for i, (ticker, config) in enumerate(zip(tickers, configs)):
+        if not has_data[i]:
+            print(f"Warning: No price data for {ticker}")
+            rows.extend(_get_empty_forecasts(ticker, config))
+            continue
+        for horizon in HORIZONS:
+            expected_return, expected_price, direction, confidence = per_horizon[horizon]
+            rows.append({
+                "ticker": ticker,
+                "commodity_name": config["name"],
+                "category": config["category"],
+                "horizon": horizon,
+                "current_price": round(float(current_price[i]), 2),
+                "expected_price": round(float(expected_price[i]), 2),
+                "expected_return": round(float(expected_return[i]), 4),
+                "direction": str(direction[i]),
+                "confidence": round(float(confidence[i]), 3),
+                "unit": config["unit"],
+                "technical_indicators": indicator_dicts[i],
+                "macro_factors": macro_factors
+            })
+    return pd.DataFrame(rows)
+
 def run_once() -> Path:
     """Generate commodity forecasts and save to parquet"""
     print("Starting commodity forecast generation...")
@@ -364,14 +256,12 @@ def run_once() -> Path:
     macro_factors = _load_macro_factors()
     print(f"Loaded macro factors: {macro_factors}")
 
-    # Generate forecasts for all commodities
-    all_forecasts = []
-    for ticker, config in COMMODITIES.items():
-        forecasts = _forecast_commodity(ticker, config, macro_factors)
-        all_forecasts.extend(forecasts)
+    # One price panel for all commodities (minimum 5 years), indicators computed once
+    start_date = (datetime.utcnow() - timedelta(days=5*365)).strftime('%Y-%m-%d')
+    panel = load_close_panel(list(COMMODITIES), start=start_date, loader=get_price_history)
 
-    # Create output dataframe
-    df = pd.DataFrame(all_forecasts)
+    # Generate forecasts for all commodities
+    df = _forecast_frame(panel_features(panel), macro_factors)
     df.insert(0, "dt", pd.to_datetime(_today_dt()))
 
     # Save to parquet
@@ -13,18 +13,23 @@ Usage examples
 
 Notes
 - Writes Parquet under data/* using core.data_store
-- Stores last run state in data/state/harvester_state.json
+- Stores last run state in data/state/harvester_state.json (incl. per-stage timings)
+- Stages run concurrently: network stages in one pool, LLM stages in their own lane
+  (HARVEST_NET_WORKERS / HARVEST_LLM_WORKERS); per-stage cadence and deadline via
+  HARVEST_CADENCE_<STAGE> / HARVEST_DEADLINE_<STAGE> (seconds)
 """
 
 from __future__ import annotations
 
 import os
 import json
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pandas as pd
 import requests
@@ -46,8 +51,15 @@ except Exception:
     from core.data_store import write_parquet
     from core.market_data import get_fred_series, get_price_history, get_fundamentals
 
+try:
+    from ingestion.news_clusters import StoryClusterer, cluster_records
+except Exception:  # numpy missing
+    StoryClusterer = None
+    cluster_records = None
+
 
 STATE_PATH = Path("data/state/harvester_state.json")
+CLUSTERS_PATH = Path("data/state/news_clusters.json")
 
 
 def _load_state() -> Dict[str, Any]:
@@ -137,10 +149,36 @@ def harvest_news_recent(regions: List[str], watchlist: List[str], query: str = "
     for t in watchlist:
         it, m = collect_news(regions=regions, window=window, query=t, company=None, aliases=None, tgt_ticker=t, per_source_cap=None, limit=int(limit/len(watchlist)) if watchlist else 100)
         rows.extend(it)
+    rows = _collapse_near_duplicates(rows)
     _persist_news_rows(rows, _utcnow())
     return len(rows)
 
 
+def _collapse_near_duplicates(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep one row per story cluster (ids persisted across runs); merge tickers, add cluster_size."""
+    if cluster_records is None or not rows:
+        return rows
+    try:
+        cl = StoryClusterer.load(CLUSTERS_PATH)
+        quality = lambda r: len(str(r.get("summary") or ""))  # richest summary wins
+        annotated = cluster_records(rows, key=lambda r: str(r.get("link") or r.get("title") or ""),
+                                    quality=quality, clusterer=cl, keep_all=True)
+        reps: Dict[str, Dict[str, Any]] = {}
+        tickers: Dict[str, List[str]] = {}
+        for r in annotated:
+            cid = r["cluster_id"]
+            acc = tickers.setdefault(cid, [])
+            acc.extend(t for t in (r.get("tickers") or []) if t not in acc)
+            if cid not in reps or quality(r) > quality(reps[cid]):
+                reps[cid] = r
+        for cid, r in reps.items():
+            r["tickers"] = tickers[cid]
+        cl.save(CLUSTERS_PATH)
+        return list(reps.values())
+    except Exception:
+        return rows
+
+
 def _tavily_search_raw(q: str, time_range: str = "year", api_key: Optional[str] = None) -> Dict[str, Any]:
     key = api_key or os.getenv("TAVILY_API_KEY")
     if not key:
@@ -449,8 +487,13 @@ def discover_topics_via_llm(watchlist: List[str]) -> List[str]:
     (outdir / "topics.json").write_text(json.dumps(_clean_json(out), ensure_ascii=False, indent=2), encoding="utf-8")
     return queries
 
-def run_once() -> Dict[str, Any]:
-    st = _load_state()
+# ------------------------ STAGES -------------------------------
+# Each stage has its own cadence (min seconds between successful runs), deadline and
+# lane: network-bound stages share a thread pool and run in parallel, LLM stages run in
+# their own lane so a slow investigation never delays news/prices. Timings are kept in
+# state["stages"][name].
+
+def _load_watchlist() -> List[str]:
     # WATCHLIST from env; fallback to data/watchlist.json if present
     wl_env = os.getenv("WATCHLIST") or "NGD.TO,AEM.TO,ABX.TO,K.TO,GDX"
     watchlist = [x.strip().upper() for x in wl_env.split(",") if x.strip()]
@@ -463,100 +506,202 @@ def run_once() -> Dict[str, Any]:
                 watchlist = lst
     except Exception:
         pass
-    out: Dict[str, Any] = {"asof": _iso(), "actions": []}
-    try:
-        n = harvest_news_recent(["US","INTL"], watchlist, query=os.getenv("NEWS_QUERY",""), window=os.getenv("NEWS_WINDOW","24h"), limit=300)
-        out["actions"].append({"news_recent": n})
-    except Exception as e:
-        out["actions"].append({"news_recent_error": str(e)})
-    try:
-        m = update_macro()
-        out["actions"].append({"macro_updated": m})
-    except Exception as e:
-        out["actions"].append({"macro_error": str(e)})
-    try:
-        # Refresh prices/fundamentals at most every PRICE_REFRESH_HOURS
-        refresh_hours = int(os.getenv("PRICE_REFRESH_HOURS", "24"))
-        last = st.get("last_runs", {}).get("last_prices_refresh_iso")
-        do_refresh = True
-        if last:
-            try:
-                from datetime import datetime, timezone
-                last_dt = datetime.fromisoformat(last.replace("Z","+00:00"))
-                age_h = (datetime.now(timezone.utc) - last_dt).total_seconds()/3600.0
-                do_refresh = age_h >= max(1, refresh_hours)
-            except Exception:
-                do_refresh = True
-        if do_refresh:
-            p = update_prices_and_fundamentals(watchlist)
-            out["actions"].append({"prices_funda": p})
-            # store timestamp
-            from datetime import datetime, timezone
-            st.setdefault("last_runs", {})["last_prices_refresh_iso"] = datetime.now(timezone.utc).isoformat()
-        else:
-            out["actions"].append({"prices_funda": "skipped_recently_refreshed"})
-    except Exception as e:
-        out["actions"].append({"prices_error": str(e)})
-    try:
-        if os.getenv("DO_INVESTIGATE","1") == "1":
-            rep = investigate_macro()
-            out["actions"].append({"investigation": bool(rep.get("answer"))})
-    except Exception as e:
-        out["actions"].append({"investigation_error": str(e)})
+    return watchlist
+
+
+def _stage_news(watchlist: List[str]) -> Dict[str, Any]:
+    n = harvest_news_recent(["US","INTL"], watchlist, query=os.getenv("NEWS_QUERY",""), window=os.getenv("NEWS_WINDOW","24h"), limit=300)
+    return {"news_recent": n}
+
+
+def _stage_macro(watchlist: List[str]) -> Dict[str, Any]:
+    return {"macro_updated": update_macro()}
+
+
+def _stage_prices(watchlist: List[str]) -> Dict[str, Any]:
+    return {"prices_funda": update_prices_and_fundamentals(watchlist)}
+
+
+def _stage_investigate(watchlist: List[str]) -> Dict[str, Any]:
+    rep = investigate_macro()
+    return {"investigation": bool(rep.get("answer"))}
+
+
+def _stage_events(watchlist: List[str]) -> Dict[str, Any]:
     # Write upcoming macro events (heuristic, user-friendly labels)
+    days_ahead = int(os.getenv("EVENTS_DAYS_AHEAD","14"))
+    evts = generate_upcoming_events(days_ahead=days_ahead)
+    if evts:
+        evdir = Path("data/events") / f"dt={_utcnow().strftime('%Y%m%d')}"
+        evdir.mkdir(parents=True, exist_ok=True)
+        payload = {"asof": _iso(), "days_ahead": days_ahead, "events": evts}
+        (evdir / "events.json").write_text(json.dumps(_clean_json(payload), ensure_ascii=False, indent=2), encoding="utf-8")
+    return {"events": len(evts) if evts else 0}
+
+
+def _stage_topics(watchlist: List[str]) -> Dict[str, Any]:
+    qs = discover_topics_via_llm(watchlist)
+    # light backfill on top 3 queries
+    if qs:
+        _ = backfill_news(years=1.0, topic_queries=qs[:3])
+    return {"topics": len(qs)}
+
+
+def _stage_g4f(watchlist: List[str]) -> Dict[str, Any]:
+    from agents.g4f_model_watcher import refresh as _g4f_refresh
+    p = _g4f_refresh(limit=int(os.getenv("G4F_TEST_LIMIT","8")), refresh_verified=True)
+    return {"g4f_models_refresh": str(p)}
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[List[str]], Dict[str, Any]]
+    lane: str = "net"                      # "net" | "llm"
+    cadence: Callable[[], float] = lambda: 0.0   # seconds between successful runs (0 = every cycle)
+    deadline: float = 600.0                # seconds run_once waits before moving on
+    enabled: Callable[[], bool] = lambda: True
+
+    def cadence_s(self) -> float:
+        v = os.getenv(f"HARVEST_CADENCE_{self.name.upper()}")
+        return float(v) if v else float(self.cadence())
+
+    def deadline_s(self) -> float:
+        return float(os.getenv(f"HARVEST_DEADLINE_{self.name.upper()}", self.deadline))
+
+
+def _env_on(name: str, default: str = "1") -> Callable[[], bool]:
+    return lambda: os.getenv(name, default) == "1"
+
+
+STAGES: List[Stage] = [
+    Stage("news", _stage_news, deadline=300),
+    Stage("macro", _stage_macro, deadline=300),
+    Stage("prices", _stage_prices, cadence=lambda: 3600 * max(1, int(os.getenv("PRICE_REFRESH_HOURS", "24"))), deadline=900),
+    Stage("events", _stage_events, deadline=60),
+    Stage("investigation", _stage_investigate, lane="llm", deadline=900, enabled=_env_on("DO_INVESTIGATE")),
+    Stage("topics", _stage_topics, lane="llm", deadline=900, enabled=_env_on("DO_DISCOVER_TOPICS")),
+    Stage("g4f", _stage_g4f, lane="llm", cadence=lambda: 3600 * max(1, int(os.getenv("G4F_REFRESH_HOURS", "6"))),
+          deadline=900, enabled=_env_on("G4F_AUTO_REFRESH")),
+]
+
+# legacy last_runs keys, read once so existing state keeps its cadence
+_LEGACY_LAST_OK = {"prices": "last_prices_refresh_iso", "g4f": "last_g4f_refresh_iso"}
+
+_STATE_LOCK = threading.Lock()
+_LANES: Dict[str, ThreadPoolExecutor] = {}
+_INFLIGHT: Dict[str, Future] = {}
+
+
+def _lane(name: str) -> ThreadPoolExecutor:
+    if name not in _LANES:
+        workers = int(os.getenv("HARVEST_LLM_WORKERS", "1")) if name == "llm" else int(os.getenv("HARVEST_NET_WORKERS", "4"))
+        _LANES[name] = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"harvest-{name}")
+    return _LANES[name]
+
+
+def _parse_iso(s: Optional[str]) -> Optional[datetime]:
+    if not s:
+        return None
     try:
-        days_ahead = int(os.getenv("EVENTS_DAYS_AHEAD","14"))
-        evts = generate_upcoming_events(days_ahead=days_ahead)
-        if evts:
-            from datetime import datetime as _dt2
-            evdir = Path("data/events") / f"dt={_dt2.utcnow().strftime('%Y%m%d')}"
-            evdir.mkdir(parents=True, exist_ok=True)
-            payload = {"asof": _iso(), "days_ahead": days_ahead, "events": evts}
-            (evdir / "events.json").write_text(json.dumps(_clean_json(payload), ensure_ascii=False, indent=2), encoding="utf-8")
-        out["actions"].append({"events": len(evts) if evts else 0})
-    except Exception as e:
-        out["actions"].append({"events_error": str(e)})
+        d = datetime.fromisoformat(s.replace("Z", "+00:00"))
+        return d.replace(tzinfo=None) if d.tzinfo else d
+    except Exception:
+        return None
+
+
+def _is_due(stage: Stage, st: Dict[str, Any], now: datetime) -> bool:
+    cadence = stage.cadence_s()
+    if cadence <= 0:
+        return True
+    last = (st.get("stages", {}).get(stage.name) or {}).get("last_ok_iso")
+    if not last and stage.name in _LEGACY_LAST_OK:
+        last = st.get("last_runs", {}).get(_LEGACY_LAST_OK[stage.name])
+    last_dt = _parse_iso(last)
+    return last_dt is None or (now - last_dt).total_seconds() >= cadence
+
+
+def _run_stage(stage: Stage, watchlist: List[str]) -> Dict[str, Any]:
+    t0 = time.time()
+    start = _iso()
     try:
-        if os.getenv("DO_DISCOVER_TOPICS","1") == "1":
-            qs = discover_topics_via_llm(watchlist)
-            out["actions"].append({"topics": len(qs)})
-            # light backfill on top 3 queries
-            if qs:
-                _ = backfill_news(years=1.0, topic_queries=qs[:3])
+        action = stage.fn(watchlist)
+        status, error = "ok", None
     except Exception as e:
-        out["actions"].append({"topics_error": str(e)})
-    # Optionally refresh g4f working models on schedule
-    try:
-        refresh_hours = int(os.getenv("G4F_REFRESH_HOURS", "6"))
-        last = st.get("last_runs", {}).get("last_g4f_refresh_iso")
-        do_refresh = True
-        if last:
-            from datetime import datetime, timezone
-            last_dt = datetime.fromisoformat(last.replace("Z","+00:00"))
-            age_h = (datetime.now(timezone.utc) - last_dt).total_seconds()/3600.0
-            do_refresh = age_h >= max(1, refresh_hours)
-        if do_refresh and os.getenv("G4F_AUTO_REFRESH","1") == "1":
-            try:
-                from agents.g4f_model_watcher import refresh as _g4f_refresh
-                p = _g4f_refresh(limit=int(os.getenv("G4F_TEST_LIMIT","8")), refresh_verified=True)
-                out["actions"].append({"g4f_models_refresh": str(p)})
-                from datetime import datetime, timezone
-                st.setdefault("last_runs", {})["last_g4f_refresh_iso"] = datetime.now(timezone.utc).isoformat()
-            except Exception as ie:
-                out["actions"].append({"g4f_models_refresh_error": str(ie)})
+        action, status, error = {f"{stage.name}_error": str(e)}, "error", str(e)
+    rec = {"status": status, "last_start_iso": start, "last_end_iso": _iso(),
+           "duration_ms": int((time.time() - t0) * 1000), "lane": stage.lane}
+    if error:
+        rec["error"] = error[:500]
+    _record_stage(stage.name, rec)
+    return action
+
+
+def _record_stage(name: str, rec: Dict[str, Any]) -> None:
+    with _STATE_LOCK:
+        st = _load_state()
+        cur = st.setdefault("stages", {}).setdefault(name, {})
+        cur.update(rec)
+        if rec.get("status") == "ok":
+            cur["last_ok_iso"] = rec["last_end_iso"]
+            cur["runs"] = int(cur.get("runs", 0)) + 1
+            if name in _LEGACY_LAST_OK:
+                st.setdefault("last_runs", {})[_LEGACY_LAST_OK[name]] = rec["last_end_iso"]
         else:
-            out["actions"].append({"g4f_models_refresh": "skipped"})
-    except Exception as e:
-        out["actions"].append({"g4f_refresh_error": str(e)})
-    st["last_runs"]["once"] = out
-    _save_state(st)
+            cur["failures"] = int(cur.get("failures", 0)) + 1
+        _save_state(st)
+
+
+def run_once(wait_llm: bool = True) -> Dict[str, Any]:
+    """One harvest cycle: submit every due stage to its lane and wait up to each deadline.
+
+    Stages still running at their deadline (or LLM stages when `wait_llm=False`) keep
+    running in the background; they are not resubmitted until they finish.
+    """
+    st = _load_state()
+    watchlist = _load_watchlist()
+    now = _utcnow()
+    out: Dict[str, Any] = {"asof": _iso(), "actions": [], "stages": {}}
+    submitted: Dict[str, Tuple[Stage, Future]] = {}
+    for stage in STAGES:
+        if not stage.enabled():
+            out["stages"][stage.name] = "disabled"
+            continue
+        if stage.name in _INFLIGHT and not _INFLIGHT[stage.name].done():
+            out["stages"][stage.name] = "running"
+            continue
+        if not _is_due(stage, st, now):
+            out["stages"][stage.name] = "skipped_not_due"
+            continue
+        fut = _lane(stage.lane).submit(_run_stage, stage, watchlist)
+        _INFLIGHT[stage.name] = fut
+        submitted[stage.name] = (stage, fut)
+
+    t0 = time.time()
+    for name, (stage, fut) in submitted.items():
+        if stage.lane == "llm" and not wait_llm:
+            out["stages"][name] = "background"
+            continue
+        try:
+            action = fut.result(timeout=max(0.0, stage.deadline_s() - (time.time() - t0)))
+            out["actions"].append(action)
+            out["stages"][name] = "error" if f"{name}_error" in action else "done"
+        except FuturesTimeout:
+            out["stages"][name] = "deadline_exceeded"
+            out["actions"].append({f"{name}_error": f"still running after {stage.deadline_s():.0f}s"})
+
+    with _STATE_LOCK:
+        st = _load_state()
+        st.setdefault("last_runs", {})["once"] = out
+        _save_state(st)
     return out
 
 
 def daemon_loop(interval_seconds: int = 1800) -> None:
+    # LLM stages run in the background lane: a slow one never delays the next cycle
     while True:
         try:
-            run_once()
+            run_once(wait_llm=False)
         except Exception:
             pass
         time.sleep(max(60, int(interval_seconds)))
@@ -23,6 +23,15 @@ import os
 
 import pandas as pd
 
+try:
+    from core.parquet_stats import summarize, summarize_many
+except Exception:  # run as `python -m src.agents.data_quality`
+    import sys as _sys
+    _SRC = Path(__file__).resolve().parents[1]
+    if str(_SRC) not in _sys.path:
+        _sys.path.insert(0, str(_SRC))
+    from core.parquet_stats import summarize, summarize_many
+
 
 def _today_dt() -> str:
     return datetime.utcnow().strftime('%Y%m%d')
@@ -78,19 +87,19 @@ def scan_macro(recency_days: int = 7) -> Dict[str, Any]:
     series_dirs = list(base.glob('series_id=*/series.parquet'))
     if not series_dirs:
         return {"ok": False, "issues": [{"sev": "warn", "msg": "aucune série FRED trouvée"}]}
-    # Check recency for a few key series
+    # Check recency for a few key series (footer statistics, no full read)
     for sid in ['DTWEXBGS','DGS10','CPIAUCSL']:
         p = base / f"series_id={sid}" / "series.parquet"
         if not p.exists():
             issues.append({"sev": "warn", "msg": f"série absente: {sid}"})
             continue
-        df = _safe_read_parquet(p)
-        if df.empty:
+        sm = summarize(p)
+        if not sm.get("rows"):
             issues.append({"sev": "warn", "msg": f"série vide: {sid}"})
             continue
         try:
-            last = pd.to_datetime(df['date'] if 'date' in df.columns else df.index).max()
-            if (datetime.utcnow() - pd.to_datetime(last).to_pydatetime()).days > recency_days*6:
+            last = pd.to_datetime(sm["date_max"])
+            if (datetime.utcnow() - last.tz_localize(None).to_pydatetime()).days > recency_days*6:
                 issues.append({"sev": "info", "msg": f"série {sid} peu récente (ok si fréquence mensuelle)"})
         except Exception:
             pass
@@ -102,12 +111,12 @@ def scan_prices() -> Dict[str, Any]:
     issues: List[Dict[str, Any]] = []
     if not base.exists():
         return {"ok": False, "issues": [{"sev": "warn", "msg": "data/prices absent"}]}
-    for p in base.glob('ticker=*/prices.parquet'):
-        df = _safe_read_parquet(p)
-        if df.empty:
+    for p, sm in sorted(summarize_many(base.glob('ticker=*/prices.parquet')).items()):
+        if not sm.get("rows"):
             issues.append({"sev": "warn", "msg": f"vide: {p.parent.name}"})
             continue
-        if 'Close' in df.columns and (df['Close'] <= 0).any():
+        close_min = (sm["columns"].get("Close") or {}).get("min")
+        if isinstance(close_min, (int, float)) and close_min <= 0:
             issues.append({"sev": "error", "msg": f"prix non positifs: {p.parent.name}"})
     return {"ok": not any(i['sev']=='error' for i in issues), "issues": issues}
 
@@ -222,39 +231,26 @@ def scan_coverage(min_years: int = 5) -> Dict[str, Any]:
     import pandas as pd
     min_days = int(min_years * 365 * 0.98)  # allow small slack
     today = pd.Timestamp.utcnow().normalize()
-    # prices
-    for p in Path('data/prices').glob('ticker=*/prices.parquet'):
-        try:
-            df = pd.read_parquet(p)
-            col_date = 'date' if 'date' in df.columns else None
-            if col_date:
-                df[col_date] = pd.to_datetime(df[col_date], errors='coerce')
-                dmin, dmax = df[col_date].min(), df[col_date].max()
-                if pd.isna(dmin) or pd.isna(dmax):
-                    continue
-                span = (dmax - dmin).days
-                if span < min_days:
-                    issues.append({'sev':'warn','msg': f'coverage< {min_years}y for {p.parent.name} ({span} days)'})
-        except Exception:
-            continue
-    # macro core series
+    # prices + macro core series: spans from footer statistics, files scanned in parallel
     core = ['DGS10','DGS2','CPIAUCSL']
-    for sid in core:
-        sp = Path('data/macro')/f'series_id={sid}'/'series.parquet'
+    core_paths = {sid: Path('data/macro')/f'series_id={sid}'/'series.parquet' for sid in core}
+    sums = summarize_many(list(Path('data/prices').glob('ticker=*/prices.parquet'))
+                          + [sp for sp in core_paths.values() if sp.exists()])
+    for p, sm in sorted(sums.items()):
+        if p.name != 'prices.parquet' or sm.get('date_col') != 'date':
+            continue
+        span = sm.get('span_days')
+        if span is not None and span < min_days:
+            issues.append({'sev':'warn','msg': f'coverage< {min_years}y for {p.parent.name} ({span} days)'})
+    for sid, sp in core_paths.items():
         if not sp.exists():
             issues.append({'sev':'warn','msg': f'macro series missing: {sid}'})
             continue
-        try:
-            df = pd.read_parquet(sp)
-            col_date = 'date' if 'date' in df.columns else None
-            if col_date:
-                df[col_date] = pd.to_datetime(df[col_date], errors='coerce')
-                dmin, dmax = df[col_date].min(), df[col_date].max()
-                span = (dmax - dmin).days if dmin is not None and dmax is not None else 0
-                if span < min_days:
-                    issues.append({'sev':'warn','msg': f'macro {sid} coverage< {min_years}y ({span} days)'})
-        except Exception:
-            continue
+        sm = sums.get(sp) or {}
+        if sm.get('date_col') == 'date':
+            span = sm.get('span_days') or 0
+            if span < min_days:
+                issues.append({'sev':'warn','msg': f'macro {sid} coverage< {min_years}y ({span} days)'})
     return {'ok': len([i for i in issues if i.get('sev')=='error'])==0, 'issues': issues}
 
 
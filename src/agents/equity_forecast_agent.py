@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Iterable
@@ -12,12 +11,14 @@ import pandas as pd
 # Lazy imports to keep CLI simple
 try:
     from core.market_data import get_price_history
+    from analytics.price_panel import load_close_panel, panel_features
 except Exception:  # pragma: no cover
     import sys as _sys
     _SRC = Path(__file__).resolve().parents[1]
     if str(_SRC) not in _sys.path:
         _sys.path.insert(0, str(_SRC))
     from core.market_data import get_price_history
+    from analytics.price_panel import load_close_panel, panel_features
 
 
 DT_FMT = "%Y%m%d"
@@ -44,83 +45,49 @@ def _load_watchlist() -> List[str]:
     return ["AAPL", "MSFT", "NVDA", "SPY"]
 
 
-def _momentum(series: pd.Series, days: int) -> float | None:
-    try:
-        if len(series) <= days:
-            return None
-        return float(series.iloc[-1] / series.iloc[-days] - 1.0)
-    except Exception:
-        return None
+# horizon -> (momentum feature, scale)
+HORIZON_MOMENTUM = {"1w": ("mom_5", 1.0), "1m": ("mom_21", 1.2), "1y": ("mom_63", 1.8)}
 
 
-def _forecasts_for_ticker(ticker: str, horizons: Iterable[str]) -> List[dict]:
-    # Fetch ~500 calendar days to derive simple features (momentum/vol)
-    start = (datetime.utcnow().date() - timedelta(days=500)).isoformat()
-    hist = get_price_history(ticker, start=start)
-    rows: List[dict] = []
-    if hist is None or hist.empty or "Close" not in hist.columns:
-        for h in horizons:
-            rows.append({
-                "ticker": ticker,
-                "horizon": h,
-                "direction": "flat",
-                "confidence": 0.5,
-                "expected_return": 0.0,
-            })
-        return rows
-
-    close = pd.to_numeric(hist["Close"], errors="coerce").dropna()
-    mom_5 = _momentum(close, 5)
-    mom_21 = _momentum(close, 21)
-    mom_63 = _momentum(close, 63)
-
+def _forecast_frame(tickers: List[str], feats: pd.DataFrame, horizons: Iterable[str]) -> pd.DataFrame:
+    """All (ticker, horizon) forecasts as array operations over the feature table."""
+    horizons = list(horizons)
+    f = feats.reindex(tickers)
+    has = f["n_obs"].notna().to_numpy() if "n_obs" in f.columns else np.zeros(len(tickers), bool)
     # Volatility proxy (std of daily returns)
-    try:
-        rets = close.pct_change().dropna()
-        vol = float(rets.std())
-    except Exception:
-        vol = 0.02
-
+    vol = f["vol"].fillna(0.02).to_numpy() if "vol" in f.columns else np.full(len(tickers), 0.02)
+    frames = []
     for h in horizons:
-        # Map horizon to momentum window and scaling
-        if h == "1w":
-            m = mom_5 if mom_5 is not None else 0.0
-            scale = 1.0
-        elif h == "1m":
-            m = mom_21 if mom_21 is not None else 0.0
-            scale = 1.2
-        else:  # "1y" as coarse proxy
-            m = mom_63 if mom_63 is not None else 0.0
-            scale = 1.8
-
-        exp_ret = float(m) * scale
+        col, scale = HORIZON_MOMENTUM.get(h, HORIZON_MOMENTUM["1y"])
+        m = f[col].fillna(0.0).to_numpy() if col in f.columns else np.zeros(len(tickers))
         # Clamp expected return to reasonable bounds
-        exp_ret = float(np.clip(exp_ret, -0.25, 0.25))
-        direction = "up" if exp_ret > 0.0 else ("down" if exp_ret < 0.0 else "flat")
+        exp_ret = np.clip(m * scale, -0.25, 0.25)
         # Confidence increases with momentum signal-to-noise; cap between 0.35 and 0.85
-        try:
-            snr = abs(exp_ret) / max(1e-6, vol)
-            conf = float(np.clip(0.35 + 0.2 * snr, 0.35, 0.85))
-        except Exception:
-            conf = 0.5
-
-        rows.append({
-            "ticker": ticker,
+        conf = np.clip(0.35 + 0.2 * np.abs(exp_ret) / np.maximum(1e-6, vol), 0.35, 0.85)
+        # no history: neutral forecast
+        exp_ret = np.where(has, exp_ret, 0.0)
+        conf = np.where(has, conf, 0.5)
+        frames.append(pd.DataFrame({
+            "ticker": tickers,
             "horizon": h,
-            "direction": direction,
-            "confidence": round(conf, 3),
-            "expected_return": round(exp_ret, 4),
-        })
-    return rows
+            "direction": np.select([exp_ret > 0, exp_ret < 0], ["up", "down"], "flat"),
+            "confidence": np.round(conf, 3),
+            "expected_return": np.round(exp_ret, 4),
+        }))
+    # rows ordered ticker-major, like the former per-ticker loop
+    out = pd.concat(frames, ignore_index=True)
+    out["_t"] = np.tile(np.arange(len(tickers)), len(horizons))
+    out["_h"] = np.repeat(np.arange(len(horizons)), len(tickers))
+    return out.sort_values(["_t", "_h"]).drop(columns=["_t", "_h"]).reset_index(drop=True)
 
 
 def run_once() -> Path:
     tickers = _load_watchlist()
     horizons = ["1w", "1m", "1y"]
-    all_rows: List[dict] = []
-    for t in tickers:
-        all_rows.extend(_forecasts_for_ticker(t, horizons))
-    df = pd.DataFrame(all_rows)
+    # One panel for the whole watchlist (~500 calendar days), features computed once
+    start = (datetime.utcnow().date() - timedelta(days=500)).isoformat()
+    panel = load_close_panel(tickers, start=start, loader=get_price_history)
+    df = _forecast_frame(tickers, panel_features(panel), horizons)
     df.insert(0, "dt", pd.to_datetime(_today_dt()))
     outdir = Path("data/forecast") / f"dt={_today_dt()}"
     outdir.mkdir(parents=True, exist_ok=True)
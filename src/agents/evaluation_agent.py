@@ -1,6 +1,8 @@
 """Evaluation agent
 
-Computes MAE, RMSE and hit ratio for forecasts by agent/provider (if available) or overall.
+Computes MAE, RMSE, hit ratio and confidence calibration for forecasts by agent/provider
+(if available) or overall, over every forecast partition in the window (analytics.forecast_eval:
+prices loaded once per ticker, one vectorized join for all horizons).
 Writes outputs under `data/evaluation/dt=YYYYMMDD/` as `metrics.json` and `details.parquet`.
 
 Usage: PYTHONPATH=src python -m src.agents.evaluation_agent --horizon 1m --top-n 5
@@ -11,94 +13,35 @@ from pathlib import Path
 from datetime import datetime
 import json
 import argparse
-import math
 import pandas as pd
-import numpy as np
 
-HORIZON_TO_DAYS = {"1w": 5, "1m": 21, "1y": 252}
-
-
-def _latest_forecasts() -> pd.DataFrame:
-    parts = sorted(Path('data/forecast').glob('dt=*'))
-    if not parts:
-        return pd.DataFrame()
-    latest = parts[-1]
-    f1 = latest / 'forecasts.parquet'
-    f2 = latest / 'final.parquet'
-    if f1.exists():
-        return pd.read_parquet(f1)
-    if f2.exists():
-        return pd.read_parquet(f2)
-    return pd.DataFrame()
-
-
-def _cached_prices(ticker: str) -> pd.DataFrame | None:
-    p = Path('data/prices') / f'ticker={ticker}' / 'prices.parquet'
-    if not p.exists():
-        return None
-    try:
-        df = pd.read_parquet(p)
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
-            df = df.set_index('date').sort_index()
-        return df
-    except Exception:
-        return None
-
-
-def _realized_return_for(ticker: str, dt: pd.Timestamp, days: int) -> float | None:
-    dfp = _cached_prices(ticker)
-    if dfp is None or dfp.empty:
-        return None
-    if 'Close' in dfp.columns:
-        price_col = 'Close'
-    elif 'close' in dfp.columns:
-        price_col = 'close'
-    else:
-        return None
-    try:
-        idx = dfp.index.get_loc(dt, method='nearest')
-    except Exception:
-        after = dfp[dfp.index >= dt]
-        if after.empty:
-            return None
-        idx = dfp.index.get_loc(after.index[0])
-    j = min(len(dfp) - 1, idx + days)
-    try:
-        r = float(dfp[price_col].iloc[j] / dfp[price_col].iloc[idx] - 1.0)
-        return r
-    except Exception:
-        return None
+try:
+    from analytics.forecast_eval import (HORIZON_TO_DAYS, attach_realized, evaluate, load_forecasts,
+                                         realized_for_rows)
+except Exception:  # run as `python -m src.agents...`
+    import sys as _sys
+    _SRC = Path(__file__).resolve().parents[1]
+    if str(_SRC) not in _sys.path:
+        _sys.path.insert(0, str(_SRC))
+    from analytics.forecast_eval import (HORIZON_TO_DAYS, attach_realized, evaluate, load_forecasts,
+                                         realized_for_rows)
 
 
 def compute_metrics(horizon: str = '1m', days_back: int = 180) -> dict:
-    days = HORIZON_TO_DAYS.get(horizon, 21)
-    df = _latest_forecasts()
+    df = load_forecasts(days_back=days_back)
     if df.empty:
         return {'ok': False, 'error': 'no forecasts found'}
 
-    if 'dt' in df.columns:
-        df['dt'] = pd.to_datetime(df['dt'], errors='coerce')
-    else:
-        if 'date' in df.columns:
-            df['dt'] = pd.to_datetime(df['date'], errors='coerce')
-        else:
-            df['dt'] = pd.Timestamp.now()
-
     end = df['dt'].max()
     start = end - pd.Timedelta(days=days_back)
     df = df[(df['dt'] >= start) & (df['dt'] <= end)].copy()
     if df.empty:
         return {'ok': False, 'error': 'no forecasts in window'}
 
-    # Compute realized returns for each row if possible
-    realized = []
-    for idx, row in df.iterrows():
-        ticker = str(row.get('ticker'))
-        dt = pd.Timestamp(row.get('dt'))
-        rr = _realized_return_for(ticker, dt, days)
-        realized.append(rr)
-    df['realized_return'] = realized
+    # Realized returns for all horizons in one join, then each row's own horizon
+    df = attach_realized(df)
+    df['realized_return'] = realized_for_rows(df, horizon)
+    row_h = df['horizon'].astype(str) if 'horizon' in df.columns else pd.Series(horizon, index=df.index)
 
     # Determine grouping key (provider/agent/source) if present
     if 'provider' in df.columns:
@@ -110,47 +53,20 @@ def compute_metrics(horizon: str = '1m', days_back: int = 180) -> dict:
     else:
         group_key = None
 
-    results = {}
-
-    def _metrics_for(sub: pd.DataFrame) -> dict:
-        sub = sub.dropna(subset=['realized_return'])
-        if sub.empty:
-            return {'count': 0, 'mae': None, 'rmse': None, 'hit_ratio': None}
-        # expected value: try 'expected_return' then 'expected' else 0
-        if 'expected_return' in sub.columns:
-            exp = sub['expected_return'].astype(float).fillna(0.0)
-        else:
-            exp = pd.Series([0.0] * len(sub))
-        err = sub['realized_return'].astype(float) - exp
-        mae = float(err.abs().mean())
-        rmse = float((err ** 2).mean() ** 0.5)
-        # hit ratio: sign match between expected and realized (or direction vs realized)
-        if 'direction' in sub.columns:
-            dir_map = {'up': 1.0, 'down': -1.0, 'flat': 0.0}
-            pred_dir = sub['direction'].map(dir_map).fillna(0.0)
-            hits = (np.sign(sub['realized_return'].astype(float)) == np.sign(pred_dir)).sum()
-            hit_ratio = float(hits) / float(len(sub))
-        else:
-            hits = (np.sign(sub['realized_return'].astype(float)) == np.sign(exp)).sum()
-            hit_ratio = float(hits) / float(len(sub))
-        return {'count': int(len(sub)), 'mae': mae, 'rmse': rmse, 'hit_ratio': hit_ratio}
-
-    if group_key:
-        for k, sub in df.groupby(df[group_key].fillna('unknown')):
-            results[str(k)] = _metrics_for(sub)
-    else:
-        results['all'] = _metrics_for(df)
+    results = evaluate(df[row_h == horizon], by=group_key)
+    by_horizon = {h: evaluate(df[row_h == h], by=group_key) for h in HORIZON_TO_DAYS if (row_h == h).any()}
 
     # Write outputs
     outdir = Path('data/evaluation') / f"dt={datetime.utcnow().strftime('%Y%m%d')}"
     outdir.mkdir(parents=True, exist_ok=True)
-    (outdir / 'metrics.json').write_text(json.dumps({'horizon': horizon, 'by': group_key, 'results': results}, ensure_ascii=False, indent=2), encoding='utf-8')
+    (outdir / 'metrics.json').write_text(json.dumps({'horizon': horizon, 'by': group_key, 'results': results, 'by_horizon': by_horizon}, ensure_ascii=False, indent=2), encoding='utf-8')
     try:
         df.to_parquet(outdir / 'details.parquet', index=False)
     except Exception:
         pass
 
-    return {'ok': True, 'by': group_key, 'groups': len(results)}
+    return {'ok': True, 'by': group_key, 'groups': len(results),
+            'evaluated': int(df.loc[row_h == horizon, 'realized_return'].notna().sum())}
 
 
 def main():
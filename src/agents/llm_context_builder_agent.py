@@ -4,21 +4,41 @@ from __future__ import annotations
 Build compact LLM contexts per ticker from existing data (prices, macro, news, peers).
 Writes: data/llm/context/dt=YYYYMMDD/{ticker}.json
 
+Blocks are materialized once per data refresh and stored under
+data/llm/context/blocks/{kind}/{fingerprint}.json, where the fingerprint is
+derived from the source files (path+size+mtime). Macro and news blocks are
+shared by every ticker of a run; the packed `prompt` respects a token budget
+(env LLM_CONTEXT_TOKEN_BUDGET) with priority prices > macro > news > peers.
+
 Usage:
   PYTHONPATH=src python -m src.agents.llm_context_builder_agent --tickers NGD.TO,AAPL,MSFT
 """
 
 import argparse
 import json
-from dataclasses import dataclass
+import os
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 import pandas as pd
 
+try:
+    from core.prompt_context import ContextBlock, pack_blocks, file_fingerprint
+except Exception:  # pragma: no cover
+    _SRC = Path(__file__).resolve().parents[1]
+    if str(_SRC) not in sys.path:
+        sys.path.insert(0, str(_SRC))
+    from core.prompt_context import ContextBlock, pack_blocks, file_fingerprint
+
 
 DT_FMT = "%Y%m%d"
+BLOCKS_DIR = Path('data/llm/context/blocks')
+TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", "1500"))
+
+# In-process memo: (kind, fingerprint) -> block payload
+_BLOCKS: Dict[tuple, object] = {}
 
 
 def today_dt() -> str:
@@ -46,8 +66,41 @@ def _latest_news_parquet() -> Optional[Path]:
     return parts[-1] if parts else None
 
 
+def _cached_block(kind: str, fp: str, compute: Callable[[], object]):
+    """Return the block for (kind, fp) from memory, then disk, else compute and store it."""
+    key = (kind, fp)
+    if key in _BLOCKS:
+        return _BLOCKS[key]
+    path = BLOCKS_DIR / kind / f"{fp}.json"
+    try:
+        if path.exists():
+            val = json.loads(path.read_text(encoding='utf-8'))
+            _BLOCKS[key] = val
+            return val
+    except Exception:
+        pass
+    val = compute()
+    _BLOCKS[key] = val
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(val, ensure_ascii=False), encoding='utf-8')
+    except Exception:
+        pass
+    return val
+
+
+def _price_path(ticker: str) -> Path:
+    return Path(f'data/prices/ticker={ticker}/prices.parquet')
+
+
 def _price_summary(ticker: str) -> Dict:
-    p = Path(f'data/prices/ticker={ticker}/prices.parquet')
+    p = _price_path(ticker)
+    if not p.exists():
+        return {"available": False}
+    return _cached_block("prices", f"{ticker}-{file_fingerprint([p])}", lambda: _compute_price_summary(p))
+
+
+def _compute_price_summary(p: Path) -> Dict:
     if not p.exists():
         return {"available": False}
     try:
@@ -68,7 +121,7 @@ def _price_summary(ticker: str) -> Dict:
         r_3m = ret(63)
         r_1y = ret(252)
         vol_1m = float(s.pct_change().dropna().tail(21).std()) if len(s) > 21 else None
-        dd = float(1 - s / s.cummax()).max()
+        dd = float((1 - s / s.cummax()).max())
         return {
             "available": True,
             "last": float(s.iloc[-1]),
@@ -83,6 +136,10 @@ def _macro_kpis() -> Dict:
     p = _latest_macro_parquet()
     if not p or not p.exists():
         return {}
+    return _cached_block("macro", file_fingerprint([p]), lambda: _compute_macro_kpis(p))
+
+
+def _compute_macro_kpis(p: Path) -> Dict:
     try:
         df = pd.read_parquet(p)
         def last(*cols):
@@ -103,12 +160,16 @@ def _macro_kpis() -> Dict:
 
 def _news_digest(limit: int = 10) -> List[Dict]:
     p = _latest_news_parquet()
+    src = p if p and p.exists() else Path('data/news.jsonl')
+    return _cached_block("news", f"{limit}-{file_fingerprint([src])}", lambda: _compute_news_digest(p, limit))
+
+
+def _compute_news_digest(p: Optional[Path], limit: int) -> List[Dict]:
     out: List[Dict] = []
     try:
         if p and p.exists():
-            df = pd.read_parquet(p)
-            df = df.head(limit)
-            for _, row in df.iterrows():
+            df = pd.read_parquet(p).head(limit)
+            for row in df.to_dict('records'):
                 out.append({
                     "title": str(row.get('title','')),
                     "summary": str(row.get('summary',''))[:240],
@@ -119,7 +180,6 @@ def _news_digest(limit: int = 10) -> List[Dict]:
             try:
                 # fallback news.jsonl
                 if Path('data/news.jsonl').exists():
-                    import itertools
                     for i, line in zip(range(limit), Path('data/news.jsonl').open('r', encoding='utf-8')):
                         obj = json.loads(line)
                         out.append({
@@ -146,11 +206,46 @@ def _peers_perf(ticker: str, peers: List[str]) -> List[Dict]:
     return out[:10]
 
 
-def build_context_for(ticker: str) -> Dict:
+def build_shared_blocks() -> Dict:
+    """Blocks identical for every ticker of a run (macro KPIs, news digest)."""
+    return {"macro": _macro_kpis(), "news": _news_digest(limit=10)}
+
+
+def _r(v):
+    return round(v, 4) if isinstance(v, float) else v
+
+
+def _fmt_kv(d: Dict) -> str:
+    return "".join(f"- {k}: {_r(v)}\n" for k, v in d.items() if v is not None)
+
+
+def render_prompt(ctx: Dict, token_budget: int = TOKEN_BUDGET) -> str:
+    """Pack a context dict into prompt text within `token_budget` tokens."""
+    prices = {k: v for k, v in (ctx.get('prices') or {}).items() if k != 'available'}
+    news = [
+        f"- [{n.get('source', '')}] {n.get('title', '')} ({n.get('sent', '')})\n"
+        for n in (ctx.get('news') or [])
+    ]
+    peers = [
+        f"- {p.get('ticker')}: 1m={_r(p.get('ret_1m'))}, 3m={_r(p.get('ret_3m'))}, 1y={_r(p.get('ret_1y'))}\n"
+        for p in (ctx.get('peers') or [])
+    ]
+    blocks = [
+        ContextBlock("ticker", header="# Ticker\n", text=f"{ctx.get('ticker')} ({ctx.get('dt')})\n", priority=0, required=True),
+        ContextBlock("prices", header="## Prices\n", text=_fmt_kv(prices), priority=1),
+        ContextBlock("macro", header="## Macro\n", text=_fmt_kv(ctx.get('macro') or {}), priority=2),
+        ContextBlock("news", header="## News\n", items=news, priority=3),
+        ContextBlock("peers", header="## Peers\n", items=peers, priority=4),
+    ]
+    return pack_blocks(blocks, token_budget)
+
+
+def build_context_for(ticker: str, shared: Optional[Dict] = None, watchlist: Optional[List[str]] = None) -> Dict:
+    shared = shared if shared is not None else build_shared_blocks()
     prices = _price_summary(ticker)
-    macro = _macro_kpis()
-    news = _news_digest(limit=10)
-    peers = _peers_perf(ticker, _read_watchlist())
+    macro = shared.get("macro") or {}
+    news = shared.get("news") or []
+    peers = _peers_perf(ticker, watchlist if watchlist is not None else _read_watchlist())
     ctx = {
         "ticker": ticker,
         "dt": today_dt(),
@@ -160,6 +255,7 @@ def build_context_for(ticker: str) -> Dict:
         "peers": peers,
         "meta": {"sources": [s for s,_ in [("prices", prices.get('available')), ("macro", bool(macro)), ("news", bool(news)), ("peers", bool(peers))] if _]}
     }
+    ctx["prompt"] = render_prompt(ctx)
     return ctx
 
 
@@ -176,9 +272,11 @@ def main() -> int:
     ap.add_argument('--tickers', default=','.join(_read_watchlist()))
     args = ap.parse_args()
     tickers = [t.strip().upper() for t in str(args.tickers).split(',') if t.strip()]
+    shared = build_shared_blocks()
+    watchlist = _read_watchlist()
     written = []
     for t in tickers:
-        ctx = build_context_for(t)
+        ctx = build_context_for(t, shared=shared, watchlist=watchlist)
         written.append(str(write_context(ctx)))
     print(json.dumps({"ok": True, "written": len(written), "files": written}))
     return 0
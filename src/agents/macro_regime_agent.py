@@ -5,6 +5,12 @@ Outputs JSON at data/macro/regime/dt=YYYYMMDD/regime.json with:
 - indicators (yoy CPI, yoy GDP, yield_curve_bp, unrate, t10y_ie)
 - regime probabilities for: expansion, slowdown, inflation, deflation
 - text summary in FR (brief)
+
+History: `regime_history(series)` computes the same indicators and probabilities for
+every month-end in one vectorized pass (each value as of that month: lags on the
+series' own observations, then last observation carried to month-end), and
+`run()` persists it at data/macro/regime/history/dt=YYYYMMDD/regimes.parquet,
+recomputing only the months after the previous partition.
 """
 
 from __future__ import annotations
@@ -13,8 +19,14 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any
 import json
+import numpy as np
 import pandas as pd
 
+HISTORY_DIR = Path('data/macro/regime/history')
+SERIES = {'cpi': 'CPIAUCSL', 'gdp': 'GDPC1', 'd10': 'DGS10', 'd2': 'DGS2', 'un': 'UNRATE', 't10yie': 'T10YIE'}
+REGIMES = ['expansion', 'slowdown', 'inflation', 'deflation']
+LOOKBACK_MONTHS = 48  # covers 13 quarterly GDP observations for incremental updates
+
 
 def _yoy(series: pd.Series) -> float | None:
     s = series.dropna()
@@ -91,32 +103,124 @@ def classify_regime(ind: Dict[str, float | None]) -> Dict[str, float]:
     }
 
 
+def _month_end(series: pd.Series) -> pd.Series:
+    """Last observation of each calendar month, indexed by month-end."""
+    s = series.dropna()
+    if s.empty:
+        return s
+    s.index = pd.DatetimeIndex(s.index)
+    return s.resample('ME').last()
+
+
+def indicators_history(frames: Dict[str, pd.DataFrame | None]) -> pd.DataFrame:
+    """Month-end panel of the indicators used by `classify_regime` (same definitions as
+    `_yoy` / `_ch_6m` / `_last`, evaluated as of each month)."""
+    cols: Dict[str, pd.Series] = {}
+
+    def _s(key: str) -> pd.Series:
+        df = frames.get(key)
+        return df.iloc[:, 0].dropna() if df is not None and not df.empty else pd.Series(dtype=float)
+
+    cpi, gdp, d10, d2, un, ie = (_s(k) for k in ('cpi', 'gdp', 'd10', 'd2', 'un', 't10yie'))
+    if len(cpi):
+        cols['cpi_yoy'] = _month_end(cpi / cpi.shift(12) - 1.0)
+    if len(gdp):
+        cols['gdp_yoy'] = _month_end(gdp / gdp.shift(12) - 1.0)
+    if len(d10) and len(d2):
+        idx = _month_end(d10).index.union(_month_end(d2).index)
+        m10 = _month_end(d10).reindex(idx).ffill()
+        m2 = _month_end(d2).reindex(idx).ffill()
+        cols['yield_curve_bp'] = (m10 - m2) * 100.0
+    if len(un):
+        cols['unrate'] = _month_end(un)
+        cols['unrate_ch_6m'] = _month_end(un - un.shift(5))
+    if len(ie):
+        cols['t10y_ie'] = _month_end(ie)
+    if not cols:
+        return pd.DataFrame()
+    panel = pd.DataFrame(cols).sort_index().ffill()
+    panel.index.name = 'date'
+    return panel
+
+
+def classify_regime_frame(ind: pd.DataFrame) -> pd.DataFrame:
+    """`classify_regime` applied to every row of an indicator panel (NaN = missing)."""
+    n = len(ind)
+
+    def col(name: str) -> np.ndarray:
+        return ind[name].to_numpy(dtype=float) if name in ind.columns else np.full(n, np.nan)
+
+    cpi_y, gdp_y, yc_bp, un_6m = col('cpi_yoy'), col('gdp_yoy'), col('yield_curve_bp'), col('unrate_ch_6m')
+    with np.errstate(invalid='ignore'):
+        expansion = (np.where(gdp_y > 0.01, 0.7, 0.0) + np.where((cpi_y >= 0.01) & (cpi_y <= 0.04), 0.5, 0.0)
+                     + np.where(yc_bp > 0, 0.3, 0.0) + np.where(un_6m < -0.2, 0.2, 0.0))
+        slowdown = np.where(gdp_y < 0.005, 0.6, 0.0) + np.where(yc_bp < 0, 0.6, 0.0) + np.where(un_6m > 0.2, 0.5, 0.0)
+        inflation = np.where(cpi_y > 0.04, 0.8, 0.0)
+        deflation = np.where(gdp_y < 0, 0.6, 0.0) + np.where(cpi_y < 0.002, 0.5, 0.0)
+    vec = np.column_stack([expansion, slowdown, inflation, deflation])
+    tot = vec.sum(axis=1, keepdims=True)
+    probs = np.round(vec / np.where(tot > 0, tot, 1.0), 3)
+    out = pd.DataFrame(probs, index=ind.index, columns=REGIMES)
+    out['regime'] = np.array(REGIMES, dtype=object)[probs.argmax(axis=1)]
+    return out
+
+
+def regime_history(frames: Dict[str, pd.DataFrame | None], since: pd.Timestamp | None = None) -> pd.DataFrame:
+    """Indicators + regime probabilities per month-end (from `since`, inclusive, if given)."""
+    ind = indicators_history(frames)
+    if ind.empty:
+        return ind
+    if since is not None:
+        ind = ind[ind.index >= since]
+    return ind.join(classify_regime_frame(ind))
+
+
+def _latest_history() -> pd.DataFrame | None:
+    parts = sorted(HISTORY_DIR.glob('dt=*/regimes.parquet'))
+    if not parts:
+        return None
+    try:
+        return pd.read_parquet(parts[-1])
+    except Exception:
+        return None
+
+
+def update_history(frames: Dict[str, pd.DataFrame | None]) -> pd.DataFrame:
+    """Previous history + the months from its last (possibly partial) month onwards."""
+    prev = _latest_history()
+    if prev is None or prev.empty:
+        hist = regime_history(frames)
+    else:
+        last = prev.index.max()
+        start = last - pd.DateOffset(months=LOOKBACK_MONTHS)
+        recent = {k: (df[df.index >= start] if df is not None else None) for k, df in frames.items()}
+        new = regime_history(recent, since=last)
+        hist = pd.concat([prev[prev.index < last], new]).sort_index()
+    if not hist.empty:
+        outdir = HISTORY_DIR / f"dt={datetime.utcnow().strftime('%Y%m%d')}"
+        outdir.mkdir(parents=True, exist_ok=True)
+        hist.to_parquet(outdir / 'regimes.parquet')
+    return hist
+
+
 def run() -> Path:
     # Local import to reuse repo utils
     from src.core.market_data import get_fred_series
 
-    cpi = get_fred_series('CPIAUCSL')
-    gdp = get_fred_series('GDPC1')
-    d10 = get_fred_series('DGS10')
-    d2 = get_fred_series('DGS2')
-    un = get_fred_series('UNRATE')
-    t10yie = get_fred_series('T10YIE')
+    frames = {k: get_fred_series(sid) for k, sid in SERIES.items()}
+    try:
+        hist = update_history(frames)
+    except Exception as e:
+        # as in recession_agent: history not persisted, regime.json still written
+        print(f"regime history: {e}")
+        hist = regime_history(frames)
 
     ind: Dict[str, Any] = {}
-    if cpi is not None and not cpi.empty:
-        ind['cpi_yoy'] = _yoy(cpi.iloc[:, 0])
-    if gdp is not None and not gdp.empty:
-        ind['gdp_yoy'] = _yoy(gdp.iloc[:, 0])
-    if d10 is not None and not d10.empty and d2 is not None and not d2.empty:
-        try:
-            ind['yield_curve_bp'] = float((d10.iloc[-1, 0] - d2.iloc[-1, 0]) * 100.0)
-        except Exception:
-            ind['yield_curve_bp'] = None
-    if un is not None and not un.empty:
-        ind['unrate'] = _last(un.iloc[:, 0])
-        ind['unrate_ch_6m'] = _ch_6m(un.iloc[:, 0])
-    if t10yie is not None and not t10yie.empty:
-        ind['t10y_ie'] = _last(t10yie.iloc[:, 0])
+    if not hist.empty:
+        last = hist.iloc[-1]
+        for k in ('cpi_yoy', 'gdp_yoy', 'yield_curve_bp', 'unrate', 'unrate_ch_6m', 't10y_ie'):
+            if k in hist.columns and pd.notna(last[k]):
+                ind[k] = float(last[k])
 
     probs = classify_regime(ind)
     # brief summary in FR
@@ -3,43 +3,33 @@ from __future__ import annotations
 import json
 import time
 from pathlib import Path
+from typing import List, Optional
 
-from src.tools.make import run_make
+from src.agents.pipeline import DAILY_STEPS, Pipeline
 
 
-def run_pipeline(step_budget: int = 1) -> dict:
-    """Minimal sequential orchestrator (no external deps).
+def run_pipeline(step_budget: int = 1, force: bool = False, max_workers: int = 4,
+                 only: Optional[List[str]] = None) -> dict:
+    """Daily refresh orchestrator (in-process DAG, see agents.pipeline).
 
-    Steps (best‑effort):
-    - update-monitor (freshness)
+    Steps (best‑effort, dependencies derived from the datasets they read/write):
     - equity-forecast → forecast-aggregate
     - macro-forecast
+    - update-monitor (freshness, after the forecasts it checks)
     - llm-summary-run
     - ui-health (optional; best effort)
-    """
-    results = {"steps": []}
-    def _do(name, target):
-        r = run_make(target)
-        results["steps"].append({"name": name, **r})
-        return r["rc"] == 0
+    - ml-train (batch ML baseline models served by analytics.ml_baseline)
 
+    Independent steps run concurrently; steps whose inputs are unchanged are skipped
+    (unless `force`). `step_budget` keeps the first N steps of DAILY_STEPS.
+    """
     # Limit runs per invocation (guardrail)
     budget = max(1, step_budget)
-    steps = [
-        ("freshness", "update-monitor"),
-        ("equity", "equity-forecast"),
-        ("aggregate", "forecast-aggregate"),
-        ("macro", "macro-forecast"),
-        ("llm_summary", "llm-summary-run"),
-        ("ui_health", "ui-health"),
-    ]
-    for i, (name, target) in enumerate(steps, start=1):
-        if i > budget:
-            break
-        try:
-            _do(name, target)
-        except Exception as e:
-            results["steps"].append({"name": name, "rc": 1, "out": str(e), "duration_ms": 0})
+    names = only or [s.name for s in DAILY_STEPS][:budget]
+    try:
+        results = Pipeline(DAILY_STEPS).run(only=names, force=force, max_workers=max_workers)
+    except Exception as e:
+        results = {"steps": [{"name": "pipeline", "status": "failed", "rc": 1, "out": str(e), "duration_ms": 0}]}
 
     # Write a small summary artifact
     outdir = Path("data/agents_runs"); outdir.mkdir(parents=True, exist_ok=True)
@@ -49,9 +39,8 @@ def run_pipeline(step_budget: int = 1) -> dict:
 
 
 def main():
-    print(json.dumps(run_pipeline(step_budget=6), ensure_ascii=False, indent=2))
+    print(json.dumps(run_pipeline(step_budget=len(DAILY_STEPS)), ensure_ascii=False, indent=2))
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,281 @@
+"""
+In-process DAG pipeline runner for the daily refresh.
+
+Each step declares the dataset partitions it reads (`inputs`) and writes (`outputs`)
+as glob patterns under data/ (`{dt}` = today's partition). Dependencies are derived
+from those declarations: a step runs after every step whose outputs match one of its
+inputs (plus explicit `after`). Ready steps run concurrently in a thread pool inside
+one warm process — no `make`/interpreter start-up per step.
+
+A step is skipped when its input fingerprint (path+size+mtime of the matching files)
+is unchanged since its last successful run and its outputs for today exist.
+State: data/state/pipeline_state.json.
+
+Usage:
+    python -m src.agents.pipeline                 # full daily refresh
+    python -m src.agents.pipeline --only equity aggregate --force
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import glob
+import importlib
+import json
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+_SRC = Path(__file__).resolve().parents[1]
+if str(_SRC) not in sys.path:
+    sys.path.insert(0, str(_SRC))
+
+from core.prompt_context import file_fingerprint, fingerprint  # noqa: E402
+
+STATE_PATH = Path("data/state/pipeline_state.json")
+DT_FMT = "%Y%m%d"
+
+
+def _today_dt() -> str:
+    return datetime.utcnow().strftime(DT_FMT)
+
+
+@dataclass
+class Step:
+    """One pipeline node.
+
+    - fn: callable or "module:attr" (imported lazily, in the worker)
+    - make_target: run `make <target>` instead (for steps without a Python entry point)
+    - inputs/outputs: glob patterns of dataset files; `{dt}` expands to today's partition
+    - after: explicit extra dependencies (step names)
+    - always: never skipped on unchanged inputs (e.g. health checks)
+    """
+    name: str
+    fn: Union[str, Callable[[], Any], None] = None
+    make_target: Optional[str] = None
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+    always: bool = False
+    timeout: int = 900
+
+    def resolve(self) -> Callable[[], Any]:
+        if callable(self.fn):
+            return self.fn
+        if isinstance(self.fn, str):
+            mod, _, attr = self.fn.partition(":")
+            return getattr(importlib.import_module(mod), attr or "run_once")
+        if self.make_target:
+            from tools.make import run_make
+
+            def _make() -> Dict[str, Any]:
+                r = run_make(self.make_target, timeout=self.timeout)
+                if r["rc"] != 0:
+                    raise RuntimeError(f"make {self.make_target} rc={r['rc']}: {r['out'][-2000:]}")
+                return r
+            return _make
+        raise ValueError(f"step {self.name}: no fn or make_target")
+
+
+def _expand(pattern: str, dt: str) -> str:
+    return pattern.replace("{dt}", dt)
+
+
+def _pattern_overlap(out_pat: str, in_pat: str) -> bool:
+    """Does a step output (pattern) feed an input pattern?"""
+    return fnmatch.fnmatch(out_pat, in_pat) or fnmatch.fnmatch(in_pat, out_pat)
+
+
+class Pipeline:
+    def __init__(self, steps: List[Step], state_path: Path = STATE_PATH):
+        names = [s.name for s in steps]
+        if len(set(names)) != len(names):
+            raise ValueError("duplicate step names")
+        self.steps: Dict[str, Step] = {s.name: s for s in steps}
+        self.state_path = Path(state_path)
+        self.deps: Dict[str, set] = {s.name: set(s.after) & set(names) for s in steps}
+        for s in steps:
+            for o in steps:
+                if o.name == s.name:
+                    continue
+                if any(_pattern_overlap(_expand(op, "*"), _expand(ip, "*"))
+                       for op in o.outputs for ip in s.inputs):
+                    self.deps[s.name].add(o.name)
+        self.order = self._toposort()
+
+    def _toposort(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}
+
+        def visit(n: str, path: List[str]) -> None:
+            if state.get(n) == 2:
+                return
+            if state.get(n) == 1:
+                raise ValueError("pipeline cycle: " + " -> ".join(path + [n]))
+            state[n] = 1
+            for d in sorted(self.deps[n]):
+                visit(d, path + [n])
+            state[n] = 2
+            order.append(n)
+
+        for n in self.steps:
+            visit(n, [])
+        return order
+
+    # ---- state / fingerprints
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except Exception:
+            return {"steps": {}}
+
+    def _save_state(self, st: Dict[str, Any]) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps(st, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    @staticmethod
+    def input_fingerprint(step: Step, dt: str) -> str:
+        files = sorted({Path(f) for p in step.inputs for f in glob.glob(_expand(p, dt))})
+        return fingerprint(step.name, step.inputs, file_fingerprint(files))
+
+    @staticmethod
+    def outputs_present(step: Step, dt: str) -> bool:
+        return all(glob.glob(_expand(p, dt)) for p in step.outputs)
+
+    # ---- run
+    def run(self, only: Optional[List[str]] = None, force: bool = False,
+            max_workers: int = 4) -> Dict[str, Any]:
+        """Run the DAG (or the `only` subset, deps outside it treated as satisfied)."""
+        dt = _today_dt()
+        selected = [n for n in self.order if not only or n in only]
+        pending = {n: {d for d in self.deps[n] if d in selected} for n in selected}
+        state = self._load_state()
+        st_steps = state.setdefault("steps", {})
+        results: Dict[str, Dict[str, Any]] = {}
+
+        def _exec(name: str) -> Dict[str, Any]:
+            step = self.steps[name]
+            fp = self.input_fingerprint(step, dt)
+            prev = st_steps.get(name) or {}
+            if (not force and not step.always and prev.get("fingerprint") == fp
+                    and prev.get("status") == "ok" and self.outputs_present(step, dt)):
+                return {"name": name, "status": "skipped", "rc": 0, "duration_ms": 0,
+                        "out": "inputs unchanged", "fingerprint": fp}
+            t0 = time.time()
+            try:
+                ret = step.resolve()()
+                status, rc, out = "ok", 0, ("" if ret is None else str(ret))
+            except Exception as e:
+                status, rc, out = "failed", 1, f"{e}\n" + traceback.format_exc(limit=5)
+            res = {"name": name, "status": status, "rc": rc,
+                   "duration_ms": int((time.time() - t0) * 1000), "out": out[-4000:]}
+            # the fingerprint is recomputed after the run (a step may touch its own inputs)
+            res["fingerprint"] = self.input_fingerprint(step, dt) if status == "ok" else fp
+            return res
+
+        running: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="pipeline") as ex:
+            while pending or running:
+                for n in [n for n, d in pending.items() if not d]:
+                    pending.pop(n)
+                    running[ex.submit(_exec, n)] = n
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for f in done:
+                    n = running.pop(f)
+                    res = f.result()
+                    results[n] = res
+                    prev = st_steps.get(n) or {}
+                    if res["status"] == "ok":
+                        st_steps[n] = {"fingerprint": res["fingerprint"], "status": "ok",
+                                       "last_run": datetime.utcnow().isoformat() + "Z",
+                                       "duration_ms": res["duration_ms"]}
+                    elif res["status"] == "failed":
+                        st_steps[n] = {**prev, "status": "failed"}
+                    if res["status"] == "failed":
+                        self._cancel_dependents(n, pending, results)
+                    for d in pending.values():
+                        d.discard(n)
+        state["last_run"] = datetime.utcnow().isoformat() + "Z"
+        self._save_state(state)
+        return {"dt": dt, "steps": [results[n] for n in selected if n in results]}
+
+    def _cancel_dependents(self, failed: str, pending: Dict[str, set], results: Dict[str, Dict[str, Any]]) -> None:
+        stack = [failed]
+        while stack:
+            cur = stack.pop()
+            for n in [n for n, d in pending.items() if cur in d]:
+                pending.pop(n)
+                results[n] = {"name": n, "status": "upstream_failed", "rc": 1, "duration_ms": 0,
+                              "out": f"dependency {cur} failed"}
+                stack.append(n)
+
+
+# Daily refresh (formerly: make update-monitor / equity-forecast / forecast-aggregate /
+# macro-forecast / llm-summary-run / ui-health, in sequence)
+DAILY_STEPS: List[Step] = [
+    Step("equity", "agents.equity_forecast_agent:run_once",
+         inputs=["data/watchlist.json", "data/prices/ticker=*/prices.parquet"],
+         outputs=["data/forecast/dt={dt}/forecasts.parquet"]),
+    Step("aggregate", "agents.forecast_aggregator_agent:aggregate",
+         inputs=["data/forecast/dt=*/forecasts.parquet"],
+         outputs=["data/forecast/dt={dt}/final.parquet"]),
+    Step("macro", "agents.macro_forecast_agent:run_once",
+         # FRED series are fetched over the network: no local inputs, so it runs once a day
+         outputs=["data/macro/forecast/dt={dt}/macro_forecast.json",
+                  "data/macro/forecast/dt={dt}/macro_forecast.parquet"]),
+    Step("freshness", "agents.update_monitor_agent:run_once",
+         inputs=["data/forecast/dt=*/forecasts.parquet", "data/forecast/dt=*/final.parquet",
+                 "data/macro/forecast/dt=*/macro_forecast.json", "data/quality/dt=*/report.json",
+                 "data/watchlist.json"],
+         outputs=["data/quality/dt={dt}/freshness.json"], always=True),
+    Step("llm_summary", "agents.llm.arbiter_agent:run_llm_summary",
+         inputs=["data/quality/dt=*/freshness.json", "data/macro/forecast/dt=*/macro_forecast.parquet",
+                 "data/forecast/dt=*/final.parquet"],
+         outputs=["data/llm_summary/dt={dt}*/summary.json"]),  # dt=YYYYMMDDHH
+    Step("ui_health", make_target="ui-health", after=["llm_summary"], always=True),
+    Step("news_archive", "ingestion.news_archive:build_archive",
+         inputs=["data/news.jsonl", "data/news/dt=*/*.parquet"],
+         outputs=["data/news_archive/_index.json"]),
+    Step("brief", "research.scoring:materialize_default",
+         # macro/prices/news fetched over the network: refreshed once a day, then on demand
+         outputs=["data/brief/dt={dt}/brief_daily_*.json", "data/brief/dt={dt}/brief_weekly_*.json"]),
+    Step("peers", "analytics.peer_engine:refresh_default",
+         inputs=["data/watchlist.json", "data/prices/ticker=*/prices.parquet"],
+         outputs=["data/peers/corr.parquet"]),
+    Step("sheets", "research.sheets:materialize_watchlist",
+         # one artifact per watchlist ticker, rebuilt after every data refresh (prices/news
+         # are fetched over the network); the API recomputes only unknown tickers
+         inputs=["data/watchlist.json", "data/prices/ticker=*/prices.parquet"],
+         outputs=["data/sheets/*.json"], always=True),
+    Step("features", "research.materialize:materialize_all",
+         # appends only the dates past each symbol's watermark, then today's snapshot
+         outputs=["data/features/dt={dt}/features_flat.parquet"]),
+    Step("ml_train", "analytics.ml_baseline:train_all",
+         inputs=["data/prices/ticker=*/prices.parquet"],
+         outputs=["data/ml/dt={dt}/models.joblib"]),
+]
+
+
+def daily_pipeline() -> Pipeline:
+    return Pipeline(DAILY_STEPS)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="In-process DAG pipeline runner")
+    ap.add_argument("--only", nargs="*", default=None, help="Run only these steps")
+    ap.add_argument("--force", action="store_true", help="Ignore input fingerprints")
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+    res = daily_pipeline().run(only=args.only, force=args.force, max_workers=args.workers)
+    print(json.dumps(res, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,11 @@ Recession Risk Agent — estimates recession probability using macro proxies:
 
 Outputs: data/macro/recession/dt=YYYYMMDD/recession.json
 Fields: asof, inputs, scores (normalized), probability, summary_fr
+
+History: `recession_history(frames)` scores every month-end in one vectorized pass
+(inputs as of that month) and `run()` persists it at
+data/macro/recession/history/dt=YYYYMMDD/recession.parquet (column recession_prob),
+recomputing only the months after the previous partition.
 """
 
 from __future__ import annotations
@@ -16,8 +21,13 @@ from datetime import datetime
 from typing import Dict, Any
 import json
 import math
+import numpy as np
 import pandas as pd
 
+HISTORY_DIR = Path("data/macro/recession/history")
+SERIES = {"d10": "DGS10", "d2": "DGS2", "un": "UNRATE", "nfci": "NFCI", "hy": "BAMLH0A0HYM2"}
+LOOKBACK_MONTHS = 12
+
 
 def _dropna_series(df: pd.DataFrame) -> pd.Series:
     return df.iloc[:, 0].dropna() if df is not None and not df.empty else pd.Series([], dtype=float)
@@ -47,14 +57,87 @@ def _sigmoid(x: float, k: float = 1.0) -> float:
         return 0.5
 
 
+def _month_end(s: pd.Series) -> pd.Series:
+    """Last observation of each calendar month, indexed by month-end."""
+    s = s.dropna()
+    if s.empty:
+        return s
+    s.index = pd.DatetimeIndex(s.index)
+    return s.resample("ME").last()
+
+
+def recession_history(frames: Dict[str, pd.DataFrame | None], since: pd.Timestamp | None = None) -> pd.DataFrame:
+    """Inputs, scores and probability per month-end (same rules as `run`), from `since` if given."""
+    s10, s2, sun, snf, shy = (_dropna_series(frames.get(k)) for k in ("d10", "d2", "un", "nfci", "hy"))
+    cols: Dict[str, pd.Series] = {}
+    if len(s10) and len(s2):
+        cols["d10"], cols["d2"] = _month_end(s10), _month_end(s2)
+    if len(sun):
+        cols["unrate_6m_change"] = _month_end(sun - sun.shift(5))
+    if len(snf):
+        cols["nfci"] = _month_end(snf)
+    if len(shy):
+        cols["hy_spread"] = _month_end(shy)
+    if not cols:
+        return pd.DataFrame()
+    df = pd.DataFrame(cols).sort_index().ffill()
+    if "d10" in df.columns:
+        df["yield_curve_bp"] = (df.pop("d10") - df.pop("d2")) * 100.0
+    if since is not None:
+        df = df[df.index >= since]
+    for c in ("yield_curve_bp", "unrate_6m_change", "nfci", "hy_spread"):
+        if c not in df.columns:
+            df[c] = np.nan
+    df = df[["yield_curve_bp", "unrate_6m_change", "nfci", "hy_spread"]]
+    df.index.name = "date"
+
+    # missing input -> score 0 (as in run)
+    df["score_yield_curve"] = (-df["yield_curve_bp"] / 100.0).clip(0.0, 1.0).fillna(0.0)
+    df["score_unemployment"] = (df["unrate_6m_change"] / 1.0).clip(0.0, 1.0).fillna(0.0)
+    df["score_nfci"] = ((df["nfci"] + 0.1) / 0.6).clip(0.0, 1.0).fillna(0.0)
+    df["score_hy_spread"] = ((df["hy_spread"] - 2.5) / 7.5).clip(0.0, 1.0).fillna(0.0)
+    avg = df[["score_yield_curve", "score_unemployment", "score_nfci", "score_hy_spread"]].sum(axis=1) / 4
+    df["avg"] = avg.round(3)
+    df["recession_prob"] = (1.0 / (1.0 + np.exp(-2.0 * (avg - 0.5)))).round(3)
+    return df
+
+
+def _latest_history() -> pd.DataFrame | None:
+    parts = sorted(HISTORY_DIR.glob("dt=*/recession.parquet"))
+    if not parts:
+        return None
+    try:
+        return pd.read_parquet(parts[-1])
+    except Exception:
+        return None
+
+
+def update_history(frames: Dict[str, pd.DataFrame | None]) -> pd.DataFrame:
+    """Previous history + the months from its last (possibly partial) month onwards."""
+    prev = _latest_history()
+    if prev is None or prev.empty:
+        hist = recession_history(frames)
+    else:
+        last = prev.index.max()
+        start = last - pd.DateOffset(months=LOOKBACK_MONTHS)
+        recent = {k: (df[df.index >= start] if df is not None else None) for k, df in frames.items()}
+        hist = pd.concat([prev[prev.index < last], recession_history(recent, since=last)]).sort_index()
+    if not hist.empty:
+        outdir = HISTORY_DIR / f"dt={datetime.utcnow().strftime('%Y%m%d')}"
+        outdir.mkdir(parents=True, exist_ok=True)
+        hist.to_parquet(outdir / "recession.parquet")
+    return hist
+
+
 def run() -> Path:
     from src.core.market_data import get_fred_series
 
-    d10 = get_fred_series("DGS10")
-    d2 = get_fred_series("DGS2")
-    un = get_fred_series("UNRATE")
-    nfci = get_fred_series("NFCI")
-    hy = get_fred_series("BAMLH0A0HYM2")
+    frames = {k: get_fred_series(sid) for k, sid in SERIES.items()}
+    d10, d2, un, nfci, hy = (frames[k] for k in ("d10", "d2", "un", "nfci", "hy"))
+    try:
+        update_history(frames)
+    except Exception as e:
+        print(f"recession history: {e}")
 
     s10 = _dropna_series(d10)
     s2 = _dropna_series(d2)
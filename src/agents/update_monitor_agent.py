@@ -5,7 +5,14 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, List
 
-import pandas as pd
+try:
+    from core.parquet_stats import summarize_many
+except Exception:  # pragma: no cover
+    import sys as _sys
+    _SRC = Path(__file__).resolve().parents[1]
+    if str(_SRC) not in _sys.path:
+        _sys.path.insert(0, str(_SRC))
+    from core.parquet_stats import summarize_many
 
 
 def _today_dt() -> str:
@@ -43,29 +50,17 @@ def _watchlist() -> List[str]:
 
 
 def _prices_coverage_ok(tickers: List[str], years_min: int = 5) -> float | None:
-    """Return ratio of tickers whose local parquet coverage >= years_min (best-effort)."""
-    ok = 0
-    seen = 0
-    for t in tickers:
-        try:
-            p = Path('data/prices')/f'ticker={t}'/'prices.parquet'
-            if not p.exists():
-                continue
-            df = pd.read_parquet(p)
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'], errors='coerce')
-                df = df.set_index('date')
-            if df.empty:
-                continue
-            age_days = (df.index.max() - df.index.min()).days
-            if age_days >= years_min*365 - 5:
-                ok += 1
-            seen += 1
-        except Exception:
-            continue
-    if seen == 0:
+    """Return ratio of tickers whose local parquet coverage >= years_min (best-effort).
+
+    Uses cached Parquet footer statistics (core.parquet_stats), not full reads.
+    """
+    paths = [Path('data/prices')/f'ticker={t}'/'prices.parquet' for t in tickers]
+    sums = summarize_many([p for p in paths if p.exists()])
+    spans = [sm.get('span_days') for sm in sums.values() if sm.get('rows')]
+    spans = [s for s in spans if s is not None]
+    if not spans:
         return None
-    return ok/seen
+    return sum(1 for s in spans if s >= years_min*365 - 5)/len(spans)
 
 
 def run_once() -> Dict[str, Any]:
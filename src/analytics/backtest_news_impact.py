@@ -40,9 +40,10 @@ from __future__ import annotations
 import argparse
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
 import numpy as np
@@ -50,7 +51,6 @@ import pandas as pd
 
 from core.io_utils import read_jsonl, write_jsonl, Cache, get_artifacts_dir
 from core.stock_utils import fetch_price_history
-from ingestion.finnews import Article  # Import the Article class from finnews.py
 
 try:
     import yfinance as yf
@@ -78,7 +78,16 @@ def ensure_tz_utc(ts: datetime) -> datetime:
     return ts.astimezone(timezone.utc)
 
 
-# Article class imported from ingestion.finnews at top of file
+@dataclass
+class Article:
+    ts: datetime
+    tickers: List[str]
+    sentiment: float
+    event_class: Optional[str] = None
+    relevance: Optional[float] = None
+    source: Optional[str] = None
+    region: Optional[str] = None
+    id: Optional[str] = None
 
 
 # ---------------------------
@@ -90,6 +99,9 @@ def load_news(jsonl_path: str,
               min_relevance: Optional[float] = None,
               min_abs_sent: Optional[float] = None,
               max_age_days: Optional[int] = None) -> List[Article]:
+    if os.path.isdir(jsonl_path):
+        return load_news_archive(jsonl_path, region_filter=region_filter, min_relevance=min_relevance,
+                                 min_abs_sent=min_abs_sent, max_age_days=max_age_days)
     rows: List[Article] = []
     with open(jsonl_path, "r", encoding="utf-8") as f:
         for line in f:
@@ -150,6 +162,32 @@ def load_news(jsonl_path: str,
     return rows
 
 
+def load_news_archive(root: str,
+                      region_filter: Optional[str] = None,
+                      min_relevance: Optional[float] = None,
+                      min_abs_sent: Optional[float] = None,
+                      max_age_days: Optional[int] = None,
+                      tickers: Optional[List[str]] = None) -> List[Article]:
+    """Same articles as `load_news`, read from the columnar archive (ingestion.news_archive)
+    with the filters pushed down to the Parquet scan."""
+    from ingestion.news_archive import scan
+
+    start = datetime.now(timezone.utc) - timedelta(days=max_age_days + 1) if max_age_days is not None else None
+    tbl = scan(tickers=tickers, start=start, regions=[region_filter] if region_filter else None,
+               min_relevance=min_relevance, min_abs_sent=min_abs_sent, require_tickers=True,
+               columns=["id", "ts", "tickers", "sentiment", "event_class", "relevance", "source", "region"],
+               root=root)
+    now = datetime.now(timezone.utc)
+    out: List[Article] = []
+    for r in tbl.to_pylist():
+        if max_age_days is not None and (now - r["ts"]).days > max_age_days:
+            continue
+        out.append(Article(ts=r["ts"].astimezone(timezone.utc), tickers=r["tickers"], sentiment=r["sentiment"],
+                           event_class=r["event_class"], relevance=r["relevance"],
+                           source=r["source"], region=r["region"], id=r["id"]))
+    return out
+
+
 # ---------------------------
 # Market data with light cache
 # ---------------------------
@@ -265,6 +303,56 @@ def compute_market_model_AR(stock: pd.Series, market: pd.Series, event_loc: int,
     return df, stats_out
 
 
+def _rolling_sums(x: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """sum(x[start:end]) for many windows at once (prefix sums)."""
+    c = np.concatenate([[0.0], np.cumsum(x)])
+    return c[end] - c[start]
+
+
+def market_model_event_study(stock: np.ndarray, market: np.ndarray, event_locs: np.ndarray,
+                             pre: int, post: int, est_len: int) -> Dict[str, np.ndarray]:
+    """Vectorized `compute_market_model_AR` for all events of one ticker.
+
+    stock/market are aligned daily returns, event_locs the D0 positions. All estimation
+    windows [loc-est_len-1, loc-1) are fitted at once from rolling sums (OLS alpha/beta),
+    and AR/CAR are returned as (n_events, post-pre+1) matrices. `ok` flags events with
+    enough estimation data and a complete event window.
+    """
+    stock = np.asarray(stock, dtype=float)
+    market = np.asarray(market, dtype=float)
+    locs = np.asarray(event_locs, dtype=np.int64)
+    n = len(stock)
+    est_start = np.maximum(0, locs - est_len - 1)
+    est_end = np.maximum(0, locs - 1)
+    m = (est_end - est_start).astype(float)
+    sx = _rolling_sums(market, est_start, est_end)
+    sy = _rolling_sums(stock, est_start, est_end)
+    sxx = _rolling_sums(market * market, est_start, est_end)
+    sxy = _rolling_sums(market * stock, est_start, est_end)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = (m * sxy - sx * sy) / (m * sxx - sx * sx)
+        alpha = (sy - beta * sx) / m
+
+    ks = np.arange(pre, post + 1)
+    pos = locs[:, None] + ks[None, :]
+    ok = (m >= est_len // 2) & (locs + pre >= 0) & (locs + post < n) & np.isfinite(beta)
+    pos = np.clip(pos, 0, max(0, n - 1))
+    s_win = stock[pos]
+    m_win = market[pos]
+    ar = s_win - (alpha[:, None] + beta[:, None] * m_win)
+    car = np.cumsum(ar, axis=1)
+    out = {"ok": ok, "alpha": alpha, "beta": beta, "ret_stock": s_win, "ret_mkt": m_win,
+           "ar": ar, "car": car, "ks": ks}
+    if stats is not None and len(ks) > 1:
+        for key, mat in (("ar", ar), ("car", car)):
+            t_col, p_col = np.full(len(locs), np.nan), np.full(len(locs), np.nan)
+            if ok.any():
+                t, p = stats.ttest_1samp(mat[ok], 0.0, axis=1, nan_policy='omit')
+                t_col[ok], p_col[ok] = t, p
+            out[f"t_{key}"], out[f"p_{key}"] = t_col, p_col
+    return out
+
+
 def make_daily_returns(df: pd.DataFrame) -> pd.Series:
     close = df["close"].astype(float)
     rets = close.pct_change().dropna()
@@ -306,10 +394,15 @@ def run_backtest(news_path: str,
     mkt_df = fetch_daily_prices(index_ticker, ts_min, ts_max, cache)
     mkt_ret = make_daily_returns(mkt_df)
 
-    per_event_rows = []
     diagnostics = {"articles": len(arts), "tickers": len(tickers), "errors": 0}
-
-    for tkr in tickers:
+    by_ticker: Dict[str, List[Article]] = {t: [] for t in tickers}
+    for a in arts:
+        for t in a.tickers:
+            if t in by_ticker:
+                by_ticker[t].append(a)
+
+    def _ticker_events(tkr: str) -> Tuple[Optional[pd.DataFrame], int]:
+        """All events of one ticker on a single aligned return matrix."""
         try:
             df = fetch_daily_prices(tkr, ts_min, ts_max, cache)
             s_ret = make_daily_returns(df)
@@ -317,56 +410,54 @@ def run_backtest(news_path: str,
             pair = pd.concat([s_ret, mkt_ret], axis=1, join="inner")
             pair.columns = ["s", "m"]
             if pair.empty:
-                continue
+                return None, 0
         except Exception:
-            diagnostics["errors"] = diagnostics.get("errors", 0) + 1
-            continue
-
-        for a in [a for a in arts if tkr in a.tickers]:
-            # find event day index into pair
-            d0 = nearest_trading_day(pair, a.ts)
-            # event_loc is index position of d0 in pair
-            try:
-                event_loc = pair.index.get_indexer_for([d0])[0]
-            except Exception:
-                continue
-            try:
-                df_ev, stat = compute_market_model_AR(
-                    stock=pair["s"], market=pair["m"], event_loc=event_loc,
-                    pre=window_pre, post=window_post, est_len=est_days,
-                )
-            except Exception:
-                diagnostics["errors"] = diagnostics.get("errors", 0) + 1
-                continue
-
-            car_last = float(df_ev["car"].iloc[-1]) if not df_ev.empty else np.nan
-            row = {
-                "id": a.id,
-                "ticker": tkr,
-                "source": a.source,
-                "region": a.region,
-                "timestamp": a.ts.isoformat(),
-                "sentiment": a.sentiment,
-                "event_class": a.event_class,
-                "relevance": a.relevance,
-                "alpha": stat.get("alpha"),
-                "beta": stat.get("beta"),
-                "car_end": car_last,
-                "t_ar": stat.get("t_ar"),
-                "p_ar": stat.get("p_ar"),
-                "t_car": stat.get("t_car"),
-                "p_car": stat.get("p_car"),
-            }
-            # attach per-day CAR/AR columns with k=-1..+post
-            for k, r in df_ev.iterrows():
-                row[f"ar_{k}"] = float(r["ar"]) if pd.notna(r["ar"]) else np.nan
-                row[f"car_{k}"] = float(r["car"]) if pd.notna(r["car"]) else np.nan
-            per_event_rows.append(row)
-
-    if not per_event_rows:
+            return None, 1
+        evs = by_ticker[tkr]
+        # D0 = first trading day at/after the article (last day if none)
+        ev_ts = pd.DatetimeIndex([pd.Timestamp(a.ts) for a in evs])
+        locs = np.minimum(pair.index.searchsorted(ev_ts), len(pair) - 1)
+        res = market_model_event_study(pair["s"].to_numpy(), pair["m"].to_numpy(), locs,
+                                       pre=window_pre, post=window_post, est_len=est_days)
+        ok = res["ok"]
+        errors = int((~ok).sum())
+        if not ok.any():
+            return None, errors
+        sel = [a for a, keep in zip(evs, ok) if keep]
+        none = [None] * len(sel)
+        cols: Dict[str, Any] = {
+            "id": [a.id for a in sel],
+            "ticker": tkr,
+            "source": [a.source for a in sel],
+            "region": [a.region for a in sel],
+            "timestamp": [a.ts.isoformat() for a in sel],
+            "sentiment": [a.sentiment for a in sel],
+            "event_class": [a.event_class for a in sel],
+            "relevance": [a.relevance for a in sel],
+            "alpha": res["alpha"][ok],
+            "beta": res["beta"][ok],
+            "car_end": res["car"][ok, -1],
+        }
+        for k in ("t_ar", "p_ar", "t_car", "p_car"):
+            cols[k] = res[k][ok] if k in res else none
+        # per-day AR/CAR columns with k=pre..+post
+        for j, k in enumerate(res["ks"]):
+            cols[f"ar_{k}"] = res["ar"][ok, j]
+            cols[f"car_{k}"] = res["car"][ok, j]
+        return pd.DataFrame(cols), errors
+
+    per_event_frames: List[pd.DataFrame] = []
+    workers = max(1, min(int(os.getenv("EVENT_STUDY_WORKERS", "8")), len(tickers) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for frame, errors in ex.map(_ticker_events, tickers):
+            diagnostics["errors"] += errors
+            if frame is not None:
+                per_event_frames.append(frame)
+
+    if not per_event_frames:
         raise SystemExit("No per-event results computed.")
 
-    per_event = pd.DataFrame(per_event_rows)
+    per_event = pd.concat(per_event_frames, ignore_index=True)
     per_event.to_csv(os.path.join(out_dir, "per_event.csv"), index=False)
 
     # Aggregates
@@ -415,11 +506,7 @@ def run_backtest(news_path: str,
             ks = sorted({int(c.split("_")[1]) for c in per_event.columns if c.startswith("car_") and c != "car_end"})
             idx = pd.Index(ks, name="day")
             for bucket, sub in per_event.groupby("bucket_sentiment"):
-                mat = []
-                for _, r in sub.iterrows():
-                    row = [r.get(f"car_{k}", np.nan) for k in ks]
-                    mat.append(row)
-                M = np.array(mat, dtype=float)
+                M = sub[[f"car_{k}" for k in ks]].to_numpy(dtype=float)
                 avg = np.nanmean(M, axis=0)
                 plt.figure()
                 plt.plot(idx, avg)
@@ -440,7 +527,8 @@ def run_backtest(news_path: str,
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser(description="Backtest news impact via event study (daily)")
-    p.add_argument("--news", required=True, help="Path to enriched JSONL news (from finnews.py + nlp_enrich.py)")
+    p.add_argument("--news", required=True, help="Path to enriched JSONL news (from finnews.py + nlp_enrich.py) "
+                                                 "or a news archive directory (ingestion.news_archive)")
     p.add_argument("--index", default="SPY", help="Market index ticker for baseline (e.g., SPY, ^GSPTSE, ^GDAXI)")
     p.add_argument("--out", default="out_backtest", help="Output directory")
     p.add_argument("--window", nargs="+", default=["-1","1"],help="pre post window in days. Examples: --window -1 1   or   --window -1,1")
@@ -9,6 +9,15 @@ import re
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+try:
+    from core.prompt_context import ContextBlock, pack_blocks, fingerprint
+except Exception:  # pragma: no cover - script mode (src/ not on sys.path)
+    from pathlib import Path as _Path
+    _SRC = _Path(__file__).resolve().parents[1]
+    if str(_SRC) not in sys.path:
+        sys.path.insert(0, str(_SRC))
+    from core.prompt_context import ContextBlock, pack_blocks, fingerprint
+
 try:
     from g4f.client import Client as G4FClient
 except Exception as e:
@@ -70,6 +79,8 @@ def _pick_top3_distinct(models: List[str]) -> List[str]:
 
 # ======== Hyperparams =========================================================
 CHAR_BUDGET = int(os.getenv("ECON_AGENT_CHAR_BUDGET", "60000"))
+# Budget réel en tokens pour le contexte (défaut ≈ CHAR_BUDGET / 4)
+TOKEN_BUDGET = int(os.getenv("ECON_AGENT_TOKEN_BUDGET", str(CHAR_BUDGET // 4)))
 MAX_TOKENS = int(os.getenv("ECON_AGENT_MAX_TOKENS", "2048"))
 TEMPERATURE = float(os.getenv("ECON_AGENT_TEMPERATURE", "0.2"))
 TIMEOUT = int(os.getenv("ECON_AGENT_TIMEOUT", "60"))
@@ -155,10 +166,9 @@ def _format_features(feat: Dict[str, Any]) -> str:
     except Exception:
         return "## Features\n" + json.dumps(feat, ensure_ascii=False, indent=2) + "\n"
 
-def _format_news(news: List[Dict[str, Any]], limit_items: int = 50) -> str:
-    items = news[:limit_items]
+def _news_items(news: List[Dict[str, Any]], limit_items: int = 50) -> List[str]:
     lines = []
-    for i, n in enumerate(items, 1):
+    for i, n in enumerate(news[:limit_items], 1):
         ts = n.get("ts") or n.get("timestamp") or n.get("time") or ""
         src = n.get("source") or ""
         title = n.get("title") or n.get("headline") or ""
@@ -170,14 +180,17 @@ def _format_news(news: List[Dict[str, Any]], limit_items: int = 50) -> str:
             f"{i}. [{ts}] {src} | {title}\n"
             f"    sentiment: {sent} | tickers: {tickers}\n"
             f"    {summary}\n"
-            f"    {link}\n"
+            f"    {link}\n\n"
         )
+    return lines
+
+def _format_news(news: List[Dict[str, Any]], limit_items: int = 50) -> str:
+    lines = _news_items(news, limit_items)
     more = "" if len(news) <= limit_items else f"... et {len(news) - limit_items} de plus\n"
-    return "## News\n" + "\n".join(lines) + more
+    return "## News\n" + "".join(lines) + more
 
-def _format_attachments(atts: List[JSONLike], limit_chars_each: int = 8000, limit_total: int = 40000) -> str:
+def _attachment_items(atts: List[JSONLike], limit_chars_each: int = 8000) -> List[str]:
     chunks: List[str] = []
-    total = 0
     for idx, a in enumerate(atts, 1):
         try:
             if isinstance(a, (dict, list)):
@@ -187,33 +200,40 @@ def _format_attachments(atts: List[JSONLike], limit_chars_each: int = 8000, limi
         except Exception:
             txt = str(a)
         txt = _truncate(txt, limit_chars_each)
+        chunks.append(f"### Attachment #{idx}\n{txt}\n\n")
+    return chunks
+
+def _format_attachments(atts: List[JSONLike], limit_chars_each: int = 8000, limit_total: int = 40000) -> str:
+    chunks: List[str] = []
+    total = 0
+    for txt in _attachment_items(atts, limit_chars_each):
         if total + len(txt) > limit_total:
             break
         total += len(txt)
-        chunks.append(f"### Attachment #{idx}\n{txt}\n")
-    return "## Attachments\n" + ("\n".join(chunks) if chunks else "(none)\n")
+        chunks.append(txt)
+    return "## Attachments\n" + ("".join(chunks) if chunks else "(none)\n")
 
-def _build_context(ein: EconomicInput, char_budget: int) -> str:
-    parts: List[str] = []
-    parts.append(f"# Question\n{ein.question}\n")
+def _context_blocks(ein: EconomicInput) -> List[ContextBlock]:
+    """Sections du prompt, par priorité : question > features > news > pièces jointes > meta."""
+    blocks = [ContextBlock("question", header="# Question\n", text=f"{ein.question}\n", priority=0, required=True)]
     if ein.features:
-        parts.append(_format_features(ein.features))
+        blocks.append(ContextBlock("features", text=_format_features(ein.features), priority=1))
     if ein.news:
-        news_budget = int(char_budget * 0.4)
-        news_block = _format_news(ein.news, limit_items=120)
-        parts.append(_truncate(news_block, news_budget))
+        blocks.append(ContextBlock("news", header="## News\n", items=_news_items(ein.news, limit_items=120), priority=2))
     if ein.attachments:
-        att_budget = int(char_budget * 0.4)
-        att_block = _format_attachments(ein.attachments)
-        parts.append(_truncate(att_block, att_budget))
+        blocks.append(ContextBlock("attachments", header="## Attachments\n", items=_attachment_items(ein.attachments), priority=3))
     if ein.meta:
         try:
             meta_txt = json.dumps(ein.meta, ensure_ascii=False, indent=2)
         except Exception:
             meta_txt = str(ein.meta)
-        parts.append("## Meta\n" + _truncate(meta_txt, int(char_budget * 0.1)))
-    ctx = "\n".join(parts)
-    return _truncate(ctx, char_budget)
+        blocks.append(ContextBlock("meta", header="## Meta\n", text=meta_txt + "\n", priority=4))
+    return blocks
+
+def _build_context(ein: EconomicInput, char_budget: int, token_budget: Optional[int] = None) -> str:
+    """Assemble le contexte dans un budget en tokens (blocs entiers, par priorité)."""
+    budget = token_budget if token_budget is not None else max(1, char_budget // 4)
+    return pack_blocks(_context_blocks(ein), budget, more_fmt="... et {n} de plus\n")
 
 def _pick_system_prompt(locale: str) -> str:
     return SYSTEM_PROMPT_FR if (locale or "").lower().startswith("fr") else SYSTEM_PROMPT_EN
@@ -358,6 +378,7 @@ class EconomicAnalyst:
         timeout: int = TIMEOUT,
         retries_per_model: int = RETRIES_PER_MODEL,
         char_budget: int = CHAR_BUDGET,
+        token_budget: int = TOKEN_BUDGET,
     ):
         env_models = self._load_models_from_env()
         base = env_models or model_candidates or DEFAULT_MODEL_CANDIDATES
@@ -397,6 +418,8 @@ class EconomicAnalyst:
         self.timeout = timeout
         self.retries_per_model = retries_per_model
         self.char_budget = char_budget
+        self.token_budget = token_budget
+        self._context_cache: Dict[str, str] = {}
         self.client = G4FClient()
 
     def _load_models_from_env(self) -> Optional[List[str]]:
@@ -407,7 +430,13 @@ class EconomicAnalyst:
 
     def _build_messages(self, data: EconomicInput) -> List[Dict[str, str]]:
         system_prompt = _pick_system_prompt(data.locale)
-        context = _build_context(data, self.char_budget)
+        key = fingerprint(data.question, data.features, data.news, data.attachments, data.meta, self.token_budget)
+        context = self._context_cache.get(key)
+        if context is None:
+            context = _build_context(data, self.char_budget, self.token_budget)
+            if len(self._context_cache) >= 32:
+                self._context_cache.pop(next(iter(self._context_cache)))
+            self._context_cache[key] = context
         return [
             {"role": "system", "content": system_prompt},
             {
@@ -0,0 +1,202 @@
+"""
+Vectorized forecast evaluation against the local price store.
+
+- `load_prices(tickers)` reads each `data/prices/ticker=X/prices.parquet` once
+  (date + close columns only, cached by file mtime) into sorted numpy arrays.
+- `attach_realized(df, horizons)` resolves every forecast date with `searchsorted`
+  (first trading day >= forecast date) per ticker and computes the realized return for
+  all horizons at once (`realized_1w`, `realized_1m`, ...). Forecasts whose horizon
+  has not elapsed yet get NaN instead of a truncated return.
+- `evaluate(df, by)` gives MAE / RMSE / hit ratio and confidence calibration
+  (Brier score, expected calibration error, per-bin table) per provider.
+
+Used by agents.evaluation_agent and agents.backtest_agent.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+HORIZON_TO_DAYS = {"1w": 5, "1m": 21, "1y": 252}
+DIR_MAP = {"up": 1.0, "down": -1.0, "flat": 0.0}
+PRICES_DIR = Path("data/prices")
+
+_PRICE_CACHE: Dict[str, Tuple[int, np.ndarray, np.ndarray]] = {}
+
+
+def _read_close(p: Path) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    try:
+        names = set(pq.read_schema(p).names)
+        col = "Close" if "Close" in names else "close" if "close" in names else None
+        if col is None:
+            return None
+        # the pandas index (dates, when there is no "date" column) is restored with the columns
+        df = pd.read_parquet(p, columns=["date", col] if "date" in names else [col])
+    except Exception:
+        return None
+    if "date" in df.columns:
+        dates = pd.to_datetime(df["date"], errors="coerce")
+    else:
+        dates = pd.to_datetime(pd.Series(df.index), errors="coerce")
+    if getattr(dates.dt, "tz", None) is not None:
+        dates = dates.dt.tz_convert(None)
+    s = pd.DataFrame({"d": dates.to_numpy(), "c": pd.to_numeric(df[col], errors="coerce").to_numpy()})
+    s = s.dropna().sort_values("d").drop_duplicates("d", keep="last")
+    return s["d"].to_numpy("datetime64[ns]"), s["c"].to_numpy(float)
+
+
+def load_prices(tickers: Iterable[str], base: Path = PRICES_DIR,
+                max_workers: int = 8) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """(dates, closes) per ticker, each file read once (re-read only when it changes)."""
+    out: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    todo: List[Tuple[str, Path, int]] = []
+    for t in dict.fromkeys(str(t) for t in tickers):
+        p = Path(base) / f"ticker={t}" / "prices.parquet"
+        try:
+            mtime = p.stat().st_mtime_ns
+        except OSError:
+            continue
+        hit = _PRICE_CACHE.get(str(p))
+        if hit and hit[0] == mtime:
+            out[t] = (hit[1], hit[2])
+        else:
+            todo.append((t, p, mtime))
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as ex:
+            for (t, p, mtime), res in zip(todo, ex.map(lambda x: _read_close(x[1]), todo)):
+                if res is None or len(res[0]) == 0:
+                    continue
+                _PRICE_CACHE[str(p)] = (mtime, res[0], res[1])
+                out[t] = res
+    return out
+
+
+def attach_realized(df: pd.DataFrame, horizons: Mapping[str, int] = HORIZON_TO_DAYS,
+                    date_col: str = "dt", ticker_col: str = "ticker",
+                    prices: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None) -> pd.DataFrame:
+    """Add `realized_<h>` columns (one vectorized join per ticker, all horizons at once)."""
+    df = df.copy()
+    for h in horizons:
+        df[f"realized_{h}"] = np.nan
+    if df.empty:
+        return df
+    tickers = df[ticker_col].astype(str)
+    prices = prices if prices is not None else load_prices(tickers.unique())
+    when = pd.to_datetime(df[date_col], errors="coerce")
+    if getattr(when.dt, "tz", None) is not None:
+        when = when.dt.tz_convert(None)
+    when = when.to_numpy("datetime64[ns]")
+    steps = np.asarray(list(horizons.values()), dtype=np.int64)
+    out = np.full((len(df), len(steps)), np.nan)
+    for t, rows in tickers.groupby(tickers).indices.items():
+        if t not in prices:
+            continue
+        dates, close = prices[t]
+        d = when[rows]
+        valid = ~np.isnat(d)
+        pos = np.searchsorted(dates, d, side="left")          # first trading day >= forecast date
+        ok = valid & (pos < len(dates))
+        tgt = pos[:, None] + steps[None, :]
+        matured = ok[:, None] & (tgt < len(dates))
+        p0 = close[np.minimum(pos, len(dates) - 1)]
+        p1 = close[np.minimum(tgt, len(dates) - 1)]
+        out[rows] = np.where(matured, p1 / p0[:, None] - 1.0, np.nan)
+    for k, h in enumerate(horizons):
+        df[f"realized_{h}"] = out[:, k]
+    return df
+
+
+def realized_for_rows(df: pd.DataFrame, default_horizon: str,
+                      horizons: Mapping[str, int] = HORIZON_TO_DAYS) -> pd.Series:
+    """Pick each row's realized return for its own `horizon` (or `default_horizon`)."""
+    h = df["horizon"].astype(str) if "horizon" in df.columns else pd.Series(default_horizon, index=df.index)
+    h = h.where(h.isin(list(horizons)), default_horizon)
+    out = pd.Series(np.nan, index=df.index)
+    for name in horizons:
+        m = (h == name).to_numpy()
+        if m.any():
+            out[m] = df.loc[m, f"realized_{name}"]
+    return out
+
+
+def _group_metrics(g: pd.DataFrame, n_bins: int) -> dict:
+    g = g.dropna(subset=["realized_return"])
+    n = len(g)
+    if n == 0:
+        return {"count": 0, "mae": None, "rmse": None, "hit_ratio": None,
+                "brier": None, "ece": None, "calibration": []}
+    real = g["realized_return"].to_numpy(float)
+    exp = g["_exp"].to_numpy(float)
+    err = real - exp
+    hit = (np.sign(real) == np.sign(g["_dir"].to_numpy(float))).astype(float)
+    res = {"count": int(n), "mae": float(np.abs(err).mean()), "rmse": float(np.sqrt((err ** 2).mean())),
+           "hit_ratio": float(hit.mean()), "brier": None, "ece": None, "calibration": []}
+    conf = g["_conf"].to_numpy(float)
+    has = ~np.isnan(conf)
+    if has.any():
+        c, y = np.clip(conf[has], 0.0, 1.0), hit[has]
+        res["brier"] = float(((c - y) ** 2).mean())
+        b = np.minimum((c * n_bins).astype(int), n_bins - 1)
+        cnt = np.bincount(b, minlength=n_bins)
+        sc = np.bincount(b, weights=c, minlength=n_bins)
+        sy = np.bincount(b, weights=y, minlength=n_bins)
+        nz = cnt > 0
+        res["ece"] = float((np.abs(sc[nz] - sy[nz])).sum() / cnt.sum())
+        res["calibration"] = [
+            {"bin": f"{i / n_bins:.1f}-{(i + 1) / n_bins:.1f}", "n": int(cnt[i]),
+             "confidence": float(sc[i] / cnt[i]), "hit_ratio": float(sy[i] / cnt[i])}
+            for i in np.flatnonzero(nz)
+        ]
+    return res
+
+
+def evaluate(df: pd.DataFrame, by: Optional[str] = None, n_bins: int = 10) -> Dict[str, dict]:
+    """MAE / RMSE / hit ratio / calibration per `by` group (or 'all').
+
+    Needs `realized_return`; uses `expected_return` (else 0) for errors and `direction`
+    (else the sign of expected_return) for hits; `confidence` for calibration.
+    """
+    d = pd.DataFrame(index=df.index)
+    d["realized_return"] = pd.to_numeric(df["realized_return"], errors="coerce")
+    d["_exp"] = pd.to_numeric(df["expected_return"], errors="coerce").fillna(0.0) \
+        if "expected_return" in df.columns else 0.0
+    d["_dir"] = df["direction"].map(DIR_MAP).fillna(0.0) if "direction" in df.columns else np.sign(d["_exp"])
+    d["_conf"] = pd.to_numeric(df["confidence"], errors="coerce") if "confidence" in df.columns else np.nan
+    if by and by in df.columns:
+        keys = df[by].fillna("unknown").astype(str)
+        return {str(k): _group_metrics(g, n_bins) for k, g in d.groupby(keys)}
+    return {"all": _group_metrics(d, n_bins)}
+
+
+def load_forecasts(days_back: int = 180, base: Path = Path("data/forecast"),
+                   filename: str = "forecasts.parquet", fallback: str = "final.parquet") -> pd.DataFrame:
+    """All forecast partitions within `days_back` of the latest one, with a `dt` column."""
+    parts = sorted(Path(base).glob("dt=*"))
+    if not parts:
+        return pd.DataFrame()
+    last = pd.to_datetime(parts[-1].name.split("=", 1)[1], errors="coerce")
+    frames = []
+    for part in parts:
+        pdt = pd.to_datetime(part.name.split("=", 1)[1], errors="coerce")
+        if pd.notna(last) and pd.notna(pdt) and (last - pdt).days > days_back:
+            continue
+        f = part / filename if (part / filename).exists() else part / fallback
+        if not f.exists():
+            continue
+        try:
+            x = pd.read_parquet(f)
+        except Exception:
+            continue
+        if "dt" not in x.columns:
+            x["dt"] = pd.to_datetime(x["date"], errors="coerce") if "date" in x.columns else pdt
+        frames.append(x)
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    df["dt"] = pd.to_datetime(df["dt"], errors="coerce")
+    return df
@@ -0,0 +1,25 @@
+"""
+Minimal technical indicators in pandas (no `ta` dependency).
+
+Fallback for analytics.phase2_technical.compute_indicators: returns a copy of the
+OHLCV frame with lowercase columns sma20, sma50, rsi (14, Wilder), macd and
+macd_signal (12/26/9 EMAs).
+"""
+from __future__ import annotations
+
+import pandas as pd
+
+
+def compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    close = pd.to_numeric(out["Close"], errors="coerce")
+    out["sma20"] = close.rolling(20).mean()
+    out["sma50"] = close.rolling(50).mean()
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+    out["rsi"] = 100 - 100 / (1 + gain / loss)
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    out["macd"] = macd
+    out["macd_signal"] = macd.ewm(span=9, adjust=False).mean()
+    return out
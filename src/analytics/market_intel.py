@@ -11,6 +11,11 @@ Sorties:
 - "features": dict de métriques (globales ou par ticker s'il est fourni)
 - "meta": contexte & sources utilisées
 
+Snapshots multi-tickers (`build_snapshots`): la partie partagée (news globales,
+futures, macro) est calculée une seule fois et mise en cache (TTL
+MARKET_INTEL_SHARED_TTL, 600 s par défaut) ; les parties par ticker (ownership,
+finviz société/options, sélection des news) sont collectées en parallèle.
+
 Usage CLI:
   python -m src.analytics.market_intel run \
       --regions US,CA,INTL --window last_week --limit 200 \
@@ -23,17 +28,26 @@ Auteur: toi
 """
 from __future__ import annotations
 
-import os, re, sys, json, argparse, datetime as dt
-from typing import Any, Dict, List, Optional, Tuple
+import os, re, sys, json, argparse, threading, datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 from collections import Counter, defaultdict
 
 # ========= Imports internes (best effort) =========
 try:
     from ..ingestion.finnews import run_pipeline as finnews_run, build_news_features as finnews_build_features
+    from ..ingestion.finnews import _score_relevance as finnews_score_relevance
 except Exception as e:
     finnews_run = None
     finnews_build_features = None
+    finnews_score_relevance = None
+
+try:
+    from ..core.cache import TTLCache
+except Exception:
+    from core.cache import TTLCache
 
 try:
     from ..ingestion.financials_ownership_client import build_ownership_snapshot
@@ -91,6 +105,11 @@ def _safe_get(d: Dict[str,Any], *path, default=None):
 CACHE_DIR = Path(os.getenv("MARKET_INTEL_CACHE","cache/market_intel"))
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+# Partie partagée des snapshots (news globales / futures / macro), clé = paramètres
+SHARED_TTL = int(os.getenv("MARKET_INTEL_SHARED_TTL", "600"))
+_SHARED = TTLCache(ttl_seconds=SHARED_TTL, maxsize=32)
+_SHARED_LOCK = threading.Lock()
+
 # ============== Normalisation News (min) ==============
 
 def _news_to_minimal(item: Dict[str,Any]) -> Dict[str,Any]:
@@ -103,6 +122,7 @@ def _news_to_minimal(item: Dict[str,Any]) -> Dict[str,Any]:
         "sent": float(item.get("sentiment") or 0.0),
         "tickers": item.get("tickers") or [],
         "summary": item.get("summary") or item.get("raw_text","")[:500],
+        "cluster_size": int((item.get("meta") or {}).get("cluster_size") or 1),
         "tags": {
             "earnings": "earnings" in (item.get("event_types") or []),
             "sanctions": "sanctions" in (item.get("event_types") or []),
@@ -196,10 +216,15 @@ def collect_ownership(ticker: str) -> Dict[str,Any]:
         return {"ok": False, "error": "financials_ownership_client unavailable"}
     return build_ownership_snapshot(ticker)
 
-def collect_finviz(ticker: Optional[str], want_futures: bool) -> Dict[str,Any]:
+def collect_finviz(ticker: Optional[str], want_futures: bool,
+                   futures: Optional[Any] = None) -> Dict[str,Any]:
+    """`futures`: agrégat global déjà collecté (partie partagée), sinon récupéré ici."""
     out = {"ok": True, "ticker": ticker, "futures": None, "company": None, "options": None, "source_ok": False}
     try:
-        if want_futures and finviz_futures_snapshot:
+        if want_futures and futures is not None:
+            out["futures"] = futures
+            out["source_ok"] = True
+        elif want_futures and finviz_futures_snapshot:
             out["futures"] = finviz_futures_snapshot()  # agrégat global
             out["source_ok"] = True
         if ticker and finviz_company_snapshot:
@@ -296,6 +321,79 @@ def build_unified_features(news_items: List[Dict[str,Any]],
     base.update(_macro_signals(macro_blob or {}))
     return base
 
+# ============== Partie partagée (une fois par run) ==============
+
+def build_shared_context(regions: List[str], window: str, query: str = "",
+                         per_source_cap: Optional[int] = None,
+                         include_futures: bool = True,
+                         include_macro_derivs: bool = False) -> Dict[str,Any]:
+    """
+    News globales (pipeline RSS complet, sans ticker cible), futures et macro/dérivés :
+    identiques pour tous les tickers -> calculées une fois et mises en cache (TTL).
+    """
+    key = (tuple(regions), window, query, per_source_cap, include_futures, include_macro_derivs)
+    hit = _SHARED.get(key)
+    if hit is not None:
+        return hit
+    with _SHARED_LOCK:  # un seul calcul même si plusieurs tickers arrivent en même temps
+        hit = _SHARED.get(key)
+        if hit is not None:
+            return hit
+        meta = {"source_ok": False, "regions": regions, "window": window}
+        items: List[Dict[str,Any]] = []
+        if finnews_run:
+            try:
+                raw = finnews_run(regions=regions, window=window, query=query, company=None, aliases=[],
+                                  tgt_ticker=None, per_source_cap=per_source_cap, limit=0)
+                items = [asdict(x) if hasattr(x, "__dataclass_fields__") else dict(x) for x in raw]
+                meta["source_ok"] = True
+            except Exception as e:
+                meta["error"] = f"{type(e).__name__}: {e}"
+        else:
+            meta["error"] = "finnews module unavailable"
+        futures = None
+        if include_futures and finviz_futures_snapshot:
+            try:
+                futures = finviz_futures_snapshot()
+            except Exception:
+                futures = None
+        shared = {
+            "asof_utc": iso(),
+            "news_items": items,
+            "news_meta": meta,
+            "futures": futures,
+            "macro": collect_macro_derivs() if include_macro_derivs else None,
+        }
+        if meta["source_ok"] or not finnews_run:  # pas de cache d'un échec réseau
+            _SHARED.set(key, shared)
+        return shared
+
+
+def _news_for_ticker(shared: Dict[str,Any], ticker: Optional[str], query: str,
+                     limit: int) -> Tuple[List[Dict[str,Any]], Dict[str,Any]]:
+    """Vue par ticker des news partagées (équivalent de collect_news(tgt_ticker=ticker))."""
+    items = shared["news_items"]
+    if ticker:
+        tk = ticker.upper()
+        view = []
+        for it in items:
+            tks = list(it.get("tickers") or [])
+            if tk not in tks:
+                tks = ([tk] + tks)[:10]
+            rel = it.get("relevance")
+            if finnews_score_relevance:
+                rel = finnews_score_relevance((it.get("title") or "") + " " + (it.get("summary") or ""),
+                                              query, None, tks)
+            view.append({**it, "tickers": tks, "relevance": rel})
+        items = view
+    # même ordre que finnews.run_pipeline: importance * freshness + relevance
+    items = sorted(items, key=lambda x: (x.get("importance") or 0) * (x.get("freshness") or 0)
+                   + (x.get("relevance") or 0), reverse=True)
+    if limit:
+        items = items[:limit]
+    meta = {**shared["news_meta"], "limit": limit, "shared": True}
+    return [_news_to_minimal(x) for x in items], meta
+
 # ============== Snapshot Orchestrator ==============
 
 def build_snapshot(regions: List[str], window: str, query: str = "",
@@ -303,21 +401,40 @@ def build_snapshot(regions: List[str], window: str, query: str = "",
                    aliases: Optional[List[str]] = None, limit: int = 150,
                    per_source_cap: Optional[int] = None,
                    include_finviz: bool = True, include_futures: bool = True,
-                   include_macro_derivs: bool = False) -> Dict[str,Any]:
+                   include_macro_derivs: bool = False,
+                   use_shared: bool = True) -> Dict[str,Any]:
     """
     Retourne un JSON unifié: {news:[...], features:{...}, meta:{...}, ownership?:{...}, finviz?:{...}, macro?:{...}}
+
+    use_shared: news globales / futures / macro depuis `build_shared_context` (cache TTL)
+    au lieu d'un pipeline complet par appel. Avec company/aliases (mapping de tickers
+    spécifique), les news sont collectées directement.
     """
+    shared = None
+    if use_shared and not company and not aliases:
+        shared = build_shared_context(regions, window, query=query, per_source_cap=per_source_cap,
+                                      include_futures=include_finviz and include_futures,
+                                      include_macro_derivs=include_macro_derivs)
     # 1) News
-    news, news_meta = collect_news(
-        regions=regions, window=window, query=query, company=company,
-        aliases=aliases or [], tgt_ticker=ticker, per_source_cap=per_source_cap, limit=limit
-    )
+    if shared is not None:
+        news, news_meta = _news_for_ticker(shared, ticker, query, limit)
+    else:
+        news, news_meta = collect_news(
+            regions=regions, window=window, query=query, company=company,
+            aliases=aliases or [], tgt_ticker=ticker, per_source_cap=per_source_cap, limit=limit
+        )
     # 2) Ownership / Insiders
     ownership = collect_ownership(ticker) if ticker else None
     # 3) Finviz (optionnel)
-    finviz_blob = collect_finviz(ticker, want_futures=include_futures) if include_finviz else None
+    finviz_blob = None
+    if include_finviz:
+        finviz_blob = collect_finviz(ticker, want_futures=include_futures,
+                                     futures=shared["futures"] if shared is not None else None)
     # 4) Macro / dérivés (optionnel)
-    macro_blob = collect_macro_derivs() if include_macro_derivs else None
+    if shared is not None:
+        macro_blob = shared["macro"]
+    else:
+        macro_blob = collect_macro_derivs() if include_macro_derivs else None
 
     # 5) Features unifiées
     feats = build_unified_features(news, target_ticker=ticker, ownership=ownership,
@@ -351,6 +468,31 @@ def build_snapshot(regions: List[str], window: str, query: str = "",
         "macro": macro_blob,
     }
 
+def build_snapshots(tickers: Iterable[str], regions: List[str], window: str,
+                    max_workers: int = 8, **kwargs) -> Dict[str,Dict[str,Any]]:
+    """
+    Snapshots pour plusieurs tickers: partie partagée calculée une fois, parties par
+    ticker en parallèle. Un ticker en échec renvoie {"error": "..."}.
+    """
+    tickers = [t.strip().upper() for t in tickers if t and t.strip()]
+    if kwargs.get("use_shared", True) and not kwargs.get("company") and not kwargs.get("aliases"):
+        inc_fv = kwargs.get("include_finviz", True)
+        build_shared_context(regions, window, query=kwargs.get("query", ""),
+                             per_source_cap=kwargs.get("per_source_cap"),
+                             include_futures=inc_fv and kwargs.get("include_futures", True),
+                             include_macro_derivs=kwargs.get("include_macro_derivs", False))
+
+    def _one(t: str) -> Dict[str,Any]:
+        try:
+            return build_snapshot(regions=regions, window=window, ticker=t, **kwargs)
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    if not tickers:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as ex:
+        return dict(zip(tickers, ex.map(_one, tickers)))
+
 # ============== IO helpers ==============
 
 def _write_json(path: Path, obj: Any):
@@ -11,25 +11,57 @@ Target:
 
 Returns predicted return (float) and a crude confidence (0..1) based on
 sample size and out-of-sample R^2 if available.
+
+Batch mode (`train_all`, run once a day by the pipeline): builds the feature/target
+table for the whole local universe once (data/ml/dt=YYYYMMDD/dataset.parquet), fits
+per-ticker and pooled (cross-ticker) models for all horizons in one job, one joblib
+task per horizon, and persists them with the price-file fingerprint of each ticker
+(data/ml/dt=YYYYMMDD/models.joblib). `ml_predict_next_return` serves from that bundle
+while a ticker's price file is unchanged, and only fits on the fly otherwise.
+Tickers with too little history for their own model use the pooled one.
 """
 
 from __future__ import annotations
 
-from typing import Tuple, Optional
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple, Optional
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+import joblib
 from sklearn.linear_model import RidgeCV
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import r2_score
 
+try:
+    from core.prompt_context import file_fingerprint, fingerprint
+except Exception:  # pragma: no cover
+    import sys as _sys
+    _SRC = Path(__file__).resolve().parents[1]
+    if str(_SRC) not in _sys.path:
+        _sys.path.insert(0, str(_SRC))
+    from core.prompt_context import file_fingerprint, fingerprint
+
 HORIZON_TO_DAYS = {"1w": 5, "1m": 21, "1y": 252}
+FEATURES = ["r_5", "r_21", "r_63", "vol_21"]
+MIN_ROWS = 150
+PRICES_DIR = Path("data/prices")
+ML_DIR = Path("data/ml")
+
+_BUNDLE: Dict[str, Any] = {}
+
+
+def _price_file(ticker: str) -> Path:
+    return PRICES_DIR / f"ticker={ticker}" / "prices.parquet"
 
 
 def _load_prices(ticker: str) -> Optional[pd.DataFrame]:
     """Load cached prices parquet if present; fallback to yfinance."""
-    pfile = Path("data/prices") / f"ticker={ticker}" / "prices.parquet"
+    pfile = _price_file(ticker)
     if pfile.exists():
         try:
             df = pd.read_parquet(pfile)
@@ -64,7 +96,31 @@ def _forward_return(close: pd.Series, days: int) -> pd.Series:
     return fwd
 
 
-def ml_predict_next_return(ticker: str, horizon: str = "1m") -> Tuple[Optional[float], float]:
+def _momentum_proxy(feats: pd.DataFrame) -> float:
+    # simple momentum proxy = r_21 * 0.5
+    return float(feats.iloc[-1]["r_21"]) * 0.5 if not feats.empty else 0.0
+
+
+def _fit(X: np.ndarray, yv: np.ndarray) -> Tuple[RidgeCV, float]:
+    """Time-series CV (out-of-fold R^2), then refit on all rows."""
+    tscv = TimeSeriesSplit(n_splits=5)
+    model = RidgeCV(alphas=(0.1, 1.0, 10.0))
+    oof_pred = np.zeros_like(yv)
+    for train_idx, test_idx in tscv.split(X):
+        model.fit(X[train_idx], yv[train_idx])
+        oof_pred[test_idx] = model.predict(X[test_idx])
+    r2 = max(-1.0, min(1.0, float(r2_score(yv, oof_pred))))
+    model.fit(X, yv)
+    return model, r2
+
+
+def _confidence(r2: float, n: int) -> float:
+    # crude confidence from sample size and R^2
+    return max(0.2, min(0.95, 0.4 + 0.3 * max(0.0, r2) + 0.3 * (n / 1000.0)))
+
+
+def _fit_single(ticker: str, horizon: str) -> Tuple[Optional[float], float]:
+    """Per-call path: load, build features, cross-validate and fit one ticker/horizon."""
     days = HORIZON_TO_DAYS.get(horizon, 21)
     df = _load_prices(ticker)
     if df is None or df.empty or "Close" not in df.columns:
@@ -74,32 +130,181 @@ def ml_predict_next_return(ticker: str, horizon: str = "1m") -> Tuple[Optional[f
     close = df["Close"].reindex(feats.index)
     y = _forward_return(close, days)
     Xy = pd.concat([feats, y.rename("target")], axis=1).dropna()
-    if len(Xy) < 150:
+    if len(Xy) < MIN_ROWS:
         # insufficient history
-        # simple momentum proxy = r_21 * 0.5
-        val = float(feats.iloc[-1]["r_21"]) * 0.5 if not feats.empty else 0.0
-        return val, 0.3
+        return _momentum_proxy(feats), 0.3
     X = Xy.drop(columns=["target"]).values
     yv = Xy["target"].values
-    # time series CV
     try:
-        tscv = TimeSeriesSplit(n_splits=5)
-        model = RidgeCV(alphas=(0.1, 1.0, 10.0))
-        oof_pred = np.zeros_like(yv)
-        for train_idx, test_idx in tscv.split(X):
-            model.fit(X[train_idx], yv[train_idx])
-            oof_pred[test_idx] = model.predict(X[test_idx])
-        r2 = max(-1.0, min(1.0, float(r2_score(yv, oof_pred))))
-        # fit on full data and predict next
-        model.fit(X, yv)
-        x_last = feats.iloc[[-1]].values
-        pred = float(model.predict(x_last)[0])
-        # crude confidence from sample size and R^2
-        n = len(Xy)
-        conf = max(0.2, min(0.95, 0.4 + 0.3 * max(0.0, r2) + 0.3 * (n / 1000.0)))
-        return pred, conf
+        model, r2 = _fit(X, yv)
+        # predict next from the latest feature row
+        pred = float(model.predict(feats.iloc[[-1]].values)[0])
+        return pred, _confidence(r2, len(Xy))
     except Exception:
         # fallback momentum
-        val = float(feats.iloc[-1]["r_21"]) * 0.5 if not feats.empty else 0.0
-        return val, 0.3
+        return _momentum_proxy(feats), 0.3
+
+
+# ---- batch mode -------------------------------------------------------------
+
+def _today_dt() -> str:
+    return datetime.utcnow().strftime("%Y%m%d")
+
+
+def _local_universe() -> List[str]:
+    return sorted(p.parent.name.split("=", 1)[1] for p in PRICES_DIR.glob("ticker=*/prices.parquet"))
+
+
+def _ticker_rows(ticker: str, horizons: Dict[str, int]) -> Optional[pd.DataFrame]:
+    """Feature rows of one ticker with one forward-return column per horizon."""
+    df = _load_prices(ticker) if _price_file(ticker).exists() else None
+    if df is None or df.empty or "Close" not in df.columns:
+        return None
+    feats = _make_features(df)
+    if feats.empty:
+        return None
+    close = df["Close"].reindex(feats.index)
+    out = feats.copy()
+    for h, days in horizons.items():
+        out[f"fwd_{h}"] = _forward_return(close, days)
+    out.index.name = "date"
+    out = out.reset_index()
+    out.insert(1, "ticker", ticker)
+    return out
+
+
+def build_dataset(tickers: Optional[Iterable[str]] = None,
+                  horizons: Dict[str, int] = HORIZON_TO_DAYS,
+                  max_workers: int = 8) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """Feature/target table for the universe, cached per day and price fingerprint.
+
+    Returns (rows: date, ticker, FEATURES, fwd_<h>..., {ticker: price-file fingerprint}).
+    """
+    tickers = list(dict.fromkeys(tickers)) if tickers is not None else _local_universe()
+    fps = {t: file_fingerprint([_price_file(t)]) for t in tickers}
+    key = fingerprint(sorted(fps.items()), FEATURES, horizons)
+    outdir = ML_DIR / f"dt={_today_dt()}"
+    data_path, meta_path = outdir / "dataset.parquet", outdir / "dataset.json"
+    try:
+        if json.loads(meta_path.read_text(encoding="utf-8")).get("fingerprint") == key:
+            return pd.read_parquet(data_path), fps
+    except Exception:
+        pass
+    frames: List[pd.DataFrame] = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers) or 1))) as ex:
+        for rows in ex.map(lambda t: _ticker_rows(t, horizons), tickers):
+            if rows is not None:
+                frames.append(rows)
+    cols = ["date", "ticker"] + FEATURES + [f"fwd_{h}" for h in horizons]
+    data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=cols)
+    outdir.mkdir(parents=True, exist_ok=True)
+    data.to_parquet(data_path, index=False)
+    meta_path.write_text(json.dumps({"fingerprint": key, "tickers": len(frames), "rows": int(len(data))}),
+                         encoding="utf-8")
+    return data, fps
+
+
+def _train_horizon(data: pd.DataFrame, horizon: str) -> Dict[str, Any]:
+    """Pooled + per-ticker models for one horizon."""
+    target = f"fwd_{horizon}"
+    xy = data.dropna(subset=FEATURES + [target])
+    res: Dict[str, Any] = {"pooled": None, "tickers": {}}
+    if len(xy) >= MIN_ROWS:
+        # pooled rows in time order, so the CV folds stay forward-looking across tickers
+        pooled = xy.sort_values("date", kind="stable")
+        try:
+            model, r2 = _fit(pooled[FEATURES].to_numpy(float), pooled[target].to_numpy(float))
+            res["pooled"] = {"model": model, "r2": r2, "n": int(len(pooled))}
+        except Exception:
+            pass
+    for t, g in xy.groupby("ticker", sort=False):
+        if len(g) < MIN_ROWS:
+            continue
+        try:
+            model, r2 = _fit(g[FEATURES].to_numpy(float), g[target].to_numpy(float))
+        except Exception:
+            continue
+        res["tickers"][t] = {"model": model, "r2": r2, "n": int(len(g))}
+    return res
+
+
+def train_all(tickers: Optional[Iterable[str]] = None, horizons: Optional[Iterable[str]] = None,
+              n_jobs: int = -1) -> Path:
+    """Fit all models for the universe (one joblib task per horizon) and persist them."""
+    hz = {h: HORIZON_TO_DAYS[h] for h in (horizons or HORIZON_TO_DAYS)}
+    data, fps = build_dataset(tickers, hz)
+    fitted = joblib.Parallel(n_jobs=n_jobs, prefer="threads")(
+        joblib.delayed(_train_horizon)(data, h) for h in hz)
+    last = data.sort_values("date", kind="stable").groupby("ticker").tail(1)
+    bundle = {
+        "trained_at": datetime.utcnow().isoformat() + "Z",
+        "features": FEATURES,
+        "fingerprints": fps,
+        "last_features": {r["ticker"]: [float(r[c]) for c in FEATURES] for r in last.to_dict("records")},
+        "horizons": dict(zip(hz, fitted)),
+    }
+    out = ML_DIR / f"dt={_today_dt()}" / "models.joblib"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    joblib.dump(bundle, tmp)
+    tmp.replace(out)
+    return out
+
+
+def _load_bundle() -> Optional[Dict[str, Any]]:
+    parts = sorted(ML_DIR.glob("dt=*/models.joblib"))
+    if not parts:
+        return None
+    p = parts[-1]
+    try:
+        mtime = p.stat().st_mtime_ns
+        if _BUNDLE.get("key") != (str(p), mtime):
+            _BUNDLE.update(key=(str(p), mtime), bundle=joblib.load(p))
+        return _BUNDLE["bundle"]
+    except Exception:
+        return None
+
+
+def _predict_cached(ticker: str, horizon: str) -> Optional[Tuple[Optional[float], float]]:
+    """Prediction from the persisted bundle, or None when it is missing/stale for this ticker."""
+    bundle = _load_bundle()
+    if not bundle or ticker not in bundle["last_features"]:
+        return None
+    if bundle["fingerprints"].get(ticker) != file_fingerprint([_price_file(ticker)]):
+        return None
+    models = bundle["horizons"].get(horizon)
+    if models is None:
+        return None
+    x = np.asarray([bundle["last_features"][ticker]], dtype=float)
+    own = models["tickers"].get(ticker)
+    if own is not None:
+        return float(own["model"].predict(x)[0]), _confidence(own["r2"], own["n"])
+    pooled = models["pooled"]
+    if pooled is not None:
+        # short history: cross-ticker model, capped confidence
+        return float(pooled["model"].predict(x)[0]), min(0.6, 0.3 + 0.3 * max(0.0, pooled["r2"]))
+    return float(x[0][FEATURES.index("r_21")]) * 0.5, 0.3
+
+
+def ml_predict_next_return(ticker: str, horizon: str = "1m", use_cache: bool = True) -> Tuple[Optional[float], float]:
+    if use_cache:
+        try:
+            hit = _predict_cached(ticker, horizon)
+        except Exception:
+            hit = None
+        if hit is not None:
+            return hit
+    return _fit_single(ticker, horizon)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Batch-train the ML baseline for the local universe")
+    ap.add_argument("--tickers", nargs="*", default=None)
+    ap.add_argument("--horizons", nargs="*", default=None, choices=list(HORIZON_TO_DAYS))
+    ap.add_argument("--jobs", type=int, default=-1)
+    args = ap.parse_args()
+    print(train_all(args.tickers, args.horizons, n_jobs=args.jobs))
+
 
+if __name__ == "__main__":
+    main()
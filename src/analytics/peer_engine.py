@@ -0,0 +1,353 @@
+"""
+Peer engine: precomputed return-correlation matrix for the tracked universe.
+
+- The universe is the watchlist (env WATCHLIST / data/watchlist.json), PEER_UNIVERSE
+  (comma list), DEFAULT_UNIVERSE, and every ticker added on demand since.
+- `refresh()` (daily) appends only the new daily returns of known tickers (one
+  `load_close_panel` call from the last stored date), adds new tickers with their full
+  window, keeps the last WINDOW rows and recomputes the matrix with masked BLAS
+  products (pairwise-complete observations, MIN_OBS minimum). Missing or stale
+  sector/industry metadata is fetched in parallel.
+- `add(tickers)` extends the matrix by the new columns only (no refresh of the others).
+- `top_peers(ticker, k)` / `peer_tickers(ticker, k)` answer from memory; unknown
+  tickers are added first (`ensure=True`).
+
+State lives in data/peers/ (returns.parquet, corr.parquet, meta.parquet, state.json)
+and is reloaded when another process (the daily pipeline) rewrites it.
+
+Used by research.peers_finder.find_peers, apps.stock_analysis_app and the
+agents.pipeline "peers" step.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from analytics.price_panel import load_close_panel
+except Exception:  # pragma: no cover
+    from .price_panel import load_close_panel
+
+PEERS_DIR = Path(os.getenv("PEERS_DIR", "data/peers"))
+WINDOW = int(os.getenv("PEERS_WINDOW", "252"))            # trading days kept
+HISTORY_DAYS = int(os.getenv("PEERS_HISTORY_DAYS", "400"))  # calendar days for a new ticker
+MIN_OBS = int(os.getenv("PEERS_MIN_OBS", "60"))
+META_MAX_AGE_DAYS = int(os.getenv("PEERS_META_MAX_AGE_DAYS", "30"))
+META_FIELDS = ("sector", "industry", "country", "currency", "marketCap", "quoteType")
+
+# former hard-coded universes (research.peers_finder fallback, stock_analysis_app groups)
+DEFAULT_UNIVERSE = [
+    "AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "XOM", "JNJ", "JPM", "V", "MA",
+    "UNH", "HD", "PG", "KO", "PEP",
+    "ABX.TO", "K.TO", "AEM.TO", "BTO.TO", "IMG.TO", "OR.TO", "PAAS.TO", "EDR.TO", "FR.TO",
+    "CS.TO", "TECK-B.TO", "LUN.TO", "FM.TO", "RIO", "BHP", "VALE", "FCX",
+]
+
+
+def _norm(t: str) -> str:
+    return str(t).strip().upper()
+
+
+def load_watchlist() -> List[str]:
+    env = os.getenv("WATCHLIST")
+    if env:
+        return [_norm(t) for t in env.split(",") if t.strip()]
+    try:
+        obj = json.loads(Path("data/watchlist.json").read_text(encoding="utf-8"))
+    except Exception:
+        return []
+    items = obj.get("watchlist") if isinstance(obj, dict) else obj
+    return [_norm(t) for t in (items or []) if isinstance(t, str) and t.strip()]
+
+
+def tracked_universe() -> List[str]:
+    extra = [_norm(t) for t in os.getenv("PEER_UNIVERSE", "").split(",") if t.strip()]
+    return list(dict.fromkeys(load_watchlist() + extra + DEFAULT_UNIVERSE))
+
+
+def pairwise_corr(x: np.ndarray, y: np.ndarray, min_obs: int = MIN_OBS) -> np.ndarray:
+    """Pearson correlation of every column of `x` with every column of `y`.
+
+    NaN-aware (pairwise-complete observations): all sums are masked matrix
+    products, so an N x M block costs a few GEMMs instead of N*M pandas calls.
+    Pairs with fewer than `min_obs` common observations are NaN.
+    """
+    mx, my = ~np.isnan(x), ~np.isnan(y)
+    x0, y0 = np.where(mx, x, 0.0), np.where(my, y, 0.0)
+    fx, fy = mx.astype(float), my.astype(float)
+    n = fx.T @ fy
+    sx, sy = x0.T @ fy, fx.T @ y0
+    sxx, syy = (x0 * x0).T @ fy, fx.T @ (y0 * y0)
+    sxy = x0.T @ y0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / n
+        var = (sxx - sx * sx / n) * (syy - sy * sy / n)
+        corr = cov / np.sqrt(var)
+    corr[(n < max(2, min_obs)) | ~(var > 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _returns(panel: pd.DataFrame) -> pd.DataFrame:
+    if panel is None or panel.empty:
+        return pd.DataFrame()
+    panel = panel.copy()
+    panel.index = pd.DatetimeIndex(panel.index).normalize()
+    panel = panel[~panel.index.duplicated(keep="last")].sort_index()
+    # returns between each instrument's own consecutive closes (own trading calendar)
+    rets = {c: panel[c].dropna().pct_change() for c in panel.columns}
+    return pd.DataFrame(rets).sort_index().iloc[1:].astype("float64")
+
+
+def _fetch_meta(tickers: List[str], max_workers: int = 8) -> pd.DataFrame:
+    """Sector/industry/... per ticker from yfinance info (threaded, best effort)."""
+    def one(t: str) -> Dict[str, Any]:
+        try:
+            import yfinance as yf
+            tk = yf.Ticker(t)
+            info = (tk.get_info() if hasattr(tk, "get_info") else tk.info) or {}
+        except Exception:
+            info = {}
+        return {"ticker": t, **{f: info.get(f) for f in META_FIELDS}}
+
+    if not tickers:
+        return pd.DataFrame(columns=["ticker", *META_FIELDS, "meta_at"])
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as ex:
+        rows = list(ex.map(one, tickers))
+    df = pd.DataFrame(rows)
+    df["marketCap"] = pd.to_numeric(df["marketCap"], errors="coerce")
+    df["meta_at"] = pd.Timestamp(datetime.utcnow())
+    return df
+
+
+class PeerEngine:
+    """Correlation matrix + metadata for the tracked universe (thread-safe)."""
+
+    def __init__(self, root: Path = PEERS_DIR, loader=None):
+        self.root = Path(root)
+        self.loader = loader
+        self.returns = pd.DataFrame()
+        self.corr = pd.DataFrame()
+        self.meta = pd.DataFrame(columns=["ticker", *META_FIELDS, "meta_at"]).set_index("ticker")
+        self.state: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._mtime: Optional[float] = None
+
+    # ---- persistence
+    @property
+    def _state_path(self) -> Path:
+        return self.root / "state.json"
+
+    def _load(self) -> None:
+        """(Re)load the stored matrix when state.json changed on disk."""
+        try:
+            mtime = self._state_path.stat().st_mtime
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            try:
+                self.state = json.loads(self._state_path.read_text(encoding="utf-8"))
+                self.returns = pd.read_parquet(self.root / "returns.parquet")
+                self.corr = pd.read_parquet(self.root / "corr.parquet").astype("float64")
+                meta_path = self.root / "meta.parquet"
+                if meta_path.exists():
+                    self.meta = pd.read_parquet(meta_path).set_index("ticker")
+                self._mtime = mtime
+            except Exception:
+                pass
+
+    def _save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.returns.to_parquet(self.root / "returns.parquet")
+        self.corr.astype("float32").to_parquet(self.root / "corr.parquet")
+        self.meta.reset_index().to_parquet(self.root / "meta.parquet", index=False)
+        self.state.update({
+            "tickers": list(self.corr.columns),
+            "as_of": str(self.returns.index.max().date()) if len(self.returns) else None,
+            "updated_at": datetime.utcnow().isoformat() + "Z",
+            "window": WINDOW, "min_obs": MIN_OBS,
+        })
+        tmp = self._state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2), encoding="utf-8")
+        os.replace(tmp, self._state_path)
+        self._mtime = self._state_path.stat().st_mtime
+
+    # ---- computation
+    def _panel(self, tickers: List[str], start: str) -> pd.DataFrame:
+        loader = self.loader
+        if loader is None:
+            from core.market_data import get_price_history as loader
+        return load_close_panel(tickers, start=start, loader=loader)
+
+    def _trim(self) -> None:
+        if len(self.returns) > WINDOW:
+            self.returns = self.returns.iloc[-WINDOW:]
+        self.returns = self.returns.loc[:, self.returns.notna().any()]
+
+    def _recompute(self) -> None:
+        a = self.returns.to_numpy(dtype=float)
+        cols = list(self.returns.columns)
+        self.corr = pd.DataFrame(pairwise_corr(a, a), index=cols, columns=cols)
+
+    def _extend(self, new: List[str]) -> None:
+        """Add the rows/columns of `new` tickers to the existing matrix."""
+        cols = list(self.returns.columns)
+        new = [t for t in new if t in cols]
+        if not new:
+            return
+        block = pairwise_corr(self.returns.to_numpy(dtype=float), self.returns[new].to_numpy(dtype=float))
+        side = pd.DataFrame(block, index=cols, columns=new)
+        corr = self.corr.reindex(index=cols, columns=cols)
+        corr.loc[:, new] = side
+        corr.loc[new, :] = side.T
+        self.corr = corr
+
+    def _update_meta(self, tickers: Iterable[str], force: bool = False) -> None:
+        cutoff = pd.Timestamp(datetime.utcnow() - timedelta(days=META_MAX_AGE_DAYS))
+        stale = [t for t in tickers if force or t not in self.meta.index
+                 or pd.isna(self.meta.at[t, "meta_at"]) or self.meta.at[t, "meta_at"] < cutoff]
+        if not stale:
+            return
+        fresh = _fetch_meta(stale).set_index("ticker")
+        self.meta = pd.concat([self.meta.drop(index=stale, errors="ignore"), fresh]).sort_index()
+
+    def add(self, tickers: Iterable[str], with_meta: bool = False) -> List[str]:
+        """Add tickers absent from the matrix; returns those actually added."""
+        self._load()
+        with self._lock:
+            new = [t for t in dict.fromkeys(_norm(t) for t in tickers) if t not in self.returns.columns]
+            if not new:
+                return []
+            start = (datetime.utcnow().date() - timedelta(days=HISTORY_DAYS)).isoformat()
+            rets = _returns(self._panel(new, start))
+            if rets.empty:
+                return []
+            self.returns = self.returns.join(rets, how="outer") if len(self.returns) else rets
+            self._trim()
+            added = [t for t in new if t in self.returns.columns]
+            self._extend(added)
+            self.state["extra"] = sorted(set(self.state.get("extra", [])) | set(added))
+            if with_meta:
+                self._update_meta(added)
+            self._save()
+            return added
+
+    def refresh(self, tickers: Optional[Iterable[str]] = None, force: bool = False) -> Dict[str, Any]:
+        """Daily update: new dates for known tickers, full window for new ones."""
+        t0 = time.time()
+        self._load()
+        with self._lock:
+            universe = list(dict.fromkeys(tracked_universe() + list(self.state.get("extra", []))
+                                          + [_norm(t) for t in (tickers or [])]))
+            today = datetime.utcnow().date().isoformat()
+            # tickers dropped from the universe leave the matrix
+            self.returns = self.returns[[c for c in self.returns.columns if c in universe]]
+            known = list(self.returns.columns)
+            new_dates = 0
+            if known and (force or self.state.get("refreshed_on") != today):
+                last = self.returns.index.max()
+                # one week of overlap: the first new return needs the previous close
+                panel = self._panel(known, start=(last - timedelta(days=7)).date().isoformat())
+                rets = _returns(panel)
+                rets = rets[rets.index > last]
+                if not rets.empty:
+                    new_dates = len(rets)
+                    self.returns = pd.concat([self.returns, rets.reindex(columns=self.returns.columns)])
+            new = [t for t in universe if t not in self.returns.columns]
+            if new:
+                start = (datetime.utcnow().date() - timedelta(days=HISTORY_DAYS)).isoformat()
+                rets = _returns(self._panel(new, start))
+                if not rets.empty:
+                    self.returns = self.returns.join(rets, how="outer") if len(self.returns) else rets
+            self._trim()
+            added = [t for t in new if t in self.returns.columns]
+            if new_dates or self.corr.empty:
+                self._recompute()
+            else:
+                cols = list(self.returns.columns)
+                self.corr = self.corr.reindex(index=cols, columns=cols)
+                self._extend(added)
+            self._update_meta(list(self.returns.columns))
+            self.state["refreshed_on"] = today
+            self._save()
+            return {"tickers": len(self.corr.columns), "new_dates": new_dates, "added": len(added),
+                    "as_of": self.state.get("as_of"), "duration_s": round(time.time() - t0, 3)}
+
+    # ---- queries
+    def top_peers(self, ticker: str, k: int = 10, candidates: Optional[Iterable[str]] = None,
+                  same_sector: bool = False, ensure: bool = True) -> pd.DataFrame:
+        """Most correlated tickers (columns: ticker, corr, sector, industry)."""
+        t = _norm(ticker)
+        cand = [c for c in dict.fromkeys(_norm(c) for c in candidates) if c != t] if candidates is not None else None
+        self._load()
+        if ensure:
+            missing = [x for x in [t, *(cand or [])] if x not in self.corr.columns]
+            if missing:
+                self.add(missing)
+        with self._lock:
+            if t not in self.corr.columns:
+                return pd.DataFrame(columns=["ticker", "corr", "sector", "industry"])
+            col = self.corr[t].drop(labels=[t])
+            if cand is not None:
+                col = col.reindex([c for c in cand if c in col.index])
+            if same_sector and t in self.meta.index and pd.notna(self.meta.at[t, "sector"]):
+                sectors = self.meta["sector"].reindex(col.index)
+                col = col[(sectors == self.meta.at[t, "sector"]).to_numpy()]
+            col = col.dropna().sort_values(ascending=False).head(max(0, int(k)))
+            meta = self.meta.reindex(col.index)
+            return pd.DataFrame({"ticker": col.index, "corr": col.to_numpy(dtype=float).round(4),
+                                 "sector": meta["sector"].to_numpy(), "industry": meta["industry"].to_numpy()})
+
+    def peer_tickers(self, ticker: str, k: int = 10, **kwargs) -> List[str]:
+        return self.top_peers(ticker, k=k, **kwargs)["ticker"].tolist()
+
+
+_ENGINE: Optional[PeerEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine() -> PeerEngine:
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = PeerEngine()
+    return _ENGINE
+
+
+def top_peers(ticker: str, k: int = 10, **kwargs) -> pd.DataFrame:
+    return get_engine().top_peers(ticker, k=k, **kwargs)
+
+
+def peer_tickers(ticker: str, k: int = 10, **kwargs) -> List[str]:
+    return get_engine().peer_tickers(ticker, k=k, **kwargs)
+
+
+def refresh_default() -> Dict[str, Any]:
+    """Pipeline entry point (agents.pipeline step "peers")."""
+    return get_engine().refresh()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Peer correlation engine")
+    ap.add_argument("ticker", nargs="?", help="print the top-k peers of this ticker")
+    ap.add_argument("-k", type=int, default=10)
+    ap.add_argument("--refresh", action="store_true")
+    ap.add_argument("--force", action="store_true")
+    args = ap.parse_args()
+    if args.refresh or not args.ticker:
+        print(json.dumps(get_engine().refresh(force=args.force), indent=2))
+    if args.ticker:
+        print(top_peers(args.ticker, k=args.k).to_string(index=False))
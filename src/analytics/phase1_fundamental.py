@@ -21,20 +21,33 @@ from typing import Dict, List, Optional, Tuple, Any
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
 from dateutil.relativedelta import relativedelta
 from datetime import datetime
 
+try:
+    from core.lazy import lazy_module
+    yf = lazy_module("yfinance")  # importé au premier appel réseau
+except Exception:  # pragma: no cover
+    import yfinance as yf
+
+try:
+    from core.tracing import traced
+except Exception:  # pragma: no cover - exécution directe
+    import sys as _sys
+    from pathlib import Path as _Path
+    _sys.path.insert(0, str(_Path(__file__).resolve().parents[1]))
+    from core.tracing import traced
+
 # ----------------------------- Logging & Debug --------------------------------
 
 LOGGER_NAME = "phase1_fundamental"
 logger = logging.getLogger(LOGGER_NAME)
 
-def _init_logging_from_env(default_level: str = "INFO"):
-    """Appelé depuis __main__ ou quand importé sans CLI."""
+def _init_logging_from_env(default_level: str = "INFO", configure_root: bool = True):
+    """Niveau du logger depuis PHASE1_DEBUG ; `configure_root` installe aussi un handler racine (CLI)."""
     lvl = os.getenv("PHASE1_DEBUG")
     level = logging.DEBUG if (lvl and lvl.strip() not in ("0", "", "false", "False")) else getattr(logging, default_level)
-    if not logger.handlers:
+    if configure_root and not logger.handlers:
         logging.basicConfig(
             level=level,
             format="%(asctime)s | %(levelname)-7s | %(name)s | %(message)s",
@@ -74,10 +87,12 @@ def _brief_dict(d: Dict[str, Any]) -> str:
 def debug_io(name: Optional[str] = None):
     """
     Decorator: trace les entrées (types/shapes), la durée, et la sortie.
-    N’affiche le détail que si le logger est en DEBUG.
+    N’affiche le détail que si le logger est en DEBUG. Chaque appel est aussi un
+    span `phase1.<nom>` (core.tracing) quand TRACE_EXPORT est actif.
     """
     def deco(func):
         fname = name or func.__name__
+        @traced(f"phase1.{fname}")
         def wrapper(*args, **kwargs):
             if logger.isEnabledFor(logging.DEBUG):
                 args_brief = ", ".join(_brief(a) for a in args)
@@ -96,8 +111,9 @@ def debug_io(name: Optional[str] = None):
         return wrapper
     return deco
 
-# Init logging si importé sans passer par __main__
-_init_logging_from_env()
+# Import : seul le niveau du logger est réglé ; la configuration du logging racine
+# reste à l'application hôte (API, Dash) ou au __main__ ci-dessous.
+_init_logging_from_env(configure_root=False)
 
 # ----------------------------- Config & Constantes -----------------------------
 
@@ -32,6 +32,14 @@ import pandas as pd
 import yfinance as yf
 import ta
 
+try:
+    from core.tracing import span
+except Exception:  # pragma: no cover - exécution directe
+    import sys as _sys
+    from pathlib import Path as _Path
+    _sys.path.insert(0, str(_Path(__file__).resolve().parents[1]))
+    from core.tracing import span
+
 # -----------------------------------------------------------------------------#
 #                                    Config                                    #
 # -----------------------------------------------------------------------------#
@@ -771,14 +779,22 @@ def build_technical_view(ticker: str,
       - technical_signals + detect_regime + risk_stats
     Retourne un dict compact prêt à afficher/logguer.
     """
-    px = load_prices(ticker, period=period, interval=interval)
-    if px.empty:
-        return {"ticker": ticker, "error": "No price data"}
-
-    ind = compute_indicators(px)
-    sig = technical_signals(ind)
-    regime = detect_regime(ind)
-    risk = risk_stats(px)
+    with span("phase2.technical_view", ticker=ticker, period=period, interval=interval):
+        with span("phase2.load_prices") as sp:
+            px = load_prices(ticker, period=period, interval=interval)
+            sp.add_rows(len(px))
+        if px.empty:
+            return {"ticker": ticker, "error": "No price data"}
+
+        with span("phase2.indicators") as sp:
+            ind = compute_indicators(px)
+            sp.add_rows(len(ind))
+        with span("phase2.signals"):
+            sig = technical_signals(ind)
+        with span("phase2.regime"):
+            regime = detect_regime(ind)
+        with span("phase2.risk"):
+            risk = risk_stats(px)
 
     return {
         "ticker": ticker,
@@ -36,6 +36,13 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 
+try:
+    from core.tracing import span
+except Exception:  # pragma: no cover - exécution directe
+    from pathlib import Path as _Path
+    sys.path.insert(0, str(_Path(__file__).resolve().parents[1]))
+    from core.tracing import span
+
 logger = logging.getLogger("macroapp")
 logger.propagate = False  # <<< Prevent propagation to root logger
 
@@ -992,12 +999,21 @@ def build_macro_view(ticker: str,
       6) Régime macro
     Retourne un dict compact (prêt à intégrer dans l’app).
     """
-    bundle = get_us_macro_bundle(start=start, monthly=True)
-    nc = macro_nowcast(bundle)
-    facs = build_macro_factors(bundle)
-    ret_m, facs_m = _align_stock_factors(ticker, facs, period=period_stock)
-    expo = factor_model(ret_m, facs_m)
-    reg = macro_regime(nc)
+    with span("phase3.macro_view", ticker=ticker, start=start, period_stock=period_stock):
+        with span("phase3.macro_bundle") as sp:
+            bundle = get_us_macro_bundle(start=start, monthly=True)
+            sp.add_rows(len(bundle.data))
+        with span("phase3.nowcast"):
+            nc = macro_nowcast(bundle)
+        with span("phase3.factors"):
+            facs = build_macro_factors(bundle)
+        with span("phase3.align_stock") as sp:
+            ret_m, facs_m = _align_stock_factors(ticker, facs, period=period_stock)
+            sp.add_rows(len(ret_m))
+        with span("phase3.factor_model"):
+            expo = factor_model(ret_m, facs_m)
+        with span("phase3.regime"):
+            reg = macro_regime(nc)
 
     # Résumé "drivers"
     drivers = sorted(expo.ols_loadings.items(), key=lambda kv: abs(kv[1]), reverse=True) if expo.ols_loadings else []
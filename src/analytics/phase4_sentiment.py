@@ -30,19 +30,61 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 
+try:
+    from research import textrank as _textrank
+    from ingestion.news_clusters import StoryClusterer
+    from core.tracing import span, cache_hit, cache_miss
+except Exception:  # pragma: no cover - exécution directe
+    import sys as _sys
+    from pathlib import Path as _Path
+    _SRC = _Path(__file__).resolve().parents[1]
+    if str(_SRC) not in _sys.path:
+        _sys.path.insert(0, str(_SRC))
+    from research import textrank as _textrank
+    from ingestion.news_clusters import StoryClusterer
+    from core.tracing import span, cache_hit, cache_miss
+
 # -------- Optional NLP backends -------- #
+# Les modèles sont chargés à la première utilisation (une instance par process).
+import importlib.util
+import threading
+
 try:
     from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer  # type: ignore
     HAS_VADER = True
 except Exception:
     HAS_VADER = False
 
-try:
-    from transformers import pipeline  # type: ignore
-    HF_PIPE = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
-    HAS_HF = True
-except Exception:
-    HAS_HF = False
+HAS_HF = importlib.util.find_spec("transformers") is not None
+HF_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+HF_BATCH_SIZE = 32
+
+_MODEL_LOCK = threading.Lock()
+_VADER = None
+_HF_PIPE = None
+
+
+def _get_vader():
+    global _VADER
+    if _VADER is None and HAS_VADER:
+        with _MODEL_LOCK:
+            if _VADER is None:
+                _VADER = SentimentIntensityAnalyzer()
+    return _VADER
+
+
+def _get_hf_pipe():
+    """Pipeline HF (CPU) partagé par le process ; désactive HF si le chargement échoue."""
+    global _HF_PIPE, HAS_HF
+    if _HF_PIPE is None and HAS_HF:
+        with _MODEL_LOCK:
+            if _HF_PIPE is None and HAS_HF:
+                try:
+                    from transformers import pipeline  # type: ignore
+                    _HF_PIPE = pipeline("sentiment-analysis", model=HF_MODEL, device=-1)
+                except Exception:
+                    HAS_HF = False
+    return _HF_PIPE
 
 # ---------------------- Dataclasses ---------------------- #
 
@@ -56,6 +98,8 @@ class NewsItem:
     published: pd.Timestamp
     raw_text: Optional[str] = None
     tags: Optional[List[str]] = None
+    cluster_id: Optional[str] = None
+    cluster_size: int = 1
 
     def key(self) -> str:
         base = f"{self.ticker}|{self.title}|{self.source}|{self.url}"
@@ -212,12 +256,12 @@ def _clean_text(s: str) -> str:
 
 
 def _sent_vader(text: str) -> Optional[float]:
-    if not HAS_VADER:
-        return None
     if not text:
         return None
+    vs = _get_vader()
+    if vs is None:
+        return None
     try:
-        vs = SentimentIntensityAnalyzer()
         score = vs.polarity_scores(text)["compound"]
         # map [-1,1] → [-1,1] (déjà)
         return float(score)
@@ -225,44 +269,97 @@ def _sent_vader(text: str) -> Optional[float]:
         return None
 
 
+def _hf_signed(out: Dict[str, Any]) -> float:
+    lab = str(out["label"]).lower()
+    sc = float(out["score"])
+    # map HF (POS/NEG) sur [-1,1]
+    return float(sc if "pos" in lab else -sc)
+
+
+def _sent_hf_batch(texts: List[str], batch_size: int = HF_BATCH_SIZE) -> List[Optional[float]]:
+    """Scores HF par mini-batchs paddés (tronqués à 512 tokens)."""
+    res: List[Optional[float]] = [None] * len(texts)
+    idx = [i for i, t in enumerate(texts) if t]
+    if not idx:
+        return res
+    pipe = _get_hf_pipe()
+    if pipe is None:
+        return res
+    # trier par longueur limite le padding au sein de chaque batch
+    idx.sort(key=lambda i: len(texts[i]))
+    for start in range(0, len(idx), batch_size):
+        chunk = idx[start:start + batch_size]
+        try:
+            outs = pipe([texts[i] for i in chunk], batch_size=len(chunk), truncation=True, padding=True, max_length=512)
+            for i, o in zip(chunk, outs):
+                res[i] = _hf_signed(o)
+        except Exception:
+            continue
+    return res
+
+
 def _sent_hf(text: str) -> Optional[float]:
-    if not HAS_HF:
-        return None
-    if not text:
-        return None
-    try:
-        out = HF_PIPE(text[:512])  # tronque pour vitesse
-        if not out:
-            return None
-        lab = out[0]["label"].lower()
-        sc = float(out[0]["score"])
-        # map HF (POS/NEG) sur [-1,1]
-        return float(sc if "pos" in lab else -sc)
-    except Exception:
-        return None
+    return _sent_hf_batch([text])[0]
 
 
-def score_sentiment(title: str, abstract: str = "", weight_title: float = 0.65) -> SentimentDetail:
-    """
-    Ensemble: VADER et/ou HF ; priorité au titre.
-    """
+# Mémo (vader, hf) par hash de texte — partagé par le process
+_SENT_CACHE: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+_SENT_CACHE_MAX = 50_000
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _score_texts(texts: List[str]) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """(vader, hf) pour chaque texte distinct, via le cache puis en batch pour les manquants."""
+    out: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+    todo: Dict[str, str] = {}
+    seen = set()
+    for t in texts:
+        if not t or t in seen:
+            continue
+        seen.add(t)
+        k = _text_key(t)
+        hit = _SENT_CACHE.get(k)
+        if hit is not None:
+            out[t] = hit
+        else:
+            todo[k] = t
+    if todo:
+        keys = list(todo.keys())
+        batch = [todo[k] for k in keys]
+        hf = _sent_hf_batch(batch) if HAS_HF else [None] * len(batch)
+        for k, t, h in zip(keys, batch, hf):
+            val = (_sent_vader(t), h)
+            if len(_SENT_CACHE) >= _SENT_CACHE_MAX:
+                _SENT_CACHE.pop(next(iter(_SENT_CACHE)))
+            _SENT_CACHE[k] = val
+            out[t] = val
+    cache_hit(len(out) - len(todo))
+    cache_miss(len(todo))
+    return out
+
+
+_KEY_PLUS_RE = re.compile(r"\b(beat|surpass|record|approval|upgrade|partnership|wins?)\b", re.I)
+_KEY_MINUS_RE = re.compile(r"\b(miss|downgrade|lawsuit|probe|recall|fraud|bankruptcy)\b", re.I)
+
+
+def _prepare_texts(title: str, abstract: str) -> Tuple[str, str]:
     t = _clean_text(title)
     a = _clean_text(abstract)
-    text_title = t
-    text_body = a if len(a) >= 20 else ""
+    return t, (a if len(a) >= 20 else "")
 
-    v_title = _sent_vader(text_title)
-    v_body = _sent_vader(text_body) if text_body else None
-    h_title = _sent_hf(text_title)
-    h_body = _sent_hf(text_body) if text_body else None
 
+def _combine_sentiment(t: str, scores_title: Tuple[Optional[float], Optional[float]],
+                       scores_body: Tuple[Optional[float], Optional[float]]) -> SentimentDetail:
     # agrégation par modalité
     def _agg(x: List[Optional[float]]) -> Optional[float]:
         xs = [z for z in x if z is not None]
         return float(np.mean(xs)) if xs else None
 
-    vader = _agg([v_title, v_body])
-    hf = _agg([h_title, h_body])
+    vader = _agg([scores_title[0], scores_body[0]])
+    hf = _agg([scores_title[1], scores_body[1]])
 
     # ensemble final
     parts = []
@@ -272,8 +369,8 @@ def score_sentiment(title: str, abstract: str = "", weight_title: float = 0.65)
         parts.append(hf)
     if not parts:
         # fallback heuristique: neutre sauf mots clés
-        key_plus = bool(re.search(r"\b(beat|surpass|record|approval|upgrade|partnership|wins?)\b", t, flags=re.I))
-        key_minus = bool(re.search(r"\b(miss|downgrade|lawsuit|probe|recall|fraud|bankruptcy)\b", t, flags=re.I))
+        key_plus = bool(_KEY_PLUS_RE.search(t))
+        key_minus = bool(_KEY_MINUS_RE.search(t))
         est = 0.25 if key_plus and not key_minus else (-0.25 if key_minus and not key_plus else 0.0)
         return SentimentDetail(vader=None, hf=None, ensemble=float(est))
 
@@ -285,37 +382,35 @@ def score_sentiment(title: str, abstract: str = "", weight_title: float = 0.65)
     return SentimentDetail(vader=vader, hf=hf, ensemble=ensemble)
 
 
+def score_sentiment_batch(pairs: List[Tuple[str, str]]) -> List[SentimentDetail]:
+    """
+    Version batch de `score_sentiment` : un seul passage modèle (mini-batchs HF)
+    sur les textes distincts non encore notés, puis ensemble par article.
+    """
+    prepared = [_prepare_texts(t, a) for t, a in pairs]
+    scores = _score_texts([x for tb in prepared for x in tb if x])
+    none = (None, None)
+    return [
+        _combine_sentiment(t, scores.get(t, none), scores.get(b, none) if b else none)
+        for t, b in prepared
+    ]
+
+
+def score_sentiment(title: str, abstract: str = "", weight_title: float = 0.65) -> SentimentDetail:
+    """
+    Ensemble: VADER et/ou HF ; priorité au titre.
+    """
+    return score_sentiment_batch([(title, abstract)])[0]
+
+
 # ---------------------- Résumé & Événements ---------------------- #
 
 def summarize_textrank(sentences: List[str], k: int = 3) -> str:
     """
-    TextRank très light basé sur similarité TF (cosinus) — sans lib externe.
+    TextRank sur matrice TF creuse (hashing) + PageRank — voir research.textrank.
     Pour titres courts, retourne le texte original.
     """
-    sents = [s.strip() for s in sentences if s and len(s.strip()) > 0]
-    if len(sents) <= k:
-        return " ".join(sents)
-
-    # vocabulaire
-    def tok(x: str) -> List[str]:
-        return re.findall(r"[A-Za-z]{3,}", x.lower())
-
-    bags = [pd.value_counts(tok(s)) for s in sents]
-    cols = list(set().union(*[set(b.index) for b in bags]))
-    M = np.zeros((len(sents), len(cols)))
-    for i, b in enumerate(bags):
-        for j, w in enumerate(cols):
-            M[i, j] = b.get(w, 0.0)
-    # normalisation L2
-    M = M / (np.linalg.norm(M, axis=1, keepdims=True) + 1e-9)
-    # matrice de similarité
-    S = M @ M.T
-    np.fill_diagonal(S, 0.0)
-    # score de centralité
-    central = S.sum(axis=1)
-    idx = np.argsort(-central)[:k]
-    ordered = sorted(idx.tolist())
-    return " ".join([sents[i] for i in ordered])
+    return _textrank.summarize([s for s in sentences if s], k=k)
 
 
 _EVENT_PATTERNS = [
@@ -331,19 +426,28 @@ _EVENT_PATTERNS = [
     ("dividend_cut", -1, r"\b(cuts?|suspend[s]?)\s+dividend\b"),
 ]
 
+# Une seule regex compilée (un groupe nommé par type) : un passage par texte.
+# Une même occurrence n'est comptée que pour le premier motif de la liste.
+_EVENT_RE = re.compile("|".join(f"(?P<{typ}>{pat})" for typ, _, pat in _EVENT_PATTERNS), flags=re.I)
+_EVENT_POLARITY = {typ: int(np.sign(pol)) for typ, pol, _ in _EVENT_PATTERNS}
+_EVENT_ORDER = {typ: i for i, (typ, _, _) in enumerate(_EVENT_PATTERNS)}
+
+
 def extract_events(text: str, max_events: int = 4) -> List[EventSignal]:
     evts: List[EventSignal] = []
     if not text:
         return evts
-    t = text.lower()
-    for typ, pol, pat in _EVENT_PATTERNS:
-        m = re.search(pat, t, flags=re.I)
-        if m:
-            strength = min(1.0, 0.5 + 0.1 * len(re.findall(pat, t, flags=re.I)))
-            span = m.group(0)
-            evts.append(EventSignal(type=typ, strength=float(strength), polarity=int(np.sign(pol)), evidence=span))
-            if len(evts) >= max_events:
-                break
+    counts: Dict[str, int] = {}
+    first: Dict[str, str] = {}
+    for m in _EVENT_RE.finditer(text.lower()):
+        typ = m.lastgroup
+        if typ is None:
+            continue
+        counts[typ] = counts.get(typ, 0) + 1
+        first.setdefault(typ, m.group(0))
+    for typ in sorted(counts, key=_EVENT_ORDER.__getitem__)[:max_events]:
+        strength = min(1.0, 0.5 + 0.1 * counts[typ])
+        evts.append(EventSignal(type=typ, strength=float(strength), polarity=_EVENT_POLARITY[typ], evidence=first[typ]))
     return evts
 
 
@@ -358,10 +462,16 @@ def _importance(item: NewsItem, sentiment: SentimentDetail) -> float:
     src_w = _SOURCE_WEIGHTS.get(item.source, 0.6)
     recency_w = 1.0 / (1.0 + max(0.0, (pd.Timestamp.utcnow() - item.published).days) * 0.2)
     sent_w = 0.6 + 0.4 * abs(sentiment.ensemble)  # polarité forte = plus “important”
-    return float(src_w * recency_w * sent_w)
+    cluster_w = 1.0 + 0.2 * math.log(max(1, item.cluster_size))  # reprise multi-sources
+    return float(src_w * recency_w * sent_w * cluster_w)
 
 
-def dedupe_news(items: List[NewsItem]) -> List[NewsItem]:
+def dedupe_news(items: List[NewsItem], clusterer: Optional[StoryClusterer] = None) -> List[NewsItem]:
+    """
+    Dédoublonnage exact (clé) puis regroupement des quasi-doublons multi-sources
+    (MinHash LSH sur titre + résumé). Garde le meilleur représentant de chaque
+    histoire (source, puis récence) et renseigne `cluster_id` / `cluster_size`.
+    """
     seen = set()
     out: List[NewsItem] = []
     for it in items:
@@ -370,18 +480,21 @@ def dedupe_news(items: List[NewsItem]) -> List[NewsItem]:
             continue
         seen.add(k)
         out.append(it)
-    # également dédoublage sur titre proche
-    titles = {}
-    final: List[NewsItem] = []
+
+    cl = clusterer or StoryClusterer()
+    best: Dict[str, NewsItem] = {}
     for it in out:
-        h = hashlib.md5(it.title.lower().encode()).hexdigest()[:10]
-        if h in titles:
-            # garder le plus récent
-            if it.published > titles[h].published:
-                titles[h] = it
-        else:
-            titles[h] = it
-    final.extend(list(titles.values()))
+        q = _SOURCE_WEIGHTS.get(it.source, 0.6)
+        cid = cl.add(it.key(), it.title, it.summary or (it.raw_text or ""), it.source, q)
+        it.cluster_id = cid
+        cur = best.get(cid)
+        if cur is None or (q, it.published) > (_SOURCE_WEIGHTS.get(cur.source, 0.6), cur.published):
+            best[cid] = it
+    final: List[NewsItem] = []
+    for cid, it in best.items():
+        c = cl.cluster(cid)
+        it.cluster_size = c.size if c else 1
+        final.append(it)
     final.sort(key=lambda x: x.published, reverse=True)
     return final
 
@@ -390,8 +503,8 @@ def dedupe_news(items: List[NewsItem]) -> List[NewsItem]:
 
 def score_news_items(items: List[NewsItem]) -> List[ScoredNews]:
     scored: List[ScoredNews] = []
-    for it in items:
-        sent = score_sentiment(it.title, it.summary or (it.raw_text or ""))
+    sents = score_sentiment_batch([(it.title, it.summary or (it.raw_text or "")) for it in items])
+    for it, sent in zip(items, sents):
         text_for_events = " ".join([it.title, it.summary or "", (it.raw_text or "")])
         evs = extract_events(text_for_events)
         imp = _importance(it, sent)
@@ -483,42 +596,57 @@ def build_sentiment_view(ticker: str,
     Returns:
       dict avec: items_scored (n<50), aggregates, top_stories, signals
     """
-    items: List[NewsItem] = []
-
-    # yfinance
-    items.extend(fetch_yf_news(ticker, max_items=max_items))
-
-    # RSS optionnels
-    if rss_urls:
-        for u in rss_urls:
-            try:
-                items.extend(fetch_rss(u, ticker_hint=ticker, max_items=max_items))
-            except Exception:
-                pass
-            time.sleep(0.1)
-
-    # Textes fournis
-    if extra_texts:
-        now = pd.Timestamp.utcnow()
-        for title, txt in extra_texts:
-            items.append(NewsItem(
-                ticker=ticker.upper(), title=_clean_text(title),
-                summary="", source="USER", url="", published=now, raw_text=_clean_text(txt)
-            ))
-
-    # Dédoublonnage & tri
-    items = dedupe_news(items)[:max_items]
-
-    # Scoring
-    scored = score_news_items(items)
-
-    # Résumés (à partir de titres + fallback raw_text)
-    for s in scored:
-        if (not s.item.summary) and s.item.raw_text:
-            s.item.summary = summarize_textrank(re.split(r"[.!?]\s+", s.item.raw_text), k=2)
-
-    # Agrégation
-    aggr = aggregate_sentiment(scored)
+    with span("phase4.sentiment_view", ticker=ticker, max_items=max_items):
+        items: List[NewsItem] = []
+
+        # yfinance
+        with span("phase4.fetch_yf_news") as sp:
+            items.extend(fetch_yf_news(ticker, max_items=max_items))
+            sp.add_rows(len(items))
+
+        # RSS optionnels
+        if rss_urls:
+            with span("phase4.fetch_rss", feeds=len(rss_urls)) as sp:
+                n0 = len(items)
+                for u in rss_urls:
+                    try:
+                        items.extend(fetch_rss(u, ticker_hint=ticker, max_items=max_items))
+                    except Exception:
+                        pass
+                    time.sleep(0.1)
+                sp.add_rows(len(items) - n0)
+
+        # Textes fournis
+        if extra_texts:
+            now = pd.Timestamp.utcnow()
+            for title, txt in extra_texts:
+                items.append(NewsItem(
+                    ticker=ticker.upper(), title=_clean_text(title),
+                    summary="", source="USER", url="", published=now, raw_text=_clean_text(txt)
+                ))
+
+        # Dédoublonnage & tri
+        with span("phase4.dedupe") as sp:
+            sp.add_rows(len(items))
+            items = dedupe_news(items)[:max_items]
+
+        # Scoring
+        with span("phase4.score") as sp:
+            scored = score_news_items(items)
+            sp.add_rows(len(scored))
+
+        # Résumés (à partir de titres + fallback raw_text), en un seul batch
+        todo = [s for s in scored if (not s.item.summary) and s.item.raw_text]
+        if todo:
+            with span("phase4.summarize") as sp:
+                sums = _textrank.summarize_batch([re.split(r"[.!?]\s+", s.item.raw_text) for s in todo], k=2)
+                for s, summ in zip(todo, sums):
+                    s.item.summary = summ
+                sp.add_rows(len(todo))
+
+        # Agrégation
+        with span("phase4.aggregate"):
+            aggr = aggregate_sentiment(scored)
 
     # Top stories (importance * |sentiment|)
     top = sorted(scored, key=lambda z: z.importance * (abs(z.sentiment.ensemble) + 0.2), reverse=True)[:8]
@@ -16,12 +16,21 @@ Licence: MIT (adapter à votre projet)
 from __future__ import annotations
 import math
 import json
+import warnings
 from dataclasses import dataclass, asdict
 from typing import Any, Dict, Optional, List, Tuple
 
 import numpy as np
 import pandas as pd
 
+try:
+    from core.tracing import span, traced
+except Exception:  # pragma: no cover - exécution directe
+    import sys as _sys
+    from pathlib import Path as _Path
+    _sys.path.insert(0, str(_Path(__file__).resolve().parents[1]))
+    from core.tracing import span, traced
+
 # ============ Imports Phases 1→4 (avec fallbacks doux) ============
 
 # PHASE 1 — Data helpers (tu peux mapper vers tes fonctions existantes)
@@ -479,6 +488,7 @@ def make_recommendation(total_score: float, horizon: str = "6–12m") -> str:
 
 # ====================== Orchestrateur principal ======================
 
+@traced("phase5.run_fusion")
 def run_fusion(
     ticker: str,
     # --- payloads pré-calculés (si tu les as déjà dans l’app) :
@@ -502,51 +512,59 @@ def run_fusion(
         # Phase 1 (technique + risque de base)
         if (p1_payload is None) and HAS_P1:
             try:
-                # Exemples — mappe sur tes propres fonctions/objets
-                stock_data = P1.get_stock_data(ticker, period="3y")
-                bench = "^GSPTSE" if ticker.endswith(".TO") else "SPY"
-                benchmark_data = P1.get_stock_data(bench, period="3y")
-                with_ind = P1.add_technical_indicators(stock_data)
-                short_sig = P1.compute_short_term_signals(with_ind)
-                med_sig = P1.compute_medium_term_signals(with_ind, benchmark_data["Close"] if benchmark_data is not None else None)
-                regime = P1.detect_regime(with_ind)
-                risk = P1.risk_pack(stock_data["Close"], benchmark_data["Close"] if benchmark_data is not None else None)
-                p1_payload = {
-                    "short_sig": short_sig,
-                    "med_sig": med_sig,
-                    "regime": regime,
-                    "risk": risk,
-                    "stock_data": stock_data,
-                }
+                with span("phase5.compute_p1", ticker=ticker):
+                    # Exemples — mappe sur tes propres fonctions/objets
+                    stock_data = P1.get_stock_data(ticker, period="3y")
+                    bench = "^GSPTSE" if ticker.endswith(".TO") else "SPY"
+                    benchmark_data = P1.get_stock_data(bench, period="3y")
+                    with_ind = P1.add_technical_indicators(stock_data)
+                    short_sig = P1.compute_short_term_signals(with_ind)
+                    med_sig = P1.compute_medium_term_signals(with_ind, benchmark_data["Close"] if benchmark_data is not None else None)
+                    regime = P1.detect_regime(with_ind)
+                    risk = P1.risk_pack(stock_data["Close"], benchmark_data["Close"] if benchmark_data is not None else None)
+                    p1_payload = {
+                        "short_sig": short_sig,
+                        "med_sig": med_sig,
+                        "regime": regime,
+                        "risk": risk,
+                        "stock_data": stock_data,
+                    }
             except Exception as e:
                 diag["p1_error"] = str(e)
 
         # Phase 2 (fondamental)
         if (p2_payload is None) and HAS_P2:
             try:
-                p2_payload = P2.build_fundamental_snapshot(ticker)  # à implémenter en phase 2
+                with span("phase5.compute_p2", ticker=ticker):
+                    p2_payload = P2.build_fundamental_snapshot(ticker)  # à implémenter en phase 2
             except Exception as e:
                 diag["p2_error"] = str(e)
 
         # Phase 3 (macro)
         if (p3_payload is None) and HAS_P3:
             try:
-                p3_payload = P3.build_macro_view(ticker)  # à implémenter en phase 3
+                with span("phase5.compute_p3", ticker=ticker):
+                    p3_payload = P3.build_macro_view(ticker)  # à implémenter en phase 3
             except Exception as e:
                 diag["p3_error"] = str(e)
 
         # Phase 4 (sentiment)
         if (p4_view is None) and HAS_P4:
             try:
-                p4_view = P4.build_sentiment_view(ticker)
+                with span("phase5.compute_p4", ticker=ticker):
+                    p4_view = P4.build_sentiment_view(ticker)
             except Exception as e:
                 diag["p4_error"] = str(e)
 
     # 2) Scores par pilier
-    fund_sc, fund_drv, fund_diag = fuse_fundamental(p2_payload)
-    tech_sc, tech_drv, tech_diag = fuse_technical(p1_payload or {})
-    macro_sc, macro_drv, macro_diag = fuse_macro(p3_payload)
-    sent_sc, sent_drv, sent_diag, df_sent_day, df_sent_week = fuse_sentiment(p4_view)
+    with span("phase5.fuse_fundamental"):
+        fund_sc, fund_drv, fund_diag = fuse_fundamental(p2_payload)
+    with span("phase5.fuse_technical"):
+        tech_sc, tech_drv, tech_diag = fuse_technical(p1_payload or {})
+    with span("phase5.fuse_macro"):
+        macro_sc, macro_drv, macro_diag = fuse_macro(p3_payload)
+    with span("phase5.fuse_sentiment"):
+        sent_sc, sent_drv, sent_diag, df_sent_day, df_sent_week = fuse_sentiment(p4_view)
 
     pillars = PillarScores(
         fundamental=fund_sc,
@@ -637,6 +655,407 @@ def run_fusion(
     return out
 
 
+# ====================== Mode batch (univers) ======================
+#
+# Mêmes règles que fuse_* / combine_scores / make_recommendation, appliquées à un
+# tableau colonne (index = ticker) en opérations numpy : classer 500 titres = un appel.
+# Colonnes reconnues (toutes optionnelles ; NaN = absent) :
+#   technique   : short_score, med_score (-1..+1), regime (Bull/Bear/Range),
+#                 ct_<signal> / mt_<signal> (-1..+1, pour les drivers)
+#   fondamental : voir FUND_GROUPS (mêmes clés que ratios / peer_comps / quality)
+#   macro       : macro_regime_z, macro_regime_label, sector_fit, tw_<facteur> (-1..+1)
+#   sentiment   : mean_sent_7d, mean_sent_30d, shock_score, drift_score,
+#                 news_signals (liste), news_risk_flags (liste)
+#   risque      : vol_annual_pct, var95_pct, max_drawdown_pct, beta_60d
+# Un pilier sans aucune colonne renseignée pour une ligne prend le même repli que
+# run_fusion sans payload (55 + driver "Fallback ...").
+
+PILLARS = ("fundamental", "technical", "macro", "sentiment")
+PILLAR_LABELS = {"fundamental": "Fondamental", "technical": "Technique", "macro": "Macro", "sentiment": "Sentiment"}
+DEFAULT_WEIGHTS = {"fundamental": 0.35, "technical": 0.30, "macro": 0.20, "sentiment": 0.15}
+
+FUND_GROUPS = {
+    "profit": [("net_margin_pct", True), ("roe_pct", True), ("roa_pct", True)],
+    "growth": [("eps_cagr_3y_pct", True), ("rev_cagr_3y_pct", True)],
+    "value": [("pe_rel_sector_pct", False), ("ev_ebitda_rel_sector_pct", False), ("psales_rel_sector_pct", False)],
+    "quality": [("fcf_margin_pct", True), ("gross_margin_stability", True), ("net_debt_to_ebitda", False)],
+}
+FUND_DRIVERS = {"profit": "Rentabilité solide", "growth": "Croissance attractive",
+                "value": "Valorisation attractive vs pairs", "quality": "Qualité/FCF favorables"}
+SENT_COLS = ("mean_sent_7d", "mean_sent_30d", "shock_score", "drift_score")
+RISK_COLS = ("vol_annual_pct", "var95_pct", "max_drawdown_pct", "beta_60d")
+
+
+def _col(df: pd.DataFrame, name: str, default: float = np.nan) -> np.ndarray:
+    if name not in df.columns:
+        return np.full(len(df), default, dtype=float)
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+
+
+def _obj(df: pd.DataFrame, name: str, default: Any = None) -> np.ndarray:
+    if name not in df.columns:
+        return np.full(len(df), default, dtype=object)
+    return df[name].to_numpy(dtype=object)
+
+
+def _pct_to_score_v(p: np.ndarray, good_high: bool = True, ptiles: Tuple[float, float] = (0.2, 0.8)) -> np.ndarray:
+    """_pct_to_score sur un tableau."""
+    lo, hi = ptiles
+    frac = (p / 100.0 - lo) / (hi - lo)
+    with np.errstate(invalid="ignore"):
+        if good_high:
+            out = np.where(p <= lo * 100, 20.0, np.where(p >= hi * 100, 90.0, 20.0 + frac * 70.0))
+        else:
+            out = np.where(p <= lo * 100, 90.0, np.where(p >= hi * 100, 20.0, 90.0 - frac * 70.0))
+    return np.where(np.isnan(p), 50.0, out)
+
+
+def _add(lists: List[List[str]], mask: np.ndarray, text) -> None:
+    """Ajoute `text` (str ou tableau par ligne) aux lignes où `mask` est vrai."""
+    for i in np.flatnonzero(mask):
+        lists[i].append(text if isinstance(text, str) else text[i])
+
+
+def _fuse_fundamental_v(df: pd.DataFrame):
+    n = len(df)
+    has = np.zeros(n, dtype=bool)
+    groups = {}
+    for g, items in FUND_GROUPS.items():
+        vals = [_col(df, c) for c, _ in items]
+        has |= np.any([~np.isnan(v) for v in vals], axis=0)
+        groups[g] = np.mean([_pct_to_score_v(v, good_high=gh) for v, (_, gh) in zip(vals, items)], axis=0)
+    sc = np.mean(list(groups.values()), axis=0)
+    sc = np.where(has, sc, 55.0)
+    drivers: List[List[str]] = [[] for _ in range(n)]
+    for g, label in FUND_DRIVERS.items():
+        _add(drivers, has & (groups[g] >= 65), label)
+    _add(drivers, has & ~np.any([groups[g] >= 65 for g in groups], axis=0), "Fondamentaux mitigés")
+    _add(drivers, ~has, "Fallback fondamental (données limitées)")
+    return sc, drivers, {g: np.where(has, v, np.nan) for g, v in groups.items()}
+
+
+def _fuse_technical_v(df: pd.DataFrame):
+    n = len(df)
+    ct = np.nan_to_num(_col(df, "short_score", 0.0))
+    mt = np.nan_to_num(_col(df, "med_score", 0.0))
+    regime = np.array([r if isinstance(r, str) and r else "Range" for r in _obj(df, "regime", "Range")], dtype=object)
+    sc_ct = 50.0 + 50.0 * np.clip(ct, -1, 1)
+    sc_mt = 50.0 + 50.0 * np.clip(mt, -1, 1)
+    bonus = np.select([regime == "Bull", regime == "Bear"], [5.0, -5.0], 0.0)
+    sc = np.clip(0.6 * sc_mt + 0.4 * sc_ct + bonus, 0, 100)
+    drivers: List[List[str]] = [[] for _ in range(n)]
+    for prefix, label, thr in (("ct_", "CT", 0.2), ("mt_", "MT", 0.25)):
+        for c in [c for c in df.columns if isinstance(c, str) and c.startswith(prefix)]:
+            v = _col(df, c)
+            name = c[len(prefix):]
+            _add(drivers, np.abs(v) >= thr, np.where(v > 0, f"{label} {name} +", f"{label} {name} -"))
+    _add(drivers, np.ones(n, dtype=bool), np.array([f"Régime: {r}" for r in regime], dtype=object))
+    drivers = [d[:5] for d in drivers]
+    return sc, drivers, {"short": sc_ct, "medium": sc_mt, "regime_bonus": bonus}
+
+
+def _fuse_macro_v(df: pd.DataFrame, macro: Optional[Dict[str, Any]] = None):
+    n = len(df)
+    macro = macro or {}
+    regime = macro.get("regime", {}) or {}
+    tail = macro.get("factor_tailwinds", {}) or {}
+    tw_cols = [c for c in df.columns if isinstance(c, str) and c.startswith("tw_")]
+    reg_z = _col(df, "macro_regime_z")
+    fit = _col(df, "sector_fit")
+    label = _obj(df, "macro_regime_label")
+    has = ~np.isnan(reg_z) | ~np.isnan(fit) | np.array([isinstance(x, str) and bool(x) for x in label])
+    if tw_cols:
+        tw = np.column_stack([np.clip(_col(df, c), -1, 1) for c in tw_cols])
+        has |= (~np.isnan(tw)).any(axis=1)
+    else:
+        tw = np.empty((n, 0))
+    if macro:
+        # état macro commun à tout l'univers: valeurs par défaut de chaque ligne
+        has[:] = True
+        reg_z = np.where(np.isnan(reg_z), float(regime.get("zscore", 0.0)), reg_z)
+        label = np.array([x if isinstance(x, str) and x else regime.get("label") for x in label], dtype=object)
+        if tail and not tw_cols:
+            tw = np.tile([np.clip(float(v), -1, 1) for v in tail.values()], (n, 1))
+        fit = np.where(np.isnan(fit), float(macro.get("sector_fit", 0.0)), fit)
+    reg_z = np.nan_to_num(reg_z)
+    fit = np.nan_to_num(fit)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # lignes sans vent arrière -> 0
+        tv = np.nan_to_num(np.nanmean(tw, axis=1)) if tw.shape[1] else np.zeros(n)
+    sc_reg = 100.0 * np.clip((reg_z + 1.5) / 3.0, 0.0, 1.0)
+    sc_tail = 50.0 + 35.0 * tv
+    sc_sector = 50.0 + 40.0 * np.clip(fit, -1, 1)
+    sc = np.where(has, np.clip(0.5 * sc_reg + 0.3 * sc_tail + 0.2 * sc_sector, 0, 100), 55.0)
+    drivers: List[List[str]] = [[] for _ in range(n)]
+    has_label = np.array([isinstance(x, str) and bool(x) for x in label])
+    _add(drivers, has & has_label, np.array([f"Régime macro: {x}" for x in label], dtype=object))
+    _add(drivers, has & (tv > 0.2), "Vents macro favorables")
+    _add(drivers, has & (tv < -0.2), "Vents macro défavorables")
+    _add(drivers, has & (fit > 0.2), "Secteur bien positionné")
+    _add(drivers, has & (fit < -0.2), "Secteur sous pression")
+    _add(drivers, has & np.array([not d for d in drivers]), "Macro neutre")
+    _add(drivers, ~has, "Fallback macro")
+    return sc, drivers, {"regime_score": sc_reg, "tailwinds_score": sc_tail, "sector_fit_score": sc_sector}
+
+
+def _fuse_sentiment_v(df: pd.DataFrame):
+    n = len(df)
+    s7, s30, shock, drift = (_col(df, c) for c in SENT_COLS)
+    signals = [s if isinstance(s, (list, tuple, np.ndarray)) else [] for s in _obj(df, "news_signals")]
+    has = np.any([~np.isnan(v) for v in (s7, s30, shock, drift)], axis=0) | np.array([len(s) > 0 for s in signals])
+    sc_7 = np.where(np.isnan(s7), 50.0, 50.0 + 50.0 * np.clip(s7, -1, 1))
+    sc_30 = np.where(np.isnan(s30), 50.0, 50.0 + 50.0 * np.clip(s30, -1, 1))
+    base = 0.6 * sc_7 + 0.4 * sc_30
+    with np.errstate(invalid="ignore"):
+        is_shock = shock > 1.5
+        pos, neg = drift > 0.1, drift < -0.1
+    bonus = np.where(is_shock, 2.0 * np.clip(shock, 0, 3), 0.0) + np.select([pos, neg], [3.0, -3.0], 0.0)
+    sc = np.where(has, np.clip(base + bonus, 0, 100), 55.0)
+    drivers: List[List[str]] = [[] for _ in range(n)]
+    _add(drivers, has & is_shock, "News shock détecté")
+    _add(drivers, has & pos, "Drift post-annonce positif")
+    _add(drivers, has & neg, "Drift post-annonce négatif")
+    for i in np.flatnonzero(has):
+        drivers[i].extend(list(signals[i])[:2])
+    _add(drivers, has & np.array([not d for d in drivers]), "Sentiment neutre")
+    _add(drivers, ~has, "Fallback sentiment")
+    return sc, drivers, {"sent7": sc_7, "sent30": sc_30, "base": base, "bonus": bonus}
+
+
+def _risk_v(df: pd.DataFrame):
+    """RiskMetrics.risk_malus / flags sur un tableau."""
+    n = len(df)
+    vol, var95, mdd, beta = (_col(df, c) for c in RISK_COLS)
+    with np.errstate(invalid="ignore"):
+        pen = (np.select([vol > 60, vol > 40, vol > 30], [-12.0, -8.0, -5.0], 0.0)
+               + np.select([var95 < -5, var95 < -3.5], [-6.0, -4.0], 0.0)
+               + np.select([mdd < -55, mdd < -35], [-8.0, -5.0], 0.0)
+               + np.select([np.abs(beta) > 1.6, np.abs(beta) > 1.3], [-6.0, -4.0], 0.0))
+        flags: List[List[str]] = [[] for _ in range(n)]
+        _add(flags, vol > 40, np.array([f"Volatilité élevée ({v:.1f}%)" for v in vol], dtype=object))
+        _add(flags, var95 < -3.5, np.array([f"VaR(95) défavorable ({v:.1f}%)" for v in var95], dtype=object))
+        _add(flags, mdd < -35, np.array([f"Drawdown historique profond ({v:.1f}%)" for v in mdd], dtype=object))
+        _add(flags, np.abs(beta) > 1.3, np.array([f"Bêta élevé ({v:.2f})" for v in beta], dtype=object))
+    return np.clip(pen, -20, 0), flags
+
+
+def _unique(items: List[str], limit: int) -> List[str]:
+    return list(dict.fromkeys(items))[:limit]
+
+
+@traced("phase5.fuse_batch")
+def fuse_batch(inputs: pd.DataFrame,
+               macro: Optional[Dict[str, Any]] = None,
+               weights: Optional[Dict[str, float]] = None,
+               horizon_label: str = "6–12m") -> pd.DataFrame:
+    """
+    Score global vectorisé pour tout un univers (index de `inputs` = ticker).
+    `macro` : payload macro commun (format p3_payload) appliqué aux lignes sans colonnes macro.
+    Retourne un DataFrame trié par total_score décroissant (rank, piliers, malus risque,
+    recommandation, drivers, risk_flags).
+    """
+    df = inputs if isinstance(inputs, pd.DataFrame) else pd.DataFrame(inputs)
+    n = len(df)
+    fund_sc, fund_drv, fund_diag = _fuse_fundamental_v(df)
+    tech_sc, tech_drv, _ = _fuse_technical_v(df)
+    macro_sc, macro_drv, _ = _fuse_macro_v(df, macro)
+    sent_sc, sent_drv, _ = _fuse_sentiment_v(df)
+    malus, risk_flags = _risk_v(df)
+
+    # combine_scores
+    w = dict(weights or DEFAULT_WEIGHTS)
+    if sum(w.values()) <= 0:
+        w = {k: 1 / 4 for k in PILLARS}
+    scores = np.column_stack([fund_sc, tech_sc, macro_sc, sent_sc])
+    wv = np.array([w[k] for k in PILLARS], dtype=float)
+    raw = scores @ wv / wv.sum()
+    total = np.clip(raw + malus, 0, 100)
+    score_drv: List[List[str]] = [[] for _ in range(n)]
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :2]  # 2 piliers dominants
+    top_vals = np.take_along_axis(scores, order, axis=1)
+    for j in range(2):
+        labels = np.array([PILLAR_LABELS[p] for p in PILLARS], dtype=object)[order[:, j]]
+        _add(score_drv, top_vals[:, j] >= 65, np.array([f"{x} favorable" for x in labels], dtype=object))
+    _add(score_drv, np.array([not d for d in score_drv]), "Aucun pilier franchement dominant")
+    _add(score_drv, malus <= -8, "Profil de risque pénalisant")
+
+    # make_recommendation
+    reco = np.select([total >= 68, total >= 55],
+                     [f"Acheter (horizon {horizon_label})", f"Neutre / Conserver (horizon {horizon_label})"],
+                     f"Vendre / Éviter (horizon {horizon_label})")
+
+    news_flags = [f if isinstance(f, (list, tuple, np.ndarray)) else [] for f in _obj(df, "news_risk_flags")]
+    drivers = [
+        _unique([f"[FOND] {d}" for d in fund_drv[i][:2]] + [f"[TECH] {d}" for d in tech_drv[i][:2]]
+                + [f"[MACRO] {d}" for d in macro_drv[i][:2]] + [f"[SENT] {d}" for d in sent_drv[i][:2]]
+                + [f"[SCORE] {d}" for d in score_drv[i]], 8)
+        for i in range(n)
+    ]
+    flags = [_unique(risk_flags[i] + [f"News: {x}" for x in news_flags[i]], 6) for i in range(n)]
+
+    out = pd.DataFrame({
+        "total_score": total, "recommendation": reco,
+        "fundamental": fund_sc, "technical": tech_sc, "macro": macro_sc, "sentiment": sent_sc,
+        "risk_malus": malus, "drivers": drivers, "risk_flags": flags,
+        **{f"fund_{g}": v for g, v in fund_diag.items()},
+    }, index=pd.Index([str(t).upper() for t in df.index], name="ticker"))
+    out = out.sort_values("total_score", ascending=False, kind="stable")
+    out.insert(0, "rank", np.arange(1, n + 1))
+    return out
+
+
+# ---- Entrées batch calculées une fois pour tout l'univers (prix, benchmark, macro)
+
+def _benchmark_for(ticker: str) -> str:
+    return "^GSPTSE" if ticker.endswith(".TO") else "SPY"
+
+
+def _masked_beta(r: np.ndarray, rb: np.ndarray, min_obs: int = 20) -> np.ndarray:
+    """β de chaque colonne de `r` vs `rb` sur les observations communes."""
+    m = ~np.isnan(r) & ~np.isnan(rb)[:, None]
+    cnt = m.sum(axis=0)
+    x = np.where(m, r, 0.0)
+    y = np.where(m, rb[:, None], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mx, my = x.sum(axis=0) / cnt, y.sum(axis=0) / cnt
+        cov = (np.where(m, (x - mx) * (y - my), 0.0)).sum(axis=0) / (cnt - 1)
+        var = (np.where(m, (y - my) ** 2, 0.0)).sum(axis=0) / (cnt - 1)
+        beta = cov / var
+    return np.where(cnt >= min_obs, beta, np.nan)
+
+
+def batch_price_inputs(tickers: List[str], period_days: int = 3 * 365) -> pd.DataFrame:
+    """
+    Colonnes technique + risque de tout l'univers depuis UN panel de clôtures
+    (benchmarks SPY / ^GSPTSE chargés une seule fois) :
+      short_score / med_score / regime / ct_momentum_1m / mt_momentum_3m / mt_trend_sma200,
+      vol_annual_pct, var95_pct, max_drawdown_pct, beta_60d,
+      no_data (aucune clôture : à exclure du classement).
+    """
+    try:
+        from analytics.price_panel import load_close_panel, panel_features
+    except Exception:  # pragma: no cover - exécution directe
+        from price_panel import load_close_panel, panel_features
+    from datetime import datetime, timedelta
+
+    tickers = [str(t).upper() for t in tickers]
+    benches = sorted({_benchmark_for(t) for t in tickers})
+    start = (datetime.utcnow().date() - timedelta(days=period_days)).isoformat()
+    with span("phase5.batch_panel", tickers=len(tickers)) as sp:
+        panel = load_close_panel(list(dict.fromkeys(tickers + benches)), start=start)
+        sp.add_rows(panel.shape[0] * panel.shape[1])
+    px = panel.reindex(columns=tickers)
+    feats = panel_features(px).reindex(tickers)
+
+    vol_d = feats["vol"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mom1 = np.clip(feats["mom_21"].to_numpy(dtype=float) / (vol_d * np.sqrt(21)) / 2.0, -1, 1)
+        mom3 = np.clip(feats["mom_63"].to_numpy(dtype=float) / (vol_d * np.sqrt(63)) / 2.0, -1, 1)
+    trend = np.clip(feats["trend_strength"].to_numpy(dtype=float) * 5.0, -1, 1)
+    last, s50, s200 = (feats[c].to_numpy(dtype=float) for c in ("last", "sma_50", "sma_200"))
+    with np.errstate(invalid="ignore"):
+        regime = np.select([(last > s200) & (s50 > s200), (last < s200) & (s50 < s200)], ["Bull", "Bear"], "Range")
+
+    # risque: rendements de chaque titre sur son propre calendrier
+    rets = px.apply(lambda s: s.dropna().pct_change())
+    r = rets.to_numpy(dtype=float)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # titres sans historique -> NaN
+        vol_pct = np.nanstd(r, axis=0, ddof=1) * np.sqrt(252) * 100.0
+        var95 = np.nanpercentile(r, 5, axis=0) * 100.0
+        ff = px.ffill()
+        mdd = ((ff / ff.cummax()) - 1.0).min().to_numpy(dtype=float) * 100.0
+    beta = np.full(len(tickers), np.nan)
+    for b in benches:
+        if b not in panel.columns:
+            continue
+        idx = [i for i, t in enumerate(tickers) if _benchmark_for(t) == b]
+        rb = panel[b].pct_change().reindex(rets.index).to_numpy(dtype=float)
+        beta[idx] = _masked_beta(r[-60:, idx], rb[-60:])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        med = np.nan_to_num(np.nanmean(np.column_stack([mom3, trend]), axis=1)) if len(tickers) else np.empty(0)
+
+    return pd.DataFrame({
+        "short_score": np.nan_to_num(mom1),
+        "med_score": med,
+        "regime": regime,
+        "ct_momentum_1m": mom1, "mt_momentum_3m": mom3, "mt_trend_sma200": trend,
+        "vol_annual_pct": vol_pct, "var95_pct": var95, "max_drawdown_pct": mdd, "beta_60d": beta,
+        "no_data": ~px.notna().any(axis=0).to_numpy(dtype=bool),
+    }, index=pd.Index(tickers, name="ticker"))
+
+
+def macro_payload_from_regime(reg: Any) -> Optional[Dict[str, Any]]:
+    """
+    MacroRegimeView (phase 3) -> p3_payload lu par fuse_macro / fuse_batch :
+      - regime.zscore = croissance - (inflation + politique monétaire) / 2
+      - factor_tailwinds (-1..+1) : growth = g/2, inflation = -i/2, rates = -p/2, usd = -usd/2
+    None si le régime est inconnu (z-scores manquants) : repli macro plutôt qu'un faux neutre.
+    """
+    d = reg.to_dict() if hasattr(reg, "to_dict") else dict(reg or {})
+    try:
+        g, i, p = (float(d.get(k)) for k in ("growth_z", "inflation_z", "policy_z"))
+    except (TypeError, ValueError):
+        return None
+    if d.get("label") in (None, "", "Inconnu") or not np.isfinite([g, i, p]).all():
+        return None
+    tail = {"growth": g / 2.0, "inflation": -i / 2.0, "rates": -p / 2.0}
+    usd = (d.get("extra") or {}).get("USD")
+    if usd is not None and np.isfinite(float(usd)):
+        tail["usd"] = -float(usd) / 2.0
+    return {
+        "regime": {"label": d["label"], "zscore": float(np.clip(g - 0.5 * (i + p), -3.0, 3.0)),
+                   "growth_z": g, "inflation_z": i, "policy_z": p},
+        "factor_tailwinds": {k: float(np.clip(v, -1.0, 1.0)) for k, v in tail.items()},
+    }
+
+
+def shared_macro_payload() -> Optional[Dict[str, Any]]:
+    """État macro commun (phase 3 calculée une fois) au format p3_payload, ou None."""
+    try:
+        try:
+            from analytics import phase3_macro as _p3
+        except Exception:  # pragma: no cover - exécution directe
+            import phase3_macro as _p3
+        with span("phase5.batch_macro"):
+            bundle = _p3.get_us_macro_bundle(start="2000-01-01", monthly=True)
+            nc = _p3.macro_nowcast(bundle)
+            reg = _p3.macro_regime(nc)
+        payload = macro_payload_from_regime(reg)
+        if payload is not None:
+            payload["nowcast"] = nc.to_dict()
+        return payload
+    except Exception:
+        return None
+
+
+def rank_universe(tickers: List[str],
+                  extra: Optional[pd.DataFrame] = None,
+                  macro: Any = "auto",
+                  weights: Optional[Dict[str, float]] = None,
+                  horizon_label: str = "6–12m") -> pd.DataFrame:
+    """
+    Classement d'un univers en un appel : entrées prix/risque partagées (batch_price_inputs),
+    colonnes `extra` (fondamental, sentiment, sector_fit... index = ticker) et macro commune
+    (`"auto"` = phase 3 calculée une fois, None = repli macro).
+    Les tickers sans historique de prix sont exclus (listés dans `attrs["no_data"]`).
+    """
+    inputs = batch_price_inputs(tickers)
+    missing = inputs.index[inputs["no_data"]].tolist()
+    inputs = inputs[~inputs["no_data"]].drop(columns="no_data")
+    if extra is not None and len(extra):
+        extra = extra.copy()
+        extra.index = [str(t).upper() for t in extra.index]
+        inputs = inputs.join(extra, how="left", rsuffix="_extra")
+    if isinstance(macro, str) and macro == "auto":
+        macro = shared_macro_payload()
+    out = fuse_batch(inputs, macro=macro, weights=weights, horizon_label=horizon_label)
+    out.attrs["no_data"] = missing
+    return out
+
+
 # ====================== Exemple d’exécution ======================
 
 if __name__ == "__main__":
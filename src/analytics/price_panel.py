@@ -0,0 +1,149 @@
+"""
+Price panel + vectorized technical features shared by the forecast agents.
+
+- `load_close_panel(tickers, start)` builds one wide Close panel (dates x tickers):
+  fresh local `data/prices/ticker=X/prices.parquet` files first, then one batched
+  yfinance download for the rest, then per-ticker `get_price_history` (threaded).
+- `right_align(panel)` packs each column's valid observations at the bottom, so
+  `iloc[-n]` / `tail(n)` semantics of the former per-series helpers hold for every
+  instrument at once, whatever its trading calendar.
+- `panel_features(panel)` computes momentum, volatility, SMA, RSI, MACD and trend
+  strength for all instruments in one pass (index = ticker).
+
+Used by agents.equity_forecast_agent and agents.commodity_forecast_agent.
+"""
+from __future__ import annotations
+
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from analytics.forecast_eval import load_prices as _load_local_prices
+except Exception:  # pragma: no cover
+    _load_local_prices = None
+
+MAX_STALE_DAYS = int(os.getenv("PANEL_MAX_STALE_DAYS", "3"))
+
+
+def _download_batch(tickers: List[str], start: str) -> Dict[str, pd.Series]:
+    """One yfinance request for many tickers (Close only)."""
+    try:
+        import yfinance as yf
+        df = yf.download(tickers, start=start, auto_adjust=True, progress=False,
+                         group_by="column", threads=True)
+    except Exception:
+        return {}
+    if df is None or df.empty or "Close" not in df.columns.get_level_values(0):
+        return {}
+    close = df["Close"]
+    if isinstance(close, pd.Series):
+        close = close.to_frame(tickers[0])
+    if getattr(close.index, "tz", None) is not None:
+        close.index = close.index.tz_localize(None)
+    return {str(c): close[c].dropna() for c in close.columns if close[c].notna().any()}
+
+
+def _fetch_one(loader: Callable, ticker: str, start: str) -> Optional[pd.Series]:
+    try:
+        hist = loader(ticker, start=start)
+    except Exception:
+        return None
+    if hist is None or hist.empty or "Close" not in hist.columns:
+        return None
+    s = pd.to_numeric(hist["Close"], errors="coerce").dropna()
+    if getattr(s.index, "tz", None) is not None:
+        s.index = s.index.tz_localize(None)
+    return s
+
+
+def load_close_panel(tickers: Iterable[str], start: str,
+                     loader: Optional[Callable] = None,
+                     use_local: bool = True, batch: bool = True,
+                     max_stale_days: int = MAX_STALE_DAYS,
+                     max_workers: int = 8) -> pd.DataFrame:
+    """Wide Close panel (DatetimeIndex x tickers); instruments without data are absent."""
+    tickers = list(dict.fromkeys(str(t) for t in tickers))
+    start_ts = pd.Timestamp(start)
+    series: Dict[str, pd.Series] = {}
+    if use_local and _load_local_prices is not None:
+        fresh_after = np.datetime64(datetime.utcnow() - timedelta(days=max_stale_days), "ns")
+        for t, (dates, close) in _load_local_prices(tickers).items():
+            if len(dates) and dates[-1] >= fresh_after and dates[0] <= start_ts.to_datetime64():
+                s = pd.Series(close, index=pd.DatetimeIndex(dates))
+                series[t] = s[s.index >= start_ts]
+    missing = [t for t in tickers if t not in series]
+    if missing and batch and len(missing) > 1:
+        series.update({t: s for t, s in _download_batch(missing, start).items() if t in missing})
+        missing = [t for t in tickers if t not in series]
+    if missing:
+        if loader is None:
+            from core.market_data import get_price_history as loader
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as ex:
+            for t, s in zip(missing, ex.map(lambda x: _fetch_one(loader, x, start), missing)):
+                if s is not None and len(s):
+                    series[t] = s
+    if not series:
+        return pd.DataFrame(columns=tickers, dtype=float)
+    panel = pd.concat(series, axis=1, sort=True)
+    return panel[[t for t in tickers if t in panel.columns]]
+
+
+def right_align(panel: pd.DataFrame) -> np.ndarray:
+    """Move each column's valid values to the bottom (order kept), NaN on top."""
+    a = panel.to_numpy(dtype=float, copy=True)
+    order = np.argsort(~np.isnan(a), axis=0, kind="stable")
+    return np.take_along_axis(a, order, axis=0)
+
+
+def _last_n(a: np.ndarray, n: int) -> np.ndarray:
+    return a[-n:] if n <= len(a) else a
+
+
+def _momentum(a: np.ndarray, n_obs: np.ndarray, days: int) -> np.ndarray:
+    """last / value `days` observations back - 1 (NaN when history is too short)."""
+    if len(a) < days:
+        return np.full(a.shape[1], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m = a[-1] / a[-days] - 1.0
+    return np.where(n_obs > days, m, np.nan)
+
+
+def panel_features(panel: pd.DataFrame) -> pd.DataFrame:
+    """Technical features per instrument (rows = tickers)."""
+    cols = list(panel.columns)
+    if panel.empty or not cols:
+        return pd.DataFrame(index=pd.Index(cols, name="ticker"))
+    a = right_align(panel)
+    n_obs = (~np.isnan(a)).sum(axis=0)
+    last = a[-1]
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN slices -> NaN
+        rets = a[1:] / a[:-1] - 1.0
+        vol = np.nanstd(rets, axis=0, ddof=1)
+        tail20 = _last_n(a, 20)
+        vol_20 = np.nanstd(tail20[1:] / tail20[:-1] - 1.0, axis=0, ddof=1) * np.sqrt(252)
+        sma = {n: np.nanmean(_last_n(a, n), axis=0) for n in (20, 50, 200)}
+        # RSI(14): simple means of gains/losses over the last 14 changes
+        delta = _last_n(np.diff(a, axis=0), 14)
+        gain = np.where(delta > 0, delta, 0.0).mean(axis=0)
+        loss = np.where(delta < 0, -delta, 0.0).mean(axis=0)
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+        rsi = np.where(n_obs > 14, rsi, np.nan)
+        # MACD(12, 26) last value; leading NaNs are skipped by ewm
+        df = pd.DataFrame(a)
+        macd = (df.ewm(span=12, adjust=False).mean() - df.ewm(span=26, adjust=False).mean()).iloc[-1].to_numpy()
+        trend = np.clip((last - sma[200]) / sma[200], -1.0, 1.0)
+        trend = np.where(sma[200] > 0, trend, 0.0)
+    return pd.DataFrame({
+        "n_obs": n_obs, "last": last,
+        "mom_5": _momentum(a, n_obs, 5), "mom_21": _momentum(a, n_obs, 21), "mom_63": _momentum(a, n_obs, 63),
+        "vol": vol, "volatility_20": vol_20,
+        "sma_20": sma[20], "sma_50": sma[50], "sma_200": sma[200],
+        "rsi_14": rsi, "macd": macd, "trend_strength": trend,
+    }, index=pd.Index(cols, name="ticker"))
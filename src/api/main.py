@@ -2,11 +2,13 @@
 from __future__ import annotations
 
 import os
+from dataclasses import asdict
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 
 from pydantic import BaseModel
 
@@ -15,23 +17,33 @@ from core.config import CONFIG
 from api.errors import ApiError, api_error_handler, generic_error_handler
 from api.health import router as health_router
 from core.cache import ttl_cache
-
-# Réutilisation modules existants
-from core.market_data import get_fred_series, get_price_history
-from ingestion.finnews import run_pipeline as news_run_pipeline
-from analytics.indicators_basic import compute_indicators as compute_indicators_basic
-from analytics.phase2_technical import compute_indicators, load_prices  # si non dispo: fallback simple
-from research.brief_renderer import render_brief_html, render_brief_md
-from research.alerts import alerts_for_ticker
+from core.columnar import FORMATS, arrow_response, frame_columns, json_response
+
+from core.lazy import lazy_attr
+
+# Réutilisation modules existants, importés au premier appel (démarrage rapide ;
+# une dépendance absente ne casse que les routes qui en ont besoin)
+get_fred_series = lazy_attr("core.market_data", "get_fred_series")
+get_price_history = lazy_attr("core.market_data", "get_price_history")
+news_run_pipeline = lazy_attr("ingestion.finnews", "run_pipeline")
+news_search_cached = lazy_attr("ingestion.finnews", "search_cached")
+compute_indicators_basic = lazy_attr("analytics.indicators_basic", "compute_indicators")
+compute_indicators = lazy_attr("analytics.phase2_technical", "compute_indicators")  # si non dispo: fallback simple
+load_prices = lazy_attr("analytics.phase2_technical", "load_prices")
+render_brief_html = lazy_attr("research.brief_renderer", "render_brief_html")
+render_brief_md = lazy_attr("research.brief_renderer", "render_brief_md")
+alerts_for_ticker = lazy_attr("research.alerts", "alerts_for_ticker")
+get_sheet = lazy_attr("research.sheets", "get_sheet")
+sheet_etag = lazy_attr("research.sheets", "sheet_etag")
+etag_matches = lazy_attr("research.sheets", "etag_matches")
 # Macro bundle optionnel (si pratique)
-try:
-    from analytics.phase3_macro import get_us_macro_bundle  # type: ignore
-except Exception:
-    get_us_macro_bundle = None  # type: ignore
+get_us_macro_bundle = lazy_attr("analytics.phase3_macro", "get_us_macro_bundle")
 
 # Colle ajoutée
-from research.scoring import build_brief
-from research.rag_store import search_chunks, add_news_items, add_series_facts
+build_brief = lazy_attr("research.scoring", "build_brief")
+search_chunks = lazy_attr("research.rag_store", "search_chunks")
+add_news_items = lazy_attr("research.rag_store", "add_news_items")
+add_series_facts = lazy_attr("research.rag_store", "add_series_facts")
 
 from .schemas import (
     TimePoint, PricePoint, MacroSeries, StockItem, Indicators,
@@ -55,41 +67,69 @@ def _env_flag(name: str, default: str = "0") -> bool:
     return (os.getenv(name, default) or "0").strip() not in ("0", "false", "False", "")
 
 
+_OHLCV_ALIASES = {
+    "o": ("Open", "open", "O"), "h": ("High", "high", "H"), "l": ("Low", "low", "L"),
+    "c": ("Close", "close", "C"), "v": ("Volume", "volume", "V"),
+}
+
+
+def _ohlcv_columns(df) -> dict:
+    """{colonne du DataFrame: champ PricePoint} (premier alias présent)."""
+    out = {}
+    for name, aliases in _OHLCV_ALIASES.items():
+        col = next((a for a in aliases if a in df.columns), None)
+        if col is not None:
+            out[col] = name
+    return out
+
+
 def _df_to_time_points(df, value_col: str = None):
     """
     Convertit un DataFrame en liste TimePoint/PricePoint.
     Si value_col est donné -> TimePoint. Sinon assume OHLCV -> PricePoint.
+    Les colonnes sont lues en bloc (NumPy) ; une colonne OHLCV absente vaut 0.0.
     """
-    out = []
     if df is None or getattr(df, "empty", True):
-        return out
+        return []
+    ts = [str(i) for i in df.index]
     if value_col:
-        for idx, row in df.iterrows():
-            v = float(row[value_col]) if value_col in row else float(row.iloc[0])
-            out.append(TimePoint(t=str(idx), v=v))
-    else:
-        # OHLCV
-        for idx, r in df.iterrows():
-            out.append(
-                PricePoint(
-                    t=str(idx),
-                    o=float(r.get("Open", r.get("open", r.get("O", 0.0)))),
-                    h=float(r.get("High", r.get("high", r.get("H", 0.0)))),
-                    l=float(r.get("Low", r.get("low", r.get("L", 0.0)))),
-                    c=float(r.get("Close", r.get("close", r.get("C", 0.0)))),
-                    v=float(r.get("Volume", r.get("volume", r.get("V", 0.0)))),
-                )
-            )
-    return out
+        col = value_col if value_col in df.columns else df.columns[0]
+        vals = df[col].to_numpy(dtype=float).tolist()
+        return [TimePoint(t=t, v=v) for t, v in zip(ts, vals)]
+    # OHLCV
+    cols = {name: df[col].to_numpy(dtype=float).tolist() for col, name in _ohlcv_columns(df).items()}
+    zeros = [0.0] * len(df)
+    o, h, l, c, v = (cols.get(k, zeros) for k in ("o", "h", "l", "c", "v"))
+    return [PricePoint(t=t, o=a, h=b, l=d, c=e, v=f) for t, a, b, d, e, f in zip(ts, o, h, l, c, v)]
+
+
+def _check_format(fmt: str) -> None:
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
 
 
 # --------- Endpoints ----------
 
 @app.get("/api/macro/series")
-def macro_series(ids: List[str] = Query(...), start: Optional[str] = None, end: Optional[str] = None):
+def macro_series(request: Request, ids: List[str] = Query(...), start: Optional[str] = None,
+                 end: Optional[str] = None, format: str = "rows"):
     """
     Retourne des séries FRED/indices au format UI-ready.
+    format=columnar : tableaux parallèles {t, v} ; format=arrow : flux Arrow IPC.
     """
+    _check_format(format)
+    if format != "rows":
+        frames = {sid: get_fred_series(sid, start=start) for sid in ids}
+        frames = {sid: df.iloc[:, -1:] for sid, df in frames.items() if df is not None and len(df.columns)}
+        if format == "arrow":
+            return arrow_response(request, {sid: df.set_axis(["value"], axis=1) for sid, df in frames.items()},
+                                  {"value": "value"}, key="series")
+        ts = datetime.utcnow().isoformat() + "Z"
+        return json_response(request, {"series": [
+            {"id": sid, **frame_columns(df, {df.columns[0]: "v"}), "source": "FRED", "ts": ts,
+             "url": f"https://fred.stlouisfed.org/series/{sid}"}
+            for sid, df in frames.items()
+        ]})
     series = []
     for sid in ids:
         df = get_fred_series(sid, start=start)
@@ -106,29 +146,46 @@ def macro_series(ids: List[str] = Query(...), start: Optional[str] = None, end:
     return {"series": [s.dict() for s in series]}
 
 
+def _stock_frame(t: str, period: str, interval: str):
+    """(OHLCV, Indicators) via analytics.phase2_technical si dispo, sinon fallback simple."""
+    # Essayons la pipeline technique complète si elle existe
+    try:
+        df = load_prices(t, period=period, interval=interval)
+        ind_df = compute_indicators(df)
+        indi = Indicators(
+            rsi=float(ind_df["rsi"].dropna().iloc[-1]) if "rsi" in ind_df else None,
+            sma20=float(ind_df["sma20"].dropna().iloc[-1]) if "sma20" in ind_df else None,
+            macd=float(ind_df["macd"].dropna().iloc[-1]) if "macd" in ind_df else None,
+        )
+    except Exception:
+        # Fallback minimal
+        df = get_price_history(t, interval=interval)
+        indi = Indicators()
+    return df, indi
+
+
 @app.get("/api/stocks/prices")
-def stocks_prices(tickers: List[str] = Query(...), period: str = "1y", interval: str = "1d"):
+def stocks_prices(request: Request, tickers: List[str] = Query(...), period: str = "1y",
+                  interval: str = "1d", format: str = "rows"):
     """
     Retourne OHLCV + indicateurs de base (RSI/SMA20/MACD) pour un ou plusieurs tickers.
-    Essaie d'utiliser analytics.phase2_technical si dispo, sinon fallback simple.
+    format=columnar : prix en tableaux parallèles {t, o, h, l, c, v} ; format=arrow : flux Arrow IPC.
     """
+    _check_format(format)
+    frames = {t: _stock_frame(t, period, interval) for t in tickers}
+    if format == "arrow":
+        return arrow_response(request, {t: df.rename(columns=_ohlcv_columns(df)) for t, (df, _) in frames.items()
+                                        if df is not None},
+                              {k: k for k in _OHLCV_ALIASES}, key="ticker")
+    if format == "columnar":
+        return json_response(request, {"items": [
+            {"ticker": t, "prices": frame_columns(df, _ohlcv_columns(df)) if df is not None else {"t": []},
+             "indicators": indi.dict()}
+            for t, (df, indi) in frames.items()
+        ]})
     items = []
-    for t in tickers:
-        # Essayons la pipeline technique complète si elle existe
-        try:
-            df = load_prices(t, period=period, interval=interval)
-            ind_df = compute_indicators(df)
-            prices = _df_to_time_points(df)  # OHLCV points
-            indi = Indicators(
-                rsi=float(ind_df["rsi"].dropna().iloc[-1]) if "rsi" in ind_df else None,
-                sma20=float(ind_df["sma20"].dropna().iloc[-1]) if "sma20" in ind_df else None,
-                macd=float(ind_df["macd"].dropna().iloc[-1]) if "macd" in ind_df else None,
-            )
-        except Exception:
-            # Fallback minimal
-            df = get_price_history(t, interval=interval)
-            prices = _df_to_time_points(df)
-            indi = Indicators()
+    for t, (df, indi) in frames.items():
+        prices = _df_to_time_points(df)  # OHLCV points
         items.append(StockItem(ticker=t, prices=prices, indicators=indi).dict())
     return {"items": items}
 
@@ -145,9 +202,13 @@ def news_feed(
     """
     # Window heuristique: "last_week" si limit>50, sinon "last_48h"
     window = "last_48h" if limit <= 50 else "last_week"
-    items = news_run_pipeline(regions=regions, window=window, query=q or "", tgt_ticker=(tickers[0] if tickers else None), limit=limit)
+    items = news_search_cached(query=q or "", window=window, regions=regions, tickers=tickers, limit=limit)
+    if items is None:
+        items = news_run_pipeline(regions=regions, window=window, query=q or "", tgt_ticker=(tickers[0] if tickers else None), limit=limit)
     out = []
     for it in items:
+        if not isinstance(it, dict):
+            it = {**asdict(it), "url": it.link, "lang": it.language}
         out.append(
             NewsItem(
                 id=it.get("id") or it.get("hash") or it.get("url"),
@@ -179,10 +240,41 @@ def market_brief(period: str = "weekly", universe: Optional[List[str]] = Query(N
 
 
 @app.get("/api/tickers/{ticker}/sheet")
-def ticker_sheet(ticker: str, period: str = "6mo", interval: str = "1d"):
+def ticker_sheet(request: Request, ticker: str, period: str = "6mo", interval: str = "1d"):
     """
     Fiche complète: prix+indicateurs + top 5 news + niveaux simples.
+    period=6mo / interval=1d : artefact précalculé (research.sheets), ETag + 304 ;
+    autres fenêtres : calcul à la demande.
     """
+    if (period, interval) != ("6mo", "1d"):
+        return _ticker_sheet_live(ticker, period, interval)
+    sheet = get_sheet(ticker)
+    if sheet is None:
+        raise HTTPException(status_code=404, detail=f"No data for {ticker}")
+    etag = sheet_etag(sheet, "src")
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    px = sheet["prices"]
+    keys = ["t", "o", "h", "l", "c", "v"]
+    zeros = [0.0] * len(px.get("t", []))
+    cols = [px.get("t", [])] + [[0.0 if x is None else x for x in px.get(k) or zeros] for k in keys[1:]]
+    ind, lv = sheet["indicators"], sheet["levels"]
+    indi = Indicators(rsi=ind.get("rsi"), sma20=ind.get("sma_20"), macd=ind.get("macd"))
+    return json_response(request, {
+        "overview": {"ticker": ticker, "version": sheet.get("version"), "stale": sheet.get("stale", False),
+                     "generatedAt": sheet.get("generated_at")},
+        "prices": [dict(zip(keys, row)) for row in zip(*cols)],
+        "indicators": indi.dict(),
+        "alerts": sheet.get("alerts", []),
+        "newsTop": [NewsItem(**it).dict() for it in sheet.get("news_top", [])],
+        "levels": {"sma20": indi.sma20, "rsi": indi.rsi, "last_close": lv.get("last_close")},
+    }, headers=headers)
+
+
+def _ticker_sheet_live(ticker: str, period: str, interval: str):
+    """Fiche calculée à la demande (fenêtres autres que celle de l'artefact)."""
     # prix & indicateurs
     try:
         df = load_prices(ticker, period=period, interval=interval)
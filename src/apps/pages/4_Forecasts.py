@@ -8,7 +8,7 @@ SRC = Path(__file__).resolve().parents[2]
 if str(SRC) not in _sys.path:
     _sys.path.insert(0, str(SRC))
 
-from analytics.market_intel import build_snapshot
+from analytics.market_intel import build_snapshots
 from analytics.forecaster import forecast_ticker
 
 st.set_page_config(page_title="Forecasts — Finance Agent", layout="wide")
@@ -23,8 +23,10 @@ with st.sidebar:
 
 if run:
     rows = []
-    for t in [x.strip().upper() for x in tickers.split(",") if x.strip()]:
-        snap = build_snapshot(regions=["US","INTL"], window="last_week", ticker=t, limit=150)
+    tks = [x.strip().upper() for x in tickers.split(",") if x.strip()]
+    snaps = build_snapshots(tks, regions=["US","INTL"], window="last_week", limit=150)
+    for t in tks:
+        snap = snaps.get(t) or {}
         feats = snap.get("features", {})
         f = forecast_ticker(t, horizon=horizon, features=feats).to_dict()
         rows.append({"ticker": t, **{f"f_{k}": v for k, v in f.items() if k != "drivers"}})
@@ -305,7 +305,15 @@ def get_similar_stocks(ticker, n=5):
     # retirer le ticker principal s'il est présent
     if ticker in peer_group:
         peer_group.remove(ticker)
-    # Récupérer les données
+    # Matrice de corrélation partagée (peer engine), sans retélécharger le groupe
+    try:
+        from analytics.peer_engine import peer_tickers
+        peers = peer_tickers(ticker, k=n, candidates=peer_group)
+        if peers:
+            return peers
+    except Exception:
+        pass
+    # Repli: récupérer les données
     peers_df, _valid = get_peer_data([ticker] + peer_group)
     if peers_df is None or peers_df.empty or ticker not in peers_df.columns:
         return []
@@ -0,0 +1,178 @@
+"""
+Columnar encoding of time-series frames for the API layers.
+
+- `frame_columns(df, columns)` gives parallel arrays `{"t": [...], name: ndarray, ...}`
+  read straight from the frame's NumPy buffers (no per-row dicts); NaN is emitted as
+  JSON null.
+- `frame_records(df, columns)` gives the legacy `[{"t": ..., name: ...}, ...]` rows,
+  built from the same arrays (zip instead of iterrows).
+- `json_bytes(obj)` fast JSON: orjson (native numpy) when installed, else stdlib.
+- `arrow_bytes(frames, columns)` Arrow IPC stream: one table, one `key` column.
+- `json_response` / `arrow_response` negotiate Content-Encoding from Accept-Encoding
+  (br when `brotli` is installed, else gzip; small bodies are sent as is).
+
+Used by api/main.py and src/api/main.py (`format=rows|columnar|arrow`).
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson  # type: ignore
+except Exception:  # optional: stdlib json fallback
+    orjson = None
+
+try:
+    import brotli  # type: ignore
+except Exception:  # optional: gzip only
+    brotli = None
+
+FORMATS = ("rows", "columnar", "arrow")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MIN_COMPRESS_BYTES = int(os.getenv("API_MIN_COMPRESS_BYTES", "1024"))
+OHLCV = {"Open": "o", "High": "h", "Low": "l", "Close": "c", "Volume": "v"}
+
+
+def _timestamps(index: pd.Index) -> List[str]:
+    """ISO strings, identical to `Timestamp.isoformat()` per element."""
+    if isinstance(index, pd.DatetimeIndex) and index.tz is None:
+        values = index.values
+        if len(values) and not (values.astype(np.int64) % 1_000_000_000).any():
+            return np.datetime_as_string(values, unit="s").tolist()
+    return [x.isoformat() if hasattr(x, "isoformat") else str(x) for x in index]
+
+
+def _values(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    s = df[col]
+    if s.dtype.kind not in "fiub":
+        s = pd.to_numeric(s, errors="coerce")
+    return np.ascontiguousarray(s.to_numpy(dtype=float, na_value=np.nan))
+
+
+def frame_columns(df: Optional[pd.DataFrame], columns: Mapping[str, str]) -> Dict[str, Any]:
+    """`{"t": [iso...], out_name: float ndarray}` for `columns` = {frame column: out name}."""
+    if df is None or df.empty:
+        return {"t": [], **{name: np.empty(0) for name in columns.values()}}
+    out: Dict[str, Any] = {"t": _timestamps(df.index)}
+    for col, name in columns.items():
+        out[name] = _values(df, col)
+    return out
+
+
+def _nullable(a: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in a.tolist()]
+
+
+def frame_records(df: Optional[pd.DataFrame], columns: Mapping[str, str]) -> List[Dict[str, Any]]:
+    """Legacy row format `[{"t": iso, out_name: float | None, ...}]`."""
+    if df is None or df.empty:
+        return []
+    cols = frame_columns(df, columns)
+    keys = ["t", *columns.values()]
+    arrays = [cols["t"], *(_nullable(cols[k]) for k in keys[1:])]
+    return [dict(zip(keys, row)) for row in zip(*arrays)]
+
+
+def _default(o: Any) -> Any:
+    if isinstance(o, np.ndarray):
+        return _nullable(o.astype(float)) if o.dtype.kind == "f" else o.tolist()
+    if isinstance(o, np.generic):
+        return o.item()
+    if hasattr(o, "isoformat"):
+        return o.isoformat()
+    if hasattr(o, "model_dump"):
+        return o.model_dump()
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+
+def json_bytes(obj: Any) -> bytes:
+    """UTF-8 JSON; numpy arrays and scalars are serialized natively (NaN -> null)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def arrow_bytes(frames: Mapping[str, Optional[pd.DataFrame]], columns: Mapping[str, str],
+                key: str = "key") -> bytes:
+    """Arrow IPC stream of all frames stacked: `key` (dictionary), `t` (timestamp), columns."""
+    import pyarrow as pa
+
+    keys: List[np.ndarray] = []
+    ts: List[np.ndarray] = []
+    vals: Dict[str, List[np.ndarray]] = {name: [] for name in columns.values()}
+    for k, df in frames.items():
+        if df is None or df.empty:
+            continue
+        keys.append(np.full(len(df), k, dtype=object))
+        idx = pd.DatetimeIndex(pd.to_datetime(df.index, errors="coerce"))
+        ts.append((idx.tz_convert(None) if idx.tz is not None else idx).values.astype("datetime64[ns]"))
+        for col, name in columns.items():
+            vals[name].append(_values(df, col))
+    cat = (lambda parts, dtype: np.concatenate(parts) if parts else np.empty(0, dtype=dtype))
+    arrays = {
+        key: pa.array(cat(keys, object), type=pa.string()).dictionary_encode(),
+        "t": pa.array(cat(ts, "datetime64[ns]"), type=pa.timestamp("ns")),
+        **{name: pa.array(cat(parts, float), type=pa.float64(), from_pandas=True) for name, parts in vals.items()},
+    }
+    table = pa.table(arrays)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            out[name.strip().lower()] = q
+    return out
+
+
+def encode(body: bytes, accept_encoding: str, min_size: int = MIN_COMPRESS_BYTES):
+    """(body, content-encoding or None) for the best accepted codec."""
+    if len(body) < min_size:
+        return body, None
+    acc = _accepted(accept_encoding)
+    if brotli is not None and acc.get("br", 0) > 0:
+        return brotli.compress(body, quality=4), "br"
+    if acc.get("gzip", 0) > 0 or acc.get("*", 0) > 0:
+        return gzip.compress(body, compresslevel=5), "gzip"
+    return body, None
+
+
+def _response(request, body: bytes, media_type: str, headers: Optional[Mapping[str, str]] = None):
+    from fastapi.responses import Response
+
+    body, enc = encode(body, request.headers.get("accept-encoding", "") if request is not None else "")
+    hdrs = {"Vary": "Accept-Encoding", **(headers or {})}
+    if enc:
+        hdrs["Content-Encoding"] = enc
+    return Response(content=body, media_type=media_type, headers=hdrs)
+
+
+def json_response(request, payload: Any, headers: Optional[Mapping[str, str]] = None):
+    """JSON Response (fast encoder, negotiated compression)."""
+    return _response(request, json_bytes(payload), "application/json", headers)
+
+
+def arrow_response(request, frames: Mapping[str, Optional[pd.DataFrame]], columns: Mapping[str, str],
+                   key: str = "key", headers: Optional[Mapping[str, str]] = None):
+    """Arrow IPC stream Response (negotiated compression)."""
+    return _response(request, arrow_bytes(frames, columns, key=key), ARROW_MEDIA_TYPE, headers)
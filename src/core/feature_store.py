@@ -0,0 +1,234 @@
+"""
+Append-only feature tables keyed by (symbol, date) on Parquet.
+
+- Each table has a fixed, typed schema: `symbol` is dictionary-encoded, `date` is
+  date32 and features are declared Arrow types; input frames are cast to it (extra
+  columns dropped, missing ones null), so every segment has the same schema.
+- `append(df)` keeps only rows newer than the table's per-symbol watermark, sorts
+  them by (symbol, date) and writes them as a new segment (row groups of
+  ROW_GROUP_ROWS rows, whose min/max statistics let readers skip symbols/dates).
+  Cost is proportional to the new rows, not to the stored history.
+- `watermarks()` tells loaders where each symbol stops, so they only fetch new dates.
+- `read(symbols, start, end)` and `as_of(date)` (last row per symbol at or before
+  `date`, point-in-time) push symbol/date filters down to the Parquet scan.
+- Past MAX_SEGMENTS segments, `compact()` rewrites them into one sorted file.
+
+Layout: data/features/store/<table>/seg-NNNNNN.parquet + _state.json (schema,
+watermarks, live segments). Readers only open segments listed in the state, which
+is replaced atomically after each write.
+
+Usage:
+    t = FeatureTable("prices_features_daily", {"close": pa.float64(), "rsi": pa.float64()})
+    t.append(df)                       # columns symbol, date, close, rsi
+    t.as_of("2024-06-30", ["AAPL"])
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+STORE_ROOT = Path(os.getenv("FEATURE_STORE_ROOT", "data/features/store"))
+ROW_GROUP_ROWS = int(os.getenv("FEATURE_STORE_ROW_GROUP", "16384"))
+MAX_SEGMENTS = int(os.getenv("FEATURE_STORE_MAX_SEGMENTS", "32"))
+KEY_FIELDS = [pa.field("symbol", pa.dictionary(pa.int32(), pa.string()), nullable=False),
+              pa.field("date", pa.date32(), nullable=False)]
+
+_LOCKS: Dict[str, threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+def _table_lock(path: Path) -> threading.Lock:
+    with _LOCKS_GUARD:
+        return _LOCKS.setdefault(str(path.resolve()), threading.Lock())
+
+
+def _to_date(v: Any) -> Optional[dt.date]:
+    if v is None:
+        return None
+    ts = pd.Timestamp(v)
+    return None if pd.isna(ts) else ts.date()
+
+
+class FeatureTable:
+    """One (symbol, date)-keyed feature table; see the module docstring."""
+
+    def __init__(self, name: str, features: Mapping[str, pa.DataType], root: Optional[Path] = None):
+        self.name = name
+        self.path = Path(root or STORE_ROOT) / name
+        self.schema = pa.schema(KEY_FIELDS + [pa.field(k, t) for k, t in features.items()])
+        self._lock = _table_lock(self.path)
+
+    # ------------------------------------------------------------------ state
+    @property
+    def _state_path(self) -> Path:
+        return self.path / "_state.json"
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            state = json.loads(self._state_path.read_text(encoding="utf-8"))
+        except Exception:
+            return {"schema": self._schema_sig(), "watermarks": {}, "segments": [], "next_seq": 0, "rows": 0}
+        if state.get("schema") != self._schema_sig():
+            raise ValueError(f"feature table {self.name}: stored schema {state.get('schema')} "
+                             f"!= declared {self._schema_sig()}")
+        return state
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        tmp = self._state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, indent=1), encoding="utf-8")
+        tmp.replace(self._state_path)
+
+    def _schema_sig(self) -> Dict[str, str]:
+        return {f.name: str(f.type) for f in self.schema}
+
+    def watermarks(self) -> Dict[str, dt.date]:
+        """Last stored date per symbol."""
+        marks = self._load_state()["watermarks"]
+        return {s: dt.date.fromisoformat(d) for s, d in marks.items()}
+
+    def segments(self) -> List[Path]:
+        return [self.path / s for s in self._load_state()["segments"]]
+
+    # ------------------------------------------------------------------ write
+    def _conform(self, df: pd.DataFrame) -> pa.Table:
+        """Cast a frame to the table schema (extra columns dropped, missing ones null)."""
+        cols: Dict[str, pa.Array] = {}
+        for f in self.schema:
+            if f.name == "symbol":
+                cols[f.name] = pa.array(df["symbol"].astype(str).str.upper().tolist(),
+                                        type=pa.string()).dictionary_encode()
+            elif f.name == "date":
+                cols[f.name] = pa.array(pd.to_datetime(df["date"]).dt.date.tolist(), type=pa.date32())
+            elif f.name in df.columns:
+                s = df[f.name]
+                if pa.types.is_floating(f.type) or pa.types.is_integer(f.type):
+                    s = pd.to_numeric(s, errors="coerce")
+                cols[f.name] = pa.array(s, type=f.type, from_pandas=True)
+            else:
+                cols[f.name] = pa.nulls(len(df), type=f.type)
+        return pa.table(cols, schema=self.schema)
+
+    def _write_segment(self, table: pa.Table, name: str) -> None:
+        tmp = self.path / f".{name}.tmp"
+        pq.write_table(table, tmp, row_group_size=ROW_GROUP_ROWS, compression="zstd",
+                       use_dictionary=True, write_statistics=True)
+        tmp.replace(self.path / name)
+
+    def append(self, df: Optional[pd.DataFrame]) -> int:
+        """Append rows newer than each symbol's watermark; returns the number written."""
+        if df is None or df.empty:
+            return 0
+        df = df.dropna(subset=["symbol", "date"]).copy()
+        df["symbol"] = df["symbol"].astype(str).str.upper()
+        dates = pd.to_datetime(df["date"])
+        if getattr(dates.dt, "tz", None) is not None:
+            dates = dates.dt.tz_localize(None)
+        df["date"] = dates.dt.normalize()
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            state = self._load_state()
+            marks = state["watermarks"]
+            if marks:
+                last = pd.to_datetime(df["symbol"].map(marks))
+                df = df[last.isna() | (df["date"] > last)]
+            df = df.drop_duplicates(["symbol", "date"], keep="last").sort_values(["symbol", "date"])
+            if df.empty:
+                return 0
+            name = f"seg-{state['next_seq']:06d}.parquet"
+            self._write_segment(self._conform(df), name)
+            new_marks = df.groupby("symbol")["date"].max()
+            marks.update({s: d.date().isoformat() for s, d in new_marks.items()})
+            state["segments"].append(name)
+            state["next_seq"] += 1
+            state["rows"] = int(state.get("rows", 0)) + len(df)
+            self._save_state(state)
+            n_segments = len(state["segments"])
+        if n_segments > MAX_SEGMENTS:
+            self.compact()
+        return len(df)
+
+    def compact(self) -> int:
+        """Rewrite all segments into one file sorted by (symbol, date); returns rows."""
+        with self._lock:
+            state = self._load_state()
+            if len(state["segments"]) <= 1:
+                return int(state.get("rows", 0))
+            old = list(state["segments"])
+            table = self._dataset(old).to_table()
+            keys = pa.table({"s": table["symbol"].cast(pa.string()), "d": table["date"]})
+            order = pc.sort_indices(keys, sort_keys=[("s", "ascending"), ("d", "ascending")])
+            table = table.take(order).unify_dictionaries().combine_chunks()
+            name = f"seg-{state['next_seq']:06d}.parquet"
+            self._write_segment(table.cast(self.schema), name)
+            state.update(segments=[name], next_seq=state["next_seq"] + 1, rows=table.num_rows)
+            self._save_state(state)
+        for s in old:
+            try:
+                (self.path / s).unlink()
+            except OSError:
+                pass
+        return table.num_rows
+
+    # ------------------------------------------------------------------ read
+    def _dataset(self, names: Sequence[str]) -> ds.Dataset:
+        return ds.dataset([str(self.path / s) for s in names], schema=self.schema, format="parquet")
+
+    def _filter(self, symbols: Optional[Iterable[str]], start: Any, end: Any):
+        parts = []
+        if symbols is not None:
+            parts.append(pc.field("symbol").isin([str(s).upper() for s in symbols]))
+        if _to_date(start) is not None:
+            parts.append(pc.field("date") >= pa.scalar(_to_date(start), pa.date32()))
+        if _to_date(end) is not None:
+            parts.append(pc.field("date") <= pa.scalar(_to_date(end), pa.date32()))
+        expr = None
+        for p in parts:
+            expr = p if expr is None else expr & p
+        return expr
+
+    def scan(self, symbols: Optional[Iterable[str]] = None, start: Any = None, end: Any = None,
+             columns: Optional[Sequence[str]] = None) -> pa.Table:
+        """Arrow table of the matching rows (filters pushed down to row groups)."""
+        names = self._load_state()["segments"]
+        cols = None if columns is None else list(dict.fromkeys(["symbol", "date", *columns]))
+        if not names:
+            return self.schema.empty_table() if cols is None else self.schema.empty_table().select(cols)
+        return self._dataset(names).to_table(columns=cols, filter=self._filter(symbols, start, end))
+
+    def read(self, symbols: Optional[Iterable[str]] = None, start: Any = None, end: Any = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Rows in [start, end] sorted by (symbol, date); `symbol` as a categorical."""
+        tbl = self.scan(symbols, start, end, columns)
+        df = tbl.to_pandas()
+        if df.empty:
+            return df
+        df["date"] = pd.to_datetime(df["date"])
+        return df.sort_values(["symbol", "date"], kind="stable").reset_index(drop=True)
+
+    def as_of(self, date: Any, symbols: Optional[Iterable[str]] = None,
+              columns: Optional[Sequence[str]] = None, max_age_days: Optional[int] = None) -> pd.DataFrame:
+        """Point-in-time snapshot: last row per symbol with date <= `date`.
+
+        `max_age_days` bounds the scan (and drops symbols with no row that recent).
+        """
+        end = _to_date(date) or dt.date.today()
+        start = end - dt.timedelta(days=max_age_days) if max_age_days is not None else None
+        df = self.read(symbols, start, end, columns)
+        if df.empty:
+            return df
+        return df.drop_duplicates("symbol", keep="last").reset_index(drop=True)
+
+    def info(self) -> Dict[str, Any]:
+        state = self._load_state()
+        return {"table": self.name, "rows": state.get("rows", 0), "segments": len(state["segments"]),
+                "symbols": len(state["watermarks"]), "schema": state["schema"]}
@@ -0,0 +1,59 @@
+"""
+Deferred imports for cold-start sensitive entry points (API workers, Dash server).
+
+- `lazy_module(name)` returns a module proxy; the real import happens on first
+  attribute access (`yf = lazy_module("yfinance")` then `yf.Ticker(...)`).
+- `lazy_attr(module, name)` returns a callable that imports `module` on first call
+  and forwards to `module.name` (`get_fred_series = lazy_attr("core.market_data",
+  "get_fred_series")`).
+
+Import errors surface on first use instead of when the caller is imported, so a
+missing optional engine (ta, statsmodels, yfinance...) only breaks the routes that
+need it.
+"""
+from __future__ import annotations
+
+import importlib
+import types
+from typing import Any, Callable
+
+
+class _LazyModule(types.ModuleType):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        mod = self.__dict__["_lazy_module"]
+        if mod is None:
+            mod = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_module"] = mod
+        return mod
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """Module proxy imported on first attribute access."""
+    return _LazyModule(name)
+
+
+def lazy_attr(module: str, name: str) -> Callable[..., Any]:
+    """Callable proxy for `module.name`, imported on first call."""
+    target = None
+
+    def _call(*args, **kwargs):
+        nonlocal target
+        if target is None:
+            target = getattr(importlib.import_module(module), name)
+        return target(*args, **kwargs)
+
+    _call.__name__ = _call.__qualname__ = name
+    _call.__module__ = module
+    _call.__doc__ = f"Lazy proxy for {module}.{name}."
+    return _call
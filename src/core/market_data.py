@@ -20,6 +20,8 @@ import io
 import pandas as pd
 import requests
 
+from .tracing import traced
+
 
 def _env(name: str) -> Optional[str]:
     v = os.getenv(name)
@@ -27,6 +29,7 @@ def _env(name: str) -> Optional[str]:
 
 
 # ================= Prices =================
+@traced("market_data.price_history")
 def get_price_history(ticker: str, start: Optional[str] = None, end: Optional[str] = None, interval: str = "1d") -> Optional[pd.DataFrame]:
     """Fetch OHLCV history using yfinance. Returns DataFrame or None."""
     try:
@@ -52,6 +55,7 @@ def get_price_history(ticker: str, start: Optional[str] = None, end: Optional[st
 
 
 # ================= Fundamentals =================
+@traced("market_data.fundamentals")
 def get_fundamentals(symbol: str) -> Dict[str, Any]:
     """Return a minimal fundamentals dict. Prefer Finnhub, fallback to yfinance."""
     # Finnhub first
@@ -116,6 +120,7 @@ def _normalize_fred_key(key: Optional[str]) -> Optional[str]:
     return None
 
 
+@traced("market_data.fred_series")
 def get_fred_series(series_id: str, start: Optional[str] = None) -> pd.DataFrame:
     """Return a single-column DataFrame for a FRED series. Best-effort."""
     key = _normalize_fred_key(_env("FRED_API_KEY"))
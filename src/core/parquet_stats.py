@@ -0,0 +1,219 @@
+"""
+Metadata-only Parquet summaries for quality/coverage scans.
+
+`summarize(path)` returns row count, per-column min/max/null counts and the date
+range of a Parquet file using only its footer (row-group statistics). When a column
+has no statistics, only the needed columns are read (column projection). Summaries
+are cached in memory and on disk (data/state/parquet_summaries.json), keyed by
+path + size + mtime, so unchanged files are never reopened.
+
+Usage:
+    from core.parquet_stats import summarize_many
+    sums = summarize_many(Path('data/prices').glob('ticker=*/prices.parquet'))
+    sums[path]["date_min"], sums[path]["columns"]["Close"]["min"]
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:  # optional: fall back to pandas projected reads
+    pq = None
+
+CACHE_PATH = Path("data/state/parquet_summaries.json")
+DATE_COLUMNS = ("date", "Date", "datetime", "ts")
+
+_CACHE: Dict[str, Dict[str, Any]] = {}
+_LOCK = threading.Lock()
+_LOADED = False
+_DIRTY = False
+
+
+def _file_key(p: Path) -> Optional[List[int]]:
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _jsonable(v: Any) -> Any:
+    if v is None:
+        return None
+    if isinstance(v, (dt.datetime, dt.date, pd.Timestamp)):
+        return pd.Timestamp(v).isoformat()
+    if isinstance(v, bytes):
+        v = v.decode("utf-8", errors="ignore")
+    if isinstance(v, (int, float)):
+        return None if isinstance(v, float) and math.isnan(v) else v
+    if hasattr(v, "item"):  # numpy scalar
+        return _jsonable(v.item())
+    return str(v)
+
+
+def _merge(a: Any, b: Any, fn) -> Any:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    try:
+        return fn(a, b)
+    except TypeError:
+        return a
+
+
+def _index_columns(pf) -> List[str]:
+    try:
+        meta = pf.schema_arrow.pandas_metadata or {}
+        return [c for c in meta.get("index_columns", []) if isinstance(c, str)]
+    except Exception:
+        return []
+
+
+def _from_footer(p: Path) -> Dict[str, Any]:
+    """Summary from row-group statistics; columns lacking stats are listed in `missing`."""
+    pf = pq.ParquetFile(p)
+    md = pf.metadata
+    names = [md.schema.column(i).name for i in range(md.num_columns)]
+    cols: Dict[str, Dict[str, Any]] = {n: {"min": None, "max": None, "nulls": 0} for n in names}
+    missing = set()
+    for rg in range(md.num_row_groups):
+        g = md.row_group(rg)
+        if g.num_rows == 0:
+            continue
+        for i in range(g.num_columns):
+            c = g.column(i)
+            name = c.path_in_schema
+            if name not in cols:
+                continue
+            s = c.statistics
+            if s is None or not s.has_min_max:
+                missing.add(name)
+                continue
+            cols[name]["min"] = _merge(cols[name]["min"], s.min, min)
+            cols[name]["max"] = _merge(cols[name]["max"], s.max, max)
+            if s.has_null_count:
+                cols[name]["nulls"] += int(s.null_count)
+    return {"rows": int(md.num_rows), "columns": cols, "index_columns": _index_columns(pf),
+            "missing": sorted(missing), "source": "stats"}
+
+
+def _from_read(p: Path, columns: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Column-projected read: row count and min/max/nulls of `columns` (all when None)."""
+    df = pd.read_parquet(p, columns=list(columns) if columns else None)
+    if columns is None:
+        df = df.reset_index()
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        try:
+            lo, hi = s.min(skipna=True), s.max(skipna=True)
+        except TypeError:
+            lo = hi = None
+        out[str(c)] = {"min": lo, "max": hi, "nulls": int(s.isna().sum())}
+    return {"rows": int(len(df)), "columns": out}
+
+
+def _date_range(summary: Dict[str, Any]) -> None:
+    cols = summary["columns"]
+    for c in list(DATE_COLUMNS) + list(summary.get("index_columns") or []):
+        if c in cols and cols[c]["min"] is not None:
+            lo = pd.to_datetime(cols[c]["min"], errors="coerce")
+            hi = pd.to_datetime(cols[c]["max"], errors="coerce")
+            if pd.notna(lo) and pd.notna(hi):
+                summary["date_col"] = c
+                summary["date_min"] = lo.isoformat()
+                summary["date_max"] = hi.isoformat()
+                summary["span_days"] = int((hi - lo).days)
+                return
+    summary.update({"date_col": None, "date_min": None, "date_max": None, "span_days": None})
+
+
+def _compute(p: Path) -> Dict[str, Any]:
+    try:
+        if pq is not None:
+            summary = _from_footer(p)
+            if summary["missing"]:
+                # stats absent for some columns: read only those
+                summary["columns"].update(_from_read(p, summary["missing"])["columns"])
+                summary["source"] = "stats+read"
+        else:
+            summary = {**_from_read(p, None), "index_columns": [], "missing": [], "source": "read"}
+        summary["columns"] = {k: {kk: _jsonable(vv) for kk, vv in v.items()} for k, v in summary["columns"].items()}
+        _date_range(summary)
+        summary["error"] = None
+    except Exception as e:
+        summary = {"rows": 0, "columns": {}, "index_columns": [], "missing": [], "source": "error",
+                   "date_col": None, "date_min": None, "date_max": None, "span_days": None, "error": str(e)}
+    return summary
+
+
+def _load_cache() -> None:
+    global _LOADED
+    if _LOADED:
+        return
+    _LOADED = True
+    try:
+        _CACHE.update(json.loads(CACHE_PATH.read_text(encoding="utf-8")))
+    except Exception:
+        pass
+
+
+def save_cache() -> None:
+    global _DIRTY
+    with _LOCK:
+        if not _DIRTY:
+            return
+        _DIRTY = False
+        try:
+            CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            live = {k: v for k, v in _CACHE.items() if Path(k).exists()}
+            CACHE_PATH.write_text(json.dumps(live, ensure_ascii=False), encoding="utf-8")
+        except Exception:
+            pass
+
+
+def summarize(path: str | Path) -> Dict[str, Any]:
+    """Cached footer summary of one Parquet file (see module doc)."""
+    p = Path(path)
+    key = _file_key(p)
+    if key is None:
+        return {"rows": 0, "columns": {}, "source": "missing", "date_min": None, "date_max": None,
+                "span_days": None, "error": "not found"}
+    with _LOCK:
+        _load_cache()
+        hit = _CACHE.get(str(p))
+    if hit and hit.get("key") == key:
+        return hit
+    summary = _compute(p)
+    summary["key"] = key
+    global _DIRTY
+    with _LOCK:
+        _CACHE[str(p)] = summary
+        _DIRTY = True
+    return summary
+
+
+def summarize_many(paths: Iterable[str | Path], max_workers: Optional[int] = None,
+                   persist: bool = True) -> Dict[Path, Dict[str, Any]]:
+    """Summaries of many files, computed in parallel (pyarrow releases the GIL)."""
+    ps = [Path(p) for p in paths]
+    workers = max_workers or int(os.getenv("PARQUET_SCAN_WORKERS", "8"))
+    if len(ps) <= 1 or workers <= 1:
+        out = {p: summarize(p) for p in ps}
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            out = dict(zip(ps, ex.map(summarize, ps)))
+    if persist:
+        save_cache()
+    return out
@@ -1,5 +1,12 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
 from pathlib import Path
 from functools import lru_cache
+from typing import Any, Iterable, List, Optional
 
 @lru_cache(maxsize=1)
 def load_role_briefs() -> str:
@@ -15,3 +22,153 @@ def load_next_steps() -> str:
         return p.read_text(encoding="utf-8")
     return ""
 
+
+# ======== Token budget & block packing =======================================
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+@lru_cache(maxsize=1)
+def _tiktoken_encoder():
+    """Return a tiktoken encoder when installed, else None (optional dependency)."""
+    try:
+        import tiktoken  # type: ignore
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Count tokens with tiktoken when available, else a word/punctuation heuristic.
+
+    The heuristic counts words and punctuation marks and adds one token per
+    extra 4 characters of long words, which stays within ~10% of BPE counts
+    for French/English financial prose.
+    """
+    if not text:
+        return 0
+    enc = _tiktoken_encoder()
+    if enc is not None:
+        try:
+            return len(enc.encode(text, disallowed_special=()))
+        except Exception:
+            pass
+    n = 0
+    for tok in _TOKEN_RE.findall(text):
+        n += 1 + max(0, len(tok) - 4) // 4
+    return n
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable short hash of arbitrary JSON-able parts (used as a cache key)."""
+    h = hashlib.sha1()
+    for p in parts:
+        try:
+            h.update(json.dumps(p, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+        except Exception:
+            h.update(str(p).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()[:16]
+
+
+def file_fingerprint(paths: Iterable[Optional[Path]]) -> str:
+    """Fingerprint files by path+size+mtime, without reading their content."""
+    sig = []
+    for p in paths:
+        if p is None:
+            sig.append(None)
+            continue
+        try:
+            st = Path(p).stat()
+            sig.append([str(p), st.st_size, st.st_mtime_ns])
+        except OSError:
+            sig.append([str(p), None, None])
+    return fingerprint(sig)
+
+
+@dataclass
+class ContextBlock:
+    """A prompt section packed as a whole (`text`) or item by item (`items`).
+
+    Blocks are admitted by ascending `priority`; `required` blocks are always
+    kept (cut at a line boundary if they alone exceed the budget). Itemized
+    blocks keep their first items in order and report how many were dropped.
+    """
+    name: str
+    header: str = ""
+    text: str = ""
+    items: List[str] = field(default_factory=list)
+    priority: int = 100
+    required: bool = False
+
+    def render(self, n_items: Optional[int] = None, more_fmt: str = "... +{n} more\n") -> str:
+        body = self.text
+        if self.items:
+            kept = self.items if n_items is None else self.items[:n_items]
+            body = "".join(kept)
+            dropped = len(self.items) - len(kept)
+            if dropped > 0:
+                body += more_fmt.format(n=dropped)
+        return f"{self.header}{body}"
+
+
+def _cut_lines(text: str, budget: int) -> str:
+    """Keep whole leading lines of `text` within `budget` tokens."""
+    out: List[str] = []
+    used = 0
+    for line in text.splitlines(keepends=True):
+        t = estimate_tokens(line)
+        if used + t > budget:
+            break
+        out.append(line)
+        used += t
+    return "".join(out)
+
+
+def pack_blocks(blocks: List[ContextBlock], token_budget: int, sep: str = "\n",
+                more_fmt: str = "... +{n} more\n") -> str:
+    """Pack blocks into a single prompt string within `token_budget` tokens.
+
+    Selection follows priority order; the output keeps the declaration order
+    so the prompt reads naturally. Nothing is cut mid-item: whole blocks or
+    whole items are dropped instead.
+    """
+    chosen: dict = {}
+    remaining = max(0, int(token_budget))
+    sep_cost = estimate_tokens(sep)
+    order = sorted(range(len(blocks)), key=lambda i: (blocks[i].priority, i))
+    for i in order:
+        b = blocks[i]
+        if not b.text and not b.items:
+            continue
+        if b.items:
+            # reserve room for the "+N more" footer so the budget is never exceeded
+            header_cost = (estimate_tokens(b.header) + sep_cost
+                           + estimate_tokens(more_fmt.format(n=len(b.items))))
+            if header_cost > remaining:
+                continue
+            used = header_cost
+            n = 0
+            for it in b.items:
+                t = estimate_tokens(it)
+                if used + t > remaining:
+                    break
+                used += t
+                n += 1
+            if n == 0 and not b.required:
+                continue
+            txt = b.render(n, more_fmt)
+            chosen[i] = txt
+            remaining -= estimate_tokens(txt) + sep_cost
+            continue
+        txt = b.render()
+        cost = estimate_tokens(txt) + sep_cost
+        if cost <= remaining:
+            chosen[i] = txt
+            remaining -= cost
+        elif b.required:
+            txt = _cut_lines(txt, max(0, remaining - sep_cost))
+            chosen[i] = txt
+            remaining -= estimate_tokens(txt) + sep_cost
+        remaining = max(0, remaining)
+    return sep.join(chosen[i] for i in sorted(chosen))
@@ -0,0 +1,329 @@
+"""
+Lightweight span tracing for the analytics phases and ingestion clients.
+
+- `span(name, **attrs)` context manager: parent/child ids through contextvars,
+  wall and CPU (thread) time, rows processed, cache hits/misses, error status.
+  `with span("phase2.indicators", ticker=t) as sp: ...; sp.add_rows(len(df))`
+- `traced(name)` decorator (rows taken from the result's length when it has one).
+- `current_span()` / `add_rows(n)` / `cache_hit()` / `cache_miss()` act on the
+  innermost open span (for helpers that do not hold it, e.g. HTTP caches).
+
+Export is chosen by TRACE_EXPORT (comma list, default off => spans are no-ops):
+- `jsonl`    one line per span in TRACE_JSONL_PATH (logs/traces/spans.jsonl)
+- `otlp`     OTLP/HTTP JSON to OTEL_EXPORTER_OTLP_ENDPOINT + /v1/traces
+             (ops/otel collector, port 4318); no opentelemetry dependency
+- `profiler` latency histograms in hub.profiler under `span:<name>`
+
+Finished spans are buffered and exported by a daemon thread every TRACE_FLUSH_S
+seconds; TRACE_SAMPLE (0..1) samples whole traces at the root span.
+"""
+from __future__ import annotations
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+JSONL_PATH = Path(os.getenv("TRACE_JSONL_PATH", "logs/traces/spans.jsonl"))
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://127.0.0.1:4318").rstrip("/")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "analyse-financiere")
+FLUSH_S = float(os.getenv("TRACE_FLUSH_S", "2.0"))
+MAX_PENDING = int(os.getenv("TRACE_MAX_PENDING", "20000"))
+SINKS = ("jsonl", "otlp", "profiler")
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attrs", "rows", "cache_hits",
+                 "cache_misses", "start_ns", "_t0", "_c0", "wall_ms", "cpu_ms", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.rows: Optional[int] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter_ns()
+        self._c0 = time.thread_time_ns()
+        self.wall_ms = self.cpu_ms = 0.0
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def add_rows(self, n: Optional[int]) -> "Span":
+        if n is not None:
+            self.rows = (self.rows or 0) + int(n)
+        return self
+
+    def cache_hit(self, n: int = 1) -> "Span":
+        self.cache_hits += n
+        return self
+
+    def cache_miss(self, n: int = 1) -> "Span":
+        self.cache_misses += n
+        return self
+
+    def _finish(self) -> None:
+        self.wall_ms = (time.perf_counter_ns() - self._t0) / 1e6
+        self.cpu_ms = (time.thread_time_ns() - self._c0) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "start_ns": self.start_ns,
+            "end_ns": self.start_ns + int(self.wall_ms * 1e6),
+            "wall_ms": round(self.wall_ms, 3), "cpu_ms": round(self.cpu_ms, 3),
+            "rows": self.rows, "cache_hits": self.cache_hits, "cache_misses": self.cache_misses,
+            "status": self.status, "error": self.error, "attrs": self.attrs,
+            "thread": threading.current_thread().name,
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is off or the trace is not sampled."""
+
+    __slots__ = ()
+    name = trace_id = span_id = parent_id = None
+
+    def set(self, **attrs: Any) -> "_NoopSpan":
+        return self
+
+    def add_rows(self, n: Optional[int]) -> "_NoopSpan":
+        return self
+
+    def cache_hit(self, n: int = 1) -> "_NoopSpan":
+        return self
+
+    def cache_miss(self, n: int = 1) -> "_NoopSpan":
+        return self
+
+
+NOOP = _NoopSpan()
+_CURRENT: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+
+_LOCK = threading.Lock()
+_PENDING: List[Dict[str, Any]] = []
+_WAKE = threading.Event()
+_WRITER: Optional[threading.Thread] = None
+_STATE = {"sinks": frozenset(), "sample": 1.0, "dropped": 0, "exported": 0, "otlp_errors": 0}
+
+
+def configure(export: Optional[str] = None, sample: Optional[float] = None) -> frozenset:
+    """(Re)select sinks (`"jsonl,otlp"`, `"off"`) and the root sampling ratio."""
+    if export is not None:
+        names = {s.strip().lower() for s in export.split(",")}
+        _STATE["sinks"] = frozenset(s for s in names if s in SINKS)
+    if sample is not None:
+        _STATE["sample"] = min(1.0, max(0.0, float(sample)))
+    return _STATE["sinks"]
+
+
+configure(os.getenv("TRACE_EXPORT", "off"), float(os.getenv("TRACE_SAMPLE", "1.0")))
+
+
+def enabled() -> bool:
+    return bool(_STATE["sinks"])
+
+
+def current_span():
+    """Innermost open span (NOOP outside any traced code)."""
+    return _CURRENT.get() or NOOP
+
+
+def add_rows(n: Optional[int]) -> None:
+    current_span().add_rows(n)
+
+
+def cache_hit(n: int = 1) -> None:
+    current_span().cache_hit(n)
+
+
+def cache_miss(n: int = 1) -> None:
+    current_span().cache_miss(n)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Any]:
+    """Time the enclosed block as a child of the current span."""
+    if not _STATE["sinks"]:
+        yield NOOP
+        return
+    parent = _CURRENT.get()
+    if parent is NOOP:  # inside an unsampled trace
+        yield NOOP
+        return
+    if parent is None and _STATE["sample"] < 1.0 and random.random() >= _STATE["sample"]:
+        token = _CURRENT.set(NOOP)
+        try:
+            yield NOOP
+        finally:
+            _CURRENT.reset(token)
+        return
+    sp = Span(name, parent.trace_id if parent else os.urandom(16).hex(),
+              parent.span_id if parent else None, attrs)
+    token = _CURRENT.set(sp)
+    try:
+        yield sp
+    except BaseException as e:
+        sp.status, sp.error = "error", f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        sp._finish()
+        _CURRENT.reset(token)
+        _submit(sp)
+
+
+def _count(out: Any) -> Optional[int]:
+    if isinstance(out, (list, tuple)) or hasattr(out, "shape"):
+        try:
+            return len(out)
+        except Exception:
+            return None
+    return None
+
+
+def traced(name: Optional[str] = None, **attrs: Any) -> Callable:
+    """Decorator: run the function inside `span(name or module.qualname)`."""
+    def deco(func: Callable) -> Callable:
+        sname = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _STATE["sinks"]:
+                return func(*args, **kwargs)
+            with span(sname, **attrs) as sp:
+                out = func(*args, **kwargs)
+                if sp is not NOOP and sp.rows is None:
+                    sp.add_rows(_count(out))
+                return out
+        return wrapper
+    return deco
+
+
+# ------------------------------------------------------------------ export
+
+def _submit(sp: Span) -> None:
+    rec = sp.to_dict()
+    if "profiler" in _STATE["sinks"]:
+        try:
+            from hub.profiler import record
+            record("span", sp.name, sp.wall_ms)
+        except Exception:
+            pass
+    if not _STATE["sinks"] & {"jsonl", "otlp"}:
+        return
+    with _LOCK:
+        if len(_PENDING) >= MAX_PENDING:
+            del _PENDING[0]
+            _STATE["dropped"] += 1
+        _PENDING.append(rec)
+    _ensure_writer()
+
+
+def _otlp_value(v: Any) -> Dict[str, Any]:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": v if isinstance(v, str) else json.dumps(v, default=str)}
+
+
+def otlp_payload(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """OTLP/HTTP JSON `ExportTraceServiceRequest` for exported span records."""
+    spans = []
+    for r in records:
+        attrs = {**r["attrs"], "cpu_ms": r["cpu_ms"], "thread": r["thread"],
+                 "cache.hits": r["cache_hits"], "cache.misses": r["cache_misses"]}
+        if r["rows"] is not None:
+            attrs["rows"] = r["rows"]
+        status = {"code": 1} if r["status"] == "ok" else {"code": 2, "message": r["error"] or ""}
+        spans.append({
+            "traceId": r["trace_id"], "spanId": r["span_id"], "parentSpanId": r["parent_id"] or "",
+            "name": r["name"], "kind": 1,
+            "startTimeUnixNano": str(r["start_ns"]), "endTimeUnixNano": str(r["end_ns"]),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attrs.items() if v is not None],
+            "status": status,
+        })
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "core.tracing"}, "spans": spans}],
+    }]}
+
+
+def _export_jsonl(batch: List[Dict[str, Any]]) -> None:
+    JSONL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    data = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch)
+    with JSONL_PATH.open("a", encoding="utf-8") as f:
+        f.write(data)
+
+
+def _export_otlp(batch: List[Dict[str, Any]]) -> None:
+    body = json.dumps(otlp_payload(batch), default=str).encode("utf-8")
+    req = urllib.request.Request(f"{OTLP_ENDPOINT}/v1/traces", data=body, method="POST",
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=3) as resp:
+        resp.read()
+
+
+def flush() -> int:
+    """Export buffered spans now; returns how many were taken from the buffer."""
+    with _LOCK:
+        batch = _PENDING[:]
+        _PENDING.clear()
+    if not batch:
+        return 0
+    sinks = _STATE["sinks"]
+    if "jsonl" in sinks:
+        try:
+            _export_jsonl(batch)
+        except Exception:
+            pass
+    if "otlp" in sinks:
+        try:
+            _export_otlp(batch)
+        except Exception:
+            _STATE["otlp_errors"] += 1
+    _STATE["exported"] += len(batch)
+    return len(batch)
+
+
+def _writer_loop() -> None:
+    while True:
+        _WAKE.wait(FLUSH_S)
+        _WAKE.clear()
+        flush()
+
+
+def _ensure_writer() -> None:
+    global _WRITER
+    if _WRITER is not None:
+        return
+    with _LOCK:
+        if _WRITER is None:
+            _WRITER = threading.Thread(target=_writer_loop, name="trace-writer", daemon=True)
+            _WRITER.start()
+            atexit.register(flush)
+
+
+def status() -> Dict[str, Any]:
+    with _LOCK:
+        pending = len(_PENDING)
+    return {"sinks": sorted(_STATE["sinks"]), "sample": _STATE["sample"], "pending": pending,
+            "exported": _STATE["exported"], "dropped": _STATE["dropped"],
+            "otlp_errors": _STATE["otlp_errors"]}
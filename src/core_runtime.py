@@ -9,6 +9,11 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    from core.tracing import span as _trace_span
+except Exception:  # tracing optionnel
+    _trace_span = None
+
 # -------- Logging unifié + Correlation IDs + Tracing --------
 _trace_id = contextvars.ContextVar("trace_id", default=None)
 _span_id  = contextvars.ContextVar("span_id",  default=None)
@@ -99,9 +104,22 @@ log = configure_logging()
 
 @contextmanager
 def with_span(name: str, **ctx):
-    """Pour les fonctions backend (fetch_xxx, parse_xxx, etc.)."""
+    """Pour les fonctions backend (fetch_xxx, parse_xxx, etc.).
+
+    Ouvre aussi un span core.tracing (même span_id dans les logs) quand TRACE_EXPORT est actif.
+    """
+    if _trace_span is None:
+        with _log_span(name, None, ctx):
+            yield
+        return
+    with _trace_span(name, **ctx) as sp:
+        with _log_span(name, sp.span_id, ctx):
+            yield
+
+@contextmanager
+def _log_span(name: str, span_id, ctx):
     parent = get_span_id()
-    cur = new_span_id()
+    cur = set_span_id(span_id) if span_id else new_span_id()
     log.info(f"{name}.start", extra={"span_id": cur, "ctx": ctx})
     try:
         yield
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import os
+import re
 import json
-import requests
+import importlib
+import threading
 from pathlib import Path
-from typing import Callable, Dict
+from typing import Callable, Dict, List, Optional
 
 import pandas as pd
 import dash
@@ -80,10 +82,18 @@ if os.getenv("AF_PROFILER", "0") == "1" and request is not None:
         try:
             dur_ms = None
             if g is not None and hasattr(g, "_t0"):
-                dur_ms = int((time.perf_counter() - getattr(g, "_t0", time.perf_counter())) * 1000)
+                dur_ms = round((time.perf_counter() - getattr(g, "_t0", time.perf_counter())) * 1000, 3)
+            path = getattr(request, 'path', None)
+            if path == "/_dash-update-component":
+                # one histogram per callback (keyed by its output) instead of a shared path
+                try:
+                    out = (request.get_json(silent=True) or {}).get("output")
+                    path = f"{path}:{out}" if out else path
+                except Exception:
+                    pass
             _prof.log_event("http", {
                 "method": getattr(request, 'method', None),
-                "path": getattr(request, 'path', None),
+                "path": path,
                 "status": getattr(resp, 'status_code', None),
                 "duration_ms": dur_ms,
             })
@@ -162,83 +172,136 @@ def sidebar() -> html.Div:
     )
 
 
-def _page_registry() -> Dict[str, Callable[[], html.Div]]:
-    # Use absolute imports so running as script works with PYTHONPATH=src
-    from dash_app.pages import (
-        dashboard, signals, portfolio, observability, agents_status, regimes, risk, recession, 
-        news, deep_dive, forecasts, backtests, evaluation, quality, llm_judge, profiler, llm_summary, 
-        alerts, settings, watchlist, memos, notes, changes, events, earnings, reports, advisor, llm_models, home
-    )
-    if os.getenv("DEVTOOLS_ENABLED", "0") == "1":
-        from dash_app.pages import devtools  # type: ignore
-        # Import integration pages only in DEV mode
-        from dash_app.pages import integration_agent_status, integration_data_quality, integration_macro_data, integration_llm_scoreboard  # type: ignore
-
-    pages = {
-        "/": dashboard.layout,
-        "/home": home.layout,
-        "/dashboard": dashboard.layout,
-        "/signals": signals.layout,
-        "/portfolio": portfolio.layout,
-        "/regimes": regimes.layout,
-        "/risk": risk.layout,
-        "/recession": recession.layout,
-        "/news": news.layout,
-        "/deep_dive": deep_dive.layout,
-        "/llm_judge": llm_judge.layout,
-        "/llm_summary": llm_summary.layout,
-        "/llm_models": llm_models.layout,
-        "/forecasts": forecasts.layout,
-        "/backtests": backtests.layout,
-        "/evaluation": evaluation.layout,
-        "/agents": agents_status.layout,
-        "/quality": quality.layout,
-        "/profiler": profiler.layout,
-        "/observability": observability.layout,
-        "/alerts": alerts.layout,
-        "/watchlist": watchlist.layout,
-        "/memos": memos.layout,
-        "/notes": notes.layout,
-        "/settings": settings.layout,
-        "/changes": changes.layout,
-        "/events": events.layout,
-        "/earnings": earnings.layout,
-        "/reports": reports.layout,
-        "/advisor": advisor.layout,
-    }
+# Route -> module de dash_app.pages ; chaque page est importée à sa première visite.
+PAGES: Dict[str, str] = {
+    "/": "dashboard",
+    "/home": "home",
+    "/dashboard": "dashboard",
+    "/signals": "signals",
+    "/portfolio": "portfolio",
+    "/regimes": "regimes",
+    "/risk": "risk",
+    "/recession": "recession",
+    "/news": "news",
+    "/deep_dive": "deep_dive",
+    "/llm_judge": "llm_judge",
+    "/llm_summary": "llm_summary",
+    "/llm_models": "llm_models",
+    "/forecasts": "forecasts",
+    "/backtests": "backtests",
+    "/evaluation": "evaluation",
+    "/agents": "agents_status",
+    "/quality": "quality",
+    "/profiler": "profiler",
+    "/observability": "observability",
+    "/alerts": "alerts",
+    "/watchlist": "watchlist",
+    "/memos": "memos",
+    "/notes": "notes",
+    "/settings": "settings",
+    "/changes": "changes",
+    "/events": "events",
+    "/earnings": "earnings",
+    "/reports": "reports",
+    "/advisor": "advisor",
+}
+# Pages DEV uniquement (DEVTOOLS_ENABLED=1)
+DEV_PAGES: Dict[str, str] = {
+    "/devtools": "devtools",
+    "/integration_agent_status": "integration_agent_status",
+    "/integration_data_quality": "integration_data_quality",
+    "/integration_macro_data": "integration_macro_data",
+    "/integration_llm_scoreboard": "integration_llm_scoreboard",
+}
+PAGES_DIR = Path(__file__).resolve().parent / "pages"
+_CALLBACK_RE = re.compile(r"^@(?:dash\.)?callback\(", re.MULTILINE)
+_CALLBACKS_LOCK = threading.Lock()
+_CALLBACKS_READY = False
+
+
+def _page_registry() -> Dict[str, str]:
+    pages = dict(PAGES)
     if os.getenv("DEVTOOLS_ENABLED", "0") == "1":
-        pages["/devtools"] = devtools.layout  # type: ignore
-        pages["/integration_agent_status"] = integration_agent_status.layout  # type: ignore
-        pages["/integration_data_quality"] = integration_data_quality.layout  # type: ignore
-        pages["/integration_macro_data"] = integration_macro_data.layout  # type: ignore
-        pages["/integration_llm_scoreboard"] = integration_llm_scoreboard.layout  # type: ignore
+        pages.update(DEV_PAGES)
     return pages
 
 
-from dash_app.pages import dashboard as _dashboard_initial
-
-app.layout = dbc.Container(
-    [
-        dcc.Location(id="url"),
-        dbc.Row(
-            [
-                dbc.Col(sidebar(), width=2),
-                # Pre-render Dashboard as initial content so tests and users see content immediately
-                dbc.Col(html.Div(id="page-content", children=_dashboard_initial.layout(), style={"padding": "0.75rem"}), width=10),
-            ],
-            className="g-0",
-        ),
-        dcc.Interval(id='status-interval', interval=30*1000, n_intervals=0),  # refresh every 30s
-    ],
-    fluid=True,
-)
+def _page_layout(pathname: Optional[str]) -> Optional[Callable[[], html.Div]]:
+    """Layout de la page (module importé à la première visite, puis mis en cache par Python)."""
+    pages = _page_registry()
+    name = pages.get(pathname, pages.get("/"))
+    if not name:
+        return None
+    # Use absolute imports so running as script works with PYTHONPATH=src
+    return importlib.import_module(f"dash_app.pages.{name}").layout
+
+
+def _callback_pages() -> List[str]:
+    """Pages qui déclarent des `dash.callback` (lecture du source, sans import)."""
+    out = []
+    for name in dict.fromkeys(_page_registry().values()):
+        try:
+            if _CALLBACK_RE.search((PAGES_DIR / f"{name}.py").read_text(encoding="utf-8")):
+                out.append(name)
+        except OSError:
+            continue
+    return out
+
+
+def register_page_callbacks() -> None:
+    """Importe les pages à callbacks une seule fois.
+
+    Dash ne copie les `dash.callback` globaux qu'avant la première requête
+    (`_setup_server`) : ces pages doivent donc être importées avant, les autres
+    restent chargées à la première visite.
+    """
+    global _CALLBACKS_READY
+    if _CALLBACKS_READY:
+        return
+    with _CALLBACKS_LOCK:
+        if _CALLBACKS_READY:
+            return
+        for name in _callback_pages():
+            try:
+                importlib.import_module(f"dash_app.pages.{name}")
+            except Exception as e:  # page cassée : les autres restent servies
+                _prof.log_event("error", {"where": "register_page_callbacks", "page": name, "error": repr(e)})
+        _CALLBACKS_READY = True
+
+
+# Avant le `_setup_server` de Dash (enregistré à la construction de l'app)
+server.before_request_funcs.setdefault(None, []).insert(0, register_page_callbacks)
+# Préchargement en arrière-plan : le serveur écoute sans attendre les pages
+if os.getenv("DASH_PRELOAD_PAGES", "1") == "1":
+    threading.Thread(target=register_page_callbacks, name="dash-preload", daemon=True).start()
+
+
+def serve_layout():
+    # Pre-render Dashboard as initial content so tests and users see content immediately
+    initial = _page_layout("/dashboard")
+    return dbc.Container(
+        [
+            dcc.Location(id="url"),
+            dbc.Row(
+                [
+                    dbc.Col(sidebar(), width=2),
+                    dbc.Col(html.Div(id="page-content", children=initial() if initial else None, style={"padding": "0.75rem"}), width=10),
+                ],
+                className="g-0",
+            ),
+            dcc.Interval(id='status-interval', interval=30*1000, n_intervals=0),  # refresh every 30s
+        ],
+        fluid=True,
+    )
+
+
+app.layout = serve_layout
 
 
 @app.callback(dash.Output("page-content", "children"), dash.Input("url", "pathname"))
 def render_page(pathname: str):
     try:
-        pages = _page_registry()
-        fn = pages.get(pathname, pages.get("/"))
+        fn = _page_layout(pathname)
         if not fn:
             return html.Div([html.H4("Page introuvable"), html.Small(pathname or "/")])
         try:
@@ -282,6 +345,7 @@ def update_global_status(n):
         port = int(os.getenv("AF_DASH_PORT", "8050"))
         url = f"http://127.0.0.1:{port}/"
         try:
+            import requests
             resp = requests.get(url, timeout=2)
             health_ok = resp.status_code == 200
         except:
@@ -344,6 +408,13 @@ def _api_health():  # type: ignore
     r = jsonify({"ok": True, "status": "up"})
     return _cors(r)
 
+@server.route('/api/profiler/stats', methods=['GET'])
+def _api_profiler_stats():  # type: ignore
+    """p50/p95/p99 et débit par route/callback (?prefix=http:/api filtre les clés)."""
+    if not hasattr(_prof, "stats"):
+        return _cors(jsonify({"ok": False, "error": "profiler not available"}))
+    return _cors(jsonify({"ok": True, "data": _prof.stats(_flask_req.args.get("prefix") or None)}))
+
 @server.route('/api/forecasts', methods=['GET', 'OPTIONS'])
 def _api_forecasts():  # type: ignore
     if _flask_req.method == 'OPTIONS':
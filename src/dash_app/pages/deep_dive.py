@@ -190,7 +190,15 @@ def _peers_table(ticker: str) -> dbc.Card:
         if wf.exists():
             obj = json.loads(wf.read_text(encoding='utf-8'))
             wl = [x for x in (obj.get('watchlist') or []) if isinstance(x, str)]
-        peers = [x for x in wl if x.upper() != ticker.upper()]
+        peers = []
+        try:
+            # matrice de corrélation précalculée (étape pipeline "peers") ; pas de réseau ici
+            from analytics.peer_engine import peer_tickers
+            peers = peer_tickers(ticker, k=12, ensure=False)
+        except Exception:
+            pass
+        if not peers:
+            peers = [x for x in wl if x.upper() != ticker.upper()]
         if not peers:
             peers = ['ABX.TO','K.TO','AEM.TO','OR','GDX']
         rows = []
@@ -15,6 +15,8 @@ except Exception:
             return []
         def clear(self):
             pass
+        def stats(self, *a, **k):
+            return {"keys": {}}
     _prof = _Dummy()  # type: ignore
 
 
@@ -35,8 +37,28 @@ def _render_events() -> tuple[list[dict], str]:
     return rows, "\n".join(raw_lines)
 
 
+STATS_COLUMNS = ['key', 'count', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'mean_ms', 'rpm_last_min']
+
+
+def _render_stats() -> list[dict]:
+    try:
+        keys = (_prof.stats() if hasattr(_prof, 'stats') else {}).get('keys', {})
+    except Exception:
+        keys = {}
+    return [{'key': k, **{c: v.get(c) for c in STATS_COLUMNS[1:]}} for k, v in keys.items()]
+
+
 def layout() -> html.Div:
     rows, raw = _render_events()
+    stats_table = dash.dash_table.DataTable(
+        id='profiler-stats',
+        columns=[{'id': c, 'name': c} for c in STATS_COLUMNS],
+        data=_render_stats(),
+        page_size=10,
+        sort_action='native',
+        style_table={'overflowX':'auto'},
+        style_cell={'padding':'6px','fontSize':12}
+    )
     table = dash.dash_table.DataTable(
         id='profiler-table',
         columns=[{'id':'ts','name':'ts'},{'id':'type','name':'type'},{'id':'path','name':'path'},{'id':'status','name':'status'},{'id':'duration_ms','name':'duration_ms'}],
@@ -53,6 +75,9 @@ def layout() -> html.Div:
             dbc.Button('Refresh', id='prof-refresh', size='sm', className='me-2'),
             dbc.Button('Clear', id='prof-clear', color='danger', size='sm')
         ], className='mb-2'),
+        html.H5('Latences par route / callback'),
+        stats_table,
+        html.Hr(),
         table,
         html.Hr(),
         html.Small('Raw (JSONL):'),
@@ -64,13 +89,14 @@ def layout() -> html.Div:
 @dash.callback(
     Output('profiler-table','data'),
     Output('prof-raw','children'),
+    Output('profiler-stats','data'),
     Input('prof-interval','n_intervals'),
     Input('prof-refresh','n_clicks'),
     prevent_initial_call=True
 )
 def _tick(_n, _c):
     rows, raw = _render_events()
-    return rows, raw
+    return rows, raw, _render_stats()
 
 
 @dash.callback(Output('prof-raw','children'), Input('prof-clear','n_clicks'), prevent_initial_call=True)
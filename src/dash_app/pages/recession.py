@@ -56,13 +56,16 @@ def _recession_badge(last_val: float | None) -> dbc.Badge:
 
 def _recession_container() -> dbc.Container:
     try:
-        parts = sorted(Path('data/macro/forecast').glob('dt=*/macro_forecast.parquet'))
+        # Prefer the monthly history (recession_agent), else the macro forecast
+        parts = sorted(Path('data/macro/recession/history').glob('dt=*/recession.parquet'))
         if not parts:
-            return dbc.Container([dbc.Alert("Aucun macro_forecast.parquet trouvé.", color="warning")])
+            parts = sorted(Path('data/macro/forecast').glob('dt=*/macro_forecast.parquet'))
+        if not parts:
+            return dbc.Container([dbc.Alert("Aucun recession.parquet / macro_forecast.parquet trouvé.", color="warning")])
 
         df = pd.read_parquet(parts[-1])
         if df is None or df.empty:
-            return dbc.Container([dbc.Alert("macro_forecast.parquet vide.", color="warning")])
+            return dbc.Container([dbc.Alert(f"{parts[-1].name} vide.", color="warning")])
 
         # Chart
         chart = _recession_chart(df)
@@ -6,8 +6,11 @@ import plotly.express as px
 import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
 from dash import html, dcc
-from dash_app.data.loader import read_parquet
-from dash_app.data.paths import p_regimes as p_regimes_path
+
+
+def _latest(glob: str) -> pd.DataFrame | None:
+    parts = sorted(Path('data/macro').glob(glob))
+    return pd.read_parquet(parts[-1]) if parts else None
 
 
 def _regimes_chart(df: pd.DataFrame) -> dcc.Graph:
@@ -16,6 +19,19 @@ def _regimes_chart(df: pd.DataFrame) -> dcc.Graph:
 
     # Detect available columns for plotting, map to actual data columns
     plot_cols = []
+    # History written by agents.macro_regime_agent: one row per month-end
+    if 'regime' in df.columns:
+        fig = go.Figure()
+        for col in ['expansion', 'slowdown', 'inflation', 'deflation']:
+            if col in df.columns:
+                fig.add_trace(go.Scatter(x=df.index, y=df[col], mode='lines', stackgroup='p', name=col))
+        fig.update_layout(
+            title="Probabilités de régime (fin de mois)",
+            xaxis_title="Période",
+            yaxis_title="Probabilité",
+            template='plotly_dark'
+        )
+        return dcc.Graph(figure=fig, id='regimes-graph')
     if 'inflation_yoy' in df.columns:
         plot_cols.append(('Inflation YoY', 'inflation_yoy'))
     if 'yield_curve_slope' in df.columns:
@@ -74,17 +90,13 @@ def _trend_badge(last_val: float | None, label: str) -> dbc.Badge:
 
 def _body() -> dbc.Container:
     try:
-        # Prefer dedicated regimes.parquet if present
-        rp = p_regimes_path()
-        df = None
-        if rp is not None and rp.exists():
-            df = read_parquet(rp)
+        # Prefer the regime history (macro_regime_agent) if present
+        df = _latest('regime/history/dt=*/regimes.parquet')
         if df is None or df.empty:
-            parts = sorted(Path('data/macro/forecast').glob('dt=*/macro_forecast.parquet'))
-            if not parts:
-                return dbc.Container([dbc.Alert("Aucun macro_forecast.parquet trouvé.", color="warning")])
-            df = read_parquet(parts[-1])
-            if df is None or df.empty:
+            df = _latest('forecast/dt=*/macro_forecast.parquet')
+            if df is None:
+                return dbc.Container([dbc.Alert("Aucun regimes.parquet / macro_forecast.parquet trouvé.", color="warning")])
+            if df.empty:
                 return dbc.Container([dbc.Alert("macro_forecast.parquet vide.", color="warning")])
 
         # Chart section
@@ -92,16 +104,18 @@ def _body() -> dbc.Container:
 
         # Badges
         badges = []
+        if 'regime' in df.columns:
+            badges.append(dbc.Badge(f"Régime: {df['regime'].iloc[-1]}", color="info", className="me-2"))
         if 'inflation_yoy' in df.columns:
             badges.append(_trend_badge(df['inflation_yoy'].iloc[-1], "Inflation"))
         if 'yield_curve_slope' in df.columns:
             badges.append(_trend_badge(df['yield_curve_slope'].iloc[-1], "Courbe"))
 
         # Table
-        key_cols = ['cpi_yoy', 'slope_10y_2y', 'lei', 'pmi', 'ism', 'nfci']
-        available_cols = [c for c in df.columns if c in key_cols]
+        key_cols = ['regime', 'cpi_yoy', 'gdp_yoy', 'yield_curve_bp', 'slope_10y_2y', 'lei', 'pmi', 'ism', 'nfci']
+        available_cols = [c for c in key_cols if c in df.columns]
         if available_cols:
-            out = df[available_cols].tail(5).reset_index(drop=True)
+            out = df[available_cols].tail(5).reset_index(drop='regime' not in df.columns)
             table = dbc.Table.from_dataframe(out, striped=True, bordered=False, hover=True, size='sm')
         else:
             table = html.Small("Colonnes clés non trouvées.")
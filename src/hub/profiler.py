@@ -1,16 +1,121 @@
+"""
+Low-overhead profiler: in-memory ring buffer + latency histograms + batched writer.
+
+- `log_event(type, payload)` appends to a ring buffer (last PROFILER_RING events) and
+  to a pending batch; no file I/O on the caller's thread. Payloads carrying
+  `duration_ms` also feed a latency histogram keyed by `type:path|id|cmd`.
+- A daemon writer flushes pending events to `logs/profiler/events.jsonl` every
+  PROFILER_FLUSH_S seconds (or as soon as PROFILER_FLUSH_BATCH are pending), in one
+  append, rotating the file past PROFILER_MAX_BYTES (events.1.jsonl ... .N).
+- `stats()` gives count, p50/p95/p99/max, mean and throughput (overall and last
+  minute) per key; `read_last(n)` serves from memory (file tail only after a restart).
+"""
 from __future__ import annotations
 
+import atexit
 import json
+import math
 import os
+import threading
 import time
-from dataclasses import asdict, dataclass
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Deque, Dict, List, Optional
 
 
 LOG_DIR = Path("logs/profiler")
 LOG_FILE = LOG_DIR / "events.jsonl"
 
+RING_SIZE = int(os.getenv("PROFILER_RING", "5000"))
+FLUSH_S = float(os.getenv("PROFILER_FLUSH_S", "1.0"))
+FLUSH_BATCH = int(os.getenv("PROFILER_FLUSH_BATCH", "500"))
+MAX_BYTES = int(os.getenv("PROFILER_MAX_BYTES", str(10 * 1024 * 1024)))
+BACKUPS = int(os.getenv("PROFILER_BACKUPS", "3"))
+MAX_KEYS = 512  # histogram cardinality guard
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram (~3% relative precision, 1 µs to ~1 h).
+
+    Each power of two is split in SUB linear sub-buckets; recording is O(1) and
+    memory is fixed whatever the number of samples.
+    """
+
+    SUB = 32
+    MAGNITUDES = 32  # 2**32 µs ~ 71 min
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms", "min_ms", "first_ts", "_sec", "_sec_counts")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (self.SUB * self.MAGNITUDES)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.min_ms = math.inf
+        self.first_ts = time.time()
+        self._sec = [0] * 60         # per-second ring for the last-minute rate
+        self._sec_counts = [0] * 60
+
+    def _index(self, us: int) -> int:
+        if us < self.SUB:
+            return us                   # exact below SUB µs
+        mag = us.bit_length() - 6       # us >> mag in [SUB, 2*SUB)  (6 = log2(SUB) + 1)
+        return min(mag * self.SUB + (us >> mag), len(self.counts) - 1)
+
+    def _value_ms(self, idx: int) -> float:
+        """Upper bound of a bucket, in ms."""
+        if idx < self.SUB:
+            return idx / 1000.0
+        mag, sub = divmod(idx, self.SUB)
+        return ((sub + self.SUB + 1) << (mag - 1)) / 1000.0
+
+    def record(self, ms: float, now: Optional[float] = None) -> None:
+        ms = max(0.0, float(ms))
+        self.counts[self._index(int(ms * 1000))] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.min_ms = min(self.min_ms, ms)
+        sec = int(now if now is not None else time.time())
+        slot = sec % 60
+        if self._sec[slot] != sec:
+            self._sec[slot], self._sec_counts[slot] = sec, 0
+        self._sec_counts[slot] += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        target = max(1, math.ceil(self.count * q / 100.0))
+        seen = 0
+        for idx, c in enumerate(self.counts):
+            if c:
+                seen += c
+                if seen >= target:
+                    return round(min(self._value_ms(idx), self.max_ms), 3)
+        return self.max_ms
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = now if now is not None else time.time()
+        last_min = sum(c for s, c in zip(self._sec, self._sec_counts) if now - s < 60)
+        return {
+            "count": self.count,
+            "p50_ms": self.percentile(50), "p95_ms": self.percentile(95), "p99_ms": self.percentile(99),
+            "min_ms": None if not self.count else round(self.min_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "rps": round(self.count / max(1.0, now - self.first_ts), 4),
+            "rpm_last_min": last_min,
+        }
+
+
+_LOCK = threading.Lock()
+_RING: Deque[dict] = deque(maxlen=RING_SIZE)
+_PENDING: List[dict] = []
+_HIST: Dict[str, LatencyHistogram] = {}
+_WAKE = threading.Event()
+_WRITER: Optional[threading.Thread] = None
+_STARTED = time.time()
+
 
 def _ensure_dir() -> None:
     try:
@@ -19,33 +124,119 @@ def _ensure_dir() -> None:
         pass
 
 
+def _name(payload: Dict[str, Any]) -> str:
+    name = payload.get("path") or payload.get("id") or payload.get("cmd") or payload.get("where") or ""
+    if isinstance(name, (list, tuple)):
+        name = " ".join(map(str, name))
+    return str(name)
+
+
+def _rotate() -> None:
+    try:
+        if not LOG_FILE.exists() or LOG_FILE.stat().st_size < MAX_BYTES:
+            return
+        for i in range(BACKUPS, 0, -1):
+            src = LOG_FILE if i == 1 else LOG_DIR / f"events.{i - 1}.jsonl"
+            if src.exists():
+                os.replace(src, LOG_DIR / f"events.{i}.jsonl")
+    except Exception:
+        pass
+
+
+def flush() -> int:
+    """Write pending events now (one append); returns how many were written."""
+    with _LOCK:
+        batch = _PENDING[:]
+        _PENDING.clear()
+    if not batch:
+        return 0
+    try:
+        _ensure_dir()
+        _rotate()
+        data = "".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in batch)
+        with LOG_FILE.open("a", encoding="utf-8") as f:
+            f.write(data)
+    except Exception:
+        # Never crash caller
+        pass
+    return len(batch)
+
+
+def _writer_loop() -> None:
+    while True:
+        _WAKE.wait(FLUSH_S)
+        _WAKE.clear()
+        flush()
+
+
+def _ensure_writer() -> None:
+    global _WRITER
+    if _WRITER is not None:
+        return
+    with _LOCK:
+        if _WRITER is None:
+            _WRITER = threading.Thread(target=_writer_loop, name="profiler-writer", daemon=True)
+            _WRITER.start()
+            atexit.register(flush)
+
+
+def record(event_type: str, name: str, duration_ms: float) -> None:
+    """Feed a latency sample without storing an event (hot paths)."""
+    try:
+        key = f"{event_type}:{name}"
+        with _LOCK:
+            h = _HIST.get(key)
+            if h is None:
+                if len(_HIST) >= MAX_KEYS:
+                    key = f"{event_type}:<other>"
+                    h = _HIST.get(key)
+                if h is None:
+                    h = _HIST[key] = LatencyHistogram()
+            h.record(duration_ms)
+    except Exception:
+        pass
+
+
 def log_event(event_type: str, payload: Dict[str, Any]) -> None:
-    """Append a JSONL event with utc timestamp.
+    """Record a JSONL event with utc timestamp (buffered; written by the background writer).
 
     event_type: 'http' | 'callback' | 'subprocess' | 'info' | 'error'
-    payload: any JSON-serializable dict
+    payload: any JSON-serializable dict (`duration_ms` feeds the latency histograms)
     """
     try:
-        _ensure_dir()
         evt = {
             "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
             "type": str(event_type),
             "payload": payload,
         }
-        with LOG_FILE.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(evt, ensure_ascii=False) + "\n")
+        with _LOCK:
+            _RING.append(evt)
+            _PENDING.append(evt)
+            n_pending = len(_PENDING)
+        dur = payload.get("duration_ms") if isinstance(payload, dict) else None
+        if isinstance(dur, (int, float)):
+            record(str(event_type), _name(payload), dur)
+        _ensure_writer()
+        if n_pending >= FLUSH_BATCH:
+            _WAKE.set()
     except Exception:
         # Never crash caller
         pass
 
 
-def read_last(n: int = 200) -> list[dict]:
+def _tail_file(n: int, block: int = 64 * 1024) -> list[dict]:
+    """Last `n` events of the log file, read backwards by blocks."""
     try:
-        if not LOG_FILE.exists():
-            return []
-        lines = LOG_FILE.read_text(encoding="utf-8", errors="ignore").splitlines()
+        with LOG_FILE.open("rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos, buf = f.tell(), b""
+            while pos > 0 and buf.count(b"\n") <= n:
+                step = min(block, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
         out = []
-        for line in lines[-max(0, n):]:
+        for line in buf.splitlines()[-n:]:
             try:
                 out.append(json.loads(line))
             except Exception:
@@ -55,10 +246,39 @@ def read_last(n: int = 200) -> list[dict]:
         return []
 
 
+def read_last(n: int = 200) -> list[dict]:
+    n = max(0, n)
+    with _LOCK:
+        ring = list(_RING)
+    if len(ring) >= n or not LOG_FILE.exists():
+        return ring[-n:] if n else []
+    # after a restart the ring is short: complete with the persisted tail
+    flush()
+    return _tail_file(n)
+
+
+def stats(prefix: Optional[str] = None) -> Dict[str, Any]:
+    """Latency percentiles and throughput per `type:name` key (optionally filtered)."""
+    now = time.time()
+    with _LOCK:
+        keys = {k: h.summary(now) for k, h in _HIST.items() if not prefix or k.startswith(prefix)}
+        buffered, pending = len(_RING), len(_PENDING)
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)),
+        "uptime_s": round(now - _STARTED, 1),
+        "events_buffered": buffered,
+        "events_pending": pending,
+        "keys": dict(sorted(keys.items(), key=lambda kv: -kv[1]["count"])),
+    }
+
+
 def clear() -> None:
+    with _LOCK:
+        _RING.clear()
+        _PENDING.clear()
+        _HIST.clear()
     try:
         _ensure_dir()
         LOG_FILE.write_text("", encoding="utf-8")
     except Exception:
         pass
-
@@ -49,6 +49,13 @@ try:
 except Exception:
     yf = None
 
+# --- Tracing (core.tracing ; no-op si TRACE_EXPORT n'est pas défini)
+try:
+    from core.tracing import traced, cache_hit, cache_miss
+except Exception:  # exécution directe: src/ sur le path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from core.tracing import traced, cache_hit, cache_miss
+
 try:
     from tqdm import tqdm
 except Exception:
@@ -95,6 +102,7 @@ def _get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Di
     if use_cache and cpath.exists():
         try:
             b = cpath.read_bytes()
+            cache_hit()
             if as_json:
                 return json.loads(b.decode("utf-8", errors="ignore"))
             if as_text:
@@ -102,6 +110,7 @@ def _get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Di
             return b
         except Exception:
             pass
+    cache_miss()
     last_err = None
     wait = 0.3
     for att in range(1, RETRIES + 2):
@@ -174,6 +183,7 @@ def _df_to_dict(df: Any):
 # Yahoo Finance client
 # ====================
 
+@traced()
 def yahoo_snapshot(ticker: str, use_cache=True) -> Dict[str, Any]:
     """
     Essaye yfinance d'abord; sinon fallback à parsing HTML light de la 'quoteSummary' page.
@@ -267,6 +277,7 @@ def yahoo_snapshot(ticker: str, use_cache=True) -> Dict[str, Any]:
 
 # -------- Yahoo options chain --------
 
+@traced()
 def yahoo_options_chain(ticker: str, expiry: Optional[str] = None, use_cache=True) -> Dict[str, Any]:
     """
     Retourne {calls:[...], puts:[...], expiries:[...]} avec champs: strike, lastPrice, bid, ask, volume, openInterest, impliedVolatility
@@ -366,6 +377,7 @@ def _cik_from_submissions_json(js: Dict[str, Any]) -> Optional[str]:
         pass
     return None
 
+@traced()
 def sec_submissions(cik_or_ticker: str, use_cache=True) -> Dict[str, Any]:
     """
     data.sec.gov/submissions/CIK##########.json
@@ -408,6 +420,7 @@ def sec_submissions(cik_or_ticker: str, use_cache=True) -> Dict[str, Any]:
 # SEC - Filings index
 # =====================
 
+@traced()
 def sec_filings_index(cik_or_ticker: str, forms: List[str] = ["10-K","10-Q","8-K"], 
                       limit: int = 100, use_cache=True) -> List[Dict[str, Any]]:
     """
@@ -474,6 +487,7 @@ def _parse_atom_owner(atom_xml: str) -> List[Dict[str, Any]]:
         })
     return out
 
+@traced()
 def sec_form4_insiders(cik_or_ticker: str, limit: int = 200, use_cache=True) -> Dict[str, Any]:
     """
     Retourne {transactions:[...], aggregates:{window_30d:{buys, sells, net_shares, net_value}, window_90d:...}}
@@ -589,6 +603,7 @@ def _parse_13f_xml(xml_bytes: bytes) -> List[Dict[str, Any]]:
         })
     return rows
 
+@traced()
 def sec_13f_holdings(cik_or_ticker: str, limit_filings: int = 1, use_cache=True) -> Dict[str, Any]:
     """
     Liste les dernières 13F-HR et agrège le(s) infoTable en un tableau 'holdings'.
@@ -629,6 +644,7 @@ def sec_13f_holdings(cik_or_ticker: str, limit_filings: int = 1, use_cache=True)
 # Ownership/Insider snapshot
 # ==========================
 
+@traced()
 def build_ownership_snapshot(ticker: str, use_cache=True) -> Dict[str, Any]:
     """
     assemble: yahoo (price/funda), options expiries, sec filings head, insiders (Form4 agg), 13F last
@@ -15,13 +15,14 @@ Author: you
 """
 
 from __future__ import annotations
-import os, re, sys, json, hashlib, argparse, datetime as dt
-from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Any, Optional
+import os, re, sys, json, math, hashlib, argparse, datetime as dt
+from dataclasses import dataclass, field, asdict, replace
+from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict, Counter
 
 from taxonomy.news_taxonomy import tag_sectors, classify_event, tag_geopolitics
 from core.io_utils import write_jsonl
+from core.tracing import span, traced, cache_hit, cache_miss
 
 # ---- Optional external deps (graceful fallback) ----
 try:
@@ -72,6 +73,26 @@ except Exception:
     ner = None
     nlp_enrich = None
 
+# textrank: shared sparse TextRank summarizer
+try:
+    from research.textrank import summarize_batch as _tr_summarize_batch
+except Exception:
+    _tr_summarize_batch = None
+
+# near-duplicate story clustering (MinHash LSH)
+try:
+    from ingestion.news_clusters import StoryClusterer, cluster_records
+except Exception:
+    StoryClusterer = None
+    cluster_records = None
+
+# precompiled boolean query + columnar item table
+try:
+    from ingestion.news_query import NewsTable, NO_TS, compile_query, item_tokens, to_epoch, window_cutoff
+except Exception:
+    NewsTable = None
+    compile_query = None
+
 # news_taxonomy: expected to provide sector/event lexicons or tagger
 try:
     from taxonomy.news_taxonomy import tag_sectors, classify_event, tag_geopolitics
@@ -226,32 +247,22 @@ def guess_lang(text: str, url: str = "") -> str:
 
 def bool_query_match(q: str, text: str) -> bool:
     """
-    Simple boolean parser for queries like:
-    "BRICS OR oil", "Ukraine AND sanctions", "chip NOT Nvidia"
+    Boolean query match for queries like:
+    "BRICS OR oil", "Ukraine AND sanctions", "chip* NOT Nvidia", '(oil OR opec) "rate cut"'
+    The query is compiled once (see ingestion.news_query) and matched on the text tokens.
     """
     if not q: return True
-    # tokenize by AND/OR/NOT (uppercase words)
-    # naive: split by OR first, then AND within, then NOT terms exclude
-    expr = q
-    # Normalize spacing
+    if compile_query is not None:
+        return compile_query(q).match(item_tokens(text))
+    # fallback: naive substring match, split by OR, then AND, then NOT
     text_low = text.lower()
-    # Split by OR
-    ors = [x.strip() for x in re.split(r"\bOR\b", expr, flags=re.I) if x.strip()]
-    if not ors: ors = [expr]
+    ors = [x.strip() for x in re.split(r"\bOR\b", q, flags=re.I) if x.strip()] or [q]
     for part in ors:
-        # AND segments
-        ands = [y.strip() for y in re.split(r"\bAND\b", part, flags=re.I) if y.strip()]
         ok_and = True
-        for a in ands:
-            # Handle NOT within segment: "foo NOT bar"
+        for a in [y.strip() for y in re.split(r"\bAND\b", part, flags=re.I) if y.strip()]:
+            # "foo NOT bar" within a segment
             toks = [z.strip() for z in re.split(r"\bNOT\b", a, flags=re.I)]
-            must = toks[0]
-            nots = toks[1:] if len(toks) > 1 else []
-            if must and must.lower() not in text_low:
-                ok_and = False
-                break
-            neg_hit = any(n and n.lower() in text_low for n in nots)
-            if neg_hit:
+            if (toks[0] and toks[0].lower() not in text_low) or any(n and n.lower() in text_low for n in toks[1:]):
                 ok_and = False
                 break
         if ok_and:
@@ -318,6 +329,7 @@ def list_sources(regions: List[str]) -> List[str]:
             final.extend(SOURCES[r])
     return sorted(set(final))
 
+@traced("finnews.fetch_feed")
 def fetch_feed(url: str, per_source_cap: Optional[int] = None, timeout: int = 30) -> List[Dict[str, Any]]:
     """Enhanced RSS feed fetching with robust error handling and headers."""
     import requests
@@ -394,6 +406,77 @@ def _parse_feed_entries(d, per_source_cap: Optional[int]) -> List[Dict[str, Any]
         items.append(dict(
             title=title, link=link, published=pub_iso, summary=summary, raw_text=content
         ))
+    return items
+
+def dedup_items(items: List[Dict[str, Any]], source: str = "") -> List[Dict[str, Any]]:
+    """Drop duplicates within one feed on hash (source|title|published) or identical link; sets `_id`."""
+    seen = set()
+    out = []
+    for it in items:
+        key = sha256(f"{source}|{(it.get('title') or '').strip().lower()}|{it.get('published') or ''}")
+        link = (it.get("link") or "").strip()
+        if key in seen or (link and link in seen):
+            continue
+        seen.add(key)
+        if link:
+            seen.add(link)
+        it["_id"] = key
+        out.append(it)
+    return out
+
+# ==========
+# Enrichment
+# ==========
+
+def _source_quality(r: Dict[str, Any]) -> float:
+    dom = domain_of(r.get("_source") or r.get("link") or "")
+    w = 1.2 if ("reuters" in dom or "ft.com" in dom or "bloomberg" in dom) else 1.0
+    return w + min(len(r.get("raw_text") or r.get("summary") or ""), 2000) / 10000.0
+
+_CLUSTERER = None
+
+def _cluster_stories(raw_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Collapse cross-source near-duplicates (MinHash LSH) to their best copy; process-wide clusters."""
+    global _CLUSTERER
+    if StoryClusterer is None or not raw_items:
+        return raw_items
+    if _CLUSTERER is None:
+        _CLUSTERER = StoryClusterer()
+    try:
+        return cluster_records(raw_items, key=lambda r: r["_id"], source="_source",
+                               quality=_source_quality, clusterer=_CLUSTERER)
+    except Exception:
+        return raw_items
+
+def _translate(text: str, target_lang: str = "en") -> str:
+    if not text: return ""
+    if translate:
+        try:
+            return translate(text, target_lang) or text
+        except Exception:
+            pass
+    return text  # noop fallback
+
+def _summarize(text: str, max_sent: int = 3) -> str:
+    return _summarize_batch([text], max_sent=max_sent)[0]
+
+def _summarize_batch(texts: List[str], max_sent: int = 3) -> List[str]:
+    """Sparse TextRank summaries for many texts at once (research.textrank)."""
+    if _tr_summarize_batch is not None:
+        try:
+            return _tr_summarize_batch([t or "" for t in texts], k=max_sent)
+        except Exception:
+            pass
+    return [" ".join(re.split(r"(?<=[.!?])\s+", t or "")[:max_sent]).strip() for t in texts]
+
+def _sentiment(text: str) -> float:
+    if not text: return 0.0
+    if _VADER is not None:
+        try:
+            return float(_VADER.polarity_scores(text[:5000])["compound"])
+        except Exception:
+            pass
+    pos = len(re.findall(r"\b(up|gain|rise|beat|record|growth|surge|rally)\b", text, re.I))
     neg = len(re.findall(r"\b(down|loss|drop|probe|sanction|war|strike|glut)\b", text, re.I))
     return (pos - neg) / (pos + neg + 1)
 
@@ -468,8 +551,10 @@ def _score_importance(item: NewsItem) -> float:
         w_source = 1.2
     w_event = 1.0 + 0.2 * len(item.event_types)
     w_sector = 1.0 + 0.1 * len(item.sectors)
+    # stories picked up by several outlets matter more
+    w_cluster = 1.0 + 0.2 * math.log(max(1, int((item.meta or {}).get("cluster_size") or 1)))
     base = 0.3 + min(len(item.title) / 120.0, 0.7)
-    return round(base * w_event * w_sector * w_source, 4)
+    return round(base * w_event * w_sector * w_source * w_cluster, 4)
 
 def _score_freshness(published_iso: str) -> float:
     try:
@@ -503,6 +588,9 @@ def in_window(published_iso: str, window: str) -> bool:
     """
     if window in ("all", None, ""): 
         return True
+    if NewsTable is not None:
+        ts = to_epoch(published_iso)
+        return ts == NO_TS or ts >= window_cutoff(window)
     try:
         t = dt.datetime.fromisoformat(published_iso.replace("Z", "+00:00"))
         delta = now_utc() - t
@@ -524,6 +612,11 @@ def filter_items(items: List[NewsItem],
                  sectors: Optional[List[str]] = None,
                  events: Optional[List[str]] = None,
                  tickers: Optional[List[str]] = None) -> List[NewsItem]:
+    if NewsTable is not None:
+        # one pass to index, then vectorized masks
+        return NewsTable(items, max_items=max(1, len(items))).filter(
+            query=query, window=window, regions=regions, sources_substr=sources_substr,
+            languages=languages, sectors=sectors, events=events, tickers=tickers)
     out = []
     regions = [r.upper() for r in (regions or [])]
     src_sub = [s.lower() for s in (sources_substr or [])]
@@ -554,10 +647,17 @@ def filter_items(items: List[NewsItem],
     return out
 
 
+def item_score(it: Any) -> float:
+    """Ranking score of an item (NewsItem or dict): importance * freshness + relevance."""
+    get = it.get if isinstance(it, dict) else (lambda k: getattr(it, k, None))
+    return float((get("importance") or 0) * (get("freshness") or 0) + (get("relevance") or 0))
+
+
 # ======================
 # Main pipeline (fetch)
 # ======================
 
+@traced("finnews.run_pipeline")
 def run_pipeline(regions: List[str],
                  window: str,
                  query: str = "",
@@ -570,67 +670,166 @@ def run_pipeline(regions: List[str],
     srcs = list_sources(regions)
     all_items: List[NewsItem] = []
 
-    for u in tqdm(srcs, desc="Fetching feeds"):
-        try:
-            raw_items = fetch_feed(u, per_source_cap=per_source_cap)
-            raw_items = dedup_items(raw_items, source=u)
-        except Exception:
-            # continue on errors
-            continue
-
-        for r in raw_items:
-            title = r["title"]; link = r["link"]; published = r["published"]
+    raw_all: List[Dict[str, Any]] = []
+    with span("finnews.fetch_feeds", sources=len(srcs)) as sp:
+        for u in tqdm(srcs, desc="Fetching feeds"):
+            try:
+                raw_items = fetch_feed(u, per_source_cap=per_source_cap)
+                raw_items = dedup_items(raw_items, source=u)
+            except Exception:
+                # continue on errors
+                continue
+            for r in raw_items:
+                r["_source"] = u
+            raw_all.extend(raw_items)
+        sp.add_rows(len(raw_all))
+
+    # cross-source near-duplicates: enrich only the best copy of each story
+    with span("finnews.cluster") as sp:
+        raw_all = _cluster_stories(raw_all)
+        sp.add_rows(len(raw_all))
+
+    # language + translation, then one summarization batch
+    with span("finnews.summarize") as sp:
+        prepared = []
+        for r in raw_all:
             raw_text = (r.get("raw_text") or r.get("summary") or "").strip()
-            lang = guess_lang((title + " " + raw_text)[:2000], url=link)
-            text_for_enrich = raw_text
-
+            lang = guess_lang((r["title"] + " " + raw_text)[:2000], url=r["link"])
             # translate to EN (fallback noop)
-            if lang != "en":
-                text_for_enrich = _translate(raw_text, target_lang="en")
-
-            # summarization
-            short_sum = _summarize(text_for_enrich, max_sent=3)
-            # entities
-            ents = _entities(text_for_enrich)
-            # sectors & events
-            sects = _tag_sectors(text_for_enrich + " " + title)
-            evts = _tag_events(text_for_enrich + " " + title)
-            # map tickers
-            aliases_list = [company] if company else []
-            if aliases:
-                aliases_list.extend([a.strip() for a in aliases if a.strip()])
-            tks = _map_tickers(ents, aliases_list, tgt_ticker)
-            # sentiment
-            sent = _sentiment(text_for_enrich)
-            # scores
-            imp = _score_importance(NewsItem(
-                id=r["_id"], source=u, title=title, link=link, published=published,
-                summary=short_sum, region=None, language=lang, raw_text=raw_text,
-                sentiment=sent, entities=ents, sectors=sects, event_types=evts, tickers=tks
-            ))
-            fresh = _score_freshness(published)
-            rel = _score_relevance(title + " " + short_sum, query, company, tks)
-
-            ni = NewsItem(
-                id=r["_id"], source=u, title=title, link=link, published=published,
-                summary=short_sum, tags=[], region=_region_guess(u),
-                language=lang, raw_text=raw_text,
-                sentiment=sent, entities=ents, sectors=sects, event_types=evts, tickers=tks,
-                importance=imp, freshness=fresh, relevance=rel,
-                meta={"domain": domain_of(link)}
-            )
-            all_items.append(ni)
-
-    # global filtering (window + query)
+            text_for_enrich = _translate(raw_text, target_lang="en") if lang != "en" else raw_text
+            prepared.append((raw_text, lang, text_for_enrich))
+        summaries = _summarize_batch([p[2] for p in prepared], max_sent=3)
+        sp.add_rows(len(prepared))
+
+    for r, (raw_text, lang, text_for_enrich), short_sum in zip(raw_all, prepared, summaries):
+        u = r["_source"]
+        title = r["title"]; link = r["link"]; published = r["published"]
+        cluster = {"cluster_id": r.get("cluster_id"), "cluster_size": int(r.get("cluster_size") or 1)}
+        # entities
+        ents = _entities(text_for_enrich)
+        # sectors & events
+        sects = _tag_sectors(text_for_enrich + " " + title)
+        evts = _tag_events(text_for_enrich + " " + title)
+        # map tickers
+        aliases_list = [company] if company else []
+        if aliases:
+            aliases_list.extend([a.strip() for a in aliases if a.strip()])
+        tks = _map_tickers(ents, aliases_list, tgt_ticker)
+        # sentiment
+        sent = _sentiment(text_for_enrich)
+        # scores
+        imp = _score_importance(NewsItem(
+            id=r["_id"], source=u, title=title, link=link, published=published,
+            summary=short_sum, region=None, language=lang, raw_text=raw_text,
+            sentiment=sent, entities=ents, sectors=sects, event_types=evts, tickers=tks,
+            meta=cluster
+        ))
+        fresh = _score_freshness(published)
+        rel = _score_relevance(title + " " + short_sum, query, company, tks)
+
+        ni = NewsItem(
+            id=r["_id"], source=u, title=title, link=link, published=published,
+            summary=short_sum, tags=[], region=_region_guess(u),
+            language=lang, raw_text=raw_text,
+            sentiment=sent, entities=ents, sectors=sects, event_types=evts, tickers=tks,
+            importance=imp, freshness=fresh, relevance=rel,
+            meta={"domain": domain_of(link), **cluster}
+        )
+        if NewsTable is not None:
+            ni.meta["published_ts"] = to_epoch(published)
+        all_items.append(ni)
+
+    # keep every enriched item for search_cached(), then filter (window + query)
+    if _STORE is not None:
+        _STORE.extend(all_items)
+        fetched_at = now_utc().timestamp()
+        _STORE.updated_at = fetched_at
+        for r in regions:
+            _FETCHED[(r.strip().upper(), tgt_ticker.upper() if tgt_ticker else None)] = fetched_at
     filtered = filter_items(all_items, query=query, window=window)
     # order by combined score: importance * freshness + relevance
-    filtered.sort(key=lambda x: (x.importance or 0)* (x.freshness or 0) + (x.relevance or 0), reverse=True)
+    filtered.sort(key=item_score, reverse=True)
     if limit:
         filtered = filtered[:limit]
     return filtered
 
 
+# process-wide table of enriched items (filled by run_pipeline, read by search_cached)
+NEWS_CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", "600"))
+_STORE = NewsTable(max_items=int(os.getenv("NEWS_CACHE_MAX_ITEMS", "50000"))) if NewsTable is not None else None
+# (region, tgt_ticker) -> epoch of the last run_pipeline pass that fetched it
+_FETCHED: Dict[Tuple[str, Optional[str]], float] = {}
+
+
+def _fetched_at(region: str, ticker: Optional[str]) -> Optional[float]:
+    """Last fetch of `region` targeting `ticker` (any target when ticker is None)."""
+    if ticker is not None:
+        return _FETCHED.get((region, ticker))
+    return max((t for (r, _), t in list(_FETCHED.items()) if r == region), default=None)
+
+
+def search_cached(query: str = "",
+                  window: str = "last_week",
+                  regions: Optional[List[str]] = None,
+                  tickers: Optional[List[str]] = None,
+                  limit: int = 100,
+                  max_age_s: Optional[int] = None,
+                  **filters) -> Optional[List[NewsItem]]:
+    """
+    Search the items already enriched by run_pipeline (no network).
+    Returns None unless every requested region was fetched (with tgt_ticker = each
+    requested ticker) within `max_age_s` (default NEWS_CACHE_TTL), so callers can fall
+    back to run_pipeline. Regions are matched on the sources listed for them.
+    """
+    if _STORE is None or not len(_STORE):
+        cache_miss()
+        return None
+    regs = sorted({r.strip().upper() for r in regions}) if regions else sorted({r for r, _ in list(_FETCHED)})
+    targets = sorted({t.strip().upper() for t in tickers}) if tickers else [None]
+    stamps = [_fetched_at(r, t) for r in regs for t in targets]
+    max_age_s = NEWS_CACHE_TTL if max_age_s is None else max_age_s
+    if not stamps or None in stamps or (max_age_s and now_utc().timestamp() - min(stamps) > max_age_s):
+        cache_miss()
+        return None
+    cache_hit()
+    srcs = list_sources(regs) if regions else None
+    return _STORE.search(limit=limit, query=query, window=window, sources=srcs, tickers=tickers, **filters)
+
+
+def shared_items(regions: List[str], window: str = "last_week") -> List[NewsItem]:
+    """
+    One enriched pass shared by many tickers: the cached items when `regions` were fetched
+    recently (search_cached), else a single untargeted run_pipeline. Filter it per ticker
+    with select_for_ticker instead of running the pipeline once per ticker.
+    """
+    items = search_cached(window=window, regions=regions, limit=0)
+    if items is None:
+        items = run_pipeline(regions=regions, window=window, limit=0)
+    return list(items or [])
+
+
+def select_for_ticker(items: List[NewsItem], ticker: str, query: str = "",
+                      limit: Optional[int] = 100) -> List[NewsItem]:
+    """
+    Items of a shared pass that mention `ticker` (tickers field or text), with the ticker
+    mapped and relevance rescored as run_pipeline(tgt_ticker=ticker) would, best first.
+    """
+    tk = ticker.strip().upper()
+    out = []
+    for it in items:
+        if not _matches_tickers(it, [tk]):
+            continue
+        tks = list(dict.fromkeys([tk] + list(it.tickers or [])))[:10]
+        rel = _score_relevance((it.title or "") + " " + (it.summary or ""), query, None, tks)
+        out.append(replace(it, tickers=tks, relevance=rel))
+    out.sort(key=item_score, reverse=True)
+    return out[:limit] if limit else out
+
+
 def _region_guess(source_url: str) -> str:
+    for region, urls in SOURCES.items():
+        if source_url in urls:
+            return region
     url = source_url.lower()
     if "lesechos" in url or "boursorama" in url or "bfmtv" in url or "zonebourse" in url: return "FR"
     if "handelsblatt" in url or "faz.net" in url or "boersen-zeitung" in url or "manager-magazin" in url: return "DE"
@@ -41,6 +41,13 @@ try:
 except Exception as e:
     raise RuntimeError("finviz_client requires `beautifulsoup4`. pip install beautifulsoup4 lxml") from e
 
+# --- Tracing (core.tracing ; no-op si TRACE_EXPORT n'est pas défini)
+try:
+    from core.tracing import traced, cache_hit, cache_miss
+except Exception:  # exécution directe: src/ sur le path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from core.tracing import traced, cache_hit, cache_miss
+
 # --- Optional
 try:
     from tqdm import tqdm
@@ -92,10 +99,13 @@ def _get(url: str, params: Optional[Dict[str, Any]] = None, use_cache=True) -> s
     cpath = _cache_path(full)
     if use_cache and cpath.exists():
         try:
-            return cpath.read_text(encoding="utf-8", errors="ignore")
+            html = cpath.read_text(encoding="utf-8", errors="ignore")
+            cache_hit()
+            return html
         except Exception:
             pass
 
+    cache_miss()
     last_err = None
     wait = 0.2
     for att in range(1, RETRIES + 2):
@@ -164,6 +174,7 @@ def _parse_iso(ts: str) -> Optional[str]:
 # Company snapshot block
 # ======================
 
+@traced()
 def company_snapshot(ticker: str, use_cache=True) -> Dict[str, Any]:
     """
     Parse finviz quote main page for snapshot ratios/ownership/short/links etc.
@@ -268,6 +279,7 @@ def company_snapshot(ticker: str, use_cache=True) -> Dict[str, Any]:
 # Insider & Filings
 # ==================
 
+@traced()
 def insider_trades(ticker: str, use_cache=True) -> List[Dict[str, Any]]:
     """Parse insider trades table (if present)."""
     t = ticker.upper().strip()
@@ -303,6 +315,7 @@ def insider_trades(ticker: str, use_cache=True) -> List[Dict[str, Any]]:
             continue
     return rows
 
+@traced()
 def latest_filings(ticker: str, use_cache=True) -> List[Dict[str, Any]]:
     """Parse 'Latest Filings' tab list."""
     t = ticker.upper().strip()
@@ -331,6 +344,7 @@ def latest_filings(ticker: str, use_cache=True) -> List[Dict[str, Any]]:
 # Options chain
 # =============
 
+@traced()
 def options_chain(ticker: str, expiry: Optional[str] = None, use_cache=True) -> Dict[str, Any]:
     """
     Fetch options list view (calls/puts) for a given expiry if provided.
@@ -404,6 +418,7 @@ def options_chain(ticker: str, expiry: Optional[str] = None, use_cache=True) ->
 # News
 # =====
 
+@traced()
 def news(ticker: Optional[str] = None, use_cache=True, limit: int = 200) -> List[Dict[str, Any]]:
     """
     Finviz news feed (global or per ticker)
@@ -454,6 +469,7 @@ FUTURES_CATEGORIES = [
     "Indices","Energy","Metals","Bonds","Currencies","Softs","Meats","Grains","Crypto"
 ]
 
+@traced()
 def futures(category: Optional[str] = None, timeframe: str = "w", tab: str = "quotes",
             use_cache=True) -> Dict[str, Any]:
     """
@@ -546,6 +562,7 @@ class FinvizCompany:
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
+@traced()
 def fetch_company_all(ticker: str, expiry: Optional[str] = None,
                       include_news: bool = True, use_cache=True) -> FinvizCompany:
     snap = company_snapshot(ticker, use_cache=use_cache)
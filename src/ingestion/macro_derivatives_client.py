@@ -37,6 +37,13 @@ try:
 except Exception:
     pd = None
 
+# --- Tracing (core.tracing ; no-op si TRACE_EXPORT n'est pas défini)
+try:
+    from core.tracing import traced, cache_hit, cache_miss
+except Exception:  # exécution directe: src/ sur le path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from core.tracing import traced, cache_hit, cache_miss
+
 try:
     from tqdm import tqdm
 except Exception:
@@ -79,6 +86,7 @@ def _get(url: str, params: Optional[Dict[str, Any]] = None, use_cache=True, as_j
     if use_cache and cpath.exists():
         try:
             raw = cpath.read_bytes()
+            cache_hit()
             if as_json:
                 return json.loads(raw.decode("utf-8", errors="ignore"))
             if as_text:
@@ -87,6 +95,7 @@ def _get(url: str, params: Optional[Dict[str, Any]] = None, use_cache=True, as_j
         except Exception:
             pass
 
+    cache_miss()
     last_err = None
     wait = 0.25
     for att in range(1, RETRIES + 2):
@@ -140,6 +149,7 @@ try:
 except Exception:
     FRED_KEY = os.getenv("FRED_API_KEY", "").strip() or None
 
+@traced()
 def fred_series(series_ids: List[str], start: Optional[str] = None, end: Optional[str] = None,
                 use_cache=True) -> Dict[str, List[Dict[str, Any]]]:
     """
@@ -212,6 +222,7 @@ def _te_headers():
         return {"accept": "application/json", "x-api-key": TE_KEY}
     return {"accept": "application/json"}
 
+@traced()
 def tradingeconomics_calendar(countries: Optional[List[str]] = None,
                               start: Optional[str] = None,
                               end: Optional[str] = None,
@@ -253,6 +264,7 @@ def tradingeconomics_calendar(countries: Optional[List[str]] = None,
 # ==============
 # CBOE endpoints
 # ==============
+@traced()
 def cboe_indexes(which: List[str] = ["VIX","VVIX","SKEW"], use_cache=True) -> Dict[str, Dict[str, Any]]:
     """
     Récupère VIX, VVIX, SKEW depuis endpoints publics (CSV / JSON)
@@ -314,6 +326,7 @@ COT_MARKET_REGEX = {
     "UST10Y": r"U\.S\. Treasury Bonds|10-Year",
 }
 
+@traced()
 def cftc_cot(symbols: List[str] = ["SPX","NDX","WTI","GOLD","COPPER","EUR","JPY"],
              use_cache=True) -> Dict[str, Dict[str, Any]]:
     """
@@ -400,6 +413,7 @@ def _yoy(series: List[Dict[str, Any]]) -> Optional[float]:
 # Macro snapshot construction
 # ===========================
 
+@traced()
 def build_macro_snapshot(
     fred_ids: Dict[str, str] = DEFAULT_FRED,
     include_te: bool = True,
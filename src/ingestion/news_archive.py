@@ -0,0 +1,349 @@
+"""
+Columnar news archive (month-partitioned Parquet) with ticker / timestamp indexes.
+
+News lands as per-run files: JSONL dumps (finnews.save_jsonl, data/news.jsonl,
+enriched exports) and harvester batches (data/news/dt=YYYY-MM-DD/news_HHMMSS.parquet).
+`build_archive(sources)` streams them once into
+
+    data/news_archive/month=YYYY-MM/news.parquet   (sorted by ts, deduplicated by id)
+    data/news_archive/_index.json                  (per month: ts range, rows, tickers,
+                                                    regions; ingested source files)
+
+Rebuilds are incremental: unchanged source files (path+size+mtime) are skipped and
+only the months that receive rows are rewritten.
+
+`scan(...)` prunes months with the index (time range, tickers) and pushes the
+region / relevance / |sentiment| / time filters down to the Parquet scan (row-group
+statistics), so repeated event studies and RAG backfills read only the slices they need.
+
+Usage:
+    python -m ingestion.news_archive build data/news.jsonl "data/news/dt=*/*.parquet"
+    from ingestion.news_archive import scan
+    tbl = scan(tickers=["AAPL"], start="2024-01-01", min_relevance=0.3)
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+ARCHIVE_DIR = Path("data/news_archive")
+DEFAULT_SOURCES = ["data/news.jsonl", "data/news/dt=*/*.parquet"]
+BATCH_LINES = 50_000
+
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("ts", pa.timestamp("us", tz="UTC")),
+    ("title", pa.string()),
+    ("summary", pa.string()),
+    ("link", pa.string()),
+    ("source", pa.string()),
+    ("region", pa.string()),
+    ("lang", pa.string()),
+    ("tickers", pa.list_(pa.string())),
+    ("sentiment", pa.float64()),
+    ("relevance", pa.float64()),
+    ("event_class", pa.string()),
+])
+
+
+# ---------------------------
+# Normalization
+# ---------------------------
+
+def _parse_ts(v: Any) -> Optional[datetime]:
+    if v is None:
+        return None
+    if isinstance(v, datetime):
+        ts = v
+    else:
+        try:
+            import pandas as pd
+            ts = pd.Timestamp(v).to_pydatetime()
+        except Exception:
+            return None
+    if ts != ts:  # NaT
+        return None
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def _float(v: Any) -> Optional[float]:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if f != f else f
+
+
+def _str(v: Any) -> Optional[str]:
+    if v is None or (isinstance(v, float) and v != v):
+        return None
+    return str(v) or None
+
+
+def _tickers(obj: Dict[str, Any]) -> List[str]:
+    raw = obj.get("tickers")
+    if raw is None or (isinstance(raw, float) and raw != raw):
+        ent = obj.get("entities")
+        raw = ent.get("tickers") if isinstance(ent, dict) else None
+    if raw is None:
+        return []
+    if isinstance(raw, str):
+        raw = raw.replace(";", ",").split(",")
+    try:
+        return sorted({str(t).upper().strip() for t in raw if str(t).strip()})
+    except TypeError:
+        return []
+
+
+def normalize(obj: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """One raw news record (JSONL or harvester row) -> archive row (None without a timestamp)."""
+    ts = _parse_ts(obj.get("published") or obj.get("time") or obj.get("timestamp") or obj.get("ts"))
+    if ts is None:
+        return None
+    title = _str(obj.get("title"))
+    link = _str(obj.get("link") or obj.get("url"))
+    rid = _str(obj.get("id")) or link
+    if not rid:
+        rid = hashlib.sha1(f"{ts.isoformat()}|{title}".encode("utf-8")).hexdigest()[:16]
+    sent = obj.get("sentiment", obj.get("sent"))
+    return {
+        "id": rid,
+        "ts": ts,
+        "title": title,
+        "summary": _str(obj.get("summary")),
+        "link": link,
+        "source": _str(obj.get("source")),
+        "region": _str(obj.get("region")),
+        "lang": _str(obj.get("lang")),
+        "tickers": _tickers(obj),
+        "sentiment": _float(sent) or 0.0,
+        "relevance": _float(obj.get("relevance")),
+        "event_class": _str(obj.get("event_class")),
+    }
+
+
+def _to_table(rows: List[Dict[str, Any]]) -> pa.Table:
+    return pa.Table.from_pylist(rows, schema=SCHEMA)
+
+
+def iter_jsonl(path: str | Path, batch_lines: int = BATCH_LINES) -> Iterator[pa.Table]:
+    """Stream a JSONL dump as normalized Arrow batches (bounded memory)."""
+    rows: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = normalize(json.loads(line))
+            except Exception:
+                continue
+            if row is not None:
+                rows.append(row)
+            if len(rows) >= batch_lines:
+                yield _to_table(rows)
+                rows = []
+    if rows:
+        yield _to_table(rows)
+
+
+def iter_parquet(path: str | Path) -> Iterator[pa.Table]:
+    """Normalized Arrow batches of a harvester/export Parquet file."""
+    pf = pq.ParquetFile(path)
+    for batch in pf.iter_batches(batch_size=BATCH_LINES):
+        rows = [r for r in map(normalize, batch.to_pylist()) if r is not None]
+        if rows:
+            yield _to_table(rows)
+
+
+# ---------------------------
+# Build
+# ---------------------------
+
+def _load_index(root: Path) -> Dict[str, Any]:
+    try:
+        return json.loads((root / "_index.json").read_text(encoding="utf-8"))
+    except Exception:
+        return {"months": {}, "sources": {}}
+
+
+def _save_index(root: Path, index: Dict[str, Any]) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / "_index.json.tmp"
+    tmp.write_text(json.dumps(index, ensure_ascii=False, indent=1), encoding="utf-8")
+    tmp.replace(root / "_index.json")
+
+
+def _expand_sources(sources: Iterable[str | Path]) -> List[Path]:
+    out: List[Path] = []
+    for s in map(str, sources):
+        if any(c in s for c in "*?["):
+            out.extend(Path(p) for p in sorted(glob.glob(s)))
+        else:
+            out.append(Path(s))
+    return [p for p in dict.fromkeys(out) if p.is_file()]
+
+
+def _month_stats(tbl: pa.Table) -> Dict[str, Any]:
+    ts = tbl.column("ts")
+    tick = pc.unique(pc.list_flatten(tbl.column("tickers"))).to_pylist()
+    regions = pc.unique(tbl.column("region")).to_pylist()
+    return {
+        "rows": tbl.num_rows,
+        "ts_min": pc.min(ts).as_py().isoformat(),
+        "ts_max": pc.max(ts).as_py().isoformat(),
+        "tickers": sorted(t for t in tick if t),
+        "regions": sorted(r for r in regions if r),
+    }
+
+
+def _write_month(root: Path, month: str, new: pa.Table) -> Dict[str, Any]:
+    path = root / f"month={month}" / "news.parquet"
+    parts = [pq.read_table(path, schema=SCHEMA)] if path.exists() else []
+    tbl = pa.concat_tables(parts + [new])
+    # keep the last version of each id, then sort by time (tight row-group ts ranges)
+    idx = pa.array(range(tbl.num_rows), pa.int64())
+    last = (pa.table({"id": tbl.column("id"), "i": idx})
+            .group_by("id", use_threads=False).aggregate([("i", "max")]).column("i_max"))
+    tbl = tbl.take(last).sort_by([("ts", "ascending")])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(tbl, tmp, compression="zstd", row_group_size=20_000)
+    tmp.replace(path)
+    return _month_stats(tbl)
+
+
+def build_archive(sources: Optional[Sequence[str | Path]] = None, root: str | Path = ARCHIVE_DIR,
+                  force: bool = False) -> Dict[str, Any]:
+    """Ingest new/changed source files into the month-partitioned archive."""
+    root = Path(root)
+    index = _load_index(root)
+    seen = index.setdefault("sources", {})
+    batches: List[pa.Table] = []
+    ingested: Dict[str, List[int]] = {}
+    for p in _expand_sources(sources or DEFAULT_SOURCES):
+        st = p.stat()
+        key = [st.st_size, st.st_mtime_ns]
+        if not force and seen.get(str(p)) == key:
+            continue
+        reader = iter_parquet if p.suffix == ".parquet" else iter_jsonl
+        try:
+            batches.extend(reader(p))
+        except Exception:
+            continue
+        ingested[str(p)] = key
+    rows = sum(b.num_rows for b in batches)
+    if batches:
+        tbl = pa.concat_tables(batches)
+        month = pc.strftime(tbl.column("ts"), format="%Y-%m")
+        for m in pc.unique(month).to_pylist():
+            index["months"][m] = _write_month(root, m, tbl.filter(pc.equal(month, m)))
+    seen.update(ingested)
+    index["updated"] = datetime.now(timezone.utc).isoformat()
+    _save_index(root, index)
+    return {"sources": len(ingested), "rows": rows, "months": len(index["months"])}
+
+
+# ---------------------------
+# Scan
+# ---------------------------
+
+def _ts(v: Any) -> Optional[datetime]:
+    return _parse_ts(v) if v is not None else None
+
+
+def _months(index: Dict[str, Any], start: Optional[datetime], end: Optional[datetime],
+            tickers: Optional[set]) -> List[str]:
+    keep = []
+    for m, meta in sorted(index.get("months", {}).items()):
+        if start is not None and _parse_ts(meta["ts_max"]) < start:
+            continue
+        if end is not None and _parse_ts(meta["ts_min"]) > end:
+            continue
+        if tickers and not tickers.intersection(meta.get("tickers", ())):
+            continue
+        keep.append(m)
+    return keep
+
+
+def scan(tickers: Optional[Iterable[str]] = None, start: Any = None, end: Any = None,
+         regions: Optional[Iterable[str]] = None, min_relevance: Optional[float] = None,
+         min_abs_sent: Optional[float] = None, require_tickers: bool = False,
+         columns: Optional[List[str]] = None, root: str | Path = ARCHIVE_DIR) -> pa.Table:
+    """Filtered slice of the archive as an Arrow table (sorted by ts within each month).
+
+    - regions: rows whose region is unknown are kept (legacy loader behaviour)
+    - min_relevance: rows without relevance are dropped
+    - tickers: rows mentioning at least one of them
+    """
+    root = Path(root)
+    tick = {str(t).upper() for t in tickers} if tickers else None
+    start_ts, end_ts = _ts(start), _ts(end)
+    months = _months(_load_index(root), start_ts, end_ts, tick)
+    files = [str(root / f"month={m}" / "news.parquet") for m in months]
+    files = [f for f in files if Path(f).exists()]
+    if not files:
+        return SCHEMA.empty_table() if columns is None else SCHEMA.empty_table().select(columns)
+
+    flt = None
+
+    def _and(e):
+        nonlocal flt
+        flt = e if flt is None else (flt & e)
+
+    if start_ts is not None:
+        _and(ds.field("ts") >= pa.scalar(start_ts, SCHEMA.field("ts").type))
+    if end_ts is not None:
+        _and(ds.field("ts") <= pa.scalar(end_ts, SCHEMA.field("ts").type))
+    if min_relevance is not None:
+        _and(ds.field("relevance") >= float(min_relevance))
+    if min_abs_sent is not None:
+        _and(pc.abs(ds.field("sentiment")) >= float(min_abs_sent))
+    if regions:
+        regs = pa.array(sorted({str(r).upper() for r in regions}))
+        _and(ds.field("region").is_null() | pc.is_in(pc.utf8_upper(ds.field("region")), value_set=regs))
+    if require_tickers:
+        _and(pc.list_value_length(ds.field("tickers")) > 0)
+
+    need = None
+    if columns is not None:
+        need = list(dict.fromkeys(list(columns) + (["tickers"] if tick else [])))
+    tbl = ds.dataset(files, schema=SCHEMA, format="parquet").to_table(columns=need, filter=flt)
+    if tick:
+        lists = tbl.column("tickers")
+        hit = pc.is_in(pc.list_flatten(lists), value_set=pa.array(sorted(tick)))
+        # parent indices are ascending, so unique() keeps the row order
+        tbl = tbl.take(pc.unique(pc.filter(pc.list_parent_indices(lists), hit)))
+    return tbl.select(columns) if columns is not None else tbl
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Month-partitioned columnar news archive")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Ingest JSONL/Parquet news dumps")
+    b.add_argument("sources", nargs="*", default=None, help=f"Files or globs (default: {DEFAULT_SOURCES})")
+    b.add_argument("--root", default=str(ARCHIVE_DIR))
+    b.add_argument("--force", action="store_true", help="Re-ingest unchanged sources")
+    s = sub.add_parser("stats", help="Show the archive index")
+    s.add_argument("--root", default=str(ARCHIVE_DIR))
+    args = ap.parse_args()
+    if args.cmd == "build":
+        print(json.dumps(build_archive(args.sources or None, root=args.root, force=args.force)))
+    else:
+        idx = _load_index(Path(args.root))
+        print(json.dumps({m: {k: v for k, v in meta.items() if k != "tickers"}
+                          for m, meta in idx.get("months", {}).items()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
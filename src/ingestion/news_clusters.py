@@ -0,0 +1,234 @@
+"""
+Near-duplicate story clustering for news (MinHash + LSH banding).
+
+Syndicated stories (Reuters/Yahoo/CNBC...) rarely share an exact title, so the
+exact-hash dedup in finnews/phase4 lets them all through. Here every article is
+reduced to a MinHash signature over character shingles of title + summary head;
+LSH bands find candidate clusters in O(1) and the estimated Jaccard similarity
+with the cluster representative confirms the match.
+
+- `StoryClusterer.add(...)` assigns a stable cluster id incrementally (streaming).
+- Each cluster keeps its best representative (caller-supplied quality), its size
+  and distinct sources — `size` is exposed as an importance feature.
+- `save()/load()` persist the clusters so ids survive across harvest runs.
+
+Usage:
+    from ingestion.news_clusters import StoryClusterer
+    cl = StoryClusterer()
+    cid = cl.add("id1", "Fed holds rates", "The Fed kept...", source="reuters", quality=1.0)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_P = (1 << 31) - 1  # Mersenne prime: a*x + b stays below 2**63 in uint64
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+NUM_PERM = 64
+BANDS = 16          # 16 bands x 4 rows -> candidate threshold ~ (1/16)**(1/4) = 0.5
+THRESHOLD = 0.5     # estimated Jaccard required to join a cluster
+SHINGLE = 5
+SUMMARY_CHARS = 200
+
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall((text or "").lower()))
+
+
+def shingles(title: str, summary: str = "", k: int = SHINGLE) -> set:
+    """Character k-shingles over the normalized title + head of summary."""
+    txt = normalize(f"{title or ''} {(summary or '')[:SUMMARY_CHARS]}")
+    if len(txt) <= k:
+        return {txt} if txt else set()
+    return {txt[i:i + k] for i in range(len(txt) - k + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 7):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, _P, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _P, num_perm, dtype=np.uint64)
+
+    def signature(self, sh: Sequence[str] | set) -> np.ndarray:
+        h = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in sh), dtype=np.uint64, count=len(sh))
+        if h.size == 0:
+            return np.full(self.num_perm, _P, dtype=np.uint64)
+        h %= _P
+        return ((np.outer(h, self.a) + self.b) % _P).min(axis=0)
+
+
+def jaccard_estimate(s1: np.ndarray, s2: np.ndarray) -> float:
+    return float(np.mean(s1 == s2))
+
+
+@dataclass
+class StoryCluster:
+    cluster_id: str
+    rep_id: str
+    rep_quality: float
+    signature: np.ndarray
+    size: int = 1
+    sources: List[str] = field(default_factory=list)
+    last_seen: float = 0.0
+
+
+class StoryClusterer:
+    """Incremental near-duplicate clusterer (MinHash LSH)."""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, threshold: float = THRESHOLD,
+                 max_clusters: int = 50_000):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_clusters = max_clusters
+        self.clusters: Dict[str, StoryCluster] = {}
+        self._buckets: Dict[Tuple[int, int], List[str]] = {}
+        self.member_of: Dict[str, str] = {}
+
+    # ---- LSH
+    def _band_keys(self, sig: np.ndarray) -> List[Tuple[int, int]]:
+        return [(b, hash(sig[b * self.rows:(b + 1) * self.rows].tobytes())) for b in range(self.bands)]
+
+    def _index(self, cid: str, sig: np.ndarray) -> None:
+        for key in self._band_keys(sig):
+            ids = self._buckets.setdefault(key, [])
+            if cid not in ids:
+                ids.append(cid)
+
+    def _best_match(self, sig: np.ndarray) -> Optional[str]:
+        best, best_sim = None, self.threshold
+        seen = set()
+        for key in self._band_keys(sig):
+            for cid in self._buckets.get(key, ()):
+                if cid in seen or cid not in self.clusters:
+                    continue
+                seen.add(cid)
+                sim = jaccard_estimate(sig, self.clusters[cid].signature)
+                if sim >= best_sim:
+                    best, best_sim = cid, sim
+        return best
+
+    # ---- API
+    def add(self, item_id: str, title: str, summary: str = "", source: str = "", quality: float = 0.0) -> str:
+        """Assign `item_id` to a story cluster and return the cluster id (idempotent per id)."""
+        if item_id in self.member_of:
+            return self.member_of[item_id]
+        sig = self.hasher.signature(shingles(title, summary))
+        cid = self._best_match(sig)
+        now = time.time()
+        if cid is None:
+            cid = "c" + hashlib.sha1(item_id.encode("utf-8")).hexdigest()[:12]
+            self.clusters[cid] = StoryCluster(cid, item_id, float(quality), sig, 1, [source] if source else [], now)
+            self._index(cid, sig)
+            self._evict()
+        else:
+            c = self.clusters[cid]
+            c.size += 1
+            c.last_seen = now
+            if source and source not in c.sources:
+                c.sources.append(source)
+            if quality > c.rep_quality:
+                c.rep_id, c.rep_quality = item_id, float(quality)
+                # index the new representative too, so later variants of it still match
+                c.signature = sig
+                self._index(cid, sig)
+        self.member_of[item_id] = cid
+        return cid
+
+    def cluster(self, cid: str) -> Optional[StoryCluster]:
+        return self.clusters.get(cid)
+
+    def is_representative(self, item_id: str) -> bool:
+        c = self.clusters.get(self.member_of.get(item_id, ""))
+        return bool(c and c.rep_id == item_id)
+
+    def _evict(self) -> None:
+        if len(self.clusters) <= self.max_clusters:
+            return
+        # drop the least recently seen clusters down to 90%, then purge them from the band
+        # buckets (a cluster may sit under several signatures, so filter every bucket)
+        n_drop = len(self.clusters) - int(self.max_clusters * 0.9)
+        for cid in sorted(self.clusters, key=lambda k: self.clusters[k].last_seen)[:n_drop]:
+            self.clusters.pop(cid, None)
+        live = set(self.clusters)
+        self.member_of = {k: v for k, v in self.member_of.items() if v in live}
+        buckets: Dict[Tuple[int, int], List[str]] = {}
+        for key, ids in self._buckets.items():
+            kept = [cid for cid in ids if cid in live]
+            if kept:
+                buckets[key] = kept
+        self._buckets = buckets
+
+    # ---- persistence
+    def save(self, path: str | Path) -> Path:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        obj = {
+            "clusters": [
+                {"id": c.cluster_id, "rep": c.rep_id, "q": c.rep_quality, "sig": c.signature.tolist(),
+                 "size": c.size, "sources": c.sources, "last_seen": c.last_seen}
+                for c in self.clusters.values()
+            ],
+            "members": self.member_of,
+        }
+        p.write_text(json.dumps(obj, ensure_ascii=False), encoding="utf-8")
+        return p
+
+    @classmethod
+    def load(cls, path: str | Path, **kwargs) -> "StoryClusterer":
+        cl = cls(**kwargs)
+        try:
+            obj = json.loads(Path(path).read_text(encoding="utf-8"))
+        except Exception:
+            return cl
+        for c in obj.get("clusters", []):
+            sig = np.asarray(c["sig"], dtype=np.uint64)
+            cl.clusters[c["id"]] = StoryCluster(c["id"], c["rep"], float(c.get("q", 0.0)), sig,
+                                                int(c.get("size", 1)), list(c.get("sources") or []),
+                                                float(c.get("last_seen", 0.0)))
+            cl._index(c["id"], sig)
+        cl.member_of = {k: v for k, v in (obj.get("members") or {}).items() if v in cl.clusters}
+        return cl
+
+
+def cluster_records(records: List[Dict[str, Any]],
+                    key: Callable[[Dict[str, Any]], str],
+                    title: str = "title", summary: str = "summary", source: str = "source",
+                    quality: Optional[Callable[[Dict[str, Any]], float]] = None,
+                    clusterer: Optional[StoryClusterer] = None,
+                    keep_all: bool = False) -> List[Dict[str, Any]]:
+    """Cluster dict records and annotate `cluster_id`/`cluster_size`.
+
+    Returns the best record (highest quality, first on ties) of each cluster present
+    in `records`, in input order — or every record when `keep_all=True`.
+    """
+    cl = clusterer or StoryClusterer()
+    best: Dict[str, Tuple[float, int]] = {}
+    cids: List[str] = []
+    for i, r in enumerate(records):
+        q = quality(r) if quality else 0.0
+        cid = cl.add(key(r), r.get(title) or "", r.get(summary) or "", str(r.get(source) or ""), q)
+        cids.append(cid)
+        if cid not in best or q > best[cid][0]:
+            best[cid] = (q, i)
+    keep = {i for _, i in best.values()}
+    out = []
+    for i, (r, cid) in enumerate(zip(records, cids)):
+        r["cluster_id"] = cid
+        r["cluster_size"] = cl.clusters[cid].size if cid in cl.clusters else 1
+        if keep_all or i in keep:
+            out.append(r)
+    return out
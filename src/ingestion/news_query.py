@@ -0,0 +1,458 @@
+"""
+Precompiled boolean news search over a columnar item table.
+
+`finnews.filter_items` used to re-split the query and rescan title/summary/raw_text
+for every item, and reparse ISO timestamps on each call. Here:
+
+- `compile_query(q)` parses the query once (cached) into a small AST:
+  terms, "quoted phrases", prefix* terms, AND / OR / NOT, parentheses.
+  Adjacent terms are an implicit AND, "a NOT b" means a AND NOT b.
+- `NewsTable` ingests items once: token set -> inverted index (postings), timestamps
+  as epoch ints, region/source/language as arrays, sector/event/ticker tags as
+  postings. Every filter is then a numpy boolean mask.
+- `NewsTable.search(...)` filters, re-scores (freshness from the epoch column) and
+  returns the top items.
+
+Usage:
+    from ingestion.news_query import NewsTable, compile_query
+    tbl = NewsTable(items)
+    tbl.filter(query="(oil OR opec) NOT forecast*", window="last_day", regions=["US"])
+"""
+from __future__ import annotations
+
+import datetime as dt
+import re
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_LEX_RE = re.compile(r'\(|\)|"[^"]*"?|[^\s()"]+')
+_OPS = {"AND", "OR", "NOT"}
+
+NO_TS = np.iinfo(np.int64).min   # unknown timestamp: kept by every window (legacy behaviour)
+
+WINDOW_HOURS = {
+    "1h": 1, "6h": 6, "12h": 12, "24h": 24, "48h": 48, "last_48h": 48,
+    "last_day": 24, "last_week": 24 * 7, "last_month": 24 * 30,
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+def item_tokens(*texts: Optional[str]) -> FrozenSet[str]:
+    """Token set of an item (title, summary, raw text...)."""
+    return frozenset(t for txt in texts for t in tokenize(txt or ""))
+
+
+def to_epoch(published: Any) -> int:
+    """ISO string / datetime / epoch -> epoch seconds (naive = UTC), NO_TS if unparseable."""
+    if published is None or published == "":
+        return NO_TS
+    if isinstance(published, (int, float, np.integer, np.floating)):
+        return int(published)
+    try:
+        t = published if isinstance(published, dt.datetime) else \
+            dt.datetime.fromisoformat(str(published).strip().replace("Z", "+00:00"))
+    except Exception:
+        return NO_TS
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=dt.timezone.utc)
+    return int(t.timestamp())
+
+
+def window_cutoff(window: Optional[str], now: Optional[float] = None) -> Optional[int]:
+    """Lower epoch bound for a window name, None for 'all'."""
+    if window in ("all", None, ""):
+        return None
+    hours = WINDOW_HOURS.get(window, 24)
+    return int((now if now is not None else time.time()) - hours * 3600)
+
+
+# =========
+# Query AST
+# =========
+
+class Node:
+    def match(self, tokens: FrozenSet[str]) -> bool:
+        raise NotImplementedError
+
+    def mask(self, table: "NewsTable") -> np.ndarray:
+        raise NotImplementedError
+
+
+class MatchAll(Node):
+    def match(self, tokens):
+        return True
+
+    def mask(self, table):
+        return np.ones(len(table), dtype=bool)
+
+    def __repr__(self):
+        return "ALL"
+
+
+@dataclass(frozen=True)
+class Term(Node):
+    """One word, a quoted phrase (all its tokens) or a prefix* term."""
+    tokens: Tuple[str, ...]
+    prefix: bool = False
+
+    def match(self, tokens):
+        if self.prefix:
+            *head, last = self.tokens
+            return all(t in tokens for t in head) and any(t.startswith(last) for t in tokens)
+        return all(t in tokens for t in self.tokens)
+
+    def mask(self, table):
+        m = np.ones(len(table), dtype=bool)
+        *head, last = self.tokens
+        for t in head:
+            m &= table.token_mask(t)
+        return m & (table.prefix_mask(last) if self.prefix else table.token_mask(last))
+
+
+@dataclass(frozen=True)
+class Not(Node):
+    child: Node
+
+    def match(self, tokens):
+        return not self.child.match(tokens)
+
+    def mask(self, table):
+        return ~self.child.mask(table)
+
+
+@dataclass(frozen=True)
+class And(Node):
+    children: Tuple[Node, ...]
+
+    def match(self, tokens):
+        return all(c.match(tokens) for c in self.children)
+
+    def mask(self, table):
+        m = self.children[0].mask(table)
+        for c in self.children[1:]:
+            m = m & c.mask(table)
+        return m
+
+
+@dataclass(frozen=True)
+class Or(Node):
+    children: Tuple[Node, ...]
+
+    def match(self, tokens):
+        return any(c.match(tokens) for c in self.children)
+
+    def mask(self, table):
+        m = self.children[0].mask(table)
+        for c in self.children[1:]:
+            m = m | c.mask(table)
+        return m
+
+
+class _Parser:
+    """or := and (OR and)* ; and := unary ((AND | NOT)? unary)* ; unary := NOT unary | atom"""
+
+    def __init__(self, q: str):
+        self.toks = _LEX_RE.findall(q)
+        self.i = 0
+
+    def peek(self) -> Optional[str]:
+        return self.toks[self.i] if self.i < len(self.toks) else None
+
+    def op(self) -> Optional[str]:
+        t = self.peek()
+        return t.upper() if t is not None and t.upper() in _OPS else None
+
+    def parse(self) -> Optional[Node]:
+        node = self.or_expr()
+        while self.peek() is not None:  # stray ')' or trailing garbage: keep going as AND
+            self.i += 1
+            rest = self.or_expr()
+            node = _and([node, rest])
+        return node
+
+    def or_expr(self) -> Optional[Node]:
+        parts = [self.and_expr()]
+        while self.op() == "OR":
+            self.i += 1
+            parts.append(self.and_expr())
+        return _or(parts)
+
+    def and_expr(self) -> Optional[Node]:
+        parts = [self.unary()]
+        while True:
+            t = self.peek()
+            if t is None or t == ")" or self.op() == "OR":
+                break
+            if self.op() == "AND":
+                self.i += 1
+                continue
+            if self.op() == "NOT":
+                self.i += 1
+                parts.append(_not(self.unary()))
+                continue
+            parts.append(self.unary())
+        return _and(parts)
+
+    def unary(self) -> Optional[Node]:
+        if self.op() == "NOT":
+            self.i += 1
+            return _not(self.unary())
+        return self.atom()
+
+    def atom(self) -> Optional[Node]:
+        t = self.peek()
+        if t is None or t == ")" or self.op():
+            return None
+        self.i += 1
+        if t == "(":
+            node = self.or_expr()
+            if self.peek() == ")":
+                self.i += 1
+            return node
+        prefix = t.endswith("*") and not t.startswith('"')
+        words = tokenize(t.strip('"').rstrip("*"))
+        return Term(tuple(words), prefix) if words else None
+
+
+# empty operands (None: "a OR", "NOT", "()") are dropped rather than matching everything
+
+def _and(parts: List[Optional[Node]]) -> Optional[Node]:
+    parts = [p for p in parts if p is not None]
+    return None if not parts else parts[0] if len(parts) == 1 else And(tuple(parts))
+
+
+def _or(parts: List[Optional[Node]]) -> Optional[Node]:
+    parts = [p for p in parts if p is not None]
+    return None if not parts else parts[0] if len(parts) == 1 else Or(tuple(parts))
+
+
+def _not(child: Optional[Node]) -> Optional[Node]:
+    return None if child is None else Not(child)
+
+
+@lru_cache(maxsize=1024)
+def compile_query(q: str) -> Node:
+    """Parse a boolean query once; an empty query matches everything."""
+    return _Parser(q or "").parse() or MatchAll()
+
+
+def positive_terms(node: Node) -> List[Term]:
+    """Terms that count towards relevance (those not under a NOT)."""
+    if isinstance(node, Term):
+        return [node]
+    if isinstance(node, (And, Or)):
+        return [t for c in node.children for t in positive_terms(c)]
+    return []
+
+
+# ===============
+# Columnar table
+# ===============
+
+def _get(obj: Any, name: str, default: Any = None) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+class NewsTable:
+    """Columnar, append-only index of news items (NewsItem objects or dicts)."""
+
+    def __init__(self, items: Iterable[Any] = (), max_items: int = 50_000):
+        self.max_items = max_items
+        self._reset()
+        self.extend(items)
+
+    def _reset(self) -> None:
+        self.items: List[Any] = []
+        self._row_of: Dict[str, int] = {}
+        self._ts: List[int] = []
+        self._region: List[str] = []
+        self._source: List[str] = []
+        self._lang: List[str] = []
+        self._ntk: List[int] = []
+        self._imp: List[float] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._tags: Dict[str, Dict[str, List[int]]] = {"sectors": {}, "event_types": {}, "tickers": {}}
+        self._cols: Optional[Dict[str, np.ndarray]] = None
+        self._vocab: Optional[List[str]] = None
+        self.updated_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    # ---- ingest
+    def extend(self, items: Iterable[Any]) -> int:
+        """Index new items (same id = skipped); returns how many were added."""
+        added = 0
+        for it in items:
+            key = str(_get(it, "id") or _get(it, "link") or _get(it, "url") or id(it))
+            if key in self._row_of:
+                continue
+            row = len(self.items)
+            self._row_of[key] = row
+            self.items.append(it)
+            meta = _get(it, "meta") or {}
+            ts = meta.get("published_ts") if isinstance(meta, dict) else None
+            self._ts.append(int(ts) if ts is not None else to_epoch(_get(it, "published")))
+            self._region.append((_get(it, "region") or "").upper())
+            self._source.append((_get(it, "source") or "").lower())
+            self._lang.append((_get(it, "language") or _get(it, "lang") or "en").lower())
+            tks = _get(it, "tickers") or []
+            self._ntk.append(len(tks))
+            self._imp.append(float(_get(it, "importance") or 0.0))
+            for tok in item_tokens(_get(it, "title"), _get(it, "summary"), _get(it, "raw_text")):
+                self._postings.setdefault(tok, []).append(row)
+            for field_name, idx in self._tags.items():
+                vals = _get(it, field_name) or []
+                norm = str.upper if field_name == "tickers" else str.lower
+                for v in {norm(str(v)) for v in vals if v}:
+                    idx.setdefault(v, []).append(row)
+            added += 1
+        if added:
+            self._cols = None
+            self._vocab = None
+            self.updated_at = time.time()
+            if len(self.items) > self.max_items:
+                self._evict()
+        return added
+
+    def _evict(self) -> None:
+        # keep the most recent 90% (by publication time), rebuilt in one pass
+        keep = int(self.max_items * 0.9)
+        order = np.argsort(-np.asarray(self._ts, dtype=np.int64), kind="stable")[:keep]
+        kept = [self.items[i] for i in sorted(order.tolist())]
+        updated = self.updated_at
+        self._reset()
+        self.extend(kept)
+        self.updated_at = updated
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        if self._cols is None:
+            self._cols = {
+                "ts": np.asarray(self._ts, dtype=np.int64),
+                "region": np.asarray(self._region, dtype=object),
+                "source": np.asarray(self._source, dtype=object),
+                "lang": np.asarray(self._lang, dtype=object),
+                "ntk": np.asarray(self._ntk, dtype=np.int64),
+                "imp": np.asarray(self._imp, dtype=np.float64),
+            }
+        return self._cols
+
+    # ---- masks
+    def _rows_mask(self, rows: Optional[Sequence[int]]) -> np.ndarray:
+        m = np.zeros(len(self.items), dtype=bool)
+        if rows:
+            m[np.asarray(rows, dtype=np.int64)] = True
+        return m
+
+    def token_mask(self, token: str) -> np.ndarray:
+        return self._rows_mask(self._postings.get(token))
+
+    def prefix_mask(self, prefix: str) -> np.ndarray:
+        if self._vocab is None:
+            self._vocab = sorted(self._postings)
+        m = np.zeros(len(self.items), dtype=bool)
+        i = bisect_left(self._vocab, prefix)
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+            m[np.asarray(self._postings[self._vocab[i]], dtype=np.int64)] = True
+            i += 1
+        return m
+
+    def _tag_mask(self, field_name: str, values: Sequence[str]) -> np.ndarray:
+        idx = self._tags[field_name]
+        m = np.zeros(len(self.items), dtype=bool)
+        for v in values:
+            rows = idx.get(v)
+            if rows:
+                m[np.asarray(rows, dtype=np.int64)] = True
+        return m
+
+    def window_mask(self, window: Optional[str], now: Optional[float] = None) -> np.ndarray:
+        cutoff = window_cutoff(window, now)
+        ts = self._columns()["ts"]
+        if cutoff is None:
+            return np.ones(len(ts), dtype=bool)
+        return (ts >= cutoff) | (ts == NO_TS)
+
+    def mask(self,
+             query: str = "",
+             window: Optional[str] = "last_week",
+             regions: Optional[List[str]] = None,
+             sources_substr: Optional[List[str]] = None,
+             sources: Optional[List[str]] = None,
+             languages: Optional[List[str]] = None,
+             sectors: Optional[List[str]] = None,
+             events: Optional[List[str]] = None,
+             tickers: Optional[List[str]] = None,
+             now: Optional[float] = None) -> np.ndarray:
+        cols = self._columns()
+        m = self.window_mask(window, now)
+        if query:
+            m &= compile_query(query).mask(self)
+        if regions:
+            m &= np.isin(cols["region"], [r.upper() for r in regions])
+        if sources_substr:
+            subs = [s.lower() for s in sources_substr]
+            src_ok = np.fromiter((any(s in src for s in subs) for src in cols["source"]),
+                                 dtype=bool, count=len(self.items))
+            m &= src_ok
+        if sources:
+            m &= np.isin(cols["source"], [s.lower() for s in sources])
+        if languages:
+            m &= np.isin(cols["lang"], [l.lower() for l in languages])
+        if sectors:
+            m &= self._tag_mask("sectors", [s.lower() for s in sectors])
+        if events:
+            m &= self._tag_mask("event_types", [e.lower() for e in events])
+        if tickers:
+            tks = [t.upper() for t in tickers]
+            tk = self._tag_mask("tickers", tks)
+            # fallback on the text, as finnews._matches_tickers does
+            for t in tks:
+                words = tokenize(t)
+                if words:
+                    tk |= Term(tuple(words)).mask(self)
+            m &= tk
+        return m
+
+    def filter(self, **kwargs) -> List[Any]:
+        """Items passing every filter, in ingest order."""
+        m = self.mask(**kwargs)
+        return [self.items[i] for i in np.flatnonzero(m)]
+
+    # ---- ranking
+    def scores(self, query: str = "", now: Optional[float] = None) -> np.ndarray:
+        """importance * freshness + relevance, with freshness from the epoch column."""
+        cols = self._columns()
+        ts = cols["ts"]
+        now = now if now is not None else time.time()
+        age_h = np.maximum((now - ts) / 3600.0, 0.0)
+        fresh = np.where(ts == NO_TS, 0.5, 1.0 / (1.0 + age_h / 12.0))
+        hits = np.zeros(len(ts))
+        for term in positive_terms(compile_query(query)) if query else []:
+            hits += term.mask(self)
+        rel = np.minimum(1.5, 0.2 * hits + 0.15 * cols["ntk"])
+        return cols["imp"] * fresh + rel
+
+    def search(self, limit: Optional[int] = 50, query: str = "", now: Optional[float] = None,
+               **filters) -> List[Any]:
+        """Filtered items sorted by score (desc)."""
+        m = self.mask(query=query, now=now, **filters)
+        rows = np.flatnonzero(m)
+        if rows.size == 0:
+            return []
+        sc = self.scores(query, now)[rows]
+        order = rows[np.argsort(-sc, kind="stable")]
+        if limit:
+            order = order[:limit]
+        return [self.items[i] for i in order]
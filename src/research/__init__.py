@@ -1,9 +1,12 @@
 """Research and experimental scripts package."""
 
-# Expose NLP enrich functions for easy import
-try:
-    from .nlp_enrich import ask_model, enrich_article, sentiment_score, extract_entities
-    __all__ = ["ask_model", "enrich_article", "sentiment_score", "extract_entities"]
-except ImportError as e:
-    print(f"Warning: Could not import NLP enrich functions: {e}")
-    __all__ = []
+# Expose NLP enrich functions for easy import, loaded on first access (PEP 562):
+# importing research.scoring or research.rag_store no longer pulls nlp_enrich/scipy.
+__all__ = ["ask_model", "enrich_article", "sentiment_score", "extract_entities"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import nlp_enrich
+        return getattr(nlp_enrich, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,77 +1,213 @@
 # src/research/materialize.py
+"""
+Matérialisation incrémentale des features (core.feature_store).
+
+Tables (data/features/store/<table>/, schéma typé, symboles dictionary-encoded) :
+- prices_features_daily : symbol, date, close, rsi, sma20, macd
+- macro_snapshot_daily  : symbol (= id de série FRED), date, value
+- news_features_daily   : symbol, date (= asof), news_score_mean, news_count
+
+Chaque exécution ne télécharge que les dates postérieures au watermark de chaque
+symbole (plus WARMUP_DAYS d'historique pour amorcer les indicateurs) et ajoute un
+segment trié par (symbol, date) : le coût suit les nouvelles lignes, pas l'historique.
+`features_as_of(date)` donne l'instantané point-in-time (une ligne par symbole) ;
+`write_features_flat()` le publie dans data/features/dt=YYYYMMDD/features_flat.parquet
+(lu par agents.data_quality.scan_features et les pages Dash), fusionné avec les
+colonnes déjà écrites ce jour-là par l'agent quotidien.
+"""
 from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Iterable, List, Dict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
 import pandas as pd
+import pyarrow as pa
 
-from core.datasets import DatasetLayout, write_parquet_partition
+from core.feature_store import FeatureTable
 from core.market_data import get_price_history, get_fred_series
-from ingestion.finnews import run_pipeline
+from core.tracing import span
 # Indicateurs: priorité phase2_technical; fallback basic
 try:
     from analytics.phase2_technical import compute_indicators
 except Exception:
-    from analytics.indicators_basic import compute_indicators  # <— module fallback que je t'ai donné
+    from analytics.indicators_basic import compute_indicators
 
 DEFAULT_UNIVERSE = ("SPY", "QQQ", "AAPL", "NVDA", "MSFT")
 MACRO_SERIES = ("CPIAUCSL", "VIXCLS", "DGS10")  # CPI, VIX, 10Y
+MAX_WORKERS = int(os.getenv("MATERIALIZE_WORKERS", "8"))
+WARMUP_DAYS = 120   # historique relu avant le watermark (SMA20 / RSI14 / MACD 12-26-9)
+PERIOD_DAYS = {"1mo": 31, "3mo": 92, "6mo": 185, "1y": 365, "2y": 730, "5y": 1826, "10y": 3652, "max": 36500}
+FEATURES_DIR = Path("data/features")
+
+PRICES = FeatureTable("prices_features_daily", {
+    "close": pa.float64(), "rsi": pa.float64(), "sma20": pa.float64(), "macd": pa.float64(),
+})
+MACRO = FeatureTable("macro_snapshot_daily", {"value": pa.float64()})
+NEWS = FeatureTable("news_features_daily", {"news_score_mean": pa.float64(), "news_count": pa.int32()})
+
+# colonnes d'indicateurs: noms phase2_technical puis indicators_basic
+_IND_COLUMNS = {"rsi": ("RSI_14", "rsi"), "sma20": ("SMA_20", "sma20"), "macd": ("MACD", "macd")}
+
+
+def _fetch_all(fn, keys: List[str]) -> List[Any]:
+    """`fn(k)` pour chaque clé, en parallèle ; une erreur donne None pour cette clé."""
+    def _safe(k):
+        try:
+            return fn(k)
+        except Exception as e:
+            print(f"Erreur materialize {k}: {e}")
+            return None
+    if not keys:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(keys)))) as ex:
+        return list(ex.map(_safe, keys))
 
-def materialize_prices_features(universe: Iterable[str] = DEFAULT_UNIVERSE, interval="1d", period="1y"):
-    lay = DatasetLayout.default()
-    frames = []
-    for sym in universe:
-        df = get_price_history(sym, interval=interval)  # period param si ton loader le supporte
+
+def _start(sym: str, marks: Dict[str, Any], default_start: str, warmup_days: int = 0) -> str:
+    last = marks.get(sym.upper())
+    if last is None:
+        return default_start
+    return (last - timedelta(days=warmup_days)).isoformat()
+
+
+def materialize_prices_features(universe: Iterable[str] = DEFAULT_UNIVERSE, interval="1d", period="1y") -> int:
+    """Ajoute les nouvelles dates (close + rsi/sma20/macd) par ticker ; renvoie le nombre de lignes."""
+    universe = [s.upper() for s in universe]
+    marks = PRICES.watermarks()
+    first = (datetime.utcnow().date() - timedelta(days=PERIOD_DAYS.get(period, 365))).isoformat()
+
+    def _one(sym: str) -> Optional[pd.DataFrame]:
+        df = get_price_history(sym, start=_start(sym, marks, first, WARMUP_DAYS), interval=interval)
         if df is None or df.empty:
-            continue
+            return None
         ind = compute_indicators(df)
-        out = pd.DataFrame(index=df.index)
-        out["symbol"] = sym
-        out["close"] = df["Close"]
-        for col in ("rsi", "sma20", "macd"):
-            if col in ind:
-                out[col] = ind[col]
-        out = out.reset_index().rename(columns={"Date": "date", "Datetime": "date"})
-        frames.append(out)
-    if not frames:
-        return None
-    all_df = pd.concat(frames, ignore_index=True)
-    pdir = lay.today_partition("features", table="prices_features_daily")
-    return write_parquet_partition(all_df, pdir)
-
-def materialize_macro_snapshot(series_ids: Iterable[str] = MACRO_SERIES, start="2018-01-01"):
-    lay = DatasetLayout.default()
-    frames = []
-    for sid in series_ids:
-        s = get_fred_series(sid, start=start)
+        out = pd.DataFrame({"symbol": sym, "date": df.index, "close": df["Close"].to_numpy()})
+        for col, names in _IND_COLUMNS.items():
+            src = next((n for n in names if n in ind.columns), None)
+            if src is not None:
+                out[col] = ind[src].to_numpy()
+        return out
+
+    with span("materialize.prices", tickers=len(universe)) as sp:
+        frames = [f for f in _fetch_all(_one, universe) if f is not None]
+        n = PRICES.append(pd.concat(frames, ignore_index=True)) if frames else 0
+        sp.add_rows(n)
+    return n
+
+
+def materialize_macro_snapshot(series_ids: Iterable[str] = MACRO_SERIES, start="2018-01-01") -> int:
+    """Ajoute les nouvelles observations FRED par série (les révisions passées ne sont pas réécrites)."""
+    series_ids = [s.upper() for s in series_ids]
+    marks = MACRO.watermarks()
+
+    def _one(sid: str) -> Optional[pd.DataFrame]:
+        s = get_fred_series(sid, start=_start(sid, marks, start))
         if s is None or s.empty:
-            continue
-        out = s.reset_index()
-        out.columns = ["date", "value"]
-        out["series"] = sid
-        frames.append(out)
-    if not frames:
-        return None
-    df = pd.concat(frames, ignore_index=True)
-    pdir = lay.today_partition("features", table="macro_snapshot_daily")
-    return write_parquet_partition(df, pdir)
-
-def materialize_news_features(universe: Iterable[str] = DEFAULT_UNIVERSE, limit=200):
-    lay = DatasetLayout.default()
-    rows = []
-    for sym in universe:
-        items = run_pipeline(regions=["US","CA","INTL"], window="last_week", tgt_ticker=sym, limit=limit)
-        if not items:
-            continue
-        scores = [float(x.get("score", 0.0)) for x in items]
-        row = {
-            "symbol": sym,
-            "news_score_mean": float(pd.Series(scores).mean()) if scores else 0.0,
-            "news_count": int(len(items)),
-            "asof": datetime.utcnow().date().isoformat(),
-        }
-        rows.append(row)
-    if not rows:
+            return None
+        return pd.DataFrame({"symbol": sid, "date": s.index, "value": s.iloc[:, -1].to_numpy()})
+
+    with span("materialize.macro", series=len(series_ids)) as sp:
+        frames = [f for f in _fetch_all(_one, series_ids) if f is not None]
+        n = MACRO.append(pd.concat(frames, ignore_index=True)) if frames else 0
+        sp.add_rows(n)
+    return n
+
+
+def materialize_news_features(universe: Iterable[str] = DEFAULT_UNIVERSE, limit=200) -> int:
+    """
+    Une ligne par ticker et par jour (score moyen, nombre de news ; 0 sans news) ;
+    une seule passe news pour tout l'univers, filtrée par ticker ; idempotent sur la journée.
+    """
+    from ingestion.finnews import item_score, select_for_ticker, shared_items
+
+    today = datetime.utcnow().date()
+    marks = NEWS.watermarks()
+    todo = [s.upper() for s in universe if marks.get(s.upper()) != today]
+    if not todo:
+        return 0
+
+    with span("materialize.news", tickers=len(todo)) as sp:
+        items = shared_items(["US", "CA", "INTL"], window="last_week")
+        if not items:   # passe vide/échouée: ne pas marquer la journée comme faite
+            return 0
+        rows = []
+        for sym in todo:
+            scores = [item_score(x) for x in select_for_ticker(items, sym, limit=limit)]
+            rows.append({
+                "symbol": sym,
+                "date": today,
+                "news_score_mean": float(sum(scores) / len(scores)) if scores else 0.0,
+                "news_count": len(scores),
+            })
+        n = NEWS.append(pd.DataFrame(rows))
+        sp.add_rows(n)
+    return n
+
+
+# ============================================================================
+# LECTURE POINT-IN-TIME
+# ============================================================================
+def features_as_of(date: Any = None, symbols: Optional[Iterable[str]] = None,
+                   max_age_days: int = 10) -> pd.DataFrame:
+    """
+    Une ligne par symbole avec les dernières valeurs connues au `date` (défaut: aujourd'hui) :
+    close/rsi/sma20/macd, news_score_mean/news_count et macro_<série> (même valeur pour tous).
+    Rien de postérieur à `date` n'est lu (pas de fuite pour l'entraînement / backtests).
+    """
+    date = pd.Timestamp(date or datetime.utcnow().date())
+    px = PRICES.as_of(date, symbols, max_age_days=max_age_days)
+    if px.empty:
+        return px
+    out = px.rename(columns={"date": "price_date"})
+    news = NEWS.as_of(date, symbols, max_age_days=max_age_days)
+    if not news.empty:
+        out = out.merge(news.drop(columns=["date"]), on="symbol", how="left")
+    macro = MACRO.as_of(date, max_age_days=max(max_age_days, 62))   # séries mensuelles
+    for sid, val in zip(macro.get("symbol", []), macro.get("value", [])):
+        out[f"macro_{str(sid).lower()}"] = val
+    out["symbol"] = out["symbol"].astype(str)
+    return out
+
+
+def write_features_flat(date: Any = None) -> Optional[Path]:
+    """Publie features_as_of(date) dans data/features/dt=YYYYMMDD/features_flat.parquet."""
+    date = pd.Timestamp(date or datetime.utcnow().date())
+    snap = features_as_of(date)
+    if snap.empty:
         return None
-    df = pd.DataFrame(rows)
-    pdir = lay.today_partition("features", table="news_features_daily")
-    return write_parquet_partition(df, pdir)
\ No newline at end of file
+    snap = snap.rename(columns={"symbol": "ticker"})
+    snap["dt"] = date.strftime("%Y-%m-%d")
+    path = FEATURES_DIR / f"dt={date.strftime('%Y%m%d')}" / "features_flat.parquet"
+    if path.exists():
+        # colonnes de l'agent quotidien (news_count, y_pe, ...) conservées ; les nôtres priment
+        try:
+            prev = pd.read_parquet(path)
+            if "ticker" in prev.columns:
+                keep = ["ticker"] + [c for c in prev.columns if c not in snap.columns]
+                snap = prev[keep].merge(snap, on="ticker", how="outer")
+        except Exception:
+            pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    snap.to_parquet(tmp, index=False)
+    tmp.replace(path)
+    return path
+
+
+def materialize_all(universe: Iterable[str] = DEFAULT_UNIVERSE) -> Dict[str, Any]:
+    """Les trois tables (incrémental) puis l'instantané features_flat du jour."""
+    universe = list(universe)
+    out: Dict[str, Any] = {}
+    for name, fn in (("prices", lambda: materialize_prices_features(universe)),
+                     ("macro", materialize_macro_snapshot),
+                     ("news", lambda: materialize_news_features(universe))):
+        try:
+            out[name] = fn()
+        except Exception as e:
+            out[name] = f"error: {e}"
+    path = write_features_flat()
+    out["features_flat"] = str(path) if path else None
+    return out
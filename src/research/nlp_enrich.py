@@ -14,7 +14,7 @@ item = enrich_article(title, summary, body, source="ft", region="INTL")
 
 Optional translator: pass translator=str->str callable (e.g., wrapper to DeepL/OpenAI/etc.)
 
-No external imports beyond stdlib.
+No external imports beyond stdlib (TextRank centrality via research.textrank when numpy is available).
 """
 from __future__ import annotations
 
@@ -28,10 +28,19 @@ except ImportError:
     IMPORT_SUCCESS = False
 
 from dataclasses import dataclass, asdict
+from functools import lru_cache
 from typing import List, Dict, Tuple, Optional, Callable
 import re
 import math
 
+try:
+    from research import textrank as _textrank
+except ImportError:
+    try:
+        import textrank as _textrank  # exécution directe depuis src/research
+    except ImportError:
+        _textrank = None
+
 # -----------------------------
 # Utilities
 # -----------------------------
@@ -57,25 +66,26 @@ def _split_sentences(text: str) -> List[str]:
 # Summarization (extractive heuristic)
 # -----------------------------
 
-def summarize(text: str, level: str = "headline", max_bullets: int = 5) -> str | List[str]:
-    """Very small extractive summarizer.
-    level: 'headline' | 'bullets' | 'narrative'
-    - headline: best short sentence/fragment <= 120 chars
-    - bullets: 3..max_bullets bullet points (key sentences)
-    - narrative: 3-5 sentences stitched
-    """
-    sents = _split_sentences(text)
-    if not sents:
-        return "" if level != "bullets" else []
+_KEYWORDS = {
+    "acquire", "merger", "guidance", "forecast", "profit", "loss", "tariff", "sanction",
+    "inflation", "rate", "policy", "earnings", "IPO", "dividend", "strike", "war",
+    "attack", "drone", "oil", "gas", "OPEC", "BRICS", "Ukraine", "Gaza", "Ceasefire",
+}
+_KEYWORDS_LOW = {k.lower() for k in _KEYWORDS}
 
-    # scoring: position + keyword boosts + length penalty
-    keywords = {
-        "acquire", "merger", "guidance", "forecast", "profit", "loss", "tariff", "sanction",
-        "inflation", "rate", "policy", "earnings", "IPO", "dividend", "strike", "war",
-        "attack", "drone", "oil", "gas", "OPEC", "BRICS", "Ukraine", "Gaza", "Ceasefire",
-    }
-    scores: List[Tuple[float, str]] = []
+
+@lru_cache(maxsize=512)
+def _ranked_sentences(text: str) -> Tuple[str, ...]:
+    """Sentences ranked by position + keywords + length + TextRank centrality (cached per text)."""
+    sents = _split_sentences(text)
     n = len(sents)
+    centrality = None
+    if _textrank is not None and n > 2:
+        try:
+            centrality = _textrank.rank_sentences(sents) * n  # mean 1.0
+        except Exception:
+            centrality = None
+    scores: List[Tuple[float, str]] = []
     for i, sent in enumerate(sents):
         l = len(sent)
         if l < 12:
@@ -85,15 +95,26 @@ def summarize(text: str, level: str = "headline", max_bullets: int = 5) -> str |
         score += max(0.0, (n - i) / n)  # earlier higher
         # keyword boosts
         tokens = set(re.findall(r"[A-Za-z][A-Za-z\-]+", sent.lower()))
-        score += 0.6 * sum(1 for k in keywords if k.lower() in tokens)
+        score += 0.6 * len(_KEYWORDS_LOW & tokens)
         # length sweet spot ~ 60-160 chars
         score -= abs(l - 110) / 220.0
+        # TextRank: sentences central to the article
+        if centrality is not None:
+            score += 0.5 * float(centrality[i])
         scores.append((score, sent))
+    return tuple(s for _, s in sorted(scores, key=lambda x: x[0], reverse=True))
 
-    if not scores:
-        return "" if level != "bullets" else []
 
-    ranked = [s for _, s in sorted(scores, key=lambda x: x[0], reverse=True)]
+def summarize(text: str, level: str = "headline", max_bullets: int = 5) -> str | List[str]:
+    """Very small extractive summarizer.
+    level: 'headline' | 'bullets' | 'narrative'
+    - headline: best short sentence/fragment <= 120 chars
+    - bullets: 3..max_bullets bullet points (key sentences)
+    - narrative: 3-5 sentences stitched
+    """
+    ranked = list(_ranked_sentences(_clean_text(text)))
+    if not ranked:
+        return "" if level != "bullets" else []
 
     if level == "headline":
         # choose first that fits <= 120 chars; fallback to best truncated
@@ -6,6 +6,9 @@ Peers finder basé Finnhub (+ validation yfinance) — général US/CA.
 Entrée: ticker Yahoo OU nom de société (ex: "NGD.TO" ou "New Gold" ou "HUT" ou "Hut 8")
 Sortie: liste de tickers Yahoo US/CA plausibles (scores simples + filtres secteur/industrie/keywords)
 
+find_peers() répond d'abord depuis analytics.peer_engine (matrice de corrélation
+quotidienne de l'univers suivi), puis via Finnhub.
+
 Dépendances: yfinance, requests, numpy
 Secrets: FINNHUB_API_KEY (via secrets_local.py ou variable d'env)
 
@@ -15,9 +18,10 @@ Exemples:
 """
 
 from __future__ import annotations
-import os, re, time, math, json, argparse, logging
-from typing import List, Tuple, Dict, Any, Optional
+import os, re, math, json, argparse, logging
+from typing import List, Tuple, Dict, Any
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 import numpy as np
@@ -34,7 +38,7 @@ if not logger.handlers:
     logger.addHandler(h)
 logger.setLevel(logging.INFO)
 
-YF_SLEEP = 0.10
+PEERS_WORKERS = int(os.getenv("PEERS_WORKERS", "6"))  # candidats résolus en parallèle
 HTTP_TIMEOUT = (8, 20)
 
 # ------------------------------------------------------------------------------
@@ -294,28 +298,35 @@ def _score_candidate(my_info: Dict[str, Any], peer_info: Dict[str, Any]) -> floa
         score += 0.2
     return score
 
+def _resolve_candidate(b: str) -> Tuple[str, Dict[str, Any]]:
+    """(ticker Yahoo, info yfinance) d'un symbole Finnhub (profil -> échange -> suffixe)."""
+    b_clean = _strip_yahoo_suffix(b)
+    # profil Finnhub pour récupérer l'échange (mapping Yahoo)
+    try:
+        prof = _fh_get("/stock/profile2", {"symbol": b_clean}) or {}
+    except Exception:
+        prof = {}
+    ex = (prof.get("exchange") or "")
+
+    yahoo = _to_yahoo_symbol(b_clean, ex)
+    pi = _yf_info(yf.Ticker(yahoo))
+    # fallback si pas actif: tenter base sans suffixe
+    if not _looks_active(yahoo):
+        alt = b_clean.upper()
+        pi2 = _yf_info(yf.Ticker(alt))
+        if _looks_active(alt):
+            yahoo, pi = alt, pi2
+    return yahoo, pi
+
 def _map_and_validate(peers_base: List[str], my_info: Dict[str, Any]) -> List[Tuple[str, float]]:
     validated: List[Tuple[str, float]] = []
     seen_yahoo: set[str] = set()
 
-    for b in peers_base:
-        b_clean = _strip_yahoo_suffix(b)
-        # profil Finnhub pour récupérer l'échange (mapping Yahoo)
-        try:
-            prof = _fh_get("/stock/profile2", {"symbol": b_clean}) or {}
-        except Exception:
-            prof = {}
-        ex = (prof.get("exchange") or "")
-
-        yahoo = _to_yahoo_symbol(b_clean, ex)
-        pi = _yf_info(yf.Ticker(yahoo))
-        # fallback si pas actif: tenter base sans suffixe
-        if not _looks_active(yahoo):
-            alt = b_clean.upper()
-            pi2 = _yf_info(yf.Ticker(alt))
-            if _looks_active(alt):
-                yahoo, pi = alt, pi2
+    # profils Finnhub + infos Yahoo des candidats en parallèle (ordre conservé)
+    with ThreadPoolExecutor(max_workers=max(1, min(PEERS_WORKERS, len(peers_base) or 1))) as ex:
+        resolved = list(ex.map(_resolve_candidate, peers_base))
 
+    for yahoo, pi in resolved:
         if not pi or not _is_us_ca(pi):    # limiter à US/CA
             continue
         if not _has_useful_multiples(pi):  # éviter shells / données trop pauvres
@@ -327,7 +338,6 @@ def _map_and_validate(peers_base: List[str], my_info: Dict[str, Any]) -> List[Tu
         if yahoo not in seen_yahoo:
             seen_yahoo.add(yahoo)
             validated.append((yahoo, sc))
-            time.sleep(YF_SLEEP)
 
     validated.sort(key=lambda x: x[1], reverse=True)
     return validated
@@ -366,34 +376,20 @@ def get_peers_auto(user_input: str, min_peers: int = 5, max_peers: int = 15, log
     return peers
 
 def find_peers(ticker: str, k: int = 10):
-    """Fonction d'interface avec fallback corrélation Yahoo si pas d'API Finnhub"""
-    # Try Finnhub first
+    """Fonction d'interface : matrice de corrélation du peer engine (précalculée), puis Finnhub."""
+    # Peer engine: réponse en mémoire, identique dans toutes les apps
     try:
-        peers = get_peers_auto(ticker, min_peers=k, max_peers=k)
+        from analytics.peer_engine import peer_tickers
+        peers = peer_tickers(ticker, k=k)
         if peers:
             return peers
     except Exception as e:
-        logger.debug(f"Finnhub peers failed, trying correlation fallback: {e}")
+        logger.debug(f"Peer engine failed, trying Finnhub: {e}")
 
-    # Fallback: corrélation sur un univers réduit d'ETFs/large caps
     try:
-        universe = ["AAPL","MSFT","GOOGL","AMZN","META","NVDA","TSLA",
-                   "XOM","JNJ","JPM","V","MA","UNH","HD","PG","KO","PEP"]
-        if ticker not in universe:
-            universe.insert(0, ticker)
-
-        import pandas as pd
-        px = yf.download(universe, period="1y", interval="1d", auto_adjust=True)["Close"]
-        ret = px.pct_change().dropna()
-        if ticker not in ret.columns:
-            return []
-        corr = ret.corr()[ticker].drop(ticker).sort_values(ascending=False)
-        correlation_peers = corr.head(k).index.tolist()
-        logger.info(f"[{ticker}] Using correlation-based peers fallback: {correlation_peers}")
-        return correlation_peers
-
+        return get_peers_auto(ticker, min_peers=k, max_peers=k)
     except Exception as e:
-        logger.warning(f"Correlation peers fallback failed: {e}")
+        logger.warning(f"Finnhub peers failed: {e}")
         return []
 
 # ------------------------------------------------------------------------------
@@ -44,7 +44,9 @@ class RAGStore:
                 "date": item.get("published", ""),
                 "ticker": item.get("tickers", [])[0] if item.get("tickers") else "",
                 "score": item.get("score", 0),
-                "source": item.get("source", "")
+                "source": item.get("source", ""),
+                "cluster_id": item.get("cluster_id"),
+                "cluster_size": item.get("cluster_size", 1)
             },
             "indexed_at": datetime.utcnow().isoformat()
         }
@@ -1,13 +1,24 @@
 """
 Scoring Composite - Pilier central du copilote
 Combine macro(40) + technique(40) + news(20) pour produire signaux/risques/picks.
+
+Les trois piliers sont calculés en parallèle (et, dans chaque pilier, les séries FRED /
+tickers). Le brief est matérialisé en artefact versionné
+(data/brief/dt=YYYYMMDD/brief_<period>_<univers>.json) ; `get_brief` sert l'artefact
+et déclenche un rafraîchissement en arrière-plan quand il dépasse BRIEF_MAX_AGE_S.
 """
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, List, Any, Optional
 import pandas as pd
 
 # Imports des modules existants
 from core.market_data import get_fred_series, get_price_history
+from core.prompt_context import fingerprint
 from analytics.phase2_technical import compute_indicators, technical_signals
 from analytics.phase3_macro import get_us_macro_bundle
 from ingestion.finnews import run_pipeline as run_news_pipeline
@@ -28,6 +39,25 @@ MACRO_SERIES = {
     "UNRATE": "Unemployment",
 }
 
+MAX_WORKERS = int(os.getenv("BRIEF_WORKERS", "8"))
+BRIEF_DIR = Path("data/brief")
+BRIEF_MAX_AGE_S = int(os.getenv("BRIEF_MAX_AGE_S", "900"))
+DEFAULT_UNIVERSE = ["SPY", "QQQ", "AAPL", "MSFT", "NVDA"]
+
+
+def _fetch_all(fn, keys: List[str]) -> List[Any]:
+    """fn(key) pour chaque clé, en parallèle, résultats dans l'ordre des clés (None si erreur)."""
+    def _safe(k):
+        try:
+            return fn(k)
+        except Exception as e:
+            print(f"Erreur fetch {k}: {e}")
+            return None
+    if not keys:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(keys)))) as ex:
+        return list(ex.map(_safe, keys))
+
 
 # ============================================================================
 # SCORING MACRO
@@ -42,9 +72,9 @@ def score_macro() -> Dict[str, Any]:
     sources = []
     
     try:
-        # Récupérer séries clés
-        for series_id, name in MACRO_SERIES.items():
-            df = get_fred_series(series_id, start=None)
+        # Récupérer séries clés (en parallèle)
+        frames = _fetch_all(lambda sid: get_fred_series(sid, start=None), list(MACRO_SERIES))
+        for (series_id, name), df in zip(MACRO_SERIES.items(), frames):
             if df is None or df.empty:
                 continue
             
@@ -112,14 +142,15 @@ def score_technical(universe: List[str]) -> Dict[str, Any]:
     sources = []
     
     try:
-        for ticker in universe:
+        # Prix + indicateurs par ticker (en parallèle)
+        def _indicators(ticker: str):
             df = get_price_history(ticker, start=None, interval="1d")
             if df is None or df.empty:
-                continue
-            
-            # Calculer indicateurs
-            df_ind = compute_indicators(df)
-            if df_ind.empty:
+                return None
+            return compute_indicators(df)
+
+        for ticker, df_ind in zip(universe, _fetch_all(_indicators, list(universe))):
+            if df_ind is None or df_ind.empty:
                 continue
             
             last = df_ind.iloc[-1]
@@ -270,10 +301,12 @@ def compute_composite_brief(period: str = "weekly", universe: List[str] = None)
     
     window = "last_week" if period == "weekly" else "last_day"
     
-    # 1. Scorer chaque pilier
-    macro_result = score_macro()
-    tech_result = score_technical(universe)
-    news_result = score_news(universe, window)
+    # 1. Scorer chaque pilier (en parallèle)
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        f_macro = ex.submit(score_macro)
+        f_tech = ex.submit(score_technical, universe)
+        f_news = ex.submit(score_news, universe, window)
+        macro_result, tech_result, news_result = f_macro.result(), f_tech.result(), f_news.result()
     
     # 2. Score composite pondéré
     composite_score = (
@@ -321,3 +354,119 @@ def compute_composite_brief(period: str = "weekly", universe: List[str] = None)
         "period": period,
         "universe": universe
     }
+
+
+# ============================================================================
+# ARTEFACT VERSIONNÉ + SERVICE
+# ============================================================================
+_REFRESHING: Dict[str, threading.Thread] = {}
+_REFRESH_LOCK = threading.Lock()
+
+
+def _universe_key(universe: List[str]) -> str:
+    tickers = sorted({t.strip().upper() for t in universe if t and t.strip()})
+    key = "-".join(tickers)
+    return key if len(key) <= 60 else fingerprint(tickers)
+
+
+def _artifact_path(period: str, universe: List[str], dt: Optional[str] = None) -> Path:
+    dt = dt or datetime.utcnow().strftime("%Y%m%d")
+    return BRIEF_DIR / f"dt={dt}" / f"brief_{period}_{_universe_key(universe)}.json"
+
+
+def _latest_artifact(period: str, universe: List[str]) -> Optional[Dict[str, Any]]:
+    name = _artifact_path(period, universe).name
+    for part in sorted(BRIEF_DIR.glob("dt=*"), reverse=True):
+        p = part / name
+        if p.exists():
+            try:
+                return json.loads(p.read_text(encoding="utf-8"))
+            except Exception:
+                continue
+    return None
+
+
+def materialize_brief(period: str = "weekly", universe: List[str] = None) -> Dict[str, Any]:
+    """Calcule le brief et l'écrit (écriture atomique) ; `version` = hash du contenu."""
+    universe = universe or DEFAULT_UNIVERSE
+    brief = compute_composite_brief(period=period, universe=universe)
+    content = {k: v for k, v in brief.items() if k != "generated_at"}
+    brief["version"] = fingerprint(content)
+    prev = _latest_artifact(period, universe)
+    brief["revision"] = int((prev or {}).get("revision", 0)) + (0 if prev and prev.get("version") == brief["version"] else 1)
+    out = _artifact_path(period, universe)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    tmp.write_text(json.dumps(brief, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+    tmp.replace(out)
+    return brief
+
+
+def refresh_brief_async(period: str = "weekly", universe: List[str] = None) -> bool:
+    """Lance le recalcul en arrière-plan (un seul à la fois par brief). True si lancé."""
+    universe = universe or DEFAULT_UNIVERSE
+    key = f"{period}:{_universe_key(universe)}"
+    with _REFRESH_LOCK:
+        th = _REFRESHING.get(key)
+        if th is not None and th.is_alive():
+            return False
+
+        def _run():
+            try:
+                materialize_brief(period=period, universe=universe)
+            except Exception as e:
+                print(f"Erreur refresh brief {key}: {e}")
+
+        th = threading.Thread(target=_run, name=f"brief-{key}", daemon=True)
+        _REFRESHING[key] = th
+        th.start()
+        return True
+
+
+def get_brief(period: str = "weekly", universe: List[str] = None,
+              max_age_s: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Brief depuis l'artefact précalculé (réponse immédiate). Trop vieux -> servi tel quel
+    avec `stale=True` et rafraîchi en arrière-plan. Aucun artefact -> calcul synchrone.
+    """
+    universe = universe or DEFAULT_UNIVERSE
+    max_age_s = BRIEF_MAX_AGE_S if max_age_s is None else max_age_s
+    brief = _latest_artifact(period, universe)
+    if brief is None:
+        brief = materialize_brief(period=period, universe=universe)
+        brief["stale"] = False
+        return brief
+    try:
+        age = (datetime.utcnow() - datetime.fromisoformat(brief["generated_at"])).total_seconds()
+    except Exception:
+        age = float("inf")
+    brief["stale"] = age > max_age_s
+    if brief["stale"]:
+        refresh_brief_async(period=period, universe=universe)
+    return brief
+
+
+def build_brief(period: str = "weekly", universe: List[str] = None) -> Dict[str, Any]:
+    """Brief au format BriefResponse (src/api): {brief: {topSignals, topRisks, picks}, generatedAt, sources}."""
+    b = get_brief(period=period, universe=universe)
+
+    def _sig(x: Dict[str, Any]) -> Dict[str, Any]:
+        return {"label": x.get("pillar", ""), "value": float(x.get("weight", 0.0)), "reason": x.get("text", "")}
+
+    return {
+        "brief": {
+            "topSignals": [_sig(x) for x in b.get("top_signals", [])],
+            "topRisks": [_sig(x) for x in b.get("top_risks", [])],
+            "picks": [{"ticker": p.get("ticker", ""), "score": float(p.get("score", 0.0)),
+                       "rationale": p.get("rationale", "")} for p in b.get("picks", [])],
+        },
+        "generatedAt": b.get("generated_at", ""),
+        "sources": {"items": b.get("sources", []), "scores": b.get("scores", {}),
+                    "version": b.get("version"), "stale": b.get("stale", False)},
+    }
+
+
+def materialize_default() -> List[str]:
+    """Pré-calcul des briefs par défaut (daily + weekly) pour le pipeline quotidien."""
+    return [str(_artifact_path(p, DEFAULT_UNIVERSE)) for p in ("daily", "weekly")
+            if materialize_brief(period=p, universe=DEFAULT_UNIVERSE)]
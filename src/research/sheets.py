@@ -0,0 +1,318 @@
+"""
+Fiches ticker matérialisées (/api/tickers/{ticker}/sheet)
+
+Une fiche = prix (≈6 mois, tableaux parallèles t/o/h/l/c/v), derniers indicateurs,
+alertes, top news (passe news partagée, filtrée par ticker) et niveaux, calculée une
+fois et écrite en artefact compact (data/sheets/<TICKER>.json, écriture atomique)
+avec `version` = hash du contenu.
+
+- `materialize_watchlist()` précalcule toute la watchlist après chaque rafraîchissement
+  des données (étape "sheets" du pipeline quotidien).
+- `get_sheet(ticker)` sert l'artefact (une lecture de fichier, puis mémoire tant que le
+  fichier ne change pas) ; trop vieux -> servi avec `stale=True` et recalculé en
+  arrière-plan ; ticker inconnu -> calcul synchrone puis artefact.
+- `sheet_etag` / `etag_matches` : ETag (faible) dérivé de `version`, `generated_at` et
+  `stale` pour les 304.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, is_dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from core.columnar import OHLCV, frame_columns, json_bytes
+from core.prompt_context import fingerprint
+from core.tracing import span
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+SHEET_DIR = Path("data/sheets")
+SHEET_MAX_AGE_S = int(os.getenv("SHEET_MAX_AGE_S", "3600"))
+MAX_WORKERS = int(os.getenv("SHEET_WORKERS", "8"))
+PRICE_DAYS = 185          # ≈ period="6mo"
+NEWS_LIMIT = 5
+NEWS_REGIONS = ["US", "CA", "INTL"]
+
+
+# ============================================================================
+# CALCUL D'UNE FICHE
+# ============================================================================
+def _indicator_frame(df: pd.DataFrame) -> pd.DataFrame:
+    try:
+        from analytics.phase2_technical import compute_indicators
+        return compute_indicators(df)
+    except Exception:
+        from analytics.indicators_basic import compute_indicators as basic
+        return basic(df)
+
+
+def _last(df: pd.DataFrame, *cols: str) -> Optional[float]:
+    """Dernière valeur non-NaN de la première colonne présente."""
+    for c in cols:
+        if c in df.columns:
+            s = pd.to_numeric(df[c], errors="coerce").dropna()
+            return float(s.iloc[-1]) if len(s) else None
+    return None
+
+
+def _news_item(it: Any) -> Dict[str, Any]:
+    from ingestion.finnews import item_score
+
+    if not isinstance(it, dict):
+        it = {**asdict(it), "url": getattr(it, "link", None), "lang": getattr(it, "language", None)} \
+            if is_dataclass(it) else dict(getattr(it, "__dict__", {}))
+    return {
+        "id": it.get("id") or it.get("hash") or it.get("url") or it.get("link") or "",
+        "title": it.get("title") or "",
+        "url": it.get("url") or it.get("link") or "",
+        "source": it.get("source") or "",
+        "published": str(it.get("published") or ""),
+        "score": item_score(it),
+        "tickers": it.get("tickers") or None,
+        "lang": it.get("lang") or None,
+    }
+
+
+def _shared_news() -> Optional[List[Any]]:
+    """Une passe news (cache finnews ou un seul run_pipeline) pour toutes les fiches ; None si échec."""
+    try:
+        from ingestion.finnews import shared_items
+        return shared_items(NEWS_REGIONS, window="last_week")
+    except Exception as e:
+        print(f"Erreur news partagées: {e}")
+        return None
+
+
+def _top_news(ticker: str, news: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+    """News du ticker filtrées dans la passe partagée `news` (chargée si absente)."""
+    try:
+        from ingestion.finnews import select_for_ticker
+        news = _shared_news() if news is None else news
+        return [_news_item(it) for it in select_for_ticker(news or [], ticker, limit=NEWS_LIMIT)]
+    except Exception:
+        return []
+
+
+def _perf(close: pd.Series, n: int) -> Optional[float]:
+    return float((close.iloc[-1] / close.iloc[-n] - 1) * 100) if len(close) >= n else None
+
+
+def compute_sheet(ticker: str, news: Optional[List[Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Calcule la fiche (prix + indicateurs + alertes + news + niveaux) ; None sans historique.
+    `news` : passe news partagée (_shared_news), sinon chargée pour ce seul appel.
+    """
+    from core.market_data import get_price_history
+    from research.alerts import alerts_for_ticker
+
+    ticker = ticker.strip().upper()
+    start = (datetime.utcnow().date() - timedelta(days=PRICE_DAYS)).isoformat()
+    with span("sheets.compute", ticker=ticker) as sp:
+        df = get_price_history(ticker, start=start, interval="1d")
+        if df is None or df.empty or "Close" not in df.columns:
+            return None
+        sp.add_rows(len(df))
+        ind = _indicator_frame(df)
+        news = _top_news(ticker, news)
+
+        indicators = {
+            "rsi": _last(ind, "RSI_14", "RSI", "rsi"),
+            "sma_20": _last(ind, "SMA_20", "sma20"),
+            "sma_50": _last(ind, "SMA_50", "sma50"),
+            "macd": _last(ind, "MACD", "macd"),
+            "macd_signal": _last(ind, "MACD_Signal", "macd_signal"),
+        }
+        close = pd.to_numeric(df["Close"], errors="coerce").dropna()
+        levels = {
+            "last_close": float(close.iloc[-1]) if len(close) else None,
+            "sma_20": indicators["sma_20"],
+            "sma_50": indicators["sma_50"],
+            "rsi": indicators["rsi"],
+            "perf_1w": _perf(close, 5),
+            "perf_1m": _perf(close, 21),
+        }
+        # research.alerts lit les colonnes rsi / sma20 / macd
+        alert_ind = pd.DataFrame({"rsi": ind.get("RSI_14", ind.get("rsi")),
+                                  "sma20": ind.get("SMA_20", ind.get("sma20")),
+                                  "macd": ind.get("MACD", ind.get("macd"))}, index=ind.index)
+        news_score = max((n["score"] for n in news), default=None)
+        try:
+            alerts = alerts_for_ticker(df, alert_ind, news_score, ticker)
+        except Exception:
+            alerts = []
+
+        prices = frame_columns(df, OHLCV)
+        return {
+            "ticker": ticker,
+            "period": "6mo",
+            "interval": "1d",
+            "prices": {k: v if isinstance(v, list) else [None if x != x else x for x in v.tolist()]
+                       for k, v in prices.items()},
+            "indicators": indicators,
+            "levels": levels,
+            "alerts": alerts,
+            "news_top": news,
+            "source": "yfinance",
+        }
+
+
+# ============================================================================
+# ARTEFACT VERSIONNÉ + SERVICE
+# ============================================================================
+_MEMO: Dict[str, Tuple[int, Dict[str, Any]]] = {}   # chemin -> (mtime_ns, fiche)
+_MEMO_LOCK = threading.Lock()
+_REFRESHING: Dict[str, threading.Thread] = {}
+_REFRESH_LOCK = threading.Lock()
+
+
+def _sheet_path(ticker: str) -> Path:
+    safe = ticker.strip().upper().replace("/", "_").replace("\\", "_")
+    return SHEET_DIR / f"{safe}.json"
+
+
+def load_sheet(ticker: str) -> Optional[Dict[str, Any]]:
+    """Fiche matérialisée (None si absente). Relue seulement si le fichier a changé."""
+    p = _sheet_path(ticker)
+    try:
+        mtime = p.stat().st_mtime_ns
+    except OSError:
+        return None
+    key = str(p)
+    with _MEMO_LOCK:
+        hit = _MEMO.get(key)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    try:
+        sheet = json.loads(p.read_bytes())
+    except Exception:
+        return None
+    with _MEMO_LOCK:
+        _MEMO[key] = (mtime, sheet)
+    return sheet
+
+
+def materialize_sheet(ticker: str, news: Optional[List[Any]] = None) -> Optional[Dict[str, Any]]:
+    """Calcule la fiche et l'écrit (écriture atomique) ; `version` = hash du contenu."""
+    sheet = compute_sheet(ticker, news)
+    if sheet is None:
+        return None
+    sheet["version"] = fingerprint(sheet)
+    prev = load_sheet(ticker)
+    sheet["revision"] = int((prev or {}).get("revision", 0)) + (0 if prev and prev.get("version") == sheet["version"] else 1)
+    sheet["generated_at"] = datetime.utcnow().isoformat()
+    out = _sheet_path(ticker)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(f".{threading.get_ident()}.tmp")
+    tmp.write_bytes(json_bytes(sheet))
+    tmp.replace(out)
+    return sheet
+
+
+def refresh_sheet_async(ticker: str) -> bool:
+    """Lance le recalcul en arrière-plan (un seul à la fois par ticker). True si lancé."""
+    key = ticker.strip().upper()
+    with _REFRESH_LOCK:
+        th = _REFRESHING.get(key)
+        if th is not None and th.is_alive():
+            return False
+
+        def _run():
+            try:
+                materialize_sheet(key)
+            except Exception as e:
+                print(f"Erreur refresh fiche {key}: {e}")
+
+        th = threading.Thread(target=_run, name=f"sheet-{key}", daemon=True)
+        _REFRESHING[key] = th
+        th.start()
+        return True
+
+
+def get_sheet(ticker: str, max_age_s: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Fiche depuis l'artefact précalculé (réponse immédiate). Trop vieille -> servie telle
+    quelle avec `stale=True` et rafraîchie en arrière-plan. Inconnue -> calcul synchrone.
+    La fiche renvoyée est partagée : ne pas la modifier.
+    """
+    max_age_s = SHEET_MAX_AGE_S if max_age_s is None else max_age_s
+    sheet = load_sheet(ticker)
+    if sheet is None:
+        sheet = materialize_sheet(ticker)
+        return None if sheet is None else {**sheet, "stale": False}
+    try:
+        age = (datetime.utcnow() - datetime.fromisoformat(sheet["generated_at"])).total_seconds()
+    except Exception:
+        age = float("inf")
+    stale = age > max_age_s
+    if stale:
+        refresh_sheet_async(ticker)
+    return {**sheet, "stale": stale}
+
+
+def sheet_etag(sheet: Dict[str, Any], variant: str = "") -> str:
+    """
+    ETag faible : `version` (contenu) + `generated_at` et `stale`, renvoyés eux aussi dans
+    le corps — un recalcul au contenu identique ou un passage à `stale` invalide le cache.
+    """
+    state = fingerprint(sheet.get("generated_at"), bool(sheet.get("stale")))[:8]
+    return f'W/"{sheet.get("version", "")}.{state}{("-" + variant) if variant else ""}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible (RFC 9110) d'un en-tête If-None-Match avec `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    strip = (lambda t: t.strip()[2:] if t.strip().startswith("W/") else t.strip())
+    return strip(etag) in {strip(t) for t in if_none_match.split(",")}
+
+
+# ============================================================================
+# PRÉCALCUL DE LA WATCHLIST
+# ============================================================================
+def materialize_watchlist(tickers: Optional[List[str]] = None) -> List[str]:
+    """
+    Précalcule les fiches de la watchlist en parallèle (une seule passe news, filtrée par
+    ticker) ; renvoie les artefacts écrits.
+    """
+    if tickers is None:
+        from analytics.peer_engine import load_watchlist
+        tickers = load_watchlist()
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+
+    news = (_shared_news() or []) if tickers else None   # échec: pas de relance par ticker
+
+    def _safe(t: str) -> Optional[str]:
+        try:
+            return str(_sheet_path(t)) if materialize_sheet(t, news) is not None else None
+        except Exception as e:
+            print(f"Erreur fiche {t}: {e}")
+            return None
+
+    with span("sheets.materialize_watchlist", tickers=len(tickers)):
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(tickers) or 1))) as ex:
+            return [p for p in ex.map(_safe, tickers) if p]
+
+
+def main() -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Précalcul des fiches ticker (data/sheets)")
+    ap.add_argument("tickers", nargs="*", help="Tickers (défaut: watchlist)")
+    args = ap.parse_args()
+    paths = materialize_watchlist(args.tickers or None)
+    print(json.dumps({"written": paths}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Sparse TextRank summarizer shared by the news pipeline.
+
+- Sentences are turned into hashed term-frequency rows (hashing-vectorizer style):
+  no vocabulary is built, columns are `crc32(token) % N_FEATURES`.
+- Cosine similarity is computed with a sparse product (scipy.sparse when available,
+  otherwise a compact per-document matrix), and centrality is PageRank solved by
+  power iteration.
+- `summarize_batch` handles many documents in one pass: each document gets its own
+  column block, so the similarity matrix is block-diagonal and every document's
+  PageRank is iterated simultaneously.
+
+Used by analytics.phase4_sentiment.summarize_textrank, research.nlp_enrich.summarize
+and ingestion.finnews._summarize.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from typing import List, Sequence, Union
+
+import numpy as np
+
+try:
+    from scipy import sparse as _sp  # type: ignore
+except Exception:  # optional dependency
+    _sp = None
+
+N_FEATURES = 1 << 16
+DAMPING = 0.85
+MAX_ITER = 50
+TOL = 1e-6
+
+_TOKEN_RE = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+_SENT_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENT_RE.split(text or "") if s and s.strip()]
+
+
+def _hash_tokens(sentence: str) -> List[int]:
+    return [zlib.crc32(t.encode("utf-8")) % N_FEATURES for t in _TOKEN_RE.findall(sentence.lower())]
+
+
+def _coo(docs: Sequence[Sequence[str]]):
+    """Hashed TF triplets for all sentences of all docs (columns offset per doc)."""
+    rows: List[int] = []
+    cols: List[int] = []
+    doc_of_row: List[int] = []
+    r = 0
+    for d, sents in enumerate(docs):
+        off = d * N_FEATURES
+        for s in sents:
+            for h in _hash_tokens(s):
+                rows.append(r)
+                cols.append(off + h)
+            doc_of_row.append(d)
+            r += 1
+    return (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64),
+            np.asarray(doc_of_row, dtype=np.int64), r)
+
+
+def _similarity(rows: np.ndarray, cols: np.ndarray, n_rows: int, n_docs: int):
+    """Cosine similarity (zero diagonal) of L2-normalised hashed TF rows."""
+    vals = np.ones(len(rows), dtype=np.float64)
+    # compact the (doc-offset) hashed columns to the buckets actually present
+    uniq, inv = np.unique(cols, return_inverse=True)
+    if _sp is not None:
+        M = _sp.csr_matrix((vals, (rows, inv)), shape=(n_rows, max(1, len(uniq))))
+        M.sum_duplicates()
+        norms = np.sqrt(np.asarray(M.multiply(M).sum(axis=1)).ravel()) + 1e-9
+        M = _sp.diags(1.0 / norms) @ M
+        S = (M @ M.T).tocsr()
+        S.setdiag(0.0)
+        S.eliminate_zeros()
+        return S
+    # Fallback: dense matrix on the compacted columns (single document)
+    M = np.zeros((n_rows, len(uniq)))
+    np.add.at(M, (rows, inv), 1.0)
+    M /= np.linalg.norm(M, axis=1, keepdims=True) + 1e-9
+    S = M @ M.T
+    np.fill_diagonal(S, 0.0)
+    return S
+
+
+def _pagerank(S, doc_of_row: np.ndarray, n_docs: int) -> np.ndarray:
+    """Power-iteration PageRank, independent per document block."""
+    sizes = np.bincount(doc_of_row, minlength=n_docs).astype(float)
+    teleport = 1.0 / sizes[doc_of_row]
+    out_w = np.asarray(S.sum(axis=1)).ravel()
+    dangling = out_w <= 0
+    inv_out = np.where(dangling, 0.0, 1.0 / np.where(dangling, 1.0, out_w))
+    r = teleport.copy()
+    for _ in range(MAX_ITER):
+        flow = S.T @ (r * inv_out)
+        # dangling sentences spread their mass uniformly within their document
+        leak = np.bincount(doc_of_row, weights=r * dangling, minlength=n_docs)[doc_of_row] * teleport
+        nr = (1.0 - DAMPING) * teleport + DAMPING * (np.asarray(flow).ravel() + leak)
+        if np.abs(nr - r).sum() < TOL * max(1, n_docs):
+            r = nr
+            break
+        r = nr
+    return r
+
+
+def rank_sentences_batch(docs: Sequence[Sequence[str]]) -> List[np.ndarray]:
+    """TextRank scores for each sentence of each document (sum to 1 per doc)."""
+    docs = [[s for s in d if s and s.strip()] for d in docs]
+    if _sp is None and len(docs) > 1:
+        # dense fallback: one document at a time to keep matrices small
+        return [rank_sentences_batch([d])[0] for d in docs]
+    rows, cols, doc_of_row, n_rows = _coo(docs)
+    if n_rows == 0:
+        return [np.zeros(0) for _ in docs]
+    S = _similarity(rows, cols, n_rows, len(docs))
+    r = _pagerank(S, doc_of_row, len(docs))
+    bounds = np.cumsum([0] + [len(d) for d in docs])
+    return [r[bounds[i]:bounds[i + 1]] for i in range(len(docs))]
+
+
+def rank_sentences(sentences: Sequence[str]) -> np.ndarray:
+    return rank_sentences_batch([sentences])[0]
+
+
+def _pick(sents: List[str], scores: np.ndarray, k: int) -> str:
+    if len(sents) <= k:
+        return " ".join(sents)
+    idx = np.argsort(-scores, kind="stable")[:k]
+    return " ".join(sents[i] for i in sorted(idx.tolist()))
+
+
+def summarize_batch(docs: Sequence[Union[str, Sequence[str]]], k: int = 3) -> List[str]:
+    """Summarize many documents at once (text or pre-split sentences) to k sentences each."""
+    sent_lists = [
+        split_sentences(d) if isinstance(d, str) else [s.strip() for s in d if s and s.strip()]
+        for d in docs
+    ]
+    todo = [i for i, s in enumerate(sent_lists) if len(s) > k]
+    out = [" ".join(s) for s in sent_lists]
+    if todo:
+        scores = rank_sentences_batch([sent_lists[i] for i in todo])
+        for i, sc in zip(todo, scores):
+            out[i] = _pick(sent_lists[i], sc, k)
+    return out
+
+
+def summarize(text: Union[str, Sequence[str]], k: int = 3) -> str:
+    return summarize_batch([text], k=k)[0]
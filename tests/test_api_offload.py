@@ -0,0 +1,118 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT)]
+
+import api.main as api
+
+
+class _Slow:
+    """Blocking callable released by `go`; counts its calls."""
+
+    def __init__(self, result="ok"):
+        self.calls = 0
+        self.go = threading.Event()
+        self.result = result
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        self.go.wait(5)
+        return (self.result, args, kwargs)
+
+
+def test_single_flight_shares_one_call():
+    fn = _Slow()
+
+    async def scenario():
+        waiters = [asyncio.ensure_future(api.offload(("k", 1), fn, 1, x=2)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        assert ("k", 1) in api._INFLIGHT
+        fn.go.set()
+        results = await asyncio.gather(*waiters)
+        await asyncio.sleep(0)  # done callbacks
+        return results
+
+    results = asyncio.run(scenario())
+    assert fn.calls == 1
+    assert all(r == ("ok", (1,), {"x": 2}) for r in results)
+    assert ("k", 1) not in api._INFLIGHT
+    # finished: the next call computes again
+    asyncio.run(api.offload(("k", 1), fn))
+    assert fn.calls == 2
+
+
+def test_no_key_means_no_sharing():
+    fn = _Slow()
+    fn.go.set()
+
+    async def scenario():
+        await asyncio.gather(*(api.offload(None, fn) for _ in range(3)))
+
+    asyncio.run(scenario())
+    assert fn.calls == 3
+
+
+def test_deadline_times_out_but_late_request_joins_the_computation():
+    fn = _Slow()
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await api.offload_until(("late",), 0.05, fn)
+        assert ("late",) in api._INFLIGHT      # still running in the pool
+        joined = asyncio.ensure_future(api.offload_until(("late",), 5, fn))
+        await asyncio.sleep(0.05)
+        fn.go.set()
+        return await joined
+
+    assert asyncio.run(scenario())[0] == "ok"
+    assert fn.calls == 1
+
+
+def test_gather_until_returns_ready_results_and_late_keys():
+    slow = _Slow()
+
+    def boom():
+        raise ValueError("nope")
+
+    async def scenario():
+        res = await api.gather_until({
+            "fast": api.offload(None, lambda: 42),
+            "err": api.offload(None, boom),
+            "slow": api.offload(None, slow),
+        }, deadline=0.2)
+        slow.go.set()
+        return res
+
+    results, late = asyncio.run(scenario())
+    assert results["fast"] == 42
+    assert isinstance(results["err"], ValueError)
+    assert late == ["slow"]
+
+
+def test_brief_route_deadline_and_default_universe(monkeypatch):
+    seen = []
+
+    def fake_brief(period="weekly", universe=None):
+        seen.append(universe)
+        if period == "daily":
+            time.sleep(0.5)
+        return {"top_signals": [], "top_risks": [], "picks": [], "sources": [],
+                "universe": ["SPY", "QQQ", "AAPL", "MSFT", "NVDA"], "version": "v"}
+
+    monkeypatch.setattr(api, "get_brief", fake_brief)
+    monkeypatch.setitem(api.ROUTE_DEADLINES, "brief", 0.1)
+    client = TestClient(api.app)
+
+    body = client.get("/api/brief").json()
+    assert body["ok"] and seen[-1] is None           # route default -> scoring.DEFAULT_UNIVERSE
+    assert body["data"]["universe"] == ["SPY", "QQQ", "AAPL", "MSFT", "NVDA"]
+
+    body = client.get("/api/brief", params={"period": "daily"}).json()
+    assert body == {"ok": False, "error": "timeout", "pending": ["brief"]}
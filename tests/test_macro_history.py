@@ -0,0 +1,87 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT)]
+
+from agents import macro_regime_agent as M
+from agents import recession_agent as R
+
+
+def _series(rng, freq, n, base, scale):
+    idx = pd.date_range("2010-01-01", periods=n, freq=freq)
+    return pd.DataFrame({"value": base + np.cumsum(rng.normal(0, scale, n))}, index=idx)
+
+
+@pytest.fixture(scope="module")
+def frames():
+    rng = np.random.default_rng(0)
+    daily = 3900
+    return {
+        "cpi": _series(rng, "MS", 180, 200, 1), "gdp": _series(rng, "QS", 60, 100, 1),
+        "d10": _series(rng, "B", daily, 3, 0.05), "d2": _series(rng, "B", daily, 2.5, 0.05),
+        "un": _series(rng, "MS", 180, 5, 0.2), "t10yie": _series(rng, "B", daily, 2, 0.02),
+        "nfci": _series(rng, "W-FRI", 780, 0, 0.05), "hy": _series(rng, "B", daily, 4, 0.05),
+    }
+
+
+def _upto(frames, date):
+    return {k: v[v.index <= date] for k, v in frames.items()}
+
+
+def test_regime_history_matches_scalar_classifier(frames):
+    hist = M.regime_history(frames)
+    for date in hist.index[-36:]:
+        f = _upto(frames, date)
+        ind = {
+            "cpi_yoy": M._yoy(f["cpi"].iloc[:, 0]),
+            "gdp_yoy": M._yoy(f["gdp"].iloc[:, 0]),
+            "yield_curve_bp": float((f["d10"].iloc[-1, 0] - f["d2"].iloc[-1, 0]) * 100.0),
+            "unrate_ch_6m": M._ch_6m(f["un"].iloc[:, 0]),
+        }
+        probs = M.classify_regime(ind)
+        for k in M.REGIMES:
+            assert hist.loc[date, k] == pytest.approx(probs[k], abs=1e-9)
+        assert hist.loc[date, "regime"] == max(M.REGIMES, key=lambda r: (hist.loc[date, r], -M.REGIMES.index(r)))
+
+
+def test_recession_history_matches_scalar_rules(frames):
+    hist = R.recession_history(frames)
+    clip = (lambda x: max(0.0, min(1.0, x)))
+    for date in hist.index[-36:]:
+        f = _upto(frames, date)
+        scores = [clip(-(f["d10"].iloc[-1, 0] - f["d2"].iloc[-1, 0])),
+                  clip(R._ch_6m(f["un"].iloc[:, 0])),
+                  clip((f["nfci"].iloc[-1, 0] + 0.1) / 0.6),
+                  clip((f["hy"].iloc[-1, 0] - 2.5) / 7.5)]
+        prob = round(R._sigmoid(2.0 * (sum(scores) / 4 - 0.5)), 3)
+        assert hist.loc[date, "recession_prob"] == pytest.approx(prob, abs=1e-9)
+
+
+@pytest.mark.parametrize("agent,full", [(M, M.regime_history), (R, R.recession_history)])
+def test_incremental_update_equals_full_rebuild(frames, tmp_path, monkeypatch, agent, full):
+    monkeypatch.setattr(agent, "HISTORY_DIR", tmp_path)
+    first = agent.update_history(_upto(frames, pd.Timestamp("2020-06-15")))
+    assert first.index.max() == pd.Timestamp("2020-06-30")
+    assert len(list(tmp_path.glob("dt=*/*.parquet"))) == 1
+
+    inc = agent.update_history(frames)
+    pd.testing.assert_frame_equal(inc, full(frames), check_freq=False)
+
+
+def test_regime_json_written_when_history_fails(frames, tmp_path, monkeypatch):
+    import src.core.market_data as market_data
+
+    ids = {sid: key for key, sid in M.SERIES.items()}
+    monkeypatch.setattr(market_data, "get_fred_series", lambda sid, *a, **kw: frames[ids[sid]])
+    monkeypatch.setattr(M, "update_history", lambda f: (_ for _ in ()).throw(OSError("disk full")))
+    monkeypatch.chdir(tmp_path)
+
+    out = json.loads(M.run().read_text(encoding="utf-8"))
+    assert set(out["probs"]) == set(M.REGIMES)
+    assert out["indicators"]["yield_curve_bp"] is not None
@@ -0,0 +1,112 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from core.feature_store import FeatureTable
+from ingestion import finnews
+from research import materialize
+
+
+def _item(i: int, tk: str) -> finnews.NewsItem:
+    return finnews.NewsItem(
+        id=f"{tk}-{i}", source="https://example.com/rss", title=f"{tk} news {i}",
+        link=f"https://example.com/{tk}/{i}", published="2024-06-28T12:00:00Z",
+        summary="", tickers=[tk], importance=0.5, freshness=0.8, relevance=0.0,
+    )
+
+
+def _frame(symbols, dates, start=0.0):
+    rows = [{"symbol": s, "date": d, "close": start + k} for s in symbols for k, d in enumerate(dates)]
+    return pd.DataFrame(rows)
+
+
+# ---------------------------------------------------------------- FeatureTable
+def test_append_keeps_only_rows_past_watermark(tmp_path):
+    t = FeatureTable("t", {"close": pa.float64()}, root=tmp_path)
+    d1 = pd.bdate_range("2024-01-01", periods=5)
+    assert t.append(_frame(["aapl", "MSFT"], d1)) == 10
+    assert t.watermarks() == {"AAPL": d1[-1].date(), "MSFT": d1[-1].date()}
+
+    # overlap with the stored history: only the new dates (and the new symbol) are written
+    d2 = pd.bdate_range("2024-01-03", periods=5)
+    assert t.append(_frame(["AAPL", "NVDA"], d2, start=100)) == 2 + 5
+    assert t.append(_frame(["AAPL", "NVDA"], d2, start=100)) == 0
+    df = t.read()
+    assert len(df) == 17
+    assert not df.duplicated(["symbol", "date"]).any()
+    assert t.info()["rows"] == 17 and t.info()["segments"] == 2
+
+
+def test_as_of_is_point_in_time(tmp_path):
+    t = FeatureTable("t", {"close": pa.float64()}, root=tmp_path)
+    dates = pd.bdate_range("2024-01-01", periods=10)
+    t.append(_frame(["AAPL", "MSFT"], dates))
+    t.append(_frame(["NVDA"], dates[:3]))
+
+    snap = t.as_of(dates[4]).set_index("symbol")
+    assert snap.loc["AAPL", "date"] == dates[4]
+    assert snap.loc["AAPL", "close"] == 4.0
+    assert snap.loc["NVDA", "date"] == dates[2]   # last row at or before the date
+    # stale symbols are dropped by max_age_days
+    recent = t.as_of(dates[9], max_age_days=3)
+    assert sorted(recent["symbol"].astype(str)) == ["AAPL", "MSFT"]
+    assert t.as_of(dates[0] - pd.Timedelta(days=1)).empty
+
+
+def test_compact_preserves_rows_and_order(tmp_path):
+    t = FeatureTable("t", {"close": pa.float64()}, root=tmp_path)
+    for k, d in enumerate(pd.bdate_range("2024-01-01", periods=6)):
+        t.append(_frame(["MSFT", "AAPL"], [d], start=k))
+    before = t.read()
+    assert t.compact() == 12
+    assert len(t.segments()) == 1
+    pd.testing.assert_frame_equal(t.read(), before)
+
+
+def test_schema_mismatch_is_rejected(tmp_path):
+    FeatureTable("t", {"close": pa.float64()}, root=tmp_path).append(_frame(["AAPL"], ["2024-01-02"]))
+    with pytest.raises(ValueError):
+        FeatureTable("t", {"close": pa.float32()}, root=tmp_path).watermarks()
+
+
+# ---------------------------------------------------------------- news features
+def test_news_features_one_shared_pass(tmp_path, monkeypatch):
+    monkeypatch.setattr(materialize, "NEWS", FeatureTable(materialize.NEWS.name, {
+        "news_score_mean": materialize.NEWS.schema.field("news_score_mean").type,
+        "news_count": materialize.NEWS.schema.field("news_count").type,
+    }, root=tmp_path))
+    calls = []
+
+    def fake_pipeline(**kw):
+        calls.append(kw)
+        return [_item(i, tk) for tk in ("AAPL", "MSFT") for i in range(1, 4)]
+
+    monkeypatch.setattr(finnews, "run_pipeline", fake_pipeline)
+    monkeypatch.setattr(finnews, "search_cached", lambda **kw: None)
+
+    universe = ["AAPL", "MSFT", "NVDA"]
+    assert materialize.materialize_news_features(universe) == len(universe)
+    assert len(calls) == 1 and calls[0].get("tgt_ticker") is None
+    # idempotent on the day
+    assert materialize.materialize_news_features(universe) == 0
+    assert len(calls) == 1
+
+    df = materialize.NEWS.read().set_index("symbol")
+    assert sorted(df.index.astype(str)) == universe
+    assert df.loc["AAPL", "news_count"] == 3 and df.loc["NVDA", "news_count"] == 0
+    # importance * freshness + relevance rescored for the ticker: 0.4 + 0.15
+    assert df.loc["AAPL", "news_score_mean"] == pytest.approx(0.55)
+
+
+def test_news_features_skip_day_on_empty_pass(tmp_path, monkeypatch):
+    monkeypatch.setattr(materialize, "NEWS", FeatureTable(materialize.NEWS.name, {
+        "news_score_mean": pa.float64(), "news_count": pa.int32()}, root=tmp_path))
+    monkeypatch.setattr(finnews, "run_pipeline", lambda **kw: [])
+    monkeypatch.setattr(finnews, "search_cached", lambda **kw: None)
+    assert materialize.materialize_news_features(["AAPL"]) == 0
+    assert materialize.NEWS.watermarks() == {}
@@ -0,0 +1,27 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from ingestion.news_clusters import StoryClusterer
+
+
+def test_near_duplicates_share_a_cluster():
+    sc = StoryClusterer()
+    a = sc.add("a", "Fed holds rates steady as inflation cools in September", source="x")
+    b = sc.add("b", "Fed holds rates steady as inflation cools in September report", source="y")
+    c = sc.add("c", "Oil prices jump after OPEC announces deeper production cuts", source="x")
+    assert a == b != c
+    assert sc.cluster(a).size == 2
+
+
+def test_eviction_purges_band_buckets():
+    rng = random.Random(0)
+    words = [f"w{k}" for k in range(500)]
+    sc = StoryClusterer(max_clusters=20)
+    for i in range(200):
+        sc.add(f"id{i}", " ".join(rng.sample(words, 10)))
+    assert 10 < len(sc.clusters) <= 20
+    indexed = {cid for ids in sc._buckets.values() for cid in ids}
+    assert indexed <= set(sc.clusters)
@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from analytics import peer_engine as P
+
+
+def _with_gaps(rng, a: np.ndarray, frac: float = 0.15) -> np.ndarray:
+    a = a.copy()
+    a[rng.random(a.shape) < frac] = np.nan
+    return a
+
+
+@pytest.mark.parametrize("min_obs", [2, 60])
+def test_pairwise_corr_matches_pandas_pairwise_complete(min_obs):
+    rng = np.random.default_rng(0)
+    x = _with_gaps(rng, rng.normal(size=(120, 6)))
+    x[:, 1] = x[:, 0] * 0.8 + rng.normal(scale=0.3, size=120)   # correlated pair
+    x[:70, 4] = np.nan                                          # short history: 50 obs
+    x[:, 5] = 1.0                                               # constant: no variance
+    y = _with_gaps(rng, rng.normal(size=(120, 3)))
+
+    both = pd.DataFrame(np.hstack([x, y]))
+    ref = both.corr(min_periods=max(2, min_obs)).to_numpy()[:6, 6:]
+    got = P.pairwise_corr(x, y, min_obs=min_obs)
+    np.testing.assert_allclose(got, ref, atol=1e-10, equal_nan=True)
+
+    sq = P.pairwise_corr(x, x, min_obs=min_obs)
+    np.testing.assert_allclose(sq, pd.DataFrame(x).corr(min_periods=max(2, min_obs)).to_numpy(),
+                               atol=1e-10, equal_nan=True)
+    assert np.isnan(sq[4, 0]) == (min_obs > 50)
+    assert np.isnan(sq[5]).all()
+
+
+@pytest.fixture
+def closes():
+    """Synthetic closes: BBB tracks AAA, CCC is noisier, DDD independent, EEE too short."""
+    rng = np.random.default_rng(1)
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=300)
+    base = rng.normal(0, 0.01, len(idx))
+    rets = {
+        "AAA": base,
+        "BBB": base + rng.normal(0, 0.003, len(idx)),
+        "CCC": base + rng.normal(0, 0.01, len(idx)),
+        "DDD": rng.normal(0, 0.01, len(idx)),
+        "EEE": rng.normal(0, 0.01, len(idx)),
+    }
+    px = pd.DataFrame({t: 100 * np.exp(np.cumsum(r)) for t, r in rets.items()}, index=idx)
+    px.loc[px.index[::7], "CCC"] = np.nan      # holes: its own trading calendar
+    px.loc[px.index[:-40], "EEE"] = np.nan     # less than MIN_OBS returns
+    return px
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch, closes):
+    calls = []
+
+    def fake_panel(tickers, start, loader=None, **kw):
+        calls.append(list(tickers))
+        return closes[[t for t in tickers if t in closes.columns]]
+
+    monkeypatch.setattr(P, "load_close_panel", fake_panel)
+    eng = P.PeerEngine(root=tmp_path)
+    eng.calls = calls
+    return eng
+
+
+def test_add_extends_matrix_like_full_recompute(engine):
+    assert engine.add(["aaa", "BBB", "DDD"]) == ["AAA", "BBB", "DDD"]
+    assert engine.add(["CCC", "EEE", "AAA"]) == ["CCC", "EEE"]
+    assert engine.calls[-1] == ["CCC", "EEE"]           # only the new columns are fetched
+    assert engine.add(["BBB"]) == []
+
+    extended = engine.corr.copy()
+    engine._recompute()
+    pd.testing.assert_frame_equal(extended, engine.corr, atol=1e-12)
+    assert np.allclose(np.diag(extended.drop(index="EEE", columns="EEE")), 1.0)
+
+    # persisted and reloaded by a fresh engine on the same root
+    other = P.PeerEngine(root=engine.root)
+    other._load()
+    assert list(other.corr.columns) == list(extended.columns)
+    np.testing.assert_allclose(other.corr.to_numpy(), extended.to_numpy(), atol=1e-6, equal_nan=True)
+
+
+def test_top_peers_orders_by_correlation(engine):
+    engine.add(["AAA", "BBB", "CCC", "DDD", "EEE"])
+    peers = engine.top_peers("aaa", k=10)
+    assert list(peers.columns) == ["ticker", "corr", "sector", "industry"]
+    # EEE has fewer than MIN_OBS common returns: NaN, left out
+    assert peers["ticker"].tolist() == ["BBB", "CCC", "DDD"]
+    assert peers["corr"].is_monotonic_decreasing
+    assert engine.peer_tickers("AAA", k=1) == ["BBB"]
+    assert engine.peer_tickers("AAA", candidates=["DDD", "CCC", "AAA"]) == ["CCC", "DDD"]
+
+
+def test_top_peers_adds_unknown_ticker(engine):
+    engine.add(["AAA", "DDD"])
+    assert engine.peer_tickers("BBB", k=1) == ["AAA"]
+    assert "BBB" in engine.corr.columns
+    assert engine.top_peers("ZZZ").empty
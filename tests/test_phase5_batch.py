@@ -0,0 +1,116 @@
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from analytics import phase5_fusion as F
+
+MACRO = {"regime": {"label": "Goldilocks", "zscore": 0.7},
+         "factor_tailwinds": {"rates": 0.4, "usd": 0.3}, "sector_fit": 0.1}
+
+
+@pytest.fixture
+def phases(monkeypatch):
+    # les fuse_* scalaires ne lisent les payloads que si la phase est importée
+    for name in ("HAS_P2", "HAS_P3", "HAS_P4"):
+        monkeypatch.setattr(F, name, True)
+
+
+def _random_case(rng: random.Random, i: int):
+    """Une ligne batch + les payloads run_fusion équivalents."""
+    row, p2, p4 = {}, None, None
+    if rng.random() < 0.8:
+        pick = (lambda keys: {k: rng.uniform(-10, 110) for k in keys if rng.random() < 0.7})
+        ratios = pick(["net_margin_pct", "roe_pct", "roa_pct", "eps_cagr_3y_pct", "rev_cagr_3y_pct"])
+        peers = pick(["pe_rel_sector_pct", "ev_ebitda_rel_sector_pct", "psales_rel_sector_pct"])
+        quality = pick(["fcf_margin_pct", "gross_margin_stability", "net_debt_to_ebitda"])
+        if ratios or peers or quality:
+            p2 = {"ratios": ratios, "peer_comps": peers, "quality": quality}
+            row.update(ratios, **peers, **quality)
+    ss = {"score": rng.uniform(-1.2, 1.2), "signals": {"rsi": rng.uniform(-1, 1), "macd": rng.uniform(-1, 1)}}
+    ms = {"score": rng.uniform(-1.2, 1.2), "signals": {"sma": rng.uniform(-1, 1)}}
+    regime = rng.choice(["Bull", "Bear", "Range"])
+    risk = {"vol_annual_%": rng.uniform(10, 80), "VaR95_%": rng.uniform(-7, -1),
+            "max_drawdown_%": rng.uniform(-70, -5), "beta_60d": rng.uniform(-2, 2)}
+    p1 = {"short_sig": ss, "med_sig": ms, "regime": regime, "risk": risk}
+    row.update(short_score=ss["score"], med_score=ms["score"], regime=regime,
+               ct_rsi=ss["signals"]["rsi"], ct_macd=ss["signals"]["macd"], mt_sma=ms["signals"]["sma"],
+               vol_annual_pct=risk["vol_annual_%"], var95_pct=risk["VaR95_%"],
+               max_drawdown_pct=risk["max_drawdown_%"], beta_60d=risk["beta_60d"])
+    if rng.random() < 0.7:
+        summary = {"mean_sent_7d": rng.uniform(-1, 1), "mean_sent_30d": rng.uniform(-1, 1),
+                   "shock_score": rng.uniform(0, 3), "drift_score": rng.uniform(-0.3, 0.3)}
+        signals = rng.sample(["a", "b", "c"], rng.randint(0, 3))
+        flags = rng.sample(["x", "y"], rng.randint(0, 2))
+        p4 = {"summary": summary, "signals": signals, "aggregates": {"risk_flags": flags}}
+        row.update(summary, news_signals=signals, news_risk_flags=flags)
+    return pd.Series(row, name=f"T{i}"), dict(p1_payload=p1, p2_payload=p2, p4_view=p4)
+
+
+@pytest.mark.parametrize("macro", [MACRO, None])
+def test_fuse_batch_matches_run_fusion(phases, macro):
+    rng = random.Random(1)
+    cases = [_random_case(rng, i) for i in range(300)]
+    batch = F.fuse_batch(pd.DataFrame([row for row, _ in cases]), macro=macro)
+    for row, payloads in cases:
+        ref = F.run_fusion(row.name, p3_payload=macro, **payloads)
+        b = batch.loc[row.name]
+        assert b.total_score == pytest.approx(ref.total_score, abs=1e-9)
+        assert b.recommendation == ref.recommendation
+        assert list(b.drivers) == ref.drivers
+        assert list(b.risk_flags) == ref.risk_flags
+        for k, v in ref.pillar_scores.as_dict().items():
+            assert b[k] == pytest.approx(v, abs=1e-9)
+    assert batch["rank"].tolist() == list(range(1, len(cases) + 1))
+    assert batch["total_score"].is_monotonic_decreasing
+
+
+class _Regime:
+    def __init__(self, label, g, i, p, usd=None):
+        self.d = {"label": label, "growth_z": g, "inflation_z": i, "policy_z": p, "extra": {"USD": usd}}
+
+    def to_dict(self):
+        return dict(self.d)
+
+
+def test_macro_payload_from_known_regime_is_not_neutral(phases):
+    payload = F.macro_payload_from_regime(_Regime("Goldilocks", 1.2, -0.8, -0.2, usd=0.5))
+    assert payload["regime"]["zscore"] == pytest.approx(1.7)
+    assert set(payload["factor_tailwinds"]) == {"growth", "inflation", "rates", "usd"}
+    df = pd.DataFrame({"short_score": [0.1, -0.2]}, index=["AAA", "BBB"])
+    macro = F.fuse_batch(df, macro=payload)["macro"]
+    assert (macro != 50.0).all() and (macro > 55.0).all()
+    assert macro.tolist() == pytest.approx([F.fuse_macro(payload)[0]] * 2)
+
+
+@pytest.mark.parametrize("reg", [_Regime("Inconnu", np.nan, np.nan, np.nan),
+                                 _Regime("Transition", 0.3, np.nan, 0.1)])
+def test_macro_payload_unknown_regime_falls_back(reg):
+    assert F.macro_payload_from_regime(reg) is None
+    out = F.fuse_batch(pd.DataFrame({"short_score": [0.0]}, index=["AAA"]), macro=F.macro_payload_from_regime(reg))
+    assert out["macro"].iloc[0] == 55.0
+    assert "[MACRO] Fallback macro" in out["drivers"].iloc[0]
+
+
+def test_rank_universe_excludes_tickers_without_prices(monkeypatch):
+    idx = pd.bdate_range("2023-01-02", periods=300)
+    rng = np.random.default_rng(0)
+    closes = {t: 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, len(idx)))) for t in ("AAA", "BBB", "SPY")}
+
+    def fake_panel(tickers, start=None, **kw):
+        return pd.DataFrame({t: closes[t] for t in tickers if t in closes}, index=idx)
+
+    import analytics.price_panel as pp
+    monkeypatch.setattr(pp, "load_close_panel", fake_panel)
+    inputs = F.batch_price_inputs(["AAA", "ZZZ", "BBB"])
+    assert inputs["no_data"].tolist() == [False, True, False]
+
+    out = F.rank_universe(["AAA", "ZZZ", "BBB"], macro=None)
+    assert sorted(out.index) == ["AAA", "BBB"]
+    assert out.attrs["no_data"] == ["ZZZ"]
+    assert out["rank"].tolist() == [1, 2]
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import core.market_data as market_data
+from ingestion import finnews
+from research import sheets
+
+
+def _item(i: int, tickers, title: str) -> finnews.NewsItem:
+    return finnews.NewsItem(
+        id=str(i), source="https://example.com/rss", title=title, link=f"https://example.com/{i}",
+        published="2024-06-28T12:00:00Z", summary="", tickers=tickers,
+        importance=0.9, freshness=0.9, relevance=0.1,
+    )
+
+
+def _prices(ticker, start=None, interval="1d"):
+    idx = pd.bdate_range("2024-01-02", periods=120)
+    close = 100 + np.cumsum(np.random.default_rng(len(ticker)).normal(0, 1, len(idx)))
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": 1e6}, index=idx)
+
+
+def test_watchlist_shares_one_news_pass(tmp_path, monkeypatch):
+    calls = []
+    news = [_item(1, ["AAPL"], "Apple beats estimates"),
+            _item(2, [], "MSFT cloud revenue jumps"),
+            _item(3, [], "Oil slides on demand worries")]
+
+    def fake_pipeline(**kw):
+        calls.append(kw)
+        return news
+
+    monkeypatch.setattr(sheets, "SHEET_DIR", tmp_path)
+    monkeypatch.setattr(finnews, "run_pipeline", fake_pipeline)
+    monkeypatch.setattr(finnews, "search_cached", lambda **kw: None)
+    monkeypatch.setattr(market_data, "get_price_history", _prices)
+
+    written = sheets.materialize_watchlist(["AAPL", "MSFT", "NVDA"])
+    assert len(written) == 3
+    assert len(calls) == 1 and calls[0].get("tgt_ticker") is None
+
+    aapl, msft, nvda = (sheets.load_sheet(t) for t in ("AAPL", "MSFT", "NVDA"))
+    assert [n["title"] for n in aapl["news_top"]] == ["Apple beats estimates"]
+    assert [n["title"] for n in msft["news_top"]] == ["MSFT cloud revenue jumps"]
+    assert nvda["news_top"] == []
+    # importance * freshness + relevance (rescored with the ticker mapped) > 0.8
+    assert aapl["news_top"][0]["score"] > 0.8
+    assert any(a["type"] == "news_spike" for a in aapl["alerts"])
+
+
+def test_etag_tracks_volatile_fields():
+    sheet = {"version": "abc", "generated_at": "2024-06-28T10:00:00", "stale": False}
+    etag = sheets.sheet_etag(sheet, "v1")
+    assert sheets.etag_matches(etag, etag)
+    assert sheets.sheet_etag({**sheet, "stale": True}, "v1") != etag
+    assert sheets.sheet_etag({**sheet, "generated_at": "2024-06-28T11:00:00"}, "v1") != etag
+    assert sheets.sheet_etag(sheet, "src") != etag